@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Toplu Block Ekleme Benchmark'ı
+====================================
+
+N poliçe block'unu iki yolla geçici bir blok günlüğüne yükler:
+    - tek tek: her poliçe için `add_block` (yazar hattı üzerinden)
+    - partili: `add_blocks` (parti başına tek kilit ve tek günlük yazımı)
+
+Ardından --threads thread'den eşzamanlı, kalıcı (fsync'li) eklemeleri
+karşılaştırır:
+    - kilitli: her çağıran `add_blocks([data], save_to_disk=True)` (kendi fsync'i)
+    - yazar hattı: `add_block(data, save_to_disk=True)` (partiyle ortak fsync)
+
+Son olarak --snapshot-blocks uzunluğundaki zincirin periyodik anlık
+görüntüsü alınırken tek block'luk eklemelerin gecikmesini ölçer: görüntü sınırını geçen ekleme
+sadece durumu yakalar, serileştirme ve fsync arka planda yapılır.
+
+Sonunda zincirlerin tam denetimden geçtiği kontrol edilir.
+
+KULLANIM:
+    python benchmarks/bench_block_append.py
+    python benchmarks/bench_block_append.py --blocks 100000 --batch 10000
+    python benchmarks/bench_block_append.py --threads 32 --durable 4000
+    python benchmarks/bench_block_append.py --snapshot-blocks 500000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import blockchain_service  # noqa: E402
+from blockchain_service import BLOCK_BATCH_SIZE, Blockchain  # noqa: E402
+
+
+def make_policies(n: int):
+    return [{
+        'type': 'policy',
+        'policy_number': f'DASK-{i:08d}',
+        'customer_id': f'CUST{i % 100000:06d}',
+        'coverage_amount': 1_000_000,
+        'premium': 30_000,
+        'latitude': 39.0 + (i % 1000) / 1000,
+        'longitude': 28.0 + (i % 997) / 1000,
+    } for i in range(n)]
+
+
+def run(policies, batch: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = Blockchain(chain_file=str(Path(tmp) / 'single.dat'))
+        start = time.perf_counter()
+        for data in policies:
+            chain.add_block(data)
+        chain._save_chain()
+        single = time.perf_counter() - start
+        assert chain.is_valid(full_audit=True)
+
+        chain = Blockchain(chain_file=str(Path(tmp) / 'batch.dat'))
+        start = time.perf_counter()
+        for i in range(0, len(policies), batch):
+            chain.add_blocks(policies[i:i + batch])
+        chain._save_chain()
+        batched = time.perf_counter() - start
+        assert chain.is_valid(full_audit=True)
+
+    n = len(policies)
+    print(f"\n📊 {n:,} poliçe block'u")
+    print(f"   tek tek (add_block):      {single:>7.2f} s  {n / single:>10,.0f} block/s")
+    print(f"   partili (add_blocks {batch:,}): {batched:>7.2f} s  {n / batched:>10,.0f} block/s"
+          f"  ({single / batched:.1f}x)")
+
+
+def run_concurrent(policies, threads: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = Blockchain(chain_file=str(Path(tmp) / 'locked.dat'))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda data: chain.add_blocks([data], save_to_disk=True), policies))
+        locked = time.perf_counter() - start
+        assert chain.is_valid(full_audit=True)
+
+        chain = Blockchain(chain_file=str(Path(tmp) / 'writer.dat'))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda data: chain.add_block(data, save_to_disk=True), policies))
+        piped = time.perf_counter() - start
+        stats = chain.writer.stats
+        assert chain.is_valid(full_audit=True)
+
+    n = len(policies)
+    print(f"\n📊 {n:,} kalıcı block, {threads} thread")
+    print(f"   kilitli (çağıran başına fsync): {locked:>7.2f} s  {n / locked:>10,.0f} block/s")
+    print(f"   yazar hattı (group commit):     {piped:>7.2f} s  {n / piped:>10,.0f} block/s"
+          f"  ({locked / piped:.1f}x, {stats['durable_batches']:,} fsync)")
+
+
+def run_snapshot_boundary(policies, batch: int):
+    blockchain_service.SNAPSHOT_EVERY = 0  # yükleme sırasında görüntü yok
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = Blockchain(chain_file=str(Path(tmp) / 'snapshot.dat'))
+        for i in range(0, len(policies), batch):
+            chain.add_blocks(policies[i:i + batch])
+
+        # 100 block sonra ilk periyodik görüntü (tüm zincirin durumu)
+        blockchain_service.SNAPSHOT_EVERY = len(chain.chain) + 100
+        latencies, boundary = [], None
+        for data in policies[:1000]:
+            start = time.perf_counter()
+            chain.add_blocks([data])
+            latencies.append(time.perf_counter() - start)
+            if boundary is None and chain._snapshot_thread is not None:
+                boundary = len(latencies) - 1
+        start = time.perf_counter()
+        chain.wait_for_snapshot()
+        waited = time.perf_counter() - start
+        assert chain.header_index_file.exists()
+        assert chain.is_valid(full_audit=True)
+
+    ordinary = sorted(latencies[:boundary] + latencies[boundary + 1:])
+    print(f"\n📊 {len(policies):,} block'luk zincirde anlık görüntü sınırı (tek block'luk add_blocks)")
+    print(f"   sınırı geçen ekleme:   {latencies[boundary] * 1000:>8.2f} ms")
+    print(f"   diğer eklemeler (p50): {ordinary[len(ordinary) // 2] * 1000:>8.2f} ms"
+          f"  (p99 {ordinary[int(len(ordinary) * 0.99)] * 1000:.2f} ms, en kötü {ordinary[-1] * 1000:.2f} ms)")
+    print(f"   görüntünün bitmesi için kalan: {waited:.2f} s (arka planda)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Toplu block ekleme benchmark')
+    parser.add_argument('--blocks', type=int, default=100000)
+    parser.add_argument('--batch', type=int, default=BLOCK_BATCH_SIZE)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--durable', type=int, default=2000, help='eşzamanlı kalıcı block sayısı')
+    parser.add_argument('--snapshot-blocks', type=int, default=None,
+                        help='anlık görüntü sınırı ölçümünde zincir uzunluğu (varsayılan: --blocks)')
+    args = parser.parse_args()
+    run(make_policies(args.blocks), args.batch)
+    run_concurrent(make_policies(args.durable), args.threads)
+    run_snapshot_boundary(make_policies(args.snapshot_blocks or args.blocks), args.batch)
+
+
+if __name__ == '__main__':
+    main()
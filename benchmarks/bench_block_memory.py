@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Zincir Bellek Benchmark'ı
+===============================
+
+N poliçe block'luk bir günlüğü iki biçimde belleğe yükler ve tracemalloc
+ile ölçer:
+    - tam block listesi: her kayıt `Block.decode` ile (data + kanonik yük)
+    - ChainStore: sütunlu başlıklar; data günlükten istendiğinde okunur
+
+İkinci ölçümde ikincil indeksler de dahildir (Blockchain yüklemesi).
+
+KULLANIM:
+    python benchmarks/bench_block_memory.py
+    python benchmarks/bench_block_memory.py --blocks 1000000
+"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from blockchain_service import BLOCK_BATCH_SIZE, Block, Blockchain  # noqa: E402
+
+
+def make_policies(n: int):
+    return [{
+        'type': 'policy',
+        'policy_number': f'DASK-{i:08d}',
+        'customer_id': f'CUST{i % 100000:06d}',
+        'coverage_amount': 1_000_000,
+        'premium': 30_000,
+        'latitude': 39.0 + (i % 1000) / 1000,
+        'longitude': 28.0 + (i % 997) / 1000,
+    } for i in range(n)]
+
+
+def measure(load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zincir bellek benchmark')
+    parser.add_argument('--blocks', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chain_file = str(Path(tmp) / 'blockchain.dat')
+        chain = Blockchain(chain_file=chain_file)
+        policies = make_policies(args.blocks)
+        for i in range(0, len(policies), BLOCK_BATCH_SIZE):
+            chain.add_blocks(policies[i:i + BLOCK_BATCH_SIZE])
+        del chain, policies
+
+        blocks, full_bytes, full_seconds = measure(
+            lambda: [Block.decode(payload) for payload in Blockchain(chain_file=chain_file).log.read_all()])
+        n = len(blocks)
+        del blocks
+
+        chain, store_bytes, store_seconds = measure(lambda: Blockchain(chain_file=chain_file))
+        header_bytes = chain.chain.memory_bytes()
+        assert chain.is_valid(full_audit=True)
+
+    print(f"\n📊 {n:,} block")
+    print(f"   tam block listesi:       {full_bytes / 2**20:>8.1f} MB  {full_bytes / n:>6.0f} B/block"
+          f"  ({full_seconds:.2f} s)")
+    print(f"   ChainStore + indeksler:  {store_bytes / 2**20:>8.1f} MB  {store_bytes / n:>6.0f} B/block"
+          f"  ({store_seconds:.2f} s)")
+    print(f"   yalnız başlık sütunları: {header_bytes / 2**20:>8.1f} MB  {header_bytes / n:>6.0f} B/block")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Defter Dışa Aktarma Benchmark'ı
+=====================================
+
+N poliçe block'luk bir defterde eski dışa aktarmayı (tüm block'lar →
+DataFrame → geçici CSV) akışlı dışa aktarmayla (CSV / NDJSON parçaları)
+karşılaştırır: ilk parçaya kadar geçen süre, toplam süre ve en yüksek
+ek bellek (tracemalloc).
+
+KULLANIM:
+    python benchmarks/bench_chain_export.py
+    python benchmarks/bench_chain_export.py --blocks 500000 --old 0
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from blockchain_service import BLOCK_BATCH_SIZE, Blockchain  # noqa: E402
+from chain_export import export_chunks, export_positions  # noqa: E402
+
+
+def make_policies(n: int):
+    for i in range(n):
+        yield {
+            'type': 'policy',
+            'customer_id': f'CUST{i % 100000:06d}',
+            'policy_number': f'DP-2025-{i:08d}',
+            'coverage_amount': 250_000 + (i * 7919) % 2_000_000,
+            'premium': 1_500.0,
+            'latitude': 41.0 + (i % 100) / 1000,
+            'longitude': 29.0 + (i % 100) / 1000,
+        }
+
+
+def old_export(chain, path: Path):
+    records = [{
+        'block_index': block.index,
+        'timestamp': datetime.fromtimestamp(block.timestamp).isoformat(),
+        'type': 'policy',
+        'customer_id': block.data.get('customer_id', ''),
+        'coverage_amount': block.data.get('coverage_amount', 0),
+        'premium': block.data.get('premium', 0),
+        'latitude': block.data.get('latitude', 0),
+        'longitude': block.data.get('longitude', 0),
+        'hash': block.hash,
+    } for block in chain.get_blocks_by_type('policy')]
+    pd.DataFrame(records).to_csv(path, index=False, encoding='utf-8')
+    return path.stat().st_size
+
+
+def streamed_export(chain, export_format: str):
+    size = 0
+    first = None
+    start = time.perf_counter()
+    for chunk in export_chunks(chain, export_positions(chain, block_type='policy'), export_format):
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    return first, size
+
+
+def _measure(label: str, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    first, size = result if isinstance(result, tuple) else (elapsed, result)
+
+    # Bellek ayrı bir turda ölçülür (tracemalloc süreyi şişirir)
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"   {label:<22} ilk parça {first * 1000:>9.2f} ms   toplam {elapsed:>7.2f} s   "
+          f"{size / 1e6:>7.1f} MB   ek bellek (tepe) {peak / 1e6:>7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Defter dışa aktarma benchmark')
+    parser.add_argument('--blocks', type=int, default=200000)
+    parser.add_argument('--old', type=int, default=1, help='eski dışa aktarmayı da ölç (0 = atla)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = Blockchain(chain_file=str(Path(tmp) / 'blockchain.dat'))
+        policies = make_policies(args.blocks)
+        while True:
+            batch = [policy for _, policy in zip(range(BLOCK_BATCH_SIZE), policies)]
+            if not batch:
+                break
+            chain.add_blocks(batch)
+        print(f"\n📦 {len(chain.chain):,} block")
+
+        if args.old:
+            _measure('eski (DataFrame+CSV)', old_export, chain, Path(tmp) / 'export.csv')
+        _measure('akışlı CSV', streamed_export, chain, 'csv')
+        _measure('akışlı NDJSON', streamed_export, chain, 'ndjson')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Blockchain Sorgu Benchmark'ı
+==================================
+
+N poliçe block'luk bir defterde eski aramayı (her block'un yükünde alt dize
+araması) yapılandırılmış sorgu motoruyla (indeksler + plan) karşılaştırır.
+
+KULLANIM:
+    python benchmarks/bench_chain_query.py
+    python benchmarks/bench_chain_query.py --blocks 1000000 --old-scan 0
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from blockchain_service import BLOCK_BATCH_SIZE, Blockchain  # noqa: E402
+
+CITIES = ['İstanbul', 'İzmir', 'Ankara', 'Bursa', 'Antalya', 'Kocaeli', 'Hatay', 'Malatya']
+DISTRICTS = ['Kadıköy', 'Üsküdar', 'Bornova', 'Çankaya', 'Nilüfer', 'Merkez', 'Antakya', 'Battalgazi']
+
+
+def make_policies(n: int):
+    return [{
+        'type': 'policy',
+        'customer_id': f'CUST{i % 100000:06d}',
+        'policy_number': f'DP-2025-{i:08d}',
+        'coverage_tl': 250_000 + (i * 7919) % 2_000_000,
+        'premium_tl': 1_500.0,
+        'package_type': ['Temel', 'Standart', 'Premium'][i % 3],
+        'owner_name': f'Sahip {i % 5000}',
+        'city': CITIES[i % len(CITIES)],
+        'district': DISTRICTS[(i // 3) % len(DISTRICTS)],
+    } for i in range(n)]
+
+
+def old_search(chain, needle: str, limit: int):
+    results = []
+    for block in chain.chain:
+        if needle.lower() in block.payload.decode('utf-8').lower():
+            results.append(block.index)
+            if len(results) >= limit:
+                break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Blockchain sorgu benchmark')
+    parser.add_argument('--blocks', type=int, default=200000)
+    parser.add_argument('--old-scan', type=int, default=1, help='eski taramayı da ölç (0 = atla)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = Blockchain(chain_file=str(Path(tmp) / 'blockchain.dat'))
+        policies = make_policies(args.blocks)
+        start = time.perf_counter()
+        for i in range(0, len(policies), BLOCK_BATCH_SIZE):
+            chain.add_blocks(policies[i:i + BLOCK_BATCH_SIZE])
+        print(f"\n📦 {len(chain.chain):,} block ({time.perf_counter() - start:.1f} s)")
+
+        queries = [
+            {'customer_id': 'CUST000042'},
+            {'policy_number': 'DP-2025-00000777'},
+            {'query': 'CUST012345'},
+            {'text': 'kadıköy istanbul', 'type': 'policy'},
+            {'text': 'hatay', 'amount_min': 1_000_000, 'amount_max': 1_100_000},
+            {'amount_min': 2_240_000},
+            {'customer_id': 'CUST000042', 'amount_max': 500_000, 'text': 'premium'},
+        ]
+        for predicates in queries:
+            best = min(_timed(chain, predicates) for _ in range(5))
+            page = chain.query(predicates, limit=50)
+            print(f"   {str(predicates):<78} {best * 1000:>8.3f} ms  {len(page['positions']):>3} sonuç  "
+                  f"sürücü={page['plan']['driver']['source']} ({page['plan']['driver']['size']:,})")
+
+        if args.old_scan:
+            start = time.perf_counter()
+            found = old_search(chain, 'CUST012345', 50)
+            print(f"   eski tarama (yük alt dize, 'CUST012345'): {(time.perf_counter() - start) * 1000:>10.1f} ms"
+                  f"  {len(found)} sonuç")
+
+
+def _timed(chain, predicates):
+    start = time.perf_counter()
+    chain.query(predicates, limit=50)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Zincir Açılış Benchmark'ı
+===============================
+
+N block'luk bir defterin açılış (Blockchain() + is_valid()) süresini ölçer:
+    - yan dosya yok: tüm günlük kayıtları çözülür, indeksler yeniden kurulur
+    - yan dosya var: başlıklar/indeksler mmap ile okunur, kuyruk taranır
+Son ölçümde temiz kapanıştan sonra --tail block daha eklenmiş ve süreç
+kapanmadan sonlanmıştır (çökme sonrası kurtarma).
+
+KULLANIM:
+    python benchmarks/bench_chain_startup.py
+    python benchmarks/bench_chain_startup.py --blocks 1000000 --tail 5000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from blockchain_service import BLOCK_BATCH_SIZE, Blockchain  # noqa: E402
+
+
+def make_policies(start: int, n: int):
+    return [{
+        'type': 'policy',
+        'policy_number': f'DASK-{i:08d}',
+        'customer_id': f'CUST{i % 100000:06d}',
+        'coverage_amount': 1_000_000,
+        'premium': 30_000,
+    } for i in range(start, start + n)]
+
+
+def add(chain: Blockchain, policies):
+    for i in range(0, len(policies), BLOCK_BATCH_SIZE):
+        chain.add_blocks(policies[i:i + BLOCK_BATCH_SIZE])
+
+
+def open_chain(chain_file: str):
+    start = time.perf_counter()
+    chain = Blockchain(chain_file=chain_file)
+    assert chain.is_valid()
+    return chain, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zincir açılış benchmark')
+    parser.add_argument('--blocks', type=int, default=200000)
+    parser.add_argument('--tail', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chain_file = str(Path(tmp) / 'blockchain.dat')
+        chain = Blockchain(chain_file=chain_file)
+        add(chain, make_policies(0, args.blocks))
+        chain.is_valid()
+        chain._discard_header_index()  # periyodik anlık görüntüler de silinir
+        chain.log.close()  # yan dosya yazılmadan
+
+        chain, cold = open_chain(chain_file)
+        n = len(chain.chain)
+        chain.close()
+        chain, warm = open_chain(chain_file)
+        add(chain, make_policies(args.blocks, args.tail))
+        chain.log.close()
+        chain, tail = open_chain(chain_file)
+
+    print(f"\n📊 {n:,} block")
+    print(f"   yan dosya yok (tam tarama):   {cold:>7.2f} s")
+    print(f"   yan dosya var:                {warm:>7.2f} s  ({cold / warm:.1f}x)")
+    print(f"   yan dosya + {args.tail:,} block kuyruk: {tail:>7.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Zincir Doğrulama Benchmark'ı
+==================================
+
+Doğrulamanın (hash yeniden hesaplama + previous_hash bağları) seri ve
+segment bazlı paralel hızını blocks/s olarak raporlar: block'ta saklanan
+kanonik yük ile ve derin denetimdeki gibi yük data'dan yeniden üretilerek.
+Zincir bellekte kurulur; diske yazılmaz.
+
+KULLANIM:
+    python benchmarks/bench_chain_verify.py
+    python benchmarks/bench_chain_verify.py --blocks 2000000 --workers 1 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from blockchain_service import Block  # noqa: E402
+from chain_verifier import VERIFY_SEGMENT, verify_chain  # noqa: E402
+
+
+def make_chain(n: int):
+    chain = [Block(0, time.time(), {'type': 'genesis'}, '0')]
+    for i in range(1, n):
+        chain.append(Block(i, time.time(), {
+            'type': 'policy',
+            'policy_number': f'DASK-{i:08d}',
+            'customer_id': f'CUST{i % 100000:06d}',
+            'coverage_amount': 1_000_000,
+            'premium': 30_000,
+        }, chain[-1].hash))
+    return chain
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zincir doğrulama benchmark')
+    parser.add_argument('--blocks', type=int, default=500000)
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument('--segment', type=int, default=VERIFY_SEGMENT)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    chain = make_chain(args.blocks)
+    print(f"\n📦 {args.blocks:,} block kuruldu ({time.perf_counter() - start:.1f} s), "
+          f"{os.cpu_count()} CPU, segment {args.segment:,}")
+
+    for deep in (False, True):
+        mode = 'derin (yük data\'dan)' if deep else 'saklı yük'
+        for workers in args.workers:
+            failure, stats = verify_chain(chain, workers=workers, segment_size=args.segment, deep=deep)
+            assert failure is None, failure
+            print(f"   {mode:<22}{workers:>2} worker: {stats['seconds']:>7.2f} s  "
+                  f"{stats['blocks_per_second']:>10,} blocks/s  ({stats['segments']} segment)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Portföy Hash İndeks Benchmark'ı
+=====================================
+
+Boolean maske taraması (eski yöntem) ile PortfolioIndex sorgularını
+10K / 100K / 1M bina üzerinde karşılaştırır.
+
+KULLANIM:
+    python benchmarks/bench_portfolio_index.py
+    python benchmarks/bench_portfolio_index.py --sizes 10000 100000 --lookups 500
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from portfolio_index import PortfolioIndex  # noqa: E402
+
+
+def make_buildings(n: int, seed: int = 42) -> pd.DataFrame:
+    """buildings.csv şemasına benzeyen sentetik portföy (anahtar kolonlar + birkaç değer)"""
+    rng = np.random.default_rng(seed)
+    n_customers = max(1, int(n * 0.7))
+    ids = np.arange(n)
+    return pd.DataFrame({
+        'building_id': [f'BLD_{i:06d}' for i in ids],
+        'customer_id': [f'CUST{c:06d}' for c in rng.integers(0, n_customers, n)],
+        'policy_number': [f'DP-2025-{i:08d}' for i in ids],
+        'policy_status': rng.choice(['Aktif', 'Pasif'], n, p=[0.9, 0.1]),
+        'monthly_premium_tl': rng.uniform(50, 2000, n).round(2),
+        'risk_score': rng.uniform(0, 1, n).round(4),
+    })
+
+
+def _per_lookup_us(fn, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def run(n: int, lookups: int):
+    df = make_buildings(n)
+    rng = np.random.default_rng(7)
+    picks = rng.integers(0, n, lookups)
+    policy_keys = df['policy_number'].to_numpy()[picks]
+    building_keys = df['building_id'].to_numpy()[picks]
+    customer_keys = df['customer_id'].to_numpy()[picks]
+
+    start = time.perf_counter()
+    index = PortfolioIndex.build(df, None)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Maske taraması pahalı: büyük boyutlarda daha az örnekle ölç
+    scan_sample = max(5, min(lookups, 2_000_000 // n))
+
+    rows = [
+        ('policy_number',
+         _per_lookup_us(lambda k: df[df['policy_number'] == k].iloc[0], policy_keys[:scan_sample]),
+         _per_lookup_us(lambda k: df.iloc[index.policy_row(k)], policy_keys)),
+        ('building_id',
+         _per_lookup_us(lambda k: df[df['building_id'] == k].iloc[0], building_keys[:scan_sample]),
+         _per_lookup_us(lambda k: df.iloc[index.building_row(k)], building_keys)),
+        ('customer_id',
+         _per_lookup_us(lambda k: df[df['customer_id'] == k], customer_keys[:scan_sample]),
+         _per_lookup_us(lambda k: df.iloc[index.building_rows_for_customer(k)], customer_keys)),
+    ]
+
+    print(f"\n📊 {n:,} bina - indeks kurulumu: {build_ms:,.0f} ms")
+    print(f"   {'anahtar':<15}{'maske (µs)':>14}{'indeks (µs)':>14}{'hızlanma':>11}")
+    for key, scan_us, index_us in rows:
+        print(f"   {key:<15}{scan_us:>14,.1f}{index_us:>14,.1f}{scan_us / index_us:>10,.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Portföy hash indeks benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--lookups', type=int, default=2000)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args.lookups)
+
+
+if __name__ == '__main__':
+    main()
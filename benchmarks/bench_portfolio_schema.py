@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Bellek İçi Şema Benchmark'ı
+=================================
+
+buildings frame'inin bellek kullanımını (memory_usage(deep=True)) okuma
+şeması uygulanmadan önce ve sonra kolon bazında raporlar: az değerli metin
+kolonları category, küçük tamsayılar int32, tarih metinleri datetime64.
+
+KULLANIM:
+    python benchmarks/bench_portfolio_schema.py
+    python benchmarks/bench_portfolio_schema.py --sizes 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bench_portfolio_storage import make_buildings  # noqa: E402
+from portfolio_storage import typed_frame  # noqa: E402
+
+MB = 1024 ** 2
+
+
+def run(n: int, top: int):
+    raw = make_buildings(n)
+    start = time.perf_counter()
+    typed = typed_frame(raw, 'buildings')
+    elapsed = time.perf_counter() - start
+
+    before = raw.memory_usage(deep=True, index=False)
+    after = typed.memory_usage(deep=True, index=False)
+
+    print(f"\n📊 {n:,} bina - şema uygulama {elapsed:.3f} s")
+    print(f"   {'toplam':<22}{before.sum() / MB:>12,.1f} MB →{after.sum() / MB:>10,.1f} MB"
+          f"  ({after.sum() / before.sum():.0%})")
+    print(f"   {'kolon':<22}{'önce (MB)':>12}{'sonra (MB)':>12}  tip")
+    for col in (before - after).sort_values(ascending=False).index[:top]:
+        print(f"   {col:<22}{before[col] / MB:>12,.1f}{after[col] / MB:>12,.1f}  "
+              f"{raw[col].dtype} → {typed[col].dtype}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bellek içi şema (dtype) benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--top', type=int, default=12, help='Raporlanacak kolon sayısı')
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args.top)
+
+
+if __name__ == '__main__':
+    main()
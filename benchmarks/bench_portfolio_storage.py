@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Depolama Backend Benchmark'ı (CSV vs Parquet)
+===================================================
+
+buildings veri setini CSV ve Parquet olarak yazar, ardından her okumayı
+ayrı bir süreçte çalıştırarak soğuk başlangıç süresini ve yerleşik bellek
+(RSS) artışını ölçer. Kolon projeksiyonu da ayrıca ölçülür.
+
+KULLANIM:
+    python benchmarks/bench_portfolio_storage.py
+    python benchmarks/bench_portfolio_storage.py --sizes 100000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from portfolio_storage import CsvStorage, ParquetStorage  # noqa: E402
+
+PROJECTION = ['policy_number', 'customer_id', 'annual_premium_tl', 'policy_status']
+
+# Her okuma temiz bir süreçte: import maliyeti ölçüme girmez
+# (ru_maxrss üst süreçten miras kalır; bu yüzden /proc'tan VmRSS okunur)
+_READER = '''
+import gc, json, sys, time
+sys.path.insert(0, {src!r})
+import pandas as pd
+from portfolio_storage import CsvStorage, ParquetStorage
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+storage = {cls}({data_dir!r})
+columns = {columns!r}
+gc.collect()
+base = rss_mb()
+start = time.perf_counter()
+df = storage.read('buildings', columns=columns)
+elapsed = time.perf_counter() - start
+gc.collect()
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb() - base,
+                   'frame_mb': df.memory_usage(deep=True).sum() / 1024 ** 2}}))
+'''
+
+
+def make_buildings(n: int, seed: int = 42) -> pd.DataFrame:
+    """buildings.csv şemasındaki 36 kolonun tamamını içeren sentetik portföy"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n)
+    cities = np.array(['İstanbul', 'Ankara', 'İzmir', 'Bursa', 'Antalya', 'Kocaeli'])
+    districts = np.array(['Kadıköy', 'Çankaya', 'Karşıyaka', 'Nilüfer', 'Muratpaşa', 'İzmit'])
+    names = np.array(['Ali Yılmaz', 'Ayşe Kaya', 'Mehmet Demir', 'Fatma Şahin', 'Emre Çelik'])
+    year = rng.integers(1950, 2024, n)
+    premium = rng.uniform(500, 20000, n).round(2)
+    return pd.DataFrame({
+        'building_id': [f'BLD_{i:06d}' for i in ids],
+        'customer_id': [f'CUST{c:06d}' for c in rng.integers(0, int(n * 0.7) + 1, n)],
+        'owner_name': rng.choice(names, n),
+        'owner_email': [f'user{i}@email.com' for i in ids],
+        'owner_phone': [f'+90 5{i % 100:02d} {i % 1000:03d} {i % 100:02d} {i % 97:02d}' for i in ids],
+        'policy_number': [f'DP-2025-{i:08d}' for i in ids],
+        'city': rng.choice(cities, n),
+        'district': rng.choice(districts, n),
+        'neighborhood': rng.choice(['Moda', 'Kızılay', 'Bostanlı', 'Görükle'], n),
+        'complete_address': [f'Çınar Apartmanı, Kat: {i % 12}, Daire: {i % 30}, Atatürk Sokak No: {i % 200}'
+                             for i in ids],
+        'latitude': rng.uniform(36, 42, n), 'longitude': rng.uniform(26, 45, n),
+        'structure_type': rng.choice(['Betonarme', 'Yığma', 'Çelik', 'Ahşap'], n),
+        'construction_year': year, 'building_age': 2025 - year,
+        'floors': rng.integers(1, 20, n), 'apartment_count': rng.integers(1, 80, n),
+        'building_area_m2': rng.uniform(60, 5000, n), 'residents': rng.integers(1, 300, n),
+        'commercial_units': rng.integers(0, 5, n),
+        'soil_type': rng.choice(['ZA', 'ZB', 'ZC', 'ZD', 'ZE'], n),
+        'soil_amplification': rng.uniform(0.8, 2.0, n), 'liquefaction_risk': rng.uniform(0, 1, n),
+        'distance_to_fault_km': rng.uniform(0, 200, n),
+        'nearest_fault': rng.choice(['Kuzey Anadolu Fay Hattı', 'Doğu Anadolu Fay Hattı'], n),
+        'quality_score': rng.uniform(1, 10, n), 'risk_score': rng.uniform(0, 1, n),
+        'package_type': rng.choice(['Temel', 'Standart', 'Premium'], n),
+        'max_coverage': rng.choice([250000, 500000, 1000000], n),
+        'insurance_value_tl': rng.integers(500000, 20000000, n),
+        'annual_premium_tl': premium, 'monthly_premium_tl': (premium / 12).round(2),
+        'policy_status': rng.choice(['Aktif', 'Pasif'], n, p=[0.9, 0.1]),
+        'policy_start_date': '2025-01-01', 'policy_end_date': '2026-01-01',
+        'created_at': '2025-01-01 12:00:00',
+    })
+
+
+def _measure(cls: str, data_dir: str, columns=None) -> dict:
+    code = _READER.format(src=str(SRC_DIR), cls=cls, data_dir=data_dir, columns=columns)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(n: int):
+    with tempfile.TemporaryDirectory() as data_dir:
+        df = make_buildings(n)
+        CsvStorage(data_dir).write('buildings', df)
+        parquet = ParquetStorage(data_dir)
+        parquet.write('buildings', df)
+        del df
+
+        csv_mb = CsvStorage(data_dir).path('buildings').stat().st_size / 1024 ** 2
+        parquet_mb = parquet.path('buildings').stat().st_size / 1024 ** 2
+
+        print(f"\n📊 {n:,} bina - dosya: CSV {csv_mb:,.1f} MB, Parquet {parquet_mb:,.1f} MB")
+        print(f"   {'okuma':<28}{'süre (s)':>10}{'RSS artışı (MB)':>16}{'frame (MB)':>13}")
+        rows = [
+            ('CSV (tüm kolonlar)', _measure('CsvStorage', data_dir)),
+            ('Parquet (tüm kolonlar)', _measure('ParquetStorage', data_dir)),
+            (f'CSV ({len(PROJECTION)} kolon)', _measure('CsvStorage', data_dir, PROJECTION)),
+            (f'Parquet ({len(PROJECTION)} kolon)', _measure('ParquetStorage', data_dir, PROJECTION)),
+        ]
+        for label, result in rows:
+            print(f"   {label:<28}{result['seconds']:>10.3f}{result['rss_mb']:>16,.1f}"
+                  f"{result['frame_mb']:>13,.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV / Parquet depolama benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Trigram Arama Benchmark'ı
+===============================
+
+Eski `str.lower().str.contains()` taraması ile SearchIndex sorgularını
+10K / 100K / 1M bina üzerinde karşılaştırır.
+
+KULLANIM:
+    python benchmarks/bench_search_index.py
+    python benchmarks/bench_search_index.py --sizes 10000 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from bench_portfolio_storage import make_buildings  # noqa: E402
+from portfolio_store import POLICY_SEARCH_FIELDS  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+QUERIES = ['DP-2025-00000042', 'yılmaz', 'ayşe kaya', 'no: 147', 'daire: 17', 'ay']
+
+
+def _scan(df, query):
+    q = query.lower()
+    return df[
+        df['policy_number'].str.lower().str.contains(q, na=False, regex=False) |
+        df['owner_name'].str.lower().str.contains(q, na=False, regex=False) |
+        df['complete_address'].str.lower().str.contains(q, na=False, regex=False)
+    ]
+
+
+def _ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(n: int):
+    df = make_buildings(n)
+
+    start = time.perf_counter()
+    index = SearchIndex.build(df, 'policy_number', POLICY_SEARCH_FIELDS)
+    build_s = time.perf_counter() - start
+
+    scan_repeat = max(1, 200_000 // n)
+    print(f"\n📊 {n:,} bina - indeks kurulumu: {build_s:,.2f} s, "
+          f"{len(index.base.postings):,} posting")
+    print(f"   {'sorgu':<20}{'tarama (ms)':>13}{'indeks (ms)':>13}{'eşleşme':>10}")
+    for query in QUERIES:
+        scan_ms = _ms(lambda: _scan(df, query), scan_repeat)
+        index_ms = _ms(lambda: index.search(query), 20)
+        print(f"   {query:<20}{scan_ms:>13,.2f}{index_ms:>13,.2f}{index.search(query).total:>10,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trigram arama benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n)
+
+
+if __name__ == '__main__':
+    main()
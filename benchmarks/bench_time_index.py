@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Zaman İndeksi Benchmark'ı
+===============================
+
+N block'u `--days` güne yayılmış bir defterde eski zaman çizelgesi
+yaklaşımlarını (zinciri geriye yürüyerek pencere bulma, her block'un
+zamanından histogram) zaman indeksiyle (ikili arama, saatlik sayaçlar)
+karşılaştırır.
+
+KULLANIM:
+    python benchmarks/bench_time_index.py
+    python benchmarks/bench_time_index.py --blocks 1000000 --days 365
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import blockchain_service  # noqa: E402
+from blockchain_service import Blockchain  # noqa: E402
+
+# Bir partinin block'ları aynı zamanı alır; küçük partiler zamanı yayar
+BATCH = 500
+
+
+def old_window(chain, start: float, end: float) -> int:
+    """Eski yol: en yeniden geriye, pencere başlangıcından eskiye inene kadar"""
+    count = 0
+    for position in range(len(chain.chain) - 1, -1, -1):
+        timestamp = chain.chain.timestamp(position)
+        if timestamp < start:
+            break
+        if timestamp <= end:
+            count += 1
+    return count
+
+
+def old_histogram(chain, start: float, end: float) -> dict:
+    """Eski yol: her block'un zamanından saatlik kova"""
+    counts = {}
+    for position in range(len(chain.chain)):
+        timestamp = chain.chain.timestamp(position)
+        if start <= timestamp <= end:
+            label = datetime.fromtimestamp(timestamp).replace(minute=0, second=0, microsecond=0).isoformat()
+            counts[label] = counts.get(label, 0) + 1
+    return counts
+
+
+def _best(fn, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zaman indeksi benchmark')
+    parser.add_argument('--blocks', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    now = time.time()
+    clock = [now - args.days * 86400]
+    step = args.days * 86400 * BATCH / args.blocks
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock[0], tz)
+
+    blockchain_service.datetime = Clock
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = Blockchain(chain_file=str(Path(tmp) / 'blockchain.dat'))
+        start = time.perf_counter()
+        for i in range(0, args.blocks, BATCH):
+            chain.add_blocks({'type': 'policy' if j % 4 else 'customer_login', 'policy_id': j}
+                             for j in range(i, min(i + BATCH, args.blocks)))
+            clock[0] += step
+        print(f"\n📦 {len(chain.chain):,} block, {args.days} gün ({time.perf_counter() - start:.1f} s)")
+
+        windows = [('son 6 saat', now - 6 * 3600, now), ('son 24 saat', now - 86400, now),
+                   ('ilk gün', now - args.days * 86400, now - (args.days - 1) * 86400)]
+        for name, low, high in windows:
+            new = _best(lambda: len(chain.positions_between(low, high)))
+            old = _best(lambda: old_window(chain, low, high), repeat=1)
+            print(f"   pencere {name:<12} {len(chain.positions_between(low, high)):>9,} block  "
+                  f"indeks {new * 1000:>8.3f} ms   eski yürüme {old * 1000:>9.1f} ms")
+
+        for name, low, bucket in [('24 saat / saatlik', now - 86400, 'hour'),
+                                  (f'{args.days} gün / günlük', now - args.days * 86400, 'day')]:
+            new = _best(lambda: chain.activity(low, now, bucket))
+            print(f"   histogram {name:<20} sayaç {new * 1000:>8.3f} ms")
+        old = _best(lambda: old_histogram(chain, now - 86400, now), repeat=1)
+        print(f"   eski histogram (her block'un zamanı, 24 saat): {old * 1000:>9.1f} ms")
+        chain.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -26,7 +26,7 @@ sys.path.insert(0, str(src_path))
 
 # Flask app'i başlat
 if __name__ == '__main__':
-    from app import app, initialize_backend
+    from app import app, initialize_backend, shutdown_backend
     
     # ASCII Art Banner
     print("="*80)
@@ -73,6 +73,7 @@ if __name__ == '__main__':
         print("                           SERVER KAPATILIYOR...                            ")
         print("")
     finally:
+        shutdown_backend()
         print()
         print(" DASK+ Backend başarıyla kapatıldı.")
         print()
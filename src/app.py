@@ -6,7 +6,7 @@ Tüm mevcut pricing_only.py, main.py ve data_generator.py özellikleri
 UI-Latest ile entegre edilmiş Flask backend
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -60,7 +60,18 @@ from trigger import (
 
 #  BLOCKCHAIN ENTEGRASYONU 
 from blockchain_manager import BlockchainManager, SmartBlockchainFilter
-from blockchain_service import BlockchainService
+from block_log import LedgerStateError
+from blockchain_service import BLOCK_BATCH_SIZE, BlockchainService
+from payout_projection import (PayoutApprovalRejected, REJECT_ALREADY_APPROVED, REJECT_EXECUTED,
+                               REJECT_NOT_FOUND)
+from chain_export import (EXPORT_FORMATS, ExportAborted, export_chunks, export_positions,
+                          parse_export_args)
+from chain_query import key_substring_positions, merge_positions, parse_timestamp
+
+# Portföy deposu (buildings/customers tek sefer yüklenir, tüm route'lar paylaşır)
+from portfolio_store import get_portfolio_store
+from pagination import (InvalidCursor, decode_cursor, encode_cursor, keyset_window,
+                        ranked_order, ranked_window)
 
 # Dinamik Rapor Üretici
 try:
@@ -103,10 +114,28 @@ kandilli_service = None
 blockchain_manager = None
 blockchain_service = None  # Yeni: Blockchain Service (Immutable, Hash-Chained)
 
-# Cache değişkenleri
-customers_cache = None
-customers_cache_timestamp = None
-CACHE_DURATION = 300  # 5 dakika cache süresi
+# Portföy deposu (süreç genelinde tek örnek)
+portfolio_store = get_portfolio_store(str(DATA_DIR))
+
+
+# İstek başına tek portföy versiyonu: route içindeki tüm snapshot() çağrıları
+# ilk çağrıda sabitlenen versiyonu görür; versiyon yanıt başlığında döner
+@app.before_request
+def pin_portfolio_version():
+    portfolio_store.begin_read()
+
+
+@app.after_request
+def report_portfolio_version(response):
+    version = portfolio_store.pinned_version()
+    if version is not None:
+        response.headers['X-Portfolio-Version'] = str(version)
+    return response
+
+
+@app.teardown_request
+def release_portfolio_version(exc):
+    portfolio_store.end_read()
 
 # ============================================================================
 # KANDILLI EARTHQUAKE SERVICE (backend/app.py'den entegre)
@@ -353,12 +382,11 @@ def load_policies_to_blockchain_service():
     
     try:
         # Buildings verilerini yükle
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        if not portfolio_store.storage.exists('buildings'):
             logger.warning("⚠️ buildings.csv bulunamadı, poliçe yükleme atlanıyor")
             return
         
-        buildings_df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+        buildings_df = portfolio_store.snapshot().buildings
         
         # Aktif poliçeleri filtrele
         active_buildings = buildings_df[buildings_df['policy_status'] == 'Aktif'].copy()
@@ -375,12 +403,8 @@ def load_policies_to_blockchain_service():
             return
         
         # ✨ MEVCUT BLOCKCHAIN'DEKİ POLİÇE NUMARALARINI AL ✨
-        existing_policy_numbers = set()
-        for block in blockchain_service.blockchain.chain:
-            if block.data.get('type') == 'policy':
-                policy_num = block.data.get('policy_number')
-                if policy_num:
-                    existing_policy_numbers.add(policy_num)
+        # (poliçe indeksinin anahtarları; block verisi günlükten okunmaz)
+        existing_policy_numbers = set(blockchain_service.blockchain.index_keys('policy'))
         
         logger.info(f"📦 Blockchain'de mevcut {len(existing_policy_numbers):,} poliçe var")
         
@@ -441,19 +465,22 @@ def load_policies_to_blockchain_service():
         logger.info(f"📤 {len(all_policy_data):,} poliçe blockchain'e kaydediliyor (memory)...")
         
         from tqdm import tqdm
-        for policy_data in tqdm(
-            all_policy_data,
+        with tqdm(
+            total=len(all_policy_data),
             desc="💾 Blockchain Memory Kayıt",
             unit="block",
             bar_format='{l_bar}{bar:40}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
             colour='green',
             ncols=100
-        ):
-            try:
-                # save_to_disk=False ile sadece memory'de tut
-                blockchain_service.blockchain.add_block(policy_data, save_to_disk=False)
-            except Exception as e:
-                logger.error(f"Block ekleme hatası: {e}")
+        ) as progress:
+            # Parti başına tek kilit, tek günlük yazımı (add_blocks)
+            for i in range(0, len(all_policy_data), BLOCK_BATCH_SIZE):
+                batch = all_policy_data[i:i + BLOCK_BATCH_SIZE]
+                try:
+                    blockchain_service.blockchain.add_blocks(batch, save_to_disk=False)
+                except Exception as e:
+                    logger.error(f"Block ekleme hatası: {e}")
+                progress.update(len(batch))
         
         print()  # Progress bar'dan sonra yeni satır
         
@@ -467,8 +494,9 @@ def load_policies_to_blockchain_service():
         import time
         start_time = time.time()
         blockchain_service.blockchain._save_chain()
+        blockchain_service.blockchain.save_header_index()  # sonraki açılış günlüğü baştan çözmesin
         save_duration = time.time() - start_time
-        logger.info(f"✅ Blockchain kaydedildi: {blockchain_service.blockchain.chain_file} ({save_duration:.2f} saniye)")
+        logger.info(f"✅ Blockchain kaydedildi: {blockchain_service.blockchain.log.directory} ({save_duration:.2f} saniye)")
         
     except Exception as e:
         logger.error(f"❌ BlockchainService poliçe yükleme hatası: {e}")
@@ -481,92 +509,69 @@ def recalculate_all_premiums_with_ai(buildings_df, pricing_system):
     Tüm binaların primlerini AI modeli ile yeniden hesapla ve güncelle
     """
     try:
-        from tqdm import tqdm
-        
         # Feature extraction
         features_df = pricing_system.pricing_model.prepare_features(buildings_df)
         
         # Model prediction ile risk skorları güncelle
         predicted_risks = pricing_system.pricing_model.predict_risk(features_df)
         
-        # Her bina için AI ile prim hesapla
-        updated_premiums = []
-        
-        for idx, row in tqdm(features_df.iterrows(), 
-                            total=len(features_df), 
-                            desc="💵 AI Fiyatlandırma",
-                            unit="bina",
-                            bar_format='{l_bar}{bar:40}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]',
-                            colour='green',
-                            ncols=100):
-            
-            # AI model ile dinamik prim hesapla
-            package_type = row['package_type']
-            base_coverage = {
-                'Temel': 250_000,
-                'Standart': 750_000,
-                'Premium': 1_500_000
-            }.get(package_type, 250_000)
-            
-            # AI risk skoru
-            ai_risk = predicted_risks[idx]
-            
-            # Base rate TÜM PAKETLER İÇİN AYNI (%1.0)
-            base_rate = 0.0100
-            
-            # AI risk multiplier - PAKET BAZLI ARALIKLAR
-            # Temel: 1.5-3.0x, Standart: 0.75-2.5x, Premium: 0.75-2.0x
-            if package_type == 'Temel':
-                # Temel paket: 1.5 - 3.0x (daha yüksek primler)
-                risk_multiplier = 1.5 + (ai_risk * 1.5)  # 1.5-3.0 aralığı
-                risk_multiplier = min(max(risk_multiplier, 1.5), 3.0)
-            elif package_type == 'Standart':
-                # Standart paket: 0.75 - 2.5x (orta)
-                risk_multiplier = 0.75 + (ai_risk * 1.75)  # 0.75-2.5 aralığı
-                risk_multiplier = min(max(risk_multiplier, 0.75), 2.5)
-            else:  # Premium
-                # Premium paket: 0.75 - 2.0x (en düşük primler)
-                risk_multiplier = 0.75 + (ai_risk * 1.25)  # 0.75-2.0 aralığı
-                risk_multiplier = min(max(risk_multiplier, 0.75), 2.0)
-            
-            # Final prim hesaplama
-            annual_premium = base_coverage * base_rate * risk_multiplier
-            monthly_premium = annual_premium / 12
-            
-            updated_premiums.append({
-                'index': idx,
-                'annual_premium_tl': round(annual_premium, 2),
-                'monthly_premium_tl': round(monthly_premium, 2),
-                'ai_risk_score': round(ai_risk, 4)
-            })
-        
-        print()  # Progress bar'dan sonra yeni satır
-        
-        # buildings.csv'yi güncelle
-        buildings_file = DATA_DIR / 'buildings.csv'
-        original_df = pd.read_csv(buildings_file, encoding='utf-8-sig')
-        
-        # Güncellemeleri uygula
-        for update in updated_premiums:
-            idx = update['index']
-            if idx < len(original_df):
-                original_df.at[idx, 'annual_premium_tl'] = update['annual_premium_tl']
-                original_df.at[idx, 'monthly_premium_tl'] = update['monthly_premium_tl']
-                # AI risk skorunu da kaydet (opsiyonel)
-                if 'ai_risk_score' not in original_df.columns:
-                    original_df['ai_risk_score'] = 0.0
-                original_df.at[idx, 'ai_risk_score'] = update['ai_risk_score']
+        # AI model ile dinamik prim hesapla (vektörel - satır döngüsü yok)
+        positions = features_df.index.to_numpy()
+        package_type = features_df['package_type']
+        base_coverage = package_type.map({
+            'Temel': 250_000,
+            'Standart': 750_000,
+            'Premium': 1_500_000
+        }).fillna(250_000).to_numpy()
+        
+        # AI risk skoru
+        ai_risk = np.asarray(predicted_risks, dtype=float)[positions]
+        
+        # Base rate TÜM PAKETLER İÇİN AYNI (%1.0)
+        base_rate = 0.0100
+        
+        # AI risk multiplier - PAKET BAZLI ARALIKLAR
+        # Temel: 1.5-3.0x (daha yüksek primler), Standart: 0.75-2.5x (orta),
+        # Premium: 0.75-2.0x (en düşük primler)
+        risk_multiplier = np.select(
+            [package_type == 'Temel', package_type == 'Standart'],
+            [np.clip(1.5 + ai_risk * 1.5, 1.5, 3.0),
+             np.clip(0.75 + ai_risk * 1.75, 0.75, 2.5)],
+            default=np.clip(0.75 + ai_risk * 1.25, 0.75, 2.0)
+        )
         
-        # Güncellenmiş CSV'yi kaydet
-        original_df.to_csv(buildings_file, index=False, encoding='utf-8-sig')
+        # Final prim hesaplama
+        annual_premium = base_coverage * base_rate * risk_multiplier
+        monthly_premium = annual_premium / 12
+        
+        # Sonuçlar poliçe numarasıyla eşlenir: hesaplama sürerken yayınlanan
+        # bir versiyon (ör. poliçe silme) satır pozisyonlarını kaydırmış olabilir
+        policy_numbers = buildings_df['policy_number'].to_numpy()[positions]
+        
+        def apply_premiums(snapshot):
+            # En güncel versiyonun kopyası üzerinde, yazma kilidi altında
+            updated_df = snapshot.buildings.copy()
+            rows = snapshot.index.policy_positions(policy_numbers)
+            found = rows >= 0
+            rows = rows[found]
+            if len(rows):
+                if 'ai_risk_score' not in updated_df.columns:
+                    updated_df['ai_risk_score'] = 0.0
+                updated_df.loc[rows, 'annual_premium_tl'] = np.round(annual_premium[found], 2)
+                updated_df.loc[rows, 'monthly_premium_tl'] = np.round(monthly_premium[found], 2)
+                updated_df.loc[rows, 'ai_risk_score'] = np.round(ai_risk[found], 4)
+            return updated_df
+        
+        # Sadece değişen satır/kolonlar yazılır (SQLite UPDATE / mutasyon günlüğü), indeks korunur
+        original_df = portfolio_store.update_buildings(apply_premiums, keys_changed=False).buildings
         
         avg_premium = original_df['annual_premium_tl'].mean()
         total_premium = original_df['annual_premium_tl'].sum()
         
-        print(f"✅ AI ile {len(updated_premiums)} bina fiyatlandırıldı")
+        print(f"✅ AI ile {len(positions)} bina fiyatlandırıldı")
         print(f"   💵 Ortalama yıllık prim: {avg_premium:,.2f} TL")
         print(f"   💰 Toplam yıllık prim: {total_premium:,.2f} TL")
-        print(f"   📊 buildings.csv güncellendi")
+        print(f"   📊 Bina veri seti güncellendi")
         
     except Exception as e:
         print(f"⚠️ AI fiyatlandırma hatası: {e}")
@@ -588,12 +593,11 @@ def create_sample_payout_requests():
     
     try:
         # Buildings verilerini yükle
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        if not portfolio_store.storage.exists('buildings'):
             logger.warning("⚠️ buildings.csv bulunamadı, örnek ödeme emirleri atlanıyor")
             return
         
-        buildings_df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+        buildings_df = portfolio_store.snapshot().buildings
         
         # Aktif ve yüksek kapsamlı poliçeleri filtrele
         eligible_policies = buildings_df[
@@ -606,12 +610,12 @@ def create_sample_payout_requests():
             return
         
         # Mevcut ödeme emirlerini kontrol et (duplicate önleme)
+        chain = blockchain_service.blockchain
         existing_requests = set()
-        for block in blockchain_service.blockchain.chain:
-            if block.data.get('type') == 'payout_request':
-                policy_id = block.data.get('policy_id')
-                if policy_id:
-                    existing_requests.add(policy_id)
+        for position in chain.positions_by_type('payout_request'):
+            policy_id = chain.chain[position].data.get('policy_id')
+            if policy_id:
+                existing_requests.add(policy_id)
         
         # İlk 4 poliçeyi seç (henüz ödeme emri olmayanlardan)
         sample_policies = []
@@ -694,19 +698,21 @@ def initialize_backend():
         data_dir.mkdir(parents=True, exist_ok=True)
         
         # Veri dosyalarını kontrol et
-        buildings_file = data_dir / 'buildings.csv'
-        customers_file = data_dir / 'customers.csv'
         earthquakes_file = data_dir / 'earthquakes.csv'
         
-        # Eğer buildings.csv yoksa oluştur
-        if not buildings_file.exists():
+        # Bina verisi yoksa oluştur (depolama backend'ine yazılır; CSV dışa aktarma hedefidir)
+        if not portfolio_store.storage.exists('buildings'):
             print("\n📊 Bina ve müşteri verisi oluşturuluyor...")
             generator = RealisticDataGenerator()
             buildings_df, customers_df = generator.generate_buildings(n_buildings=10000)
-            buildings_df.to_csv(buildings_file, index=False, encoding='utf-8-sig')
-            customers_df.to_csv(customers_file, index=False, encoding='utf-8-sig')
+            portfolio_store.storage.write('buildings', buildings_df)
+            portfolio_store.storage.write('customers', customers_df)
+            portfolio_store.invalidate()
             print(f"✅ {len(buildings_df)} bina ve {len(customers_df)} müşteri verisi oluşturuldu")
         
+        # Mutasyon günlüğü sıkıştırıcısı (sadece CSV/Parquet backend'lerinde çalışır)
+        portfolio_store.start_compactor()
+        
         # Sistemleri başlat
         print("\n🚀 Sistemler başlatılıyor...")
         
@@ -736,8 +742,8 @@ def initialize_backend():
             print("⏱️ Bu işlem 2-5 dakika sürebilir (ilk başlatmada bir kez)...")
             
             try:
-                # Veriyi yükle
-                buildings_df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+                # Veriyi yükle (paylaşılan snapshot'ın kopyası)
+                buildings_df = portfolio_store.snapshot().buildings.copy()
                 
                 # Feature extraction (prepare_features kullan)
                 features_df = pricing_system.pricing_model.prepare_features(buildings_df)
@@ -796,11 +802,39 @@ def initialize_backend():
         print("✅ BACKEND BAŞLATILDI!")
         print("="*80 + "\n")
         
+    except LedgerStateError:
+        # Defter okunamıyor: boş chain ile sunucu açılmaz, segmentler incelenmeli
+        print("❌ Blockchain defteri yüklenemedi, backend başlatılmıyor")
+        raise
     except Exception as e:
         print(f"❌ Backend başlatma hatası: {e}")
         import traceback
         traceback.print_exc()
 
+
+def shutdown_backend():
+    """
+    Backend'i temiz kapat
+    
+    Block yazar kuyruğu boşaltılır, zincir kuyruğu doğrulanır, checkpoint ve
+    başlık/indeks yan dosyası yazılır; sonraki açılış sadece bundan sonra
+    eklenen block'ları tarar.
+    """
+    if blockchain_service is None:
+        return
+    try:
+        blockchain_service.blockchain.close()
+        print("💾 Blockchain kapatıldı (checkpoint + yan dosya yazıldı)")
+    except Exception as e:
+        print(f"⚠️ Blockchain kapatma hatası: {e}")
+
+
+def _log_login_block_error(future):
+    """Kuyruğa bırakılan giriş kaydı yazılamadıysa logla (yazar thread'inde çağrılır)"""
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Blockchain login kayıt hatası: {error}")
+
 # ============================================================================
 # ROUTES - HTML PAGES
 # ============================================================================
@@ -1190,15 +1224,55 @@ def simulate_trigger():
 # API ROUTES - ADMIN DASHBOARD (Removed - Using customer dashboard instead)
 # ============================================================================
 
+def _date_text(value, fmt: str = '%Y-%m-%d') -> str:
+    """Bellek içi tarih değerini (datetime64 / Timestamp) API metnine çevir"""
+    if value is None or pd.isna(value):
+        return ''
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.strftime(fmt)
+    return str(value)
+
+
+def _policy_list_item(row) -> dict:
+    """Bina satırını /api/policies liste öğesine çevir"""
+    return {
+        'no': str(row['policy_number']),
+        'musteri': str(row['owner_name']),
+        'email': str(row['owner_email']),
+        'tel': str(row['owner_phone']),
+        'adres': f"{row['city']}/{row['district']}",
+        'tam_adres': str(row['complete_address']),
+        'teminat': f"{int(row['max_coverage']):,} TL",
+        'prim': int(row['monthly_premium_tl']),
+        'baslangic': _date_text(row['policy_start_date']),
+        'bitis': _date_text(row['policy_end_date']),
+        'durum': str(row['policy_status']),
+        'paket': str(row['package_type']),
+        'risk_skoru': round(float(row['risk_score']), 4),
+        'building_id': str(row['building_id'])
+    }
+
+
 @app.route('/api/policies', methods=['GET'])
 def get_policies():
-    """Poliçe listesini getir - buildings.csv'den (pagination + filter destekli)"""
+    """
+    Poliçe listesini getir - buildings.csv'den (pagination + filter destekli)
+
+    İki sayfalama modu:
+        ?page=3&per_page=20         → sayfa numarası (total_pages ile)
+        ?cursor=&per_page=20        → keyset: policy_number sıralı, yanıtta
+                                      next_cursor; sonraki sayfa için geri gönderilir
+    Aramada sıra alaka skoru (azalan), eşitlikte policy_number'dır; cursor
+    son kaydın (skor, policy_number) çiftini taşır, araya eklenen/silinen
+    poliçeler sayfaları kaydırmaz.
+    """
     try:
         # Query parametreleri
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         search = request.args.get('search', '', type=str)
         status_filter = request.args.get('status', 'all', type=str)
+        cursor = request.args.get('cursor')
         
         # per_page değeri sınırla
         if per_page not in [10, 20, 50, 100]:
@@ -1206,58 +1280,84 @@ def get_policies():
         if page < 1:
             page = 1
         
-        buildings_file = DATA_DIR / 'buildings.csv'
+        snapshot = portfolio_store.snapshot()
+        df = snapshot.buildings
         
-        if not buildings_file.exists():
+        if df is None:
             return jsonify({
                 'success': False,
                 'message': 'Poliçe verisi bulunamadı'
             }), 404
         
-        # CSV'yi oku
-        df = pd.read_csv(str(buildings_file), encoding='utf-8-sig')
+        status = None if status_filter == 'all' else status_filter
         
-        # Arama filtresi (poliçe no, müşteri adı, adres)
+        # Keyset modu (arama yok): sıralı indeksten tek sayfa - O(log n + sayfa)
+        if cursor is not None and not search:
+            after = decode_cursor(cursor)
+            if after is not None and not isinstance(after, str):
+                raise InvalidCursor(f'Geçersiz cursor: {cursor}')
+            keys, rows = snapshot.sorted_policies(status)
+            start, stop = keyset_window(keys, after, per_page)
+            
+            return jsonify({
+                'success': True,
+                'data': [_policy_list_item(row) for _, row in df.iloc[rows[start:stop]].iterrows()],
+                'total': len(keys),
+                'per_page': per_page,
+                'next_cursor': encode_cursor(keys[stop - 1]) if stop < len(keys) else None,
+                'has_next': stop < len(keys)
+            })
+        
+        # Arama filtresi (poliçe no, müşteri adı, adres) - trigram indeks, sıralı
+        scores = None
         if search:
-            search_lower = search.lower()
-            df = df[
-                df['policy_number'].str.lower().str.contains(search_lower, na=False) |
-                df['owner_name'].str.lower().str.contains(search_lower, na=False) |
-                df['complete_address'].str.lower().str.contains(search_lower, na=False)
-            ]
+            result = snapshot.policy_search.search(search)
+            positions = snapshot.index.policy_positions(result.keys)
+            found = positions >= 0
+            positions = positions[found]
+            scores = np.asarray(result.scores, dtype=float)[found]
+        else:
+            positions = np.arange(len(df))
         
         # Durum filtresi
-        if status_filter != 'all':
-            df = df[df['policy_status'] == status_filter]
-        
-        total_policies = len(df)
+        if status is not None:
+            keep = df['policy_status'].to_numpy()[positions] == status
+            positions = positions[keep]
+            if scores is not None:
+                scores = scores[keep]
+        
+        total_policies = len(positions)
+        
+        # (skor azalan, policy_number artan): cursor ve sayfa modunda aynı sıra
+        if scores is not None:
+            keys = df['policy_number'].to_numpy()[positions].astype(str)
+            order = ranked_order(scores, keys)
+            positions, scores, keys = positions[order], scores[order], keys[order]
+        
+        # Arama + cursor: (skor, policy_number) keyset
+        if cursor is not None:
+            start_idx, end_idx = ranked_window(scores, keys, decode_cursor(cursor), per_page)
+            has_next = end_idx < total_policies
+            
+            return jsonify({
+                'success': True,
+                'data': [_policy_list_item(row) for _, row in df.iloc[positions[start_idx:end_idx]].iterrows()],
+                'total': total_policies,
+                'per_page': per_page,
+                'next_cursor': encode_cursor([float(scores[end_idx - 1]), str(keys[end_idx - 1])])
+                               if has_next else None,
+                'has_next': has_next
+            })
         
         # Sayfalama
         total_pages = (total_policies + per_page - 1) // per_page
         start_idx = (page - 1) * per_page
         end_idx = start_idx + per_page
         
-        paginated_df = df.iloc[start_idx:end_idx]
+        paginated_df = df.iloc[positions[start_idx:end_idx]]
         
         # Poliçe listesini hazırla
-        policies = []
-        for idx, row in paginated_df.iterrows():
-            policies.append({
-                'no': str(row['policy_number']),
-                'musteri': str(row['owner_name']),
-                'email': str(row['owner_email']),
-                'tel': str(row['owner_phone']),
-                'adres': f"{row['city']}/{row['district']}",
-                'tam_adres': str(row['complete_address']),
-                'teminat': f"{int(row['max_coverage']):,} TL",
-                'prim': int(row['monthly_premium_tl']),
-                'baslangic': str(row['policy_start_date']),
-                'bitis': str(row['policy_end_date']),
-                'durum': str(row['policy_status']),
-                'paket': str(row['package_type']),
-                'risk_skoru': round(float(row['risk_score']), 4),
-                'building_id': str(row['building_id'])
-            })
+        policies = [_policy_list_item(row) for _, row in paginated_df.iterrows()]
         
         return jsonify({
             'success': True,
@@ -1270,6 +1370,11 @@ def get_policies():
             'has_prev': page > 1
         })
         
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f'Poliçe listesi hatası: {str(e)}')
         return jsonify({
@@ -1281,21 +1386,18 @@ def get_policies():
 def handle_policy(policy_no):
     """Tek bir poliçenin detaylarını getir veya sil"""
     try:
-        buildings_file = DATA_DIR / 'buildings.csv'
+        snapshot = portfolio_store.snapshot()
         
-        if not buildings_file.exists():
+        if snapshot.buildings is None:
             return jsonify({
                 'success': False,
                 'message': 'Poliçe verisi bulunamadı'
             }), 404
         
-        # CSV'yi oku
-        df = pd.read_csv(str(buildings_file), encoding='utf-8-sig')
-        
-        # Poliçeyi bul
-        policy_row = df[df['policy_number'] == policy_no]
+        # Poliçeyi bul (hash indeks - O(1))
+        row = snapshot.policy(policy_no)
         
-        if policy_row.empty:
+        if row is None:
             return jsonify({
                 'success': False,
                 'message': 'Poliçe bulunamadı'
@@ -1303,9 +1405,8 @@ def handle_policy(policy_no):
         
         # DELETE isteği
         if request.method == 'DELETE':
-            # Poliçeyi sil
-            df = df[df['policy_number'] != policy_no]
-            df.to_csv(str(buildings_file), index=False, encoding='utf-8-sig')
+            # Poliçeyi sil - store CSV'yi yazar ve indeksi günceller
+            portfolio_store.delete_policy(policy_no)
             
             return jsonify({
                 'success': True,
@@ -1313,7 +1414,6 @@ def handle_policy(policy_no):
             })
         
         # GET isteği - detayları döndür
-        row = policy_row.iloc[0]
         policy_detail = {
             'policy_number': str(row['policy_number']),
             'building_id': str(row['building_id']),
@@ -1348,9 +1448,9 @@ def handle_policy(policy_no):
             'annual_premium_tl': float(row['annual_premium_tl']),
             'monthly_premium_tl': float(row['monthly_premium_tl']),
             'policy_status': str(row['policy_status']),
-            'policy_start_date': str(row['policy_start_date']),
-            'policy_end_date': str(row['policy_end_date']),
-            'created_at': str(row['created_at'])
+            'policy_start_date': _date_text(row['policy_start_date']),
+            'policy_end_date': _date_text(row['policy_end_date']),
+            'created_at': _date_text(row['created_at'], '%Y-%m-%d %H:%M:%S')
         }
         
         return jsonify({
@@ -1402,10 +1502,28 @@ def get_claims():
             'message': f'Hata: {str(e)}'
         }), 500
 
+def _customer_list_item(record: dict) -> dict:
+    """Müşteri özet kaydını /api/customers liste formatına çevir"""
+    risk_score = record.get('risk_score')
+    return {
+        'id': record.get('building_id'),
+        'customer_id': record['customer_id'],
+        'ad_soyad': record.get('owner_name'),
+        'email': record.get('owner_email'),
+        'telefon': record.get('owner_phone'),
+        'ilce': record.get('district'),
+        'semte': record.get('neighborhood'),
+        'kayit_tarihi': _date_text(record.get('created_at')),
+        'police_sayisi': int(record['building_count']),
+        'aktif_police': int(record['active_policy_count']),
+        'toplam_yillik_prim': round(float(record['total_premium']), 2),
+        'risk_skoru': None if risk_score is None else round(risk_score, 3)
+    }
+
+
 @app.route('/api/customers', methods=['GET'])
 def get_customers():
-    """Müşteri listesini CSV'den getir (pagination + cache destekli) - Optimize edilmiş"""
-    global customers_cache, customers_cache_timestamp
+    """Müşteri listesini getir (pagination + arama) - müşteri özet görünümünden"""
     
     try:
         # Query parametreleri
@@ -1419,73 +1537,35 @@ def get_customers():
         if page < 1:
             page = 1
         
-        buildings_file = DATA_DIR / 'buildings.csv'
+        snapshot = portfolio_store.snapshot()
         
-        if not buildings_file.exists():
+        if snapshot.buildings is None:
             return jsonify({
                 'success': False,
                 'message': 'Müşteri verisi bulunamadı'
             }), 404
         
-        # Cache kontrolü
-        now = datetime.now()
-        if (customers_cache is None or 
-            customers_cache_timestamp is None or 
-            (now - customers_cache_timestamp).total_seconds() > CACHE_DURATION):
-            
-            # CSV'yi oku (sadece cache oluşturuken)
-            df = pd.read_csv(str(buildings_file), encoding='utf-8-sig')
-            
-            # Müşteri bilgilerini ayıkla - customer_id bazlı
-            customers_dict = {}  # customer_id -> müşteri bilgisi
-            
-            for idx, row in df.iterrows():
-                customer_id = row['customer_id']
-                
-                if customer_id not in customers_dict:
-                    customers_dict[customer_id] = {
-                        'id': row['building_id'],
-                        'customer_id': customer_id,
-                        'ad_soyad': row['owner_name'],
-                        'email': row['owner_email'],
-                        'telefon': row['owner_phone'],
-                        'ilce': row['district'],
-                        'semte': row['neighborhood'],
-                        'kayit_tarihi': row['created_at'][:10],
-                        'police_sayisi': 0,
-                        'aktif_police': 0,
-                        'risk_skoru': round(row['risk_score'], 3)
-                    }
-                
-                # Poliçe sayılarını artır
-                customers_dict[customer_id]['police_sayisi'] += 1
-                if row['policy_status'] == 'Aktif':
-                    customers_dict[customer_id]['aktif_police'] += 1
-            
-            customers_cache = list(customers_dict.values())
-            customers_cache_timestamp = now
-        
-        customers_list = customers_cache
+        # Müşteri özetleri snapshot ile birlikte kurulur ve artımlı güncellenir
+        aggregates = snapshot.customer_aggregates
         
-        # Arama filtresi
+        # Arama filtresi (ad, e-posta, ilçe, semt) - trigram indeks, sıralı
         if search:
-            search_lower = search.lower()
-            customers_list = [
-                c for c in customers_list 
-                if (search_lower in c['ad_soyad'].lower() or 
-                    search_lower in c['email'].lower() or
-                    search_lower in c['ilce'].lower() or
-                    search_lower in c['semte'].lower())
-            ]
+            result = snapshot.customer_search.search(search)
+            positions = aggregates.positions(result.keys)
+        else:
+            positions = np.arange(len(aggregates))
         
-        total_customers = len(customers_list)
+        total_customers = len(positions)
         
         # Sayfalama
         total_pages = (total_customers + per_page - 1) // per_page
         start_idx = (page - 1) * per_page
         end_idx = start_idx + per_page
         
-        paginated_customers = customers_list[start_idx:end_idx]
+        paginated_customers = [
+            _customer_list_item(record)
+            for record in aggregates.records(positions[start_idx:end_idx])
+        ]
         
         return jsonify({
             'success': True,
@@ -1508,33 +1588,27 @@ def get_customers():
 @app.route('/api/customers/<building_id>', methods=['GET'])
 def get_customer_detail(building_id):
     """Müşteri detaylarını getir"""
-    global customers_cache, customers_cache_timestamp
     
     try:
-        buildings_file = DATA_DIR / 'buildings.csv'
+        snapshot = portfolio_store.snapshot()
         
-        if not buildings_file.exists():
+        if snapshot.buildings is None:
             return jsonify({
                 'success': False,
                 'message': 'Müşteri verisi bulunamadı'
             }), 404
         
-        # CSV'yi oku
-        df = pd.read_csv(str(buildings_file), encoding='utf-8-sig')
+        # Building ID'ye göre verileri bul (hash indeks - O(1))
+        row = snapshot.building(building_id)
         
-        # Building ID'ye göre verileri bul
-        building = df[df['building_id'] == building_id]
-        
-        if building.empty:
+        if row is None:
             return jsonify({
                 'success': False,
                 'message': 'Müşteri bulunamadı'
             }), 404
         
-        row = building.iloc[0]
-        
         # Aynı customer_id'ye sahip tüm binaları bul
-        customer_buildings = df[df['customer_id'] == row['customer_id']]
+        customer_buildings = snapshot.customer_buildings(row['customer_id'])
         
         # Detaylı müşteri bilgileri - .item() ile int64 dönüşümü
         customer_detail = {
@@ -1572,9 +1646,9 @@ def get_customer_detail(building_id):
             'yillik_prim_tl': float(round(float(row['annual_premium_tl']), 2)),
             'aylik_prim_tl': float(round(float(row['monthly_premium_tl']), 2)),
             'policy_status': str(row['policy_status']),
-            'police_baslangic': str(row['policy_start_date']),
-            'police_bitis': str(row['policy_end_date']),
-            'kayit_tarihi': str(row['created_at'])[:10],
+            'police_baslangic': _date_text(row['policy_start_date']),
+            'police_bitis': _date_text(row['policy_end_date']),
+            'kayit_tarihi': _date_text(row['created_at']),
             
             # Müşteri istatistikleri
             'toplam_police': int(len(customer_buildings)),
@@ -1718,6 +1792,7 @@ def health_check():
         'blockchain_service': 'active' if blockchain_service else 'inactive',
         'blockchain_manager_stats': blockchain_stats,
         'blockchain_service_stats': blockchain_service_stats,
+        'portfolio_versions': portfolio_store.version_info(),
         'timestamp': datetime.now().isoformat(),
         'version': '2.0.2-blockchain-full'
     })
@@ -1777,9 +1852,9 @@ def placeholder_for_old_blockchain_code():
                 'genesis_hash': blockchain_data.chain[0].hash,
                 'latest_block_hash': blockchain_data.chain[-1].hash if len(blockchain_data.chain) > 0 else None,
                 'chain_valid': blockchain_data.is_valid(),
-                'policy_blocks': len([b for b in blockchain_data.chain if b.data.get('type') == 'policy']),
-                'payout_blocks': len([b for b in blockchain_data.chain if b.data.get('type') == 'payout']),
-                'earthquake_blocks': len([b for b in blockchain_data.chain if b.data.get('type') == 'earthquake']),
+                'policy_blocks': len(blockchain_data.positions_by_type('policy')),
+                'payout_blocks': len(blockchain_data.positions_by_type('payout')),
+                'earthquake_blocks': len(blockchain_data.positions_by_type('earthquake')),
                 'type': 'Immutable Hash-Chained Blockchain'
             }
             
@@ -1977,7 +2052,8 @@ def blockchain_execute_payout():
     Body:
     {
         "payout_id": 0,
-        "admin_approvals": ["admin1", "admin2"]  # 2-of-3 gerekli
+        "admin_approvals": ["admin1", "admin2"],  # 2-of-3 gerekli
+        "request_id": "PAY-..."  # opsiyonel: zincirdeki ödeme emri (onaylar emirden alınır)
     }
     """
     try:
@@ -1990,6 +2066,27 @@ def blockchain_execute_payout():
         data = request.get_json()
         payout_id = data.get('payout_id')
         admin_approvals = data.get('admin_approvals', [])
+        request_id = data.get('request_id')
+        
+        if request_id:
+            # Ödeme emrinin durumu (projeksiyon, O(1))
+            payout_state = blockchain_service.blockchain.payouts.get(request_id)
+            if not payout_state:
+                return jsonify({
+                    'success': False,
+                    'message': 'Ödeme emri bulunamadı'
+                }), 404
+            if payout_state.executed:
+                return jsonify({
+                    'success': False,
+                    'message': 'Ödeme emri zaten gerçekleştirilmiş'
+                }), 400
+            admin_approvals = admin_approvals or list(payout_state.approvers)
+            if any(not payout_state.has_approved(admin) for admin in admin_approvals):
+                return jsonify({
+                    'success': False,
+                    'message': 'Sadece ödeme emrini onaylamış adminler ödemeyi gerçekleştirebilir'
+                }), 400
         
         if len(admin_approvals) < 2:
             return jsonify({
@@ -2000,7 +2097,8 @@ def blockchain_execute_payout():
         # Ödeme gerçekleştir
         success = blockchain_service.execute_payout(
             payout_id=payout_id,
-            admin_approvals=admin_approvals
+            admin_approvals=admin_approvals,
+            request_id=request_id
         )
         
         if success:
@@ -2044,10 +2142,10 @@ def get_blockchain_customer_data(customer_id):
                 'message': 'BlockchainService devre dışı'
             }), 503
         
-        # Müşteriye ait tüm blokları bul
+        # Müşteriye ait tüm bloklar (customer_id indeksi)
         customer_blocks = []
         
-        for block in blockchain_service.blockchain.chain:
+        for block in blockchain_service.blockchain.blocks_by('customer_id', customer_id):
             block_data = block.data
             
             # Policy blokları
@@ -2099,13 +2197,20 @@ def get_blockchain_customer_data(customer_id):
 @app.route('/api/blockchain/search', methods=['POST'])
 def blockchain_search():
     """
-    Blockchain'de arama yap
+    Blockchain'de yapılandırılmış arama (indeksler üzerinde, bkz. chain_query.py)
     
-    Body:
+    Body (tüm alanlar opsiyonel, verilenlerin hepsi sağlanır):
     {
-        "query": "CUST000123",  # Customer ID, policy ID, vb.
-        "type": "policy",  # policy, payout, earthquake (opsiyonel)
-        "limit": 50
+        "query": "CUST000123",  # Alt dize: customer / policy / request ID ya da metin kelimeleri
+        "type": "policy",  # policy, payout, earthquake, ...
+        "customer_id": "CUST000123",
+        "policy_number": "DP-2025-00000001",
+        "request_id": "PAY-...",
+        "text": "kadıköy",  # owner_name, city, district, package_type, reason, message
+        "amount_min": 500000, "amount_max": 2000000,
+        "from": "2025-01-01T00:00:00", "to": 1767225600,  # ISO ya da epoch
+        "limit": 50,
+        "cursor": 12345  # önceki sayfanın next_cursor'ı
     }
     """
     try:
@@ -2115,40 +2220,42 @@ def blockchain_search():
                 'message': 'BlockchainService devre dışı'
             }), 503
         
-        data = request.get_json()
+        data = request.get_json() or {}
         query = data.get('query', '')
-        block_type = data.get('type', None)
         limit = data.get('limit', 50)
+        cursor = data.get('cursor')
+        predicates = {name: value for name, value in data.items()
+                      if name not in ('limit', 'cursor') and value not in (None, '')}
         
-        # Arama yap
-        results = []
+        chain = blockchain_service.blockchain
+        try:
+            page = chain.query(predicates, limit=limit, cursor=cursor)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'Geçersiz sorgu: {str(e)}'
+            }), 400
         
-        for block in blockchain_service.blockchain.chain:
+        # Sadece sayfadaki block'ların verisi okunur
+        results = []
+        for position in page['positions']:
+            block = chain.chain[position]
             block_data = block.data
-            
-            # Tip filtresi
-            if block_type and block_data.get('type') != block_type:
-                continue
-            
-            # Query filtresi (customer_id, policy_id, vb.)
-            block_str = json.dumps(block_data).lower()
-            if query.lower() in block_str:
-                results.append({
-                    'block_index': block.index,
-                    'block_hash': block.hash,
-                    'timestamp': datetime.fromtimestamp(block.timestamp).isoformat(),
-                    'type': block_data.get('type'),
-                    'data': block_data
-                })
-            
-            if len(results) >= limit:
-                break
+            results.append({
+                'block_index': block.index,
+                'block_hash': block.hash,
+                'timestamp': datetime.fromtimestamp(block.timestamp).isoformat(),
+                'type': block_data.get('type'),
+                'data': block_data
+            })
         
         return jsonify({
             'success': True,
             'query': query,
             'results': results,
             'total_found': len(results),
+            'next_cursor': page['next_cursor'],
+            'plan': page['plan'],
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -2183,19 +2290,15 @@ def login():
             return jsonify({'error': 'Email ve sifre gerekli'}), 400
         
         # Customers.csv'den müşteri verilerini oku
-        customers_file = DATA_DIR / 'customers.csv'
-        if not customers_file.exists():
+        snapshot = portfolio_store.snapshot()
+        if snapshot.customers is None:
             return jsonify({'error': 'Veri dosyalari bulunamadi'}), 404
         
-        customers_df = pd.read_csv(customers_file)
-        
-        # Email ile müşteri bul (büyük/küçük harf duyarsız)
-        customer_record = customers_df[customers_df['email'].str.lower() == email.lower()]
-        if customer_record.empty:
+        # Email ile müşteri bul (büyük/küçük harf duyarsız, hash indeks)
+        customer_data = snapshot.customer_by_email(email)
+        if customer_data is None:
             return jsonify({'error': 'E-mail veya sifre yanlis'}), 401
         
-        customer_data = customer_record.iloc[0]
-        
         # Basit password check (plain text - production'da hash ile)
         if password != "dask2024":
             return jsonify({'error': 'E-mail veya sifre yanlis'}), 401
@@ -2218,8 +2321,10 @@ def login():
                     'ip_address': request.remote_addr,
                     'user_agent': request.headers.get('User-Agent', 'Unknown')[:100]
                 }
-                blockchain_service.blockchain.add_block(login_block_data, save_to_disk=False)
-                logger.info(f"🔗 Login kaydı blockchain'e eklendi: {customer_id}")
+                # Yazar hattına bırakılır, yanıt block'un yazılmasını beklemez
+                future = blockchain_service.blockchain.submit_block(login_block_data)
+                future.add_done_callback(_log_login_block_error)
+                logger.info(f"🔗 Login kaydı blockchain kuyruğuna alındı: {customer_id}")
             except Exception as e:
                 logger.error(f"Blockchain login kayıt hatası: {e}")
         
@@ -2258,24 +2363,18 @@ def get_customer(customer_id):
     """
     try:
         # Önce customers.csv'den bul
-        customers_file = DATA_DIR / 'customers.csv'
-        if not customers_file.exists():
+        snapshot = portfolio_store.snapshot()
+        customers_df = snapshot.customers
+        if customers_df is None:
             return jsonify({'error': 'Veri dosyalari bulunamadi'}), 404
         
-        customers_df = pd.read_csv(customers_file)
-        customer_data = customers_df[customers_df['customer_id'] == customer_id]
+        customer_info = snapshot.customer(customer_id)
         
-        if customer_data.empty:
+        if customer_info is None:
             return jsonify({'error': 'Musteri bulunamadi'}), 404
         
-        customer_info = customer_data.iloc[0]
-        
-        # Buildings.csv'den ilişkili binaları say
-        buildings_file = DATA_DIR / 'buildings.csv'
-        total_properties = 0
-        if buildings_file.exists():
-            buildings_df = pd.read_csv(buildings_file)
-            total_properties = int(len(buildings_df[buildings_df['customer_id'] == customer_id]))
+        # Buildings.csv'den ilişkili binaları say (indeksten, tarama yok)
+        total_properties = int(len(snapshot.index.building_rows_for_customer(customer_id)))
         
         # Müşteri bilgisini derle (int64 türlerini int'e çevir)
         response_data = {
@@ -2291,8 +2390,8 @@ def get_customer(customer_id):
                 'avatar_url': str(customer_info['avatar_url']),
                 'status': str(customer_info['status']),
                 'total_properties': total_properties,
-                'registration_date': str(customer_info['registration_date']),
-                'last_login': str(customer_info['last_login']),
+                'registration_date': _date_text(customer_info['registration_date']),
+                'last_login': _date_text(customer_info['last_login'], '%Y-%m-%d %H:%M:%S'),
                 'customer_score': int(customer_info['customer_score'])
             }
         }
@@ -2316,23 +2415,20 @@ def get_policy_details(customer_id):
     """
     try:
         # Bina verilerini oku
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        snapshot = portfolio_store.snapshot()
+        if snapshot.buildings is None:
             return jsonify({'error': 'Bina verileri bulunamadı'}), 404
         
-        buildings_df = pd.read_csv(buildings_file)
-        
         # Önce building_id ile kontrol et (BLD_ ile başlıyorsa)
         if customer_id.startswith('BLD_'):
-            customer_buildings = buildings_df[buildings_df['building_id'] == customer_id]
-            if not customer_buildings.empty:
-                # Building bulundu, customer_id'yi al
-                actual_customer_id = customer_buildings.iloc[0]['customer_id']
-                # Aynı müşteriye ait tüm binaları bul
-                customer_buildings = buildings_df[buildings_df['customer_id'] == actual_customer_id]
+            customer_buildings = pd.DataFrame()
+            building_row = snapshot.building(customer_id)
+            if building_row is not None:
+                # Building bulundu, aynı müşteriye ait tüm binaları bul
+                customer_buildings = snapshot.customer_buildings(building_row['customer_id'])
         else:
             # Customer ID ile direkt ara
-            customer_buildings = buildings_df[buildings_df['customer_id'] == customer_id]
+            customer_buildings = snapshot.customer_buildings(customer_id)
         
         if customer_buildings.empty:
             return jsonify({'error': 'Musteri icin polis bulunamadı'}), 404
@@ -2346,8 +2442,8 @@ def get_policy_details(customer_id):
             'active_policy_index': 1,
             'policy_number': str(building['policy_number']),
             'package_type': str(building['package_type']),
-            'policy_start_date': str(building['policy_start_date']),
-            'policy_end_date': str(building['policy_end_date']),
+            'policy_start_date': _date_text(building['policy_start_date']),
+            'policy_end_date': _date_text(building['policy_end_date']),
             'policy_status': str(building['policy_status']),
             'max_coverage': int(building['max_coverage']),
             'monthly_premium_tl': round(float(building['monthly_premium_tl']), 2),
@@ -2387,10 +2483,10 @@ def get_policy_details(customer_id):
                 'monthly_premium_tl': round(float(building['monthly_premium_tl']), 2)
             },
             'policy_dates': {
-                'start_date': str(building['policy_start_date']),
-                'end_date': str(building['policy_end_date']),
+                'start_date': _date_text(building['policy_start_date']),
+                'end_date': _date_text(building['policy_end_date']),
                 'status': str(building['policy_status']),
-                'renewal_date': (datetime.strptime(str(building['policy_end_date']), '%Y-%m-%d') - timedelta(days=30)).strftime('%Y-%m-%d')
+                'renewal_date': (pd.Timestamp(building['policy_end_date']) - timedelta(days=30)).strftime('%Y-%m-%d')
             },
             'coverage_details': {
                 'structural_damage': 'Tam Kapsama',
@@ -2431,14 +2527,12 @@ def get_customer_policies(customer_id):
         customer_id: Müşteri ID
     """
     try:
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        snapshot = portfolio_store.snapshot()
+        if snapshot.buildings is None:
             return jsonify({'error': 'Bina verileri bulunamadı'}), 404
         
-        buildings_df = pd.read_csv(buildings_file)
-        
-        # Müşteriye ait tüm binaları bul
-        customer_buildings = buildings_df[buildings_df['customer_id'] == customer_id]
+        # Müşteriye ait tüm binaları bul (hash indeks)
+        customer_buildings = snapshot.customer_buildings(customer_id)
         
         if customer_buildings.empty:
             return jsonify({
@@ -2453,8 +2547,8 @@ def get_customer_policies(customer_id):
                 'policy_number': building['policy_number'],
                 'address': building['complete_address'],
                 'status': building['policy_status'],
-                'start_date': building['policy_start_date'],
-                'end_date': building['policy_end_date'],
+                'start_date': _date_text(building['policy_start_date']),
+                'end_date': _date_text(building['policy_end_date']),
                 'coverage': int(building['max_coverage']),
                 'premium_monthly': round(float(building['monthly_premium_tl']), 2),
                 'risk_score': round(float(building['risk_score']), 4),
@@ -2483,15 +2577,13 @@ def get_dashboard_stats(customer_id):
         customer_id: Musteri ID
     """
     try:
-        buildings_file = DATA_DIR / 'buildings.csv'
+        snapshot = portfolio_store.snapshot()
         
-        if not buildings_file.exists():
+        if snapshot.buildings is None:
             return jsonify({'error': 'Veri dosyalari bulunamadi'}), 404
         
-        buildings_df = pd.read_csv(buildings_file)
-        
-        # Müşteriye ait binaları bul
-        customer_buildings = buildings_df[buildings_df['customer_id'] == customer_id]
+        # Müşteriye ait binaları bul (hash indeks)
+        customer_buildings = snapshot.customer_buildings(customer_id)
         
         if customer_buildings.empty:
             return jsonify({'error': 'Musteri bulunamadi'}), 404
@@ -2547,15 +2639,13 @@ def get_payment_history(customer_id):
         customer_id: Müşteri ID
     """
     try:
-        buildings_file = DATA_DIR / 'buildings.csv'
+        snapshot = portfolio_store.snapshot()
         
-        if not buildings_file.exists():
+        if snapshot.buildings is None:
             return jsonify({'error': 'Veri dosyaları bulunamadı'}), 404
         
-        buildings_df = pd.read_csv(buildings_file)
-        
-        # Müşteriye ait binaları bul
-        customer_buildings = buildings_df[buildings_df['customer_id'] == customer_id]
+        # Müşteriye ait binaları bul (hash indeks)
+        customer_buildings = snapshot.customer_buildings(customer_id)
         
         if customer_buildings.empty:
             return jsonify({
@@ -2571,7 +2661,7 @@ def get_payment_history(customer_id):
         for building in customer_buildings.itertuples():
             # Her bina için son 6 ayın ödemelerini oluştur
             monthly_premium = float(building.monthly_premium_tl)
-            policy_start = datetime.strptime(str(building.policy_start_date), '%Y-%m-%d')
+            policy_start = pd.Timestamp(building.policy_start_date)
             
             # Poliçe başlangıcından bugüne kadar kaç ay geçti
             months_diff = (now.year - policy_start.year) * 12 + (now.month - policy_start.month)
@@ -2626,15 +2716,15 @@ def retrain_model():
     try:
         logger.info("Model yeniden eğitim başlatıldı (Admin isteği)")
         
-        # Veriyi yükle
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        # Veriyi yükle (paylaşılan snapshot'ın kopyası)
+        snapshot = portfolio_store.snapshot()
+        if snapshot.buildings is None:
             return jsonify({
                 'success': False,
                 'error': 'Bina verisi bulunamadı'
             }), 404
         
-        buildings_df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+        buildings_df = snapshot.buildings.copy()
         
         # Feature extraction
         logger.info("Feature extraction başladı...")
@@ -2648,7 +2738,7 @@ def retrain_model():
         
         # ✨ TÜM BİNALARA AI İLE DİNAMİK FİYAT HESAPLA
         logger.info("Tüm binalar için AI ile dinamik fiyat hesaplanıyor...")
-        buildings_df = pd.read_csv(DATA_DIR / 'buildings.csv')
+        buildings_df = portfolio_store.snapshot().buildings.copy()
         recalculate_all_premiums_with_ai(buildings_df, pricing_system)
         
         # 📊 Raporları oluştur ve results klasörüne kaydet (AI pricing sonrası)
@@ -2779,22 +2869,20 @@ def get_system_stats():
         JSON: Sistem performans metrikleri
     """
     try:
-        buildings_file = DATA_DIR / 'buildings.csv'
-        customers_file = DATA_DIR / 'customers.csv'
-        earthquakes_file = DATA_DIR / 'earthquakes.csv'
+        storage = portfolio_store.storage
         
         stats = {
             'data_files': {
                 'buildings': {
-                    'exists': buildings_file.exists(),
+                    'exists': storage.exists('buildings'),
                     'count': 0
                 },
                 'customers': {
-                    'exists': customers_file.exists(),
+                    'exists': storage.exists('customers'),
                     'count': 0
                 },
                 'earthquakes': {
-                    'exists': earthquakes_file.exists(),
+                    'exists': storage.exists('earthquakes'),
                     'count': 0
                 }
             },
@@ -2807,20 +2895,20 @@ def get_system_stats():
             }
         }
         
-        # Veri sayılarını al
-        if buildings_file.exists():
-            buildings_df = pd.read_csv(buildings_file)
+        # Veri sayılarını al (paylaşılan portföy snapshot'ından)
+        snapshot = portfolio_store.snapshot()
+        buildings_df = snapshot.buildings
+        if buildings_df is not None:
             stats['data_files']['buildings']['count'] = len(buildings_df)
             stats['data_files']['buildings']['total_premium'] = float(buildings_df['annual_premium_tl'].sum())
             stats['data_files']['buildings']['avg_premium'] = float(buildings_df['annual_premium_tl'].mean())
         
-        if customers_file.exists():
-            customers_df = pd.read_csv(customers_file)
-            stats['data_files']['customers']['count'] = len(customers_df)
+        if snapshot.customers is not None:
+            stats['data_files']['customers']['count'] = snapshot.customer_count
         
-        if earthquakes_file.exists():
-            earthquakes_df = pd.read_csv(earthquakes_file)
-            stats['data_files']['earthquakes']['count'] = len(earthquakes_df)
+        if storage.exists('earthquakes'):
+            # Parquet'te sadece dosya metadata'sı okunur
+            stats['data_files']['earthquakes']['count'] = storage.row_count('earthquakes')
         
         # Blockchain stats (basit)
         if blockchain_manager:
@@ -2860,15 +2948,14 @@ def load_policies_to_blockchain():
         logger.info("Aktif poliçeler blockchain'e yükleniyor (Admin isteği)")
         
         # Veri dosyalarını kontrol et
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        if not portfolio_store.storage.exists('buildings'):
             return jsonify({
                 'success': False,
                 'error': 'Bina verisi bulunamadı'
             }), 404
         
         # Verileri yükle
-        buildings_df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+        buildings_df = portfolio_store.snapshot().buildings
         
         # Aktif poliçeleri filtrele
         active_buildings = buildings_df[buildings_df['policy_status'] == 'Aktif'].copy()
@@ -2904,7 +2991,7 @@ def load_policies_to_blockchain():
                     'annual_premium_tl': float(building['annual_premium_tl']),
                     'latitude': float(building['latitude']),
                     'longitude': float(building['longitude']),
-                    'start_date': building['policy_start_date'],
+                    'start_date': _date_text(building['policy_start_date']),
                     'owner_name': building['owner_name'],
                     'city': building['city'],
                     'district': building['district']
@@ -3099,29 +3186,17 @@ def get_blockchain_stats():
         # BlockchainService'den veri al
         blockchain_data = blockchain_service.blockchain
         
-        # Policy, payout request, earthquake bloklarını say
-        policy_blocks = len([b for b in blockchain_data.chain if b.data.get('type') == 'policy'])
-        payout_request_blocks = len([b for b in blockchain_data.chain if b.data.get('type') == 'payout_request'])
-        payout_approval_blocks = len([b for b in blockchain_data.chain if b.data.get('type') == 'payout_approval'])
-        earthquake_blocks = len([b for b in blockchain_data.chain if b.data.get('type') == 'earthquake'])
+        # Policy, payout request, earthquake bloklarını say (tip indeksi)
+        policy_blocks = len(blockchain_data.positions_by_type('policy'))
+        payout_request_blocks = len(blockchain_data.positions_by_type('payout_request'))
+        payout_approval_blocks = len(blockchain_data.positions_by_type('payout_approval'))
+        earthquake_blocks = len(blockchain_data.positions_by_type('earthquake'))
         total_blocks = len(blockchain_data.chain)
         
-        # Bekleyen ödeme emirlerini say (2-of-3 onay bekleyenler)
-        pending_payouts = 0
-        approved_payouts = 0
-        
-        for block in blockchain_data.chain:
-            if block.data.get('type') == 'payout_request':
-                request_id = block.data.get('request_id')
-                # Bu request için kaç admin onayı var?
-                approvals = len([b for b in blockchain_data.chain 
-                               if b.data.get('type') == 'payout_approval' 
-                               and b.data.get('request_id') == request_id])
-                
-                if approvals >= 2:
-                    approved_payouts += 1
-                else:
-                    pending_payouts += 1
+        # Bekleyen ödeme emirlerini say (2-of-3 onay bekleyenler), projeksiyondan
+        payout_counts = blockchain_data.payouts.counts()
+        pending_payouts = payout_counts['pending']
+        approved_payouts = payout_counts['approved'] + payout_counts['executed']
         
         return jsonify({
             'success': True,
@@ -3146,14 +3221,51 @@ def get_blockchain_stats():
             'error': str(e)
         }), 500
 
+def _int_cursor(token):
+    """Block index cursor'ını çöz (None: ilk sayfa)"""
+    after = decode_cursor(token)
+    if after is not None and (not isinstance(after, int) or isinstance(after, bool)):
+        raise InvalidCursor(f'Geçersiz cursor: {token}')
+    return after
+
+
+def _time_window_args():
+    """
+    Zaman penceresi parametreleri → (başlangıç, bitiş) epoch (None = açık)
+    
+    ?hours=24 son N saat; ?from=...&to=... ISO tarih ya da epoch saniye.
+    
+    Raises:
+        ValueError: Geçersiz değer
+    """
+    hours = request.args.get('hours')
+    if hours not in (None, ''):
+        hours = float(hours)
+        if not hours > 0:
+            raise ValueError(f'Geçersiz saat: {hours}')
+        return datetime.now().timestamp() - hours * 3600, None
+    return parse_timestamp(request.args.get('from')), parse_timestamp(request.args.get('to'))
+
+
+def _window_indexes(blockchain_data, first: int = 0) -> range:
+    """Zaman penceresindeki block index'leri (zaman indeksi, ikili arama)"""
+    span = blockchain_data.positions_between(*_time_window_args())
+    return range(max(span.start, first), max(span.stop, first))
+
+
 @app.route('/api/blockchain/transactions', methods=['GET'])
 def get_blockchain_transactions():
     """
-    Son blockchain işlemlerini getir
+    Son blockchain işlemlerini getir (en yeni önce)
+    
+    Keyset sayfalama: yanıttaki next_cursor ile ?cursor=... bir önceki
+    (daha eski) sayfayı döndürür. Sadece sayfadaki bloklar okunur.
+    ?hours=24 ya da ?from=...&to=... pencereyi zaman indeksiyle sınırlar.
     """
     global blockchain_service
     try:
         limit = int(request.args.get('limit', 20))
+        after = _int_cursor(request.args.get('cursor'))
         
         if not blockchain_service:
             return jsonify({
@@ -3162,15 +3274,20 @@ def get_blockchain_transactions():
                 'message': 'Blockchain servisi başlatılmamış'
             })
         
-        # Blockchain'den son blokları al
+        # Block index = zincir pozisyonu: genesis hariç indeksler zaten sıralı
         blockchain_data = blockchain_service.blockchain
-        transactions = []
+        try:
+            block_indexes = _window_indexes(blockchain_data, first=1)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Geçersiz zaman penceresi: {e}'
+            }), 400
+        start, stop = keyset_window(block_indexes, after, limit, descending=True)
         
-        # Genesis hariç son N bloku al
-        for block in reversed(blockchain_data.chain[1:]):  # Genesis atla
-            if len(transactions) >= limit:
-                break
-            
+        transactions = []
+        for block_index in reversed(block_indexes[start:stop]):
+            block = blockchain_data.chain[block_index]
             block_type = block.data.get('type', 'unknown')
             policy_id = block.data.get('policy_id', '-')
             
@@ -3186,9 +3303,15 @@ def get_blockchain_transactions():
         return jsonify({
             'success': True,
             'data': transactions,
-            'count': len(transactions)
+            'count': len(transactions),
+            'next_cursor': encode_cursor(block_indexes[start]) if start > 0 else None
         })
         
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Blockchain transactions error: {e}")
         return jsonify({
@@ -3196,16 +3319,41 @@ def get_blockchain_transactions():
             'error': str(e)
         }), 500
 
+def _blockchain_policy_item(block) -> dict:
+    """Policy block'unu /api/blockchain/policies liste öğesine çevir"""
+    policy_data = block.data
+    return {
+        'blockchain_id': block.index,
+        'customer_id': policy_data.get('customer_id', 'N/A'),
+        'coverage_amount': policy_data.get('coverage_amount', 0),
+        'premium': policy_data.get('premium', 0),
+        'latitude': policy_data.get('latitude', 0),
+        'longitude': policy_data.get('longitude', 0),
+        'is_active': policy_data.get('is_active', True),
+        'package_type': policy_data.get('package_type', 'temel')
+    }
+
+
 @app.route('/api/blockchain/policies', methods=['GET'])
 def get_blockchain_policies():
     """
     Blockchain'de kayıtlı poliçeleri getir
+    
+    ?limit=50&offset=0 (sayfa numarası) ya da ?limit=50&cursor= (keyset,
+    block index sıralı; yanıtta next_cursor). İkisi de tip indeksindeki
+    policy pozisyonlarından sadece bir sayfa okur.
+    
+    ?search= müşteri ID / poliçe ID içinde (büyük/küçük harf duyarsız) alt
+    dize arar; eşleşmeler sorgu motorunun kimlik indekslerinden gelir
+    (bkz. chain_query.key_substring_positions), block verisi okunmaz.
     """
     global blockchain_service
     try:
-        limit = int(request.args.get('limit', 50))
+        limit = max(int(request.args.get('limit', 50)), 1)
         offset = int(request.args.get('offset', 0))
         search = request.args.get('search', '')
+        cursor = request.args.get('cursor')
+        after = _int_cursor(cursor)
         
         if not blockchain_service:
             return jsonify({
@@ -3215,42 +3363,36 @@ def get_blockchain_policies():
                 'message': 'Blockchain servisi başlatılmamış'
             })
         
-        # Blockchain'den policy bloklarını al
+        # Blockchain'den policy bloklarını al (tip indeksi, artan block index)
         blockchain_data = blockchain_service.blockchain
-        all_policies = []
-        
-        for block in blockchain_data.chain:
-            if block.data.get('type') == 'policy':
-                policy_data = block.data
-                
-                # Search filtresi
-                if search:
-                    customer_id = str(policy_data.get('customer_id', ''))
-                    policy_id = str(policy_data.get('policy_id', ''))
-                    if search.lower() not in customer_id.lower() and search.lower() not in policy_id.lower():
-                        continue
-                
-                all_policies.append({
-                    'blockchain_id': block.index,
-                    'customer_id': policy_data.get('customer_id', 'N/A'),
-                    'coverage_amount': policy_data.get('coverage_amount', 0),
-                    'premium': policy_data.get('premium', 0),
-                    'latitude': policy_data.get('latitude', 0),
-                    'longitude': policy_data.get('longitude', 0),
-                    'is_active': policy_data.get('is_active', True),
-                    'package_type': policy_data.get('package_type', 'temel')
-                })
+        chain = blockchain_data.chain
+        if search:
+            # Kimlik indeksleri (müşteri ID / poliçe ID); tip başlıktan süzülür
+            sequences = key_substring_positions(blockchain_data, ('customer_id', 'policy'), search)
+            positions = [pos for pos in merge_positions(sequences) if chain.block_type(pos) == 'policy']
+        else:
+            positions = blockchain_data.positions_by_type('policy')
         
-        # Pagination
-        total = len(all_policies)
-        policies = all_policies[offset:offset + limit]
+        if cursor is not None:
+            start, stop = keyset_window(positions, after, limit)
+        else:
+            start, stop = offset, offset + limit
+        page = positions[start:stop]
         
-        return jsonify({
+        response = {
             'success': True,
-            'data': policies,
-            'total': total
-        })
+            'data': [_blockchain_policy_item(chain[pos]) for pos in page],
+            'total': len(positions)
+        }
+        if cursor is not None:
+            response['next_cursor'] = encode_cursor(page[-1]) if stop < len(positions) else None
+        return jsonify(response)
         
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Blockchain policies error: {e}")
         return jsonify({
@@ -3276,8 +3418,7 @@ def sync_policies_to_blockchain():
             }), 500
         
         # buildings.csv dosyasını oku
-        buildings_file = DATA_DIR / 'buildings.csv'
-        if not buildings_file.exists():
+        if not portfolio_store.storage.exists('buildings'):
             return jsonify({
                 'success': False,
                 'error': 'buildings.csv bulunamadı'
@@ -3288,17 +3429,16 @@ def sync_policies_to_blockchain():
         
         # ⚠️ BLOCKCHAIN'İ TEMİZLE (Sıfırdan başla)
         logger.info("🗑️ Blockchain temizleniyor (sync işlemi)...")
-        genesis_block = blockchain_service.blockchain.chain[0]  # Genesis block'u sakla
-        blockchain_service.blockchain.chain = [genesis_block]  # Sadece genesis block kalsın
-        blockchain_service.blockchain._save_chain()  # Değişiklikleri diske kaydet
+        blockchain_service.blockchain.reset_to_genesis()  # Sadece genesis block kalsın (diske kaydedilir)
         
-        df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+        df = portfolio_store.snapshot().buildings
         df = df.head(limit)  # Limit uygula
         
         recorded = 0
         skipped = 0
         errors = 0
         
+        policies = []
         for idx, row in df.iterrows():
             try:
                 # None kontrolü
@@ -3306,23 +3446,26 @@ def sync_policies_to_blockchain():
                     skipped += 1
                     continue
                 
-                # Blockchain'e kaydet
-                policy_id = blockchain_service.create_policy_on_chain(
+                policies.append(dict(
                     customer_id=str(row['customer_id']),
                     coverage_amount=int(float(row.get('insurance_value_tl', 0))),
                     latitude=float(row['latitude']),
                     longitude=float(row['longitude']),
                     premium=int(float(row.get('annual_premium_tl', 0))),
-                    package_type=str(row.get('package_type', 'temel')),
-                    verbose=False
-                )
-                
-                recorded += 1
+                    package_type=str(row.get('package_type', 'temel'))
+                ))
                 
             except Exception as e:
                 errors += 1
                 logger.warning(f"Policy sync error (row {idx}): {e}")
         
+        # Blockchain'e toplu kaydet (parti başına tek add_blocks)
+        for i in range(0, len(policies), BLOCK_BATCH_SIZE):
+            policy_ids = blockchain_service.create_policies_on_chain(policies[i:i + BLOCK_BATCH_SIZE])
+            failed = policy_ids.count(None)
+            recorded += len(policy_ids) - failed
+            errors += failed
+        
         duration = time.time() - start_time
         
         logger.info(f"✅ Blockchain sync tamamlandı: {recorded} kayıt, {skipped} atlandı, {errors} hata ({duration:.2f}s)")
@@ -3334,8 +3477,9 @@ def sync_policies_to_blockchain():
         except Exception as e:
             logger.warning(f"Örnek ödeme emirleri eklenirken hata: {e}")
         
-        # Son durumu diske kaydet
+        # Son durumu diske kaydet (başlık/indeks yan dosyası dahil)
         blockchain_service.blockchain._save_chain()
+        blockchain_service.blockchain.save_header_index()
         
         return jsonify({
             'success': True,
@@ -3361,6 +3505,9 @@ def sync_policies_to_blockchain():
 def verify_blockchain_contract():
     """
     Smart contract durumunu doğrula
+    
+    Query params:
+        full: 1 ise checkpoint'e güvenmeden tüm zincir doğrulanır (derin denetim)
     """
     global blockchain_service
     try:
@@ -3375,15 +3522,25 @@ def verify_blockchain_contract():
                 }
             })
         
-        # Blockchain integrity kontrolü
-        is_valid = blockchain_service.blockchain.is_valid()
-        total_blocks = len(blockchain_service.blockchain.chain)
-        
+        # Blockchain integrity kontrolü (varsayılan: son doğrulamadan sonraki bloklar)
+        full_audit = request.args.get('full', '').lower() in ('1', 'true', 'yes')
+        integrity = blockchain_service.verify_blockchain_integrity(full_audit=full_audit)
+        is_valid = integrity['valid']
+        total_blocks = integrity['total_blocks']
+        audit = integrity['audit']
+        if full_audit and audit:
+            logger.info(f"🔍 Tam denetim: {audit['blocks']:,} blok, {audit['seconds']:.2f} s "
+                        f"({audit['blocks_per_second']:,} blok/s, {audit['workers']} worker)")
+
         verification = {
             'contract_valid': is_valid,
             'network_connected': True,
             'accounts_available': len(blockchain_service.admins) > 0,
-            'message': f'Blockchain aktif ve geçerli ({total_blocks} blok)'
+            'verified_blocks': integrity['verified_blocks'],
+            'full_audit': full_audit,
+            'audit': audit,
+            'message': (f'Blockchain aktif ve geçerli ({total_blocks} blok)' if is_valid
+                        else f"Blockchain bozuk: blok {integrity['corrupted_block']} ({integrity['reason']})")
         }
         
         return jsonify({
@@ -3398,13 +3555,56 @@ def verify_blockchain_contract():
             'error': str(e)
         }), 500
 
+@app.route('/api/blockchain/proof/<int:block_index>', methods=['GET'])
+def get_blockchain_inclusion_proof(block_index):
+    """
+    Tek block için Merkle dahil olma kanıtı (poliçe, ödeme, deprem kaydı)
+    
+    İstemci block hash'ini block verisinden hesaplar, `proof` yolunu
+    izleyerek köke ulaşır ve kökü `checkpoint.root` ile karşılaştırır;
+    sunucu tüm defteri yeniden hash'lemez (O(log n)).
+    """
+    global blockchain_service
+    try:
+        if not blockchain_service:
+            return jsonify({
+                'success': False,
+                'error': 'Blockchain servisi başlatılmamış'
+            }), 503
+        
+        proof = blockchain_service.blockchain.inclusion_proof(block_index)
+        if proof is None:
+            return jsonify({
+                'success': False,
+                'error': f'Block bulunamadı: {block_index}'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': proof
+        })
+        
+    except Exception as e:
+        logger.error(f"Blockchain proof error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/blockchain/logs', methods=['GET'])
 def get_blockchain_logs():
     """
-    Blockchain işlem loglarını getir
+    Blockchain işlem loglarını getir (en yeni blok önce)
+    
+    ?limit=500 blok başına bir sayfa; data.next_cursor ile ?cursor=...
+    daha eski blokların sayfasını döndürür. ?hours=24 ya da
+    ?from=...&to=... pencereyi zaman indeksiyle sınırlar.
     """
     global blockchain_service
     try:
+        limit = max(int(request.args.get('limit', 500)), 1)
+        after = _int_cursor(request.args.get('cursor'))
+        
         if not blockchain_service:
             return jsonify({
                 'success': False,
@@ -3413,6 +3613,14 @@ def get_blockchain_logs():
         
         # Blockchain'den log oluştur
         blockchain_data = blockchain_service.blockchain
+        try:
+            block_indexes = _window_indexes(blockchain_data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Geçersiz zaman penceresi: {e}'
+            }), 400
+        start, stop = keyset_window(block_indexes, after, limit, descending=True)
         log_lines = []
         
         log_lines.append("=" * 80)
@@ -3421,11 +3629,14 @@ def get_blockchain_logs():
         log_lines.append(f"Tarih: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         log_lines.append(f"Toplam Blok: {len(blockchain_data.chain)}")
         log_lines.append(f"Chain Geçerli: {blockchain_data.is_valid()}")
+        if stop > start:
+            log_lines.append(f"Gösterilen: Block #{block_indexes[stop - 1]} - #{block_indexes[start]}")
         log_lines.append("=" * 80)
         log_lines.append("")
         
-        # Her bloğu logla
-        for block in blockchain_data.chain:
+        # Sayfadaki her bloğu logla
+        for block_index in reversed(block_indexes[start:stop]):
+            block = blockchain_data.chain[block_index]
             block_time = datetime.fromtimestamp(block.timestamp).strftime('%Y-%m-%d %H:%M:%S')
             block_type = block.data.get('type', 'unknown')
             
@@ -3448,10 +3659,16 @@ def get_blockchain_logs():
         return jsonify({
             'success': True,
             'data': {
-                'logs': logs
+                'logs': logs,
+                'next_cursor': encode_cursor(block_indexes[start]) if start > 0 else None
             }
         })
         
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"Blockchain logs error: {e}")
         return jsonify({
@@ -3459,10 +3676,77 @@ def get_blockchain_logs():
             'error': str(e)
         }), 500
 
+@app.route('/api/blockchain/activity', methods=['GET'])
+def get_blockchain_activity():
+    """
+    Saatlik/günlük blockchain aktivite histogramı (admin grafikleri)
+    
+    Query params:
+        bucket: hour (varsayılan, son 24 saat) | day (varsayılan son 30 gün)
+        hours: Son N saat; ya da from / to (ISO tarih ya da epoch)
+        type: Sadece bu block tipi (ör. policy, payout_request)
+    
+    Sayılar block eklenirken güncellenen saatlik sayaçlardan gelir; maliyet
+    penceredeki saat sayısıyla orantılıdır, zincir taranmaz.
+    """
+    global blockchain_service
+    try:
+        if not blockchain_service:
+            return jsonify({
+                'success': False,
+                'error': 'Blockchain servisi başlatılmamış'
+            }), 503
+        
+        bucket = request.args.get('bucket', 'hour')
+        block_type = request.args.get('type') or None
+        try:
+            start, end = _time_window_args()
+            end = end if end is not None else datetime.now().timestamp()
+            if start is None:
+                start = end - (24 * 3600 if bucket == 'hour' else 30 * 86400)
+            if start > end:
+                raise ValueError('from, to değerinden sonra')
+            series = blockchain_service.blockchain.activity(start, end, bucket, block_type)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Geçersiz parametre: {e}'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'bucket': bucket,
+                'type': block_type,
+                'from': datetime.fromtimestamp(start).isoformat(),
+                'to': datetime.fromtimestamp(end).isoformat(),
+                'total': sum(point['count'] for point in series),
+                'series': series
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Blockchain activity error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/blockchain/export', methods=['GET'])
 def export_blockchain_data():
     """
-    Blockchain verilerini CSV olarak indir
+    Blockchain verilerini akışlı olarak indir (CSV ya da NDJSON)
+    
+    Query params:
+        format: csv (varsayılan) | ndjson
+        type: Block tipi (varsayılan 'policy'; 'all' = tüm tipler)
+        start_index, end_index: Block index aralığı (dahil)
+        from, to: Zaman aralığı (ISO tarih ya da epoch saniye)
+    
+    Satırlar block deposundan tek tek üretilip parça parça gönderilir;
+    bellek kullanımı zincir boyundan bağımsızdır ve ilk bayt hemen çıkar.
+    Akış sürerken defter sıfırlanırsa (/api/blockchain/sync) aktarım hata
+    ile kesilir; yeni defterin kayıtları gönderilmez.
     """
     global blockchain_service
     try:
@@ -3472,34 +3756,32 @@ def export_blockchain_data():
                 'error': 'Blockchain servisi başlatılmamış'
             }), 503
         
-        # Blockchain'den CSV oluştur
-        blockchain_data = blockchain_service.blockchain
-        records = []
-        
-        for block in blockchain_data.chain:
-            if block.data.get('type') == 'policy':
-                records.append({
-                    'block_index': block.index,
-                    'timestamp': datetime.fromtimestamp(block.timestamp).isoformat(),
-                    'type': 'policy',
-                    'customer_id': block.data.get('customer_id', ''),
-                    'coverage_amount': block.data.get('coverage_amount', 0),
-                    'premium': block.data.get('premium', 0),
-                    'latitude': block.data.get('latitude', 0),
-                    'longitude': block.data.get('longitude', 0),
-                    'hash': block.hash
-                })
+        try:
+            options = parse_export_args(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': f'Geçersiz parametre: {e}'
+            }), 400
         
-        # DataFrame oluştur ve geçici dosyaya kaydet
-        df = pd.DataFrame(records)
-        temp_file = DATA_DIR / 'blockchain_export_temp.csv'
-        df.to_csv(temp_file, index=False, encoding='utf-8')
+        blockchain = blockchain_service.blockchain
+        export_format = options.pop('format')
+        generation = blockchain.generation  # pozisyonlar bu defter nesline ait
+        positions = export_positions(blockchain, **options)
+        filename = f'blockchain_records_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{export_format}'
         
-        return send_file(
-            temp_file,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'blockchain_records_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        def stream():
+            try:
+                yield from export_chunks(blockchain, positions, export_format, generation)
+            except ExportAborted as e:
+                # Yanıt başlamış olabilir: bağlantı kesilir, istemci eksik dosya alır
+                logger.error(f"Blockchain export aborted: {e}")
+                raise
+        
+        return Response(
+            stream(),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
         )
         
     except Exception as e:
@@ -3543,6 +3825,11 @@ def create_payout_request():
         
         # Ödeme emri ID'si oluştur
         request_id = f"PAY-{datetime.now().strftime('%Y%m%d%H%M%S')}-{policy_id}"
+        if blockchain_service.blockchain.payouts.get(request_id):
+            return jsonify({
+                'success': False,
+                'error': f'Ödeme emri zaten var: {request_id}'
+            }), 400
         
         # Blockchain'e ödeme emri kaydı ekle (ödeme yapılmaz!)
         block_data = {
@@ -3582,6 +3869,15 @@ def create_payout_request():
             'error': str(e)
         }), 500
 
+
+# Onay reddi nedeni → (mesaj, HTTP durum kodu)
+_PAYOUT_APPROVAL_ERRORS = {
+    REJECT_NOT_FOUND: ('Ödeme emri bulunamadı', 404),
+    REJECT_EXECUTED: ('Ödeme emri zaten gerçekleştirilmiş', 400),
+    REJECT_ALREADY_APPROVED: ('Bu admin zaten onaylamış', 400),
+}
+
+
 @app.route('/api/blockchain/payout-approve', methods=['POST'])
 def approve_payout_request():
     """
@@ -3613,31 +3909,9 @@ def approve_payout_request():
                 'error': f'Geçersiz admin: {admin_name}'
             }), 403
         
-        # Ödeme emrini bul
-        request_block = None
-        for block in blockchain_service.blockchain.chain:
-            if block.data.get('type') == 'payout_request' and block.data.get('request_id') == request_id:
-                request_block = block
-                break
-        
-        if not request_block:
-            return jsonify({
-                'success': False,
-                'error': 'Ödeme emri bulunamadı'
-            }), 404
-        
-        # Bu admin daha önce onaylamış mı?
-        existing_approvals = [b for b in blockchain_service.blockchain.chain 
-                            if b.data.get('type') == 'payout_approval' 
-                            and b.data.get('request_id') == request_id]
-        
-        if any(a.data.get('admin') == admin_name for a in existing_approvals):
-            return jsonify({
-                'success': False,
-                'error': 'Bu admin zaten onaylamış'
-            }), 400
-        
-        # Onay kaydını blockchain'e ekle
+        # Onay kaydını blockchain'e ekle; emrin durumu (projeksiyon) yazma
+        # kilidi altında yeniden kontrol edilir: eşzamanlı tekrar onay ya da
+        # ödemeyle yarışan onay zincire girmez
         approval_data = {
             'type': 'payout_approval',
             'request_id': request_id,
@@ -3646,12 +3920,19 @@ def approve_payout_request():
             'approved_at': datetime.now().isoformat()
         }
         
-        block = blockchain_service.blockchain.add_block(approval_data, save_to_disk=True)
+        try:
+            block, payout_state = blockchain_service.blockchain.add_payout_approval(approval_data)
+        except PayoutApprovalRejected as e:
+            error, status_code = _PAYOUT_APPROVAL_ERRORS[e.reason]
+            return jsonify({
+                'success': False,
+                'error': error
+            }), status_code
         
-        # Toplam onay sayısı
-        total_approvals = len(existing_approvals) + 1
+        # Toplam onay sayısı (projeksiyon block eklenirken güncellendi)
+        total_approvals = payout_state['approval_count']
         
-        status = 'approved' if total_approvals >= 2 else 'pending'
+        status = payout_state['status']
         
         return jsonify({
             'success': True,
@@ -3688,35 +3969,25 @@ def get_pending_payouts():
         
         pending_payouts = []
         
-        # Tüm ödeme emirlerini tara
-        for block in blockchain_service.blockchain.chain:
-            if block.data.get('type') == 'payout_request':
-                request_id = block.data.get('request_id')
-                
-                # Bu request için onayları say
-                approvals = [b for b in blockchain_service.blockchain.chain 
-                           if b.data.get('type') == 'payout_approval' 
-                           and b.data.get('request_id') == request_id]
-                
-                approval_count = len(approvals)
-                admin_approvals = [a.data.get('admin') for a in approvals]
-                
-                status = 'approved' if approval_count >= 2 else 'pending'
-                
-                pending_payouts.append({
-                    'request_id': request_id,
-                    'policy_id': block.data.get('policy_id'),
-                    'customer_id': block.data.get('customer_id'),
-                    'amount_tl': block.data.get('amount_tl'),
-                    'reason': block.data.get('reason'),
-                    'requester': block.data.get('requester'),
-                    'created_at': block.data.get('created_at'),
-                    'approval_count': approval_count,
-                    'required_approvals': 2,
-                    'approved_by': admin_approvals,
-                    'status': status,
-                    'block_index': block.index
-                })
+        # Gerçekleşmemiş emirler ve onayları projeksiyondan: O(bekleyen)
+        chain = blockchain_service.blockchain
+        for payout_state in chain.payouts.pending():
+            block_data = chain.chain[payout_state.position].data
+            
+            pending_payouts.append({
+                'request_id': payout_state.request_id,
+                'policy_id': block_data.get('policy_id'),
+                'customer_id': block_data.get('customer_id'),
+                'amount_tl': block_data.get('amount_tl'),
+                'reason': block_data.get('reason'),
+                'requester': block_data.get('requester'),
+                'created_at': block_data.get('created_at'),
+                'approval_count': payout_state.approval_count,
+                'required_approvals': 2,
+                'approved_by': list(payout_state.approvers),
+                'status': payout_state.status,
+                'block_index': payout_state.position
+            })
         
         # Tarihe göre sırala (en yeni önce)
         pending_payouts.sort(key=lambda x: x['created_at'], reverse=True)
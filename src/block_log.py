@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Segmentli Blok Günlüğü (Append-Only Block Log)
+====================================================
+
+Eski kalıcılık modeli her kayıtta tüm zinciri `blockchain.dat` dosyasına
+pickle'lıyordu; maliyet zincir uzunluğuyla büyüyordu. Blok günlüğünde her
+blok, dönen (rotating) segment dosyalarının sonuna uzunluk önekli bir kayıt
+olarak eklenir; bir blok eklemek O(1) I/O'dur:
+
+    data/blockchain_segments/
+        00000000000000000000.seg      # ilk bloğu 0 olan segment
+        00000000000000250000.seg      # segment boyutu aşılınca yenisi açılır
+
+    kayıt = [uzunluk: 4 bayt big-endian][crc32: 4 bayt][yük: uzunluk bayt]
+
+Segment adı, içindeki ilk bloğun zincir pozisyonudur.
+
+Group commit (toplu fsync):
+    Her ekleme işletim sistemine yazılır (flush); fsync ise
+    `DASK_BLOCK_FSYNC_EVERY` kayıtta ya da `DASK_BLOCK_FSYNC_MS` milisaniyede
+    bir yapılır. `sync()` bekleyen tüm kayıtları tek fsync ile diske zorlar
+    (ödeme gibi kritik bloklar). Süreç çökerse yazılanlar kaybolmaz; sadece
+    güç kesintisinde son fsync'ten sonraki kayıtlar kaybolabilir.
+
+Çökme kurtarma:
+    Açılışta son segment taranır; geçersiz ilk kayıt dosya sonuna uzanıyorsa
+    (yarım yazılmış kuyruk) ya da ardı sadece sıfırsa (dosya sistemi ön
+    ayırması) dosya oradan kesilir. Ardında başka veri olan bozuk kayıt
+    yarım yazım değildir: günlüğe dokunulmaz, BlockLogError yükselir.
+
+Konumlar:
+    `append()` ve `scan()` her kaydın konumunu (segmentin ilk pozisyonu,
+    bayt ofseti) verir; `read()` tek kaydı bu konumdan okur (pread). Blok
+    yükleri bellekte tutulmadan istendiğinde diskten alınabilir.
+
+KULLANIM:
+    from block_log import BlockLog
+
+    log = BlockLog('data/blockchain_segments')
+    locations = log.append([payload_bytes, ...])    # group commit
+    log.sync()                                      # kritik kayıt: hemen fsync
+    payloads = log.read_all()                       # zincir sırasıyla
+    payload = log.read(*locations[0])               # tek kayıt
+"""
+
+import os
+import struct
+import time
+import zlib
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# [uzunluk][crc32] - 8 baytlık kayıt başlığı
+RECORD_HEADER = struct.Struct('>II')
+SEGMENT_SUFFIX = '.seg'
+
+
+class BlockLogError(Exception):
+    """Kapalı (son olmayan) bir segmentte bozuk kayıt"""
+
+
+class LedgerStateError(RuntimeError):
+    """Bellekteki zincir/indeksler günlükten kurulamadı (açılışta ya da yazılmış bir partiden sonra); günlüğe dokunulmaz"""
+
+
+def _segment_name(first_index: int) -> str:
+    return f'{first_index:020d}{SEGMENT_SUFFIX}'
+
+
+def _fsync_directory(directory: Path):
+    """Yeni/silinen dosya adlarının kalıcı olması için dizini fsync et (POSIX)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _scan(data: bytes) -> Tuple[List[Tuple[int, bytes]], int]:
+    """
+    Segment içeriğindeki geçerli kayıtlar
+
+    Returns:
+        ([(kayıt ofseti, yük), ...], geçerli son bayt ofseti) - ofset
+        len(data)'dan küçükse sonrası yarım ya da bozuk kayıttır
+    """
+    records = []
+    offset, size = 0, len(data)
+    while offset + RECORD_HEADER.size <= size:
+        length, crc = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if not length or len(payload) < length or zlib.crc32(payload) != crc:
+            break  # boş kayıt yazılmaz: sıfır dolgu da geçersizdir
+        records.append((offset, payload))
+        offset = start + length
+    return records, offset
+
+
+def _is_torn_tail(data: bytes, offset: int, segment_bytes: int) -> bool:
+    """
+    `offset`teki geçersiz kayıt yarım yazım mı
+
+    Yarım yazım yalnızca son kaydı bozar: başlık eksiktir ya da segmente
+    sığabilecek uzunluktaki kaydın ardı boş/sıfır doludur ve yarım yükün
+    içinde geçerli bir kayıt yeniden başlamaz. Bozuk uzunluk alanı bu
+    koşulları sağlamaz; ardındaki geçerli kayıtlar kesilmemelidir.
+    """
+    if offset + RECORD_HEADER.size > len(data):
+        return True
+    length, _ = RECORD_HEADER.unpack_from(data, offset)
+    if offset and offset + length > segment_bytes:
+        return False  # append bu kaydı yeni segmente yazardı
+    start = offset + RECORD_HEADER.size
+    if data[start + length:].strip(b'\x00'):
+        return False
+    return not _has_record(data, offset + 1)
+
+
+def _has_record(data: bytes, start: int) -> bool:
+    """`start` ve sonrasındaki herhangi bir baytta CRC'si tutan bir kayıt başlıyor mu"""
+    for pos in range(start, len(data) - RECORD_HEADER.size + 1):
+        length, crc = RECORD_HEADER.unpack_from(data, pos)
+        end = pos + RECORD_HEADER.size + length
+        if length and end <= len(data) and zlib.crc32(data[pos + RECORD_HEADER.size:end]) == crc:
+            return True
+    return False
+
+
+class BlockLog:
+    """Segment dosyalarına bölünmüş, append-only blok günlüğü"""
+
+    def __init__(self, directory, segment_bytes: int = None,
+                 fsync_every: int = None, fsync_interval: float = None):
+        """
+        Args:
+            directory: Segment dizini
+            segment_bytes: Segment boyut sınırı (varsayılan: DASK_BLOCK_SEGMENT_MB, 64 MB)
+            fsync_every: Kaç kayıtta bir fsync (varsayılan: DASK_BLOCK_FSYNC_EVERY, 256)
+            fsync_interval: En fazla kaç saniyede bir fsync (varsayılan: DASK_BLOCK_FSYNC_MS, 50 ms)
+        """
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes or int(os.environ.get('DASK_BLOCK_SEGMENT_MB', 64)) * 1024 ** 2
+        self.fsync_every = fsync_every or int(os.environ.get('DASK_BLOCK_FSYNC_EVERY', 256))
+        self.fsync_interval = (fsync_interval if fsync_interval is not None
+                               else int(os.environ.get('DASK_BLOCK_FSYNC_MS', 50)) / 1000)
+
+        self._lock = Lock()
+        self._read_lock = Lock()
+        self._readers: Dict[int, int] = {}  # segmentin ilk pozisyonu → okuma fd'si
+        self._file = None
+        self._segment_first = 0     # aktif segmentin ilk blok pozisyonu
+        self._segment_size = 0
+        self._count = 0             # günlükteki toplam kayıt
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._recover()
+
+    # -------------------------------------------------------------------------
+    # AÇILIŞ / KURTARMA
+    # -------------------------------------------------------------------------
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """(ilk blok pozisyonu, yol) listesi, zincir sırasıyla"""
+        if not self.directory.is_dir():
+            return []
+        found = []
+        for path in self.directory.glob(f'*{SEGMENT_SUFFIX}'):
+            try:
+                found.append((int(path.stem), path))
+            except ValueError:
+                logger.warning(f"⚠️ Tanınmayan segment dosyası atlandı: {path.name}")
+        return sorted(found)
+
+    def _recover(self):
+        """
+        Son segmentin yarım kuyruğunu kes ve yazım konumunu belirle
+
+        Raises:
+            BlockLogError: Son segmentte ardında veri olan bozuk kayıt
+        """
+        segments = self.segments()
+        if not segments:
+            return
+
+        first, path = segments[-1]
+        data = path.read_bytes()
+        records, valid = _scan(data)
+        if valid < len(data) and not _is_torn_tail(data, valid, self.segment_bytes):
+            raise BlockLogError(f"{path.name}: {valid}. baytta bozuk kayıt, ardında veri var (yarım yazım değil)")
+        if valid < len(data):
+            logger.warning(f"⚠️ {path.name}: {len(data) - valid} baytlık yarım kayıt kesildi "
+                           f"({len(records)} geçerli kayıt)")
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._segment_first = first
+        self._segment_size = valid
+        self._count = first + len(records)
+
+    def __len__(self) -> int:
+        return self._count
+
+    # -------------------------------------------------------------------------
+    # YAZMA
+    # -------------------------------------------------------------------------
+
+    def _open_segment(self, first_index: int):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / _segment_name(first_index)
+        is_new = not path.exists()
+        self._file = open(path, 'ab')
+        self._segment_first = first_index
+        self._segment_size = self._file.tell()
+        if is_new:
+            _fsync_directory(self.directory)
+
+    def _rotate(self):
+        """Aktif segmenti kalıcı hale getirip kapat, yenisini aç"""
+        self._fsync()
+        self._file.close()
+        self._open_segment(self._count)
+
+    def _fsync(self):
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, payloads: List[bytes], sync: bool = False) -> List[Tuple[int, int]]:
+        """
+        Kayıtları günlüğün sonuna ekle
+
+        Args:
+            payloads: Blok yükleri (zincir sırasıyla)
+            sync: True ise dönmeden önce fsync (group commit beklenmez)
+
+        Returns:
+            Kayıtların konumları: [(segmentin ilk pozisyonu, bayt ofseti), ...]
+        """
+        locations = []
+        with self._lock:
+            if self._file is None:
+                self._open_segment(self._segment_first if self._count else 0)
+
+            for payload in payloads:
+                if self._segment_size and self._segment_size + len(payload) > self.segment_bytes:
+                    self._rotate()
+                record = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+                self._file.write(record)
+                locations.append((self._segment_first, self._segment_size))
+                self._segment_size += len(record)
+                self._count += 1
+                self._unsynced += 1
+
+            self._file.flush()
+            if (sync or self._unsynced >= self.fsync_every or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._fsync()
+            return locations
+
+    def sync(self):
+        """Bekleyen kayıtları tek fsync ile diske zorla"""
+        with self._lock:
+            self._fsync()
+
+    def reset(self):
+        """Tüm segmentleri sil (zincir baştan yazılacak)"""
+        with self._lock:
+            self._close_readers()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for _, path in self.segments():
+                path.unlink()
+            if self.directory.is_dir():
+                _fsync_directory(self.directory)
+            self._segment_first = self._segment_size = self._count = self._unsynced = 0
+
+    def truncate(self, count: int):
+        """
+        Günlüğü ilk `count` kayda kısalt (sadece son segmentin kuyruğu)
+
+        Açılışta çözülemeyen son kayıt için; kapalı segmentlere dokunulmaz.
+
+        Raises:
+            BlockLogError: Kesilecek kayıtlar son segmentte değil
+        """
+        with self._lock:
+            if count >= self._count:
+                return
+            first, path = self.segments()[-1]
+            if count < first:
+                raise BlockLogError(f"{path.name}: {count}. kayıt son segmentte değil, kesilmez")
+            records, _ = _scan(path.read_bytes())
+            offset = records[count - first][0]
+            self._close_readers()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+                f.flush()
+                os.fsync(f.fileno())
+            logger.warning(f"⚠️ {path.name}: çözülemeyen son {self._count - count} kayıt kesildi")
+            self._segment_first = first
+            self._segment_size = offset
+            self._count = count
+            self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            self._close_readers()
+            if self._file is not None:
+                self._fsync()
+                self._file.close()
+                self._file = None
+
+    # -------------------------------------------------------------------------
+    # OKUMA
+    # -------------------------------------------------------------------------
+
+    def scan(self, position: int = 0, location: Tuple[int, int] = (0, 0)) -> Iterator[Tuple[int, int, bytes]]:
+        """
+        Kayıtlar, zincir sırasıyla: (segmentin ilk pozisyonu, bayt ofseti, yük)
+
+        Segmentler tek tek okunur; bellekte aynı anda tek segment tutulur.
+        Varsayılan olarak tüm günlük taranır; `position` ve `location`
+        verilirse tarama o pozisyondaki kayıttan (ya da eklenecek kaydın
+        konumundan) başlar, önceki segmentler okunmaz.
+
+        Args:
+            position: İlk verilecek kaydın zincir pozisyonu
+            location: O kaydın konumu (segmentin ilk pozisyonu, bayt ofseti)
+
+        Raises:
+            BlockLogError: Son olmayan bir segmentte bozuk kayıt ya da
+                segmentler arasında boşluk varsa
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            segments = [(first, path) for first, path in self.segments() if first >= location[0]]
+
+        if position and (not segments or segments[0][0] != location[0]):
+            raise BlockLogError(f"{_segment_name(location[0])}: tarama başlangıç segmenti yok")
+        count = position
+        for number, (first, path) in enumerate(segments):
+            start = location[1] if number == 0 else 0
+            if (number or not position) and first != count:
+                raise BlockLogError(f"{path.name}: beklenen ilk blok {count}, bulunan {first}")
+            with open(path, 'rb') as f:
+                f.seek(start)
+                data = f.read()
+            records, valid = _scan(data)
+            if valid < len(data) and number < len(segments) - 1:
+                raise BlockLogError(f"{path.name}: {start + valid}. baytta bozuk kayıt")
+            for offset, payload in records:
+                yield first, start + offset, payload
+            count += len(records)
+
+    def read_all(self) -> List[bytes]:
+        """Tüm kayıtların yükleri, zincir sırasıyla (bkz. scan)"""
+        return [payload for _, _, payload in self.scan()]
+
+    def read(self, segment_first: int, offset: int) -> bytes:
+        """
+        Tek kaydın yükü (append/scan'in verdiği konumdan)
+
+        Raises:
+            BlockLogError: Kayıt eksik ya da CRC tutmuyor
+        """
+        fd = self._reader(segment_first)
+        header = self._pread(fd, RECORD_HEADER.size, offset)
+        if len(header) < RECORD_HEADER.size:
+            raise BlockLogError(f"{_segment_name(segment_first)}: {offset}. baytta kayıt yok")
+        length, crc = RECORD_HEADER.unpack(header)
+        payload = self._pread(fd, length, offset + RECORD_HEADER.size)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            raise BlockLogError(f"{_segment_name(segment_first)}: {offset}. baytta bozuk kayıt")
+        return payload
+
+    def _reader(self, segment_first: int) -> int:
+        fd = self._readers.get(segment_first)
+        if fd is None:
+            with self._read_lock:
+                fd = self._readers.get(segment_first)
+                if fd is None:
+                    path = self.directory / _segment_name(segment_first)
+                    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+                    self._readers[segment_first] = fd
+        return fd
+
+    def _pread(self, fd: int, size: int, offset: int) -> bytes:
+        if hasattr(os, 'pread'):
+            return os.pread(fd, size, offset)
+        with self._read_lock:  # Windows: pread yok, konum paylaşımlı
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+
+    def _close_readers(self):
+        with self._read_lock:
+            for fd in self._readers.values():
+                os.close(fd)
+            self._readers.clear()
+
+    def after_fork(self):
+        """fork edilmiş alt süreçte kilitleri yenile (üst süreçte tutulmuş olabilirler)"""
+        self._lock = Lock()
+        self._read_lock = Lock()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Tek Yazarlı Block Ekleme Hattı (Group Commit)
+===================================================
+
+Block'lar aynı anda birçok yerden eklenir: Flask istek thread'leri (giriş
+kaydı, ödeme emri/onayı, deprem), BlockchainManager worker thread'i. Her
+`add_block` yazma kilidini ayrı ayrı alır, kendi günlük yazımını ve
+(kritik kayıtlarda) kendi fsync'ini yapar; eşzamanlı çağıranlar kilitte
+sıraya girer.
+
+Bu hatta çağıranlar block verisini sınırlı bir kuyruğa bırakır ve bir
+Future alır. Tek yazar thread'i kuyruktan partiler toplar (en fazla
+`DASK_WRITER_BATCH` block) ve partiyi tek `add_blocks` çağrısıyla
+zincirler, hash'ler, indeksler ve günlüğe yazar. Bir parti yazılırken
+gelenler bir sonraki partide toplanır. Partide kalıcılık isteyen (durable)
+bir block varsa yazar `DASK_WRITER_DELAY_MS` milisaniye daha bekleyip
+gelenleri de ekler ve parti tek fsync ile diske iner; N eşzamanlı kritik
+kayıt N yerine bir fsync öder. Kalıcılık istemeyen tek block beklemez.
+
+    istek thread'leri ──submit()──▶ [sınırlı kuyruk] ──▶ yazar thread'i
+          ▲                                                 │
+          └──────────── Future.result() → Block ◀── add_blocks(parti)
+
+Çekişme yokken (kuyruk boş, yazma kilidi serbest) `Blockchain.add_block`
+block'u hatta bırakmadan doğrudan yazar; thread geçişi sadece eşzamanlı
+yazımlarda ödenir. Kuyruk doluysa `submit()` yer açılana kadar bekler
+(geri basınç). Parti günlüğe yazılmadan başarısız olursa block'lar tek
+tek yeniden denenir; sadece hatalı block'un Future'ı hata taşır. Günlüğe
+yazılmış partinin zinciri kurulamazsa (LedgerStateError) tekrar
+denenmez, tüm Future'lar hatayı taşır. Beklenmeyen bir hata da partinin
+Future'larını bozar ve yazar çalışmaya devam eder; thread yine de biterse
+yazar kapatılır (`submit()` BlockWriterClosed yükseltir, kuyrukta kalanlar
+hata taşır), böylece hiçbir Future sonsuza kadar beklemez.
+
+KULLANIM:
+    from block_writer import BlockWriter
+
+    writer = BlockWriter(blockchain)
+    writer.start()
+    future = writer.submit({'type': 'customer_login', ...})
+    block = future.result()                          # eklenen Block
+    writer.submit(payout_data, durable=True).result()  # fsync'li
+    writer.close()                                   # kuyruk boşaltılır
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import Future
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+from block_log import LedgerStateError
+
+logger = logging.getLogger(__name__)
+
+# Parti üst sınırı (block), fsync'li partide ek toplama süresi (ms), kuyruk kapasitesi
+WRITER_BATCH = int(os.environ.get('DASK_WRITER_BATCH', 256))
+WRITER_DELAY_MS = float(os.environ.get('DASK_WRITER_DELAY_MS', 2))
+WRITER_QUEUE = int(os.environ.get('DASK_WRITER_QUEUE', 10000))
+
+_STOP = object()
+
+
+class BlockWriterClosed(RuntimeError):
+    """Kapatılmış yazara block gönderildi"""
+
+
+class BlockWriter:
+    """Blockchain için tek yazar thread'i (bkz. modül açıklaması)"""
+
+    def __init__(self, blockchain, batch_size: int = None, delay_ms: float = None, queue_size: int = None):
+        self.blockchain = blockchain
+        self.batch_size = max(1, batch_size or WRITER_BATCH)
+        self.delay = (WRITER_DELAY_MS if delay_ms is None else delay_ms) / 1000
+        self._queue: Queue = Queue(maxsize=queue_size or WRITER_QUEUE)
+        self._thread: Optional[Thread] = None
+        self._state_lock = Lock()
+        self._closed = False
+        self._committing = False
+        # Parti sayısı, block sayısı, fsync'li parti sayısı
+        self.stats = {'batches': 0, 'blocks': 0, 'durable_batches': 0}
+
+    @property
+    def idle(self) -> bool:
+        """Kuyrukta block yok ve parti yazılmıyor (çağıran doğrudan yazabilir)"""
+        return not self._committing and self._queue.empty()
+
+    def start(self) -> 'BlockWriter':
+        with self._state_lock:
+            if self._thread is None and not self._closed:
+                self._thread = Thread(target=self._run, name='block-writer', daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, data: Dict, durable: bool = False, timeout: float = None) -> Future:
+        """
+        Block verisini kuyruğa bırak
+
+        Args:
+            data: Block verisi
+            durable: True ise Future, parti fsync edildikten sonra tamamlanır
+            timeout: Kuyruk doluysa en fazla bu kadar bekle (None = yer açılana kadar)
+
+        Returns:
+            Eklenen Block'u döndürecek Future
+
+        Raises:
+            BlockWriterClosed: Yazar kapatılmış
+            queue.Full: `timeout` içinde kuyrukta yer açılmadı
+        """
+        future: Future = Future()
+        with self._state_lock:  # kapanış işaretinden sonra kuyruğa block girmesin
+            if self._closed:
+                raise BlockWriterClosed("Block yazarı kapatıldı")
+            self._queue.put((data, durable, future), timeout=timeout)
+        return future
+
+    def close(self, timeout: float = 30.0):
+        """Yeni gönderimleri durdur, kuyruktakileri yaz, thread'i bitir"""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put((_STOP, False, None))
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # -------------------------------------------------------------------------
+    # YAZAR THREAD'İ
+    # -------------------------------------------------------------------------
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            # Normal kapanışta kuyruk boştur; beklenmedik çıkışta bekleyenler bırakılmaz
+            with self._state_lock:
+                self._closed = True
+            while True:
+                try:
+                    _, _, future = self._queue.get_nowait()
+                except Empty:
+                    break
+                if future is not None and future.set_running_or_notify_cancel():
+                    future.set_exception(BlockWriterClosed("Block yazarı beklenmedik şekilde durdu"))
+
+    def _loop(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            if batch[0][0] is _STOP:
+                break
+            # Parti: kuyrukta bekleyenler hemen; fsync'li partide `delay` süre daha
+            durable = batch[0][1]
+            deadline = time.monotonic() + self.delay
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except Empty:
+                    remaining = deadline - time.monotonic()
+                    if not durable or remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except Empty:
+                        break
+                if item[0] is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                durable = durable or item[1]
+            self._committing = True
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.exception(f"❌ Block partisi beklenmeyen hatayla yazılamadı: {e}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                self._committing = False
+
+    def _commit(self, batch: List[Tuple[Dict, bool, Future]]):
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        durable = any(item[1] for item in batch)
+        try:
+            blocks = self.blockchain.add_blocks([item[0] for item in batch], save_to_disk=durable)
+        except LedgerStateError as e:
+            # Parti günlükte; tek tek denemek block'ları ikinci kez ekler
+            logger.error(f"❌ Block partisi günlüğe yazıldı ama zincir kurulamadı: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+                return
+            # Hatalı block'u ayır: tek tek dene (parti öncesi hiçbir şey yazılmadı)
+            logger.warning(f"⚠️ Block partisi yazılamadı ({e}), block'lar tek tek deneniyor")
+            for data, item_durable, future in batch:
+                try:
+                    block, = self.blockchain.add_blocks([data], save_to_disk=item_durable)
+                    future.set_result(block)
+                except Exception as item_error:
+                    future.set_exception(item_error)
+            return
+        self.stats['batches'] += 1
+        self.stats['blocks'] += len(blocks)
+        self.stats['durable_batches'] += durable
+        for (_, _, future), block in zip(batch, blocks):
+            future.set_result(block)
@@ -36,11 +36,14 @@ from typing import Dict, Optional, List
 
 # Blockchain service'i import et (artık src/ klasöründe)
 try:
-    from blockchain_service import BlockchainService
+    from blockchain_service import BLOCK_BATCH_SIZE, BlockchainService
 except ImportError:
     BlockchainService = None
+    BLOCK_BATCH_SIZE = 10000
     logging.warning("⚠️ blockchain_service modülü yüklenemedi. Blockchain devre dışı olacak.")
 
+from portfolio_storage import get_storage
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -183,16 +186,7 @@ class BlockchainManager:
         if not self.enabled:
             return None
         
-        # Duplicate kontrolü - zaten kaydedilmiş mi?
-        policy_id = policy_data.get('policy_id') or policy_data.get('policy_number')
-        if self.skip_existing and policy_id and policy_id in self.recorded_policies:
-            with self.stats_lock:
-                self.stats['policies_skipped'] += 1
-            return None
-        
-        # Filtreleme (hem max_coverage hem coverage_amount destekle)
-        coverage = policy_data.get('max_coverage') or policy_data.get('coverage_amount', 0)
-        if coverage < self.threshold['policy_min_coverage']:
+        if not self._should_record_policy(policy_data):
             with self.stats_lock:
                 self.stats['policies_skipped'] += 1
             return None
@@ -213,35 +207,52 @@ class BlockchainManager:
         # Senkron mod
         return self._record_policy_sync(policy_data)
     
+    def _should_record_policy(self, policy_data: Dict) -> bool:
+        """Duplicate ve teminat eşiği kontrolü"""
+        # Duplicate kontrolü - zaten kaydedilmiş mi?
+        policy_id = policy_data.get('policy_id') or policy_data.get('policy_number')
+        if self.skip_existing and policy_id and policy_id in self.recorded_policies:
+            return False
+        
+        # Filtreleme (hem max_coverage hem coverage_amount destekle)
+        coverage = policy_data.get('max_coverage') or policy_data.get('coverage_amount', 0)
+        return coverage >= self.threshold['policy_min_coverage']
+    
+    @staticmethod
+    def _policy_arguments(policy_data: Dict) -> Optional[Dict]:
+        """create_policy_on_chain argümanları (eksik veri varsa None)"""
+        # Veri doğrulama - None değerleri kontrol et
+        coverage = policy_data.get('max_coverage') or policy_data.get('coverage_amount')
+        latitude = policy_data.get('latitude')
+        longitude = policy_data.get('longitude')
+        premium = policy_data.get('annual_premium_tl') or policy_data.get('annual_premium', 0)
+        
+        # Gerekli alanların None olup olmadığını kontrol et
+        if coverage is None or latitude is None or longitude is None:
+            logger.warning(f"⚠️ Eksik veri, policy atlandı: coverage={coverage}, lat={latitude}, lon={longitude}")
+            return None
+        
+        # Coverage ve premium'u int/float'a çevir
+        return {
+            'customer_id': policy_data.get('customer_id'),
+            'coverage_amount': int(float(coverage)),
+            'latitude': float(latitude),
+            'longitude': float(longitude),
+            'premium': int(float(premium)),
+            'package_type': policy_data.get('package_type', 'Standart')
+        }
+    
     def _record_policy_sync(self, policy_data: Dict) -> Optional[int]:
         """Poliçeyi senkron kaydet"""
         try:
-            # Veri doğrulama - None değerleri kontrol et
-            coverage = policy_data.get('max_coverage') or policy_data.get('coverage_amount')
-            latitude = policy_data.get('latitude')
-            longitude = policy_data.get('longitude')
-            premium = policy_data.get('annual_premium_tl') or policy_data.get('annual_premium', 0)
-            
-            # Gerekli alanların None olup olmadığını kontrol et
-            if coverage is None or latitude is None or longitude is None:
-                logger.warning(f"⚠️ Eksik veri, policy atlandı: coverage={coverage}, lat={latitude}, lon={longitude}")
+            arguments = self._policy_arguments(policy_data)
+            if arguments is None:
                 with self.stats_lock:
                     self.stats['policies_skipped'] += 1
                 return None
             
-            # Coverage ve premium'u int/float'a çevir
-            coverage = int(float(coverage))
-            premium = int(float(premium))
-            latitude = float(latitude)
-            longitude = float(longitude)
-            
             policy_id = self.blockchain.create_policy_on_chain(
-                customer_id=policy_data.get('customer_id'),
-                coverage_amount=coverage,
-                latitude=latitude,
-                longitude=longitude,
-                premium=premium,
-                package_type=policy_data.get('package_type', 'Standart'),
+                **arguments,
                 verbose=False  # Toplu yüklemede verbose kapalı
             )
             
@@ -421,6 +432,9 @@ class BlockchainManager:
         """
         buildings.csv'den toplu poliçe kaydı
         
+        Poliçeler (asenkron modda da) kuyruğa alınmaz; BLOCK_BATCH_SIZE'lık
+        partiler halinde tek `add_blocks` çağrısıyla zincire yazılır.
+        
         Args:
             limit: Kaç poliçe kaydedilecek (None=hepsi)
         
@@ -431,14 +445,14 @@ class BlockchainManager:
             logger.warning("⚠️ Blockchain devre dışı, toplu kayıt yapılamıyor")
             return {'success': False, 'message': 'Blockchain devre dışı'}
         
-        buildings_file = Path(self.data_dir) / 'buildings.csv'
+        storage = get_storage(str(self.data_dir))
         
-        if not buildings_file.exists():
-            logger.error(f"❌ Bina verisi bulunamadı: {buildings_file}")
+        if not storage.exists('buildings'):
+            logger.error(f"❌ Bina verisi bulunamadı: {storage.path('buildings')}")
             return {'success': False, 'message': 'Veri dosyası bulunamadı'}
         
         try:
-            df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+            df = storage.read('buildings')
             
             if limit:
                 df = df.head(limit)
@@ -448,6 +462,7 @@ class BlockchainManager:
             recorded = 0
             skipped = 0
             errors = 0
+            pending = []  # create_policy_on_chain argümanları (parti)
             
             for idx, row in df.iterrows():
                 try:
@@ -471,24 +486,31 @@ class BlockchainManager:
                         'policy_number': str(row.get('policy_number', f"DP-{row['building_id']}"))
                     }
                     
-                    result = self.record_policy(policy_data)
-                    
-                    if result is not None and result >= 0:
-                        recorded += 1
-                    elif result == -1:
-                        recorded += 1  # Kuyruğa eklendi
-                    else:
+                    arguments = self._policy_arguments(policy_data) if self._should_record_policy(policy_data) else None
+                    if arguments is None:
                         skipped += 1
+                        continue
+                    pending.append(arguments)
                     
                 except Exception as e:
                     logger.warning(f"⚠️ Satır {idx} işlenirken hata: {e}")
                     errors += 1
                     skipped += 1
                 
-                # İlerleme göstergesi
-                if (idx + 1) % 100 == 0:
+                # Parti dolunca tek add_blocks ile zincire yaz
+                if len(pending) >= BLOCK_BATCH_SIZE:
+                    batch_recorded, batch_errors = self._record_policy_batch(pending)
+                    recorded += batch_recorded
+                    errors += batch_errors
+                    pending = []
                     logger.info(f"   📊 İlerleme: {idx + 1}/{len(df)}")
             
+            batch_recorded, batch_errors = self._record_policy_batch(pending)
+            recorded += batch_recorded
+            errors += batch_errors
+            with self.stats_lock:
+                self.stats['policies_skipped'] += skipped
+            
             logger.info(f"✅ Toplu kayıt tamamlandı: {recorded} kaydedildi, {skipped} atlandı")
             
             return {
@@ -503,6 +525,17 @@ class BlockchainManager:
             logger.error(f"❌ Toplu kayıt hatası: {e}")
             return {'success': False, 'message': str(e)}
     
+    def _record_policy_batch(self, batch: List[Dict]):
+        """Poliçe partisini tek add_blocks ile kaydet: (kaydedilen, hatalı)"""
+        if not batch:
+            return 0, 0
+        policy_ids = self.blockchain.create_policies_on_chain(batch)
+        failed = policy_ids.count(None)
+        with self.stats_lock:
+            self.stats['policies_recorded'] += len(policy_ids) - failed
+            self.stats['errors'] += failed
+        return len(policy_ids) - failed, failed
+    
     def bulk_sync_with_logging(self, batch_size: int = 100) -> Dict:
         """
         Detaylı loglama ile toplu blockchain senkronizasyonu
@@ -520,15 +553,15 @@ class BlockchainManager:
             logger.warning("⚠️ Blockchain devre dışı")
             return {'success': False, 'message': 'Blockchain devre dışı'}
         
-        buildings_file = Path(self.data_dir) / 'buildings.csv'
+        storage = get_storage(str(self.data_dir))
         
-        if not buildings_file.exists():
-            logger.error(f"❌ Veri dosyası bulunamadı: {buildings_file}")
+        if not storage.exists('buildings'):
+            logger.error(f"❌ Veri dosyası bulunamadı: {storage.path('buildings')}")
             return {'success': False, 'message': 'Veri dosyası bulunamadı'}
         
         try:
-            # CSV yükle
-            df = pd.read_csv(buildings_file, encoding='utf-8-sig')
+            # Bina verisini depolama backend'inden yükle
+            df = storage.read('buildings')
             df = df.dropna(subset=['latitude', 'longitude'])
             
             logger.info(f"✅ {len(df)} geçerli poliçe yüklendi")
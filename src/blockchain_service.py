@@ -5,6 +5,41 @@ DASK+ Blockchain Service - Basit Simülatör (Prototip)
 
 Basit blockchain simülatörü - karmaşık özellikler olmadan.
 
+Zincir `data/blockchain_segments/` altındaki append-only segmentli blok
+günlüğünde saklanır (bkz. block_log.py); eski `data/blockchain.dat`
+pickle dosyası ilk açılışta bir kez içe aktarılır.
+
+Doğrulama artımlıdır: doğrulanmış önekin son bloğu (pozisyon + hash) bir
+su seviyesi (watermark) olarak tutulur, `is_valid()` sadece sonradan
+eklenen blokları kontrol eder. Su seviyesi düzenli olarak HMAC imzalı bir
+checkpoint dosyasına yazılır (anahtar kuruluma özel, bkz. ledger_key.py); yeniden başlatmada doğrulama genesis'ten
+değil son checkpoint'ten devam eder. `is_valid(full_audit=True)` tüm
+zinciri baştan doğrular; uzun aralıklar segmentlere bölünüp bir worker
+havuzunda paralel doğrulanır (bkz. chain_verifier.py).
+
+Her `DASK_MERKLE_WINDOW` block'luk pencerenin Merkle kökü zincire bir
+`merkle_checkpoint` block'u olarak yazılır; `inclusion_proof()` tek bir
+block için O(log n) dahil olma kanıtı döndürür (bkz. merkle.py).
+
+Zincirden türeyen durum (başlıklar, indeksler, ödeme emri projeksiyonu,
+defter toplamları) imzalı anlık görüntülere yazılır (bkz. header_index.py):
+temiz kapanışta (`close()`), toplu yüklemelerden sonra ve her
+`DASK_LEDGER_SNAPSHOT_EVERY` yeni block'ta bir (ekleme sadece durumu yakalar,
+yazım arka planda). Son `DASK_LEDGER_SNAPSHOT_KEEP`
+nesil saklanır, eskileri silinir. Açılış en yeni kullanılabilir görüntüyü
+mmap ile okur ve günlükte sadece ondan sonra eklenen kuyruğu oynatır;
+doğrulama da son checkpoint'ten devam ettiğinden açılış ve çökme sonrası
+kurtarma süresi zincir uzunluğuyla değil son görüntüden beri eklenen
+block'larla büyür.
+
+Ödeme emirlerinin durumu (onaylayan admin'ler, gerçekleşme) her block
+eklenirken bir projeksiyonda güncellenir (`Blockchain.payouts`, bkz.
+payout_projection.py); onay/ödeme uç noktaları zinciri taramaz.
+
+Block zamanları monoton bir zaman indeksinde (defter zamanı) ve saatlik
+sayaçlarda tutulur (`Blockchain.positions_between`, `Blockchain.activity`,
+bkz. time_index.py); zaman pencereleri ikili arama ile bulunur.
+
 KULLANIM:
     from blockchain_service import BlockchainService
     
@@ -24,10 +59,17 @@ import sys
 import os
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, Optional, List
+from typing import Dict, Iterable, Optional, List, Sequence, Tuple
 import json
 import hashlib
+import hmac
 import pickle
+import struct
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock, Thread
 
 # UTF-8 encoding fix
 if sys.platform == 'win32':
@@ -42,30 +84,163 @@ from dask_plus_simulator import (
     EarthquakeEvent,
     PayoutRequest
 )
+from block_log import BlockLog, BlockLogError, LedgerStateError
+from ledger_key import load_ledger_key
+from header_index import HeaderIndexError, open_header_index, write_header_index
+from merkle import merkle_proof, merkle_root, verify_proof
+from payout_projection import PayoutApprovalRejected, PayoutProjection
+from block_writer import BlockWriter, BlockWriterClosed
+from ledger_totals import LedgerTotals
+from time_index import TimeIndex
+from chain_query import ChainQueryIndex, positions_before, run_query
+from chain_verifier import verify_chain
 
 
 # =============================================================================
 # BLOCKCHAIN KAYIT YAPISI (Immutable, Hash'li, Zincirli)
 # =============================================================================
 
+def _policy_key(data: Dict):
+    """Poliçe kimliği: app kayıtlarında policy_number, servis/ödeme kayıtlarında policy_id"""
+    value = data.get('policy_number')
+    return value if value not in (None, 'N/A') else data.get('policy_id')
+
+
+# İkincil indeksler: alan adı → block verisinden anahtar çıkaran fonksiyon
+# (anahtar None ise block o indekse girmez)
+INDEXED_FIELDS = {
+    'customer_id': lambda data: data.get('customer_id'),
+    'policy': _policy_key,
+    'request_id': lambda data: data.get('request_id'),
+    'approver': lambda data: data.get('admin') if data.get('type') == 'payout_approval' else None,
+}
+
+# Checkpoint/anlık görüntü imza anahtarı (boşsa kuruluma özel anahtar dosyası,
+# bkz. ledger_key.py) ve checkpoint sıklığı (kaç yeni doğrulanmış blokta bir yazılır)
+CHECKPOINT_KEY = os.environ.get('DASK_CHECKPOINT_KEY')
+CHECKPOINT_EVERY = int(os.environ.get('DASK_CHECKPOINT_EVERY', 1000))
+
+# Merkle penceresi: kaç block'ta bir kök checkpoint block'u yazılır
+MERKLE_WINDOW = int(os.environ.get('DASK_MERKLE_WINDOW', 1024))
+MERKLE_CHECKPOINT_TYPE = 'merkle_checkpoint'
+
+# Toplu yükleyicilerin add_blocks parti boyutu
+BLOCK_BATCH_SIZE = int(os.environ.get('DASK_BLOCK_BATCH', 10000))
+
+# ChainStore LRU önbelleğindeki block sayısı (data'sı yüklü sıcak block'lar)
+BLOCK_CACHE_SIZE = int(os.environ.get('DASK_BLOCK_CACHE', 4096))
+
+# Block formatı sürümleri (bkz. Block.calculate_hash)
+LEGACY_BLOCK_VERSION = 0     # f-string + json.dumps(sort_keys=True) hash'i
+BLOCK_VERSION = 1            # kanonik ikili başlık + kanonik yük
+_BLOCK_HEADER = struct.Struct('>BqdqH')  # sürüm, index, timestamp, nonce, len(previous_hash)
+
+# Hazır JSON encoder'lar (her çağrıda json.dumps encoder kurmasın)
+_LEGACY_JSON = json.JSONEncoder(sort_keys=True)      # json.dumps(..., sort_keys=True) ile birebir aynı
+_RECORD_JSON = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+_CANONICAL_JSON = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+_DATA_FIELD = b',"data":'
+
+# Başlık/indeks yan dosyası (bkz. header_index.py); alanları değişince sürüm artar
+HEADER_INDEX_NAME = 'headers.idx'
+HEADER_INDEX_FORMAT = 6
+
+# Durum anlık görüntüsü: kaç yeni block'ta bir yazılır (0 = sadece kapanış/toplu
+# yükleme), kaç nesil saklanır (headers.idx en yenisi, headers.1.idx bir öncesi, ...)
+SNAPSHOT_EVERY = int(os.environ.get('DASK_LEDGER_SNAPSHOT_EVERY', 100000))
+SNAPSHOT_KEEP = max(1, int(os.environ.get('DASK_LEDGER_SNAPSHOT_KEEP', 2)))
+
+
 class Block:
     """
     Blockchain Block - Gerçek blockchain mantığı ile
     Her block bir önceki block'un hash'ini içerir (chain)
+    
+    Hash formatı block'ta saklanan `version` ile belirlenir:
+    
+    - v0 (eski): SHA-256(f"{index}{timestamp}{json.dumps(data, sort_keys=True)}{previous_hash}{nonce}")
+    - v1: SHA-256(başlık || previous_hash || yük)
+        başlık = struct '>BqdqH' (sürüm, index, timestamp, nonce, len(previous_hash))
+        yük    = data'nın kanonik UTF-8 JSON'u (sıralı anahtarlar, boşluksuz)
+    
+    Yeni block'lar v1 yazılır; günlükteki v0 block'lar kendi formatıyla
+    doğrulanmaya devam eder. Yük bir kez hesaplanıp block üzerinde
+    saklanır (günlükten okunan v1 block'larda kaydın kendisinden alınır);
+    doğrulama, günlük kaydı ve arama aynı baytları kullanır. Block verisi
+    değiştirilmez kabul edilir; derin denetim yükü data'dan yeniden üretir.
+    
+    ChainStore'dan gelen block'lar sadece başlıkla kurulur; `data` ve
+    `payload` ilk erişimde blok günlüğünden okunur.
     """
     
-    def __init__(self, index: int, timestamp: float, data: Dict, previous_hash: str):
+    __slots__ = ('index', 'timestamp', 'previous_hash', 'hash', 'nonce', 'version',
+                 '_data', '_payload', '_store', '_position')
+    
+    def __init__(self, index: int, timestamp: float, data: Dict, previous_hash: str,
+                 version: int = BLOCK_VERSION):
         self.index = index
         self.timestamp = timestamp
-        self.data = data  # Poliçe/deprem/ödeme verisi
+        self._data = data  # Poliçe/deprem/ödeme verisi
+        self._payload = None
+        self._store = None
+        self._position = index
         self.previous_hash = previous_hash
         self.nonce = 0
+        self.version = version
         self.hash = self.calculate_hash()
     
+    @property
+    def data(self) -> Dict:
+        """Block verisi (ChainStore block'larında ilk erişimde günlükten okunur)"""
+        if self._data is None and self._store is not None:
+            self._load()
+        return self._data
+    
+    @data.setter
+    def data(self, value: Dict):
+        self._data = value
+    
+    @property
+    def payload(self) -> bytes:
+        """data'nın kanonik baytları (ilk erişimde hesaplanır, saklanır)"""
+        if self._payload is None:
+            if self._data is None and self._store is not None:
+                self._load()
+            if self._payload is None:
+                self._payload = _CANONICAL_JSON.encode(self.data).encode('utf-8')
+        return self._payload
+    
+    def _load(self):
+        """Günlük kaydından data (ve v1 ise kanonik yük)"""
+        record = Block.decode(self._store.record(self._position))
+        self._data = record._data
+        if self._payload is None:
+            self._payload = record._payload
+    
     def calculate_hash(self) -> str:
-        """Block hash hesapla (SHA-256)"""
-        block_string = f"{self.index}{self.timestamp}{json.dumps(self.data, sort_keys=True)}{self.previous_hash}{self.nonce}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        """Block hash hesapla (SHA-256, block'un format sürümüyle)"""
+        if self.version == LEGACY_BLOCK_VERSION:
+            block_string = f"{self.index}{self.timestamp}{_LEGACY_JSON.encode(self.data)}{self.previous_hash}{self.nonce}"
+            return hashlib.sha256(block_string.encode()).hexdigest()
+        if self.version != BLOCK_VERSION:
+            raise ValueError(f"Desteklenmeyen block formatı: v{self.version}")
+        
+        previous_hash = self.previous_hash.encode('utf-8')
+        header = _BLOCK_HEADER.pack(self.version, self.index, self.timestamp, self.nonce, len(previous_hash))
+        return hashlib.sha256(header + previous_hash + self.payload).hexdigest()
+    
+    def hash_matches(self, deep: bool = False) -> bool:
+        """
+        Saklanan hash yeniden hesaplananla aynı mı
+        
+        Args:
+            deep: True ise saklanan yük atılıp data'dan yeniden üretilir
+                (bellekte değiştirilmiş data'yı da yakalar)
+        """
+        if deep:
+            self.data  # ChainStore block'unda önce günlükten oku
+            self._payload = None
+        return self.hash == self.calculate_hash()
     
     def to_dict(self) -> Dict:
         """Block'u dict'e çevir"""
@@ -75,8 +250,271 @@ class Block:
             'data': self.data,
             'previous_hash': self.previous_hash,
             'hash': self.hash,
-            'nonce': self.nonce
+            'nonce': self.nonce,
+            'version': self.version
         }
+    
+    @classmethod
+    def from_dict(cls, record: Dict) -> 'Block':
+        """to_dict() çıktısından block kur (hash yeniden hesaplanmaz, saklanan korunur)"""
+        block = cls.__new__(cls)
+        block.__setstate__(record)
+        return block
+    
+    def __getstate__(self) -> Dict:
+        return self.to_dict()
+    
+    def __setstate__(self, state):
+        """to_dict() çıktısı ya da eski (__slots__ öncesi) pickle'ların __dict__'i"""
+        if isinstance(state, tuple):  # (__dict__, slots)
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self.index = state['index']
+        self.timestamp = state['timestamp']
+        self._data = state['data']
+        self.previous_hash = state['previous_hash']
+        self.hash = state['hash']
+        self.nonce = state.get('nonce', 0)
+        self.version = state.get('version', LEGACY_BLOCK_VERSION)
+        self._payload = None
+        self._store = None
+        self._position = self.index
+    
+    def encode(self) -> bytes:
+        """
+        Blok günlüğü kaydı (UTF-8 JSON)
+        
+        v1 kayıtlarında `data` son alandır ve kanonik yükün kendisidir;
+        okurken yük yeniden serileştirilmeden kayıttan alınır.
+        """
+        if self.version == LEGACY_BLOCK_VERSION:
+            return _RECORD_JSON.encode(self.to_dict()).encode('utf-8')
+        header = (f'{{"index":{self.index},"timestamp":{_RECORD_JSON.encode(self.timestamp)},'
+                  f'"previous_hash":{_RECORD_JSON.encode(self.previous_hash)},"hash":"{self.hash}",'
+                  f'"nonce":{self.nonce},"version":{self.version}')
+        return header.encode('utf-8') + _DATA_FIELD + self.payload + b'}'
+    
+    @classmethod
+    def decode(cls, payload: bytes) -> 'Block':
+        block = cls.from_dict(json.loads(payload))
+        if block.version != LEGACY_BLOCK_VERSION:
+            start = payload.find(_DATA_FIELD)
+            if start >= 0 and payload.endswith(b'}'):
+                block._payload = payload[start + len(_DATA_FIELD):-1]
+        return block
+
+
+class ChainStore:
+    """
+    Zincirin kompakt bellek içi görünümü (block listesi gibi kullanılır)
+    
+    Her block için bellekte sadece sabit boyutlu başlık tutulur (~51 bayt):
+    
+        timestamp  array('d')       8 bayt
+        hash       bytearray       32 bayt (ham SHA-256)
+        tip        array('H')       2 bayt (tip adları tablosuna kod)
+        sürüm      array('B')       1 bayt
+        ofset      array('Q')       8 bayt (segment içindeki kayıt ofseti)
+    
+    index pozisyonun kendisidir; previous_hash bir önceki block'un hash'idir.
+    Bu varsayımlara uymayan alanlar (genesis'in '0' previous_hash'i, bozuk
+    bir kayıt) block bazında `_overrides` sözlüğünde saklanır, böylece
+    bozulmalar doğrulamada aynen görünür.
+    
+    `chain[i]` başlıktan bir Block kurar; data/yük ilk erişimde blok
+    günlüğünden okunur (pread). Son erişilen DASK_BLOCK_CACHE block
+    (varsayılan 4096) LRU önbellekte tutulur; yeni eklenen block'lar da
+    önbelleğe tam haliyle girer.
+    """
+    
+    def __init__(self, log: BlockLog, cache_size: int = None):
+        self.log = log
+        self.cache_size = cache_size or BLOCK_CACHE_SIZE
+        self._cache: 'OrderedDict[int, Block]' = OrderedDict()
+        self._cache_lock = Lock()
+        self.clear()
+    
+    def clear(self):
+        """Tüm başlıkları ve önbelleği boşalt"""
+        self._timestamps = array('d')
+        self._hashes = bytearray()
+        self._types = array('H')
+        self._versions = array('B')
+        self._offsets = array('Q')
+        self._segment_firsts: List[int] = []   # segment ilk pozisyonları (artan)
+        self._type_names: List[Optional[str]] = []
+        self._type_codes: Dict[Optional[str], int] = {}
+        self._overrides: Dict[int, Dict] = {}
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def __len__(self) -> int:
+        return len(self._timestamps)
+    
+    def append(self, block: Block, location: Tuple[int, int], cache: bool = True):
+        """
+        Günlüğe yazılmış block'un başlığını ekle
+        
+        Args:
+            block: Eklenen block (data'sı yüklü)
+            location: Günlükteki konumu (segmentin ilk pozisyonu, bayt ofseti)
+            cache: Block'u tam haliyle LRU önbelleğe al (yükleme sırasında False)
+        """
+        position = len(self)
+        segment_first, offset = location
+        if not self._segment_firsts or self._segment_firsts[-1] != segment_first:
+            self._segment_firsts.append(segment_first)
+        
+        overrides = {}
+        if block.index != position:
+            overrides['index'] = block.index
+        if type(block.timestamp) is not float:
+            overrides['timestamp'] = block.timestamp
+        if block.nonce:
+            overrides['nonce'] = block.nonce
+        if block.previous_hash != (self._hash_at(position - 1) if position else None):
+            overrides['previous_hash'] = block.previous_hash
+        try:
+            digest = bytes.fromhex(block.hash)
+        except (TypeError, ValueError):
+            digest = b''
+        if len(digest) != 32:
+            overrides['hash'] = block.hash
+            digest = bytes(32)
+        
+        block_type = block.data.get('type') if isinstance(block.data, dict) else None
+        code = self._type_codes.get(block_type)
+        if code is None:
+            code = self._type_codes[block_type] = len(self._type_names)
+            self._type_names.append(block_type)
+        
+        self._hashes += digest
+        self._types.append(code)
+        self._versions.append(block.version)
+        self._offsets.append(offset)
+        if overrides:
+            self._overrides[position] = overrides
+        if cache:
+            self._remember(position, block)
+        # Uzunluk (len) en son: kilitsiz okuyucu yarım eklenmiş başlık görmez
+        self._timestamps.append(block.timestamp if 'timestamp' not in overrides else 0.0)
+    
+    def _hash_at(self, position: int) -> str:
+        override = self._overrides.get(position)
+        if override and 'hash' in override:
+            return override['hash']
+        return self._hashes[position * 32:position * 32 + 32].hex()
+    
+    def timestamp(self, position: int) -> float:
+        """Block zaman damgası (data okunmadan)"""
+        override = self._overrides.get(position)
+        if override and 'timestamp' in override:
+            return override['timestamp']
+        return self._timestamps[position]
+    
+    def block_type(self, position: int) -> Optional[str]:
+        """Block tipi (data okunmadan)"""
+        return self._type_names[self._types[position]]
+    
+    def record(self, position: int) -> bytes:
+        """Block'un günlük kaydı (diskten)"""
+        return self.log.read(*self.location(position))
+    
+    def _materialize(self, position: int) -> Block:
+        block = Block.__new__(Block)
+        block.index = position
+        block.timestamp = self._timestamps[position]
+        block.previous_hash = self._hash_at(position - 1) if position else None
+        block.hash = self._hashes[position * 32:position * 32 + 32].hex()
+        block.nonce = 0
+        block.version = self._versions[position]
+        for field_name, value in self._overrides.get(position, {}).items():
+            setattr(block, field_name, value)
+        block._data = None
+        block._payload = None
+        block._store = self
+        block._position = position
+        return block
+    
+    def _remember(self, position: int, block: Block):
+        with self._cache_lock:
+            self._cache[position] = block
+            self._cache.move_to_end(position)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[position] for position in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(f"Zincir dışında block: {key}")
+        
+        with self._cache_lock:
+            block = self._cache.get(key)
+            if block is not None:
+                self._cache.move_to_end(key)
+                return block
+        block = self._materialize(key)
+        self._remember(key, block)
+        return block
+    
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+    
+    # Başlık sütunları (yan dosyaya ham baytlarıyla yazılır, bkz. header_index.py)
+    COLUMNS = ('timestamps', 'hashes', 'types', 'versions', 'offsets')
+    
+    def columns(self) -> Dict[str, object]:
+        """Sütun adı → dizi (kopyalanmadan)"""
+        return {name: getattr(self, f'_{name}') for name in self.COLUMNS}
+    
+    @staticmethod
+    def column_prefixes(columns: Dict[str, object], count: int) -> Dict[str, object]:
+        """`columns()` dizilerinin ilk `count` block'luk kopyası (yazar eklemeye devam edebilir)"""
+        return {name: column[:count * (32 if name == 'hashes' else 1)] for name, column in columns.items()}
+    
+    def state(self) -> Dict:
+        """Sütun dışı başlık durumu (segmentler, tip adları, istisnalar; kopya)"""
+        return {
+            'segment_firsts': list(self._segment_firsts),
+            'type_names': list(self._type_names),
+            'overrides': dict(self._overrides),
+        }
+    
+    def restore(self, columns: Dict[str, memoryview], state: Dict):
+        """Başlıkları yan dosyadan kur (sütunlar toplu kopyalanır)"""
+        self.clear()
+        for name in self.COLUMNS:
+            column = getattr(self, f'_{name}')
+            if isinstance(column, bytearray):
+                column += columns[name]
+            else:
+                column.frombytes(columns[name])
+        count = len(self._timestamps)
+        if not (len(self._hashes) == 32 * count and
+                len(self._types) == len(self._versions) == len(self._offsets) == count):
+            self.clear()
+            raise ValueError("Başlık sütunlarının uzunlukları tutarsız")
+        self._segment_firsts = list(state['segment_firsts'])
+        self._type_names = list(state['type_names'])
+        self._type_codes = {name: code for code, name in enumerate(self._type_names)}
+        self._overrides = dict(state['overrides'])
+    
+    def location(self, position: int) -> Tuple[int, int]:
+        """Block'un günlükteki konumu (segmentin ilk pozisyonu, bayt ofseti)"""
+        return self._segment_firsts[bisect_right(self._segment_firsts, position) - 1], self._offsets[position]
+    
+    def after_fork(self):
+        """fork edilmiş alt süreçte kilitleri yenile (bkz. chain_verifier)"""
+        self._cache_lock = Lock()
+        self.log.after_fork()
+    
+    def memory_bytes(self) -> int:
+        """Başlık dizilerinin bellek kullanımı (önbellek hariç)"""
+        return sum(sys.getsizeof(column) for column in (
+            self._timestamps, self._hashes, self._types, self._versions, self._offsets))
 
 
 class Blockchain:
@@ -90,33 +528,117 @@ class Blockchain:
     def __init__(self, chain_file: str = None, auto_save_interval: int = 1000):
         """
         Args:
-            chain_file: Blockchain dosya yolu
-            auto_save_interval: Kaç block'ta bir otomatik kaydet (0 = otomatik kaydetme)
+            chain_file: Eski pickle dosyası yolu (blockchain.dat); segment dizini
+                yanında `<ad>_segments/` olarak tutulur
+            auto_save_interval: Kaç block'ta bir fsync zorlansın (0 = sadece group commit)
         """
         self.chain_file = chain_file or str(Path(__file__).parent.parent / 'data' / 'blockchain.dat')
-        self.chain: List[Block] = []
+        chain_path = Path(self.chain_file)
+        try:
+            self.log = BlockLog(chain_path.parent / f'{chain_path.stem}_segments')
+        except BlockLogError as e:
+            print(f"❌ Blok günlüğü açılamadı: {e}; segmentlere dokunulmadı")
+            raise LedgerStateError(f"Blok günlüğü açılamadı: {e}") from e
+        # Checkpoint ve anlık görüntü imzaları için kuruluma özel anahtar
+        self._key = load_ledger_key(chain_path.with_suffix('.key'), CHECKPOINT_KEY)
+        # Kompakt başlıklar; data/yük istendiğinde günlükten (bkz. ChainStore)
+        self.chain = ChainStore(self.log)
         self.auto_save_interval = auto_save_interval
         self.blocks_since_last_save = 0
+        self._write_lock = Lock()  # tek yazar: zincir sonu + günlük + indeksler
+        # reset_to_genesis'te artar: uzun okuyucular (akışlı dışa aktarma)
+        # okudukları pozisyonların hâlâ aynı defterde olduğunu doğrular
+        self.generation = 0
+        # Tek tek eklemeler için group commit hattı (ilk add_block'ta başlar), bkz. block_writer.py
+        self.writer: Optional[BlockWriter] = None
+        self._writer_lock = Lock()
+        
+        # Tip → block pozisyonları (artan sıralı; zincir sadece sona eklenir)
+        self._type_positions: Dict[Optional[str], array] = {}
+        # Alan → {anahtar (str) → block pozisyonları}, bkz. INDEXED_FIELDS
+        self._field_positions: Dict[str, Dict[str, List[int]]] = {field_name: {} for field_name in INDEXED_FIELDS}
+        # Ödeme emri durumları (onaylar, gerçekleşme), bkz. payout_projection.py
+        self.payouts = PayoutProjection()
+        # Yapılandırılmış arama indeksleri (token, tutar), bkz. chain_query.py
+        self.query_index = ChainQueryIndex()
+        # Servis toplamları (teminat, prim, ödemeler, poliçe sayacı), bkz. ledger_totals.py
+        self.totals = LedgerTotals()
+        # Monoton defter zamanı + saatlik sayaçlar (zaman pencereleri, histogram), bkz. time_index.py
+        self.time_index = TimeIndex()
+        
+        # Doğrulanmış önek: (son doğrulanmış block pozisyonu, hash'i)
+        self.checkpoint_file = self.log.directory / 'checkpoint.json'
+        self.header_index_file = self.log.directory / HEADER_INDEX_NAME
+        # Son anlık görüntünün (headers.idx) block sayısı; periyodik yazım buna göre
+        self._snapshot_blocks = 0
+        # Periyodik görüntüyü yazan arka plan thread'i (aynı anda en fazla bir tane)
+        self._snapshot_thread: Optional[Thread] = None
+        self._verify_lock = Lock()
+        self._verified: Tuple[int, Optional[str]] = (0, None)
+        self._checkpoint_index = 0
+        # Son doğrulama turunun istatistiği (block sayısı, süre, blocks/s, worker)
+        self.last_audit: Optional[Dict] = None
         
         # Genesis block oluştur veya mevcut chain'i yükle
         self._load_or_create_genesis()
+        self._resume_from_checkpoint()
     
     def _load_or_create_genesis(self):
-        """Genesis block oluştur veya mevcut chain'i yükle"""
+        """Blok günlüğünü yükle; yoksa eski pickle'ı içe aktar ya da genesis oluştur"""
         chain_path = Path(self.chain_file)
         
-        if chain_path.exists():
-            # Mevcut blockchain'i yükle
+        # Mevcut defter hiçbir hatada boş bir chain ile değiştirilmez: sadece
+        # çözülemeyen son kayıt kesilir (yarım yazım), diğer her hata açılışı durdurur
+        if len(self.log):
             try:
-                with open(chain_path, 'rb') as f:
-                    self.chain = pickle.load(f)
-                print(f"📦 Blockchain yüklendi: {len(self.chain)} block")
+                # Anlık görüntü varsa sadece ondan sonra eklenen kuyruk taranır
+                loaded = self._load_header_index()
+                if not loaded:
+                    self._scan_log(repair_tail=True)
             except Exception as e:
-                print(f"⚠️ Blockchain yükleme hatası: {e}, yeni chain oluşturuluyor")
-                self._create_genesis_block()
-        else:
-            # Genesis block oluştur
-            self._create_genesis_block()
+                print(f"❌ Blok günlüğü yüklenemedi: {e} ({self.log.directory}); segmentlere dokunulmadı")
+                raise LedgerStateError(f"Blok günlüğü yüklenemedi: {e}") from e
+            print(f"📦 Blockchain yüklendi: {len(self.chain)} block ({len(self.log.segments())} segment"
+                  + (f", görüntüden {loaded}, kuyruk {len(self.chain) - loaded}" if loaded else "") + ")")
+            if len(self.chain):
+                return
+        elif chain_path.exists():
+            try:
+                self.import_pickle(chain_path)
+                return
+            except Exception as e:
+                self.chain.clear()
+                self.log.reset()  # yarım aktarım; pickle dosyası yerinde kalır
+                print(f"❌ Blockchain pickle aktarılamadı: {e} ({chain_path})")
+                raise LedgerStateError(f"Blockchain pickle aktarılamadı: {e}") from e
+        
+        # Genesis block oluştur
+        self._create_genesis_block()
+    
+    def import_pickle(self, pickle_path) -> int:
+        """
+        Eski tüm-zincir pickle dosyasını blok günlüğüne bir kez aktar
+        
+        Aktarım bitince dosya `<ad>.imported` olarak yeniden adlandırılır
+        (yedek); sonraki açılışlar sadece günlüğü okur.
+        
+        Returns:
+            Aktarılan block sayısı
+        """
+        pickle_path = Path(pickle_path)
+        with open(pickle_path, 'rb') as f:
+            chain = [Block.from_dict(block.to_dict()) for block in pickle.load(f)]
+        
+        self._discard_header_index()
+        self.log.reset()
+        locations = self.log.append([block.encode() for block in chain], sync=True)
+        self.chain.clear()
+        for block, location in zip(chain, locations):
+            self.chain.append(block, location, cache=False)
+        self._rebuild_indexes()
+        pickle_path.replace(pickle_path.with_name(pickle_path.name + '.imported'))
+        print(f"📦 Blockchain pickle'dan blok günlüğüne aktarıldı: {len(chain)} block")
+        return len(chain)
     
     def _create_genesis_block(self):
         """Genesis block (ilk block)"""
@@ -126,73 +648,663 @@ class Blockchain:
             data={'type': 'genesis', 'message': 'DASK+ Blockchain Genesis Block'},
             previous_hash='0'
         )
-        self.chain.append(genesis_block)
-        # Genesis block için diske kaydet (sadece ilk kez)
-        self._save_chain()
+        location, = self.log.append([genesis_block.encode()], sync=True)
+        self.chain.append(genesis_block, location)
+        self._rebuild_indexes()
         print("🔗 Genesis block oluşturuldu")
     
     def add_block(self, data: Dict, save_to_disk: bool = False) -> Block:
         """
         Yeni block ekle
         
+        Yazma kilidi boşta ve yazar kuyruğu boşsa block doğrudan yazılır
+        (çekişme yok, thread geçişi yok). Aksi halde tek yazar hattına
+        bırakılır; eşzamanlı çağıranların block'ları tek partide zincirlenip
+        günlüğe yazılır (bkz. block_writer.py).
+        
         Args:
             data: Block verisi
-            save_to_disk: True ise hemen diske kaydet, False ise sadece memory'de tut
+            save_to_disk: True ise dönmeden önce fsync (kritik kayıt; partiyle
+                ortak tek fsync); False ise group commit ile diske iner
         """
-        previous_block = self.chain[-1]
-        new_block = Block(
-            index=len(self.chain),
-            timestamp=datetime.now().timestamp(),
-            data=data,
-            previous_hash=previous_block.hash
-        )
+        writer = self.writer
+        if (writer is None or writer.idle) and self._write_lock.acquire(blocking=False):
+            try:
+                return self._append_blocks([data], save_to_disk)[0]
+            finally:
+                self._write_lock.release()
+        try:
+            return self.submit_block(data, save_to_disk).result()
+        except BlockWriterClosed:
+            return self.add_blocks([data], save_to_disk=save_to_disk)[0]
+    
+    def add_payout_approval(self, data: Dict, save_to_disk: bool = True) -> Tuple[Block, Dict]:
+        """
+        Ödeme emri onayını ekle; emrin durumu yazma kilidi altında yeniden kontrol edilir
+        
+        Kontrol ile ekleme arasında başka block yazılamaz: aynı admin'in
+        eşzamanlı onaylarından ya da ödemeyle yarışan onaydan sadece geçerli
+        olanı zincire girer.
+        
+        Args:
+            data: payout_approval block verisi (request_id, admin, ...)
+            save_to_disk: True ise dönmeden önce fsync
+        
+        Returns:
+            (eklenen block, onaydan hemen sonraki emir durumu - PayoutState.to_dict())
+        
+        Raises:
+            PayoutApprovalRejected: Emir yok, gerçekleşmiş ya da admin zaten onaylamış
+        """
+        with self._write_lock:
+            reason = self.payouts.approval_rejection(data.get('request_id'), data.get('admin'))
+            if reason is not None:
+                raise PayoutApprovalRejected(reason)
+            block, = self._append_blocks([data], save_to_disk)
+            return block, self.payouts.get(data['request_id']).to_dict()
+    
+    def submit_block(self, data: Dict, save_to_disk: bool = False) -> Future:
+        """
+        Block'u yazar hattına bırak, beklemeden Future döndür
         
-        self.chain.append(new_block)
-        self.blocks_since_last_save += 1
+        Sonucu beklenmeyen kayıtlar (giriş denetim izi gibi) için; Future
+        eklenen Block'u ya da ekleme hatasını taşır.
         
-        # Otomatik kaydetme kontrolü (her N block'ta bir)
-        if self.auto_save_interval > 0 and self.blocks_since_last_save >= self.auto_save_interval:
-            self._save_chain()
+        Raises:
+            BlockWriterClosed: Zincir kapatılmış
+        """
+        writer = self.writer
+        if writer is None:
+            with self._writer_lock:
+                if self.writer is None:
+                    self.writer = BlockWriter(self).start()
+                writer = self.writer
+        return writer.submit(data, durable=save_to_disk)
+    
+    def add_blocks(self, items: Iterable[Dict], save_to_disk: bool = False) -> List[Block]:
+        """
+        Block'ları toplu ekle (toplu yükleyiciler için)
+        
+        Yazma kilidi bir kez alınır; hash'ler tek döngüde hesaplanır, parti
+        tek kayıt çağrısıyla günlüğe yazılır, indeksler parti sonunda
+        güncellenir. Partideki block'lar aynı zaman damgasını taşır. Dolan
+        Merkle pencerelerinin checkpoint block'ları araya eklenir.
+        
+        Args:
+            items: Block verileri (zincir sırasıyla)
+            save_to_disk: True ise dönmeden önce fsync
+        
+        Returns:
+            `items` sırasıyla eklenen block'lar (checkpoint block'ları hariç)
+        """
+        with self._write_lock:
+            return self._append_blocks(items, save_to_disk)
+    
+    def _append_blocks(self, items: Iterable[Dict], save_to_disk: bool) -> List[Block]:
+        """add_blocks gövdesi (yazma kilidi alınmış olmalı)"""
+        timestamp = datetime.now().timestamp()
+        previous_hash = self.chain[-1].hash
+        position = len(self.chain)
+        window_start = self._merkle_window_start()
+        
+        new_blocks: List[Block] = []
+        added: List[Block] = []
+        for data in items:
+            block = Block(position, timestamp, data, previous_hash)
+            new_blocks.append(block)
+            added.append(block)
+            previous_hash = block.hash
+            position += 1
+            
+            # Pencere dolduysa kökü checkpoint block'u olarak araya ekle
+            if data.get('type') != MERKLE_CHECKPOINT_TYPE and position - window_start >= MERKLE_WINDOW:
+                offset = window_start - len(self.chain)
+                window = (self.chain[window_start:] if offset < 0 else []) + new_blocks[max(offset, 0):]
+                block = Block(position, timestamp, {
+                    'type': MERKLE_CHECKPOINT_TYPE,
+                    'start': window_start,
+                    'end': position,
+                    'root': merkle_root([block.hash for block in window])
+                }, previous_hash)
+                new_blocks.append(block)
+                previous_hash = block.hash
+                window_start = position
+                position += 1
+        
+        if not new_blocks:
+            return added
+        
+        # Otomatik fsync (her N block'ta bir) ya da kritik kayıt
+        self.blocks_since_last_save += len(new_blocks)
+        checkpoint = self.auto_save_interval > 0 and self.blocks_since_last_save >= self.auto_save_interval
+        locations = self.log.append([block.encode() for block in new_blocks], sync=save_to_disk or checkpoint)
+        if save_to_disk or checkpoint:
             self.blocks_since_last_save = 0
-            print(f"💾 Otomatik kayıt: {len(self.chain)} block")
         
-        # Manuel kaydetme
-        if save_to_disk:
-            self._save_chain()
+        # Önce başlıklar, sonra indeksler: kilitsiz okuyucunun indeksten aldığı
+        # her pozisyon zincirde vardır. Parti günlükte kalıcı olduğu için bu adım
+        # yarım kalırsa bellek günlükten yeniden kurulur.
+        first = len(self.chain)
+        try:
+            for block, location in zip(new_blocks, locations):
+                self.chain.append(block, location)
+            for position, block in enumerate(new_blocks, first):
+                self._index_block(position, block)
+        except Exception as e:
+            print(f"⚠️ Block partisi indekslenemedi ({e}), zincir günlükten yeniden kuruluyor")
+            try:
+                self._scan_log()
+            except Exception as rebuild_error:
+                raise LedgerStateError(f"Zincir günlükten kurulamadı: {rebuild_error}") from e
+        
+        # Periyodik anlık görüntü: çökme sonrası açılış sadece bundan sonrasını oynatır.
+        # Burada sadece durum yakalanır; serileştirme ve fsync arka planda
+        if SNAPSHOT_EVERY > 0 and len(self.chain) - self._snapshot_blocks >= SNAPSHOT_EVERY:
+            self._start_snapshot()
+        return added
+    
+    def reset_to_genesis(self):
+        """Genesis dışındaki tüm blokları sil ve günlüğü baştan yaz (senkronizasyon öncesi)"""
+        with self._write_lock:
+            # Günlük silinmeden önce: okuyucu kaydı okuduktan sonra nesli kontrol eder
+            self.generation += 1
+            genesis = self.chain[0]
+            record = genesis.encode()  # günlük silinmeden önce (data günlükten okunur)
+            self._discard_header_index()
+            self.log.reset()
+            location, = self.log.append([record], sync=True)
+            self.chain.clear()
+            self.chain.append(Block.decode(record), location)
+            self._rebuild_indexes()
             self.blocks_since_last_save = 0
+    
+    def _index_block(self, position: int, block: Block):
+        """Block'u tip ve ikincil alan indekslerine ekle"""
+        data = block.data
+        block_type = data.get('type')
+        positions = self._type_positions.get(block_type)
+        if positions is None:
+            positions = self._type_positions[block_type] = array('q')  # 8 bayt/block
+        positions.append(position)
+        for field_name, key_of in INDEXED_FIELDS.items():
+            key = key_of(data)
+            if key is not None:
+                self._field_positions[field_name].setdefault(str(key), []).append(position)
+        self.payouts.apply(position, data)
+        self.query_index.add(position, data)
+        self.totals.apply(position, data)
+        self.time_index.add(position, block.timestamp, block_type)
+    
+    def _scan_log(self, repair_tail: bool = False):
+        """
+        Zinciri ve indeksleri günlüğün tamamından kur (anlık görüntü olmadan)
+        
+        Kayıtlar tek tek çözülür: başlık saklanır, indekslenir, data bırakılır.
         
-        return new_block
+        Args:
+            repair_tail: Çözülemeyen kayıt günlüğün son kaydıysa kes (açılış);
+                aksi halde ve ortadaki kayıtlarda hata yükselir
+        """
+        self.chain.clear()
+        self._clear_indexes()
+        for segment_first, offset, payload in self.log.scan():
+            position = len(self.chain)
+            try:
+                block = Block.decode(payload)
+            except Exception as e:
+                if not repair_tail or position != len(self.log) - 1:
+                    raise
+                print(f"⚠️ Son block kaydı çözülemedi ({e}), günlük {position} block'a kesiliyor")
+                self.log.truncate(position)
+                break
+            self.chain.append(block, (segment_first, offset), cache=False)
+            self._index_block(position, block)
+    
+    def _clear_indexes(self):
+        self._type_positions = {}
+        self._field_positions = {field_name: {} for field_name in INDEXED_FIELDS}
+        self.payouts = PayoutProjection()
+        self.query_index = ChainQueryIndex()
+        self.totals = LedgerTotals()
+        self.time_index = TimeIndex()
+    
+    def _rebuild_indexes(self):
+        """Tip ve alan indekslerini zincirden yeniden kur (pickle aktarımı, sıfırlama)"""
+        self._clear_indexes()
+        for position, block in enumerate(self.chain):
+            self._index_block(position, block)
     
     def _save_chain(self):
-        """Blockchain'i diske kaydet (binary, immutable)"""
+        """Bekleyen blokları diske zorla (tek fsync; bloklar zaten günlükte)"""
         try:
-            chain_path = Path(self.chain_file)
-            chain_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(chain_path, 'wb') as f:
-                pickle.dump(self.chain, f)
+            self.log.sync()
+            self.blocks_since_last_save = 0
         except Exception as e:
             print(f"⚠️ Blockchain kaydetme hatası: {e}")
     
-    def is_valid(self) -> bool:
-        """Blockchain'in geçerliliğini kontrol et"""
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i - 1]
+    # -------------------------------------------------------------------------
+    # BAŞLIK/İNDEKS YAN DOSYASI: DURUM ANLIK GÖRÜNTÜLERİ (bkz. header_index.py)
+    # -------------------------------------------------------------------------
+    
+    def snapshot_files(self) -> List[Path]:
+        """Anlık görüntü nesilleri, en yeniden eskiye (var olsun olmasın)"""
+        return [self.header_index_file] + [
+            self.log.directory / f'{Path(HEADER_INDEX_NAME).stem}.{generation}{Path(HEADER_INDEX_NAME).suffix}'
+            for generation in range(1, SNAPSHOT_KEEP)]
+    
+    def save_header_index(self) -> bool:
+        """
+        Başlıkları ve türetilmiş durumu anlık görüntüye yaz (temiz kapanış,
+        toplu yükleme sonu; ayrıca her SNAPSHOT_EVERY block'ta bir otomatik)
+        
+        Sonraki açılış günlüğü baştan çözmek yerine bu dosyayı okur ve
+        sadece sonradan eklenen block'ları tarar.
+        
+        Returns:
+            Dosya yazıldıysa True
+        """
+        with self._write_lock:
+            return self._write_snapshot()
+    
+    def _write_snapshot(self) -> bool:
+        """Anlık görüntüyü hemen yaz (yazma kilidi alınmış olmalı)"""
+        self.wait_for_snapshot()  # arka plandaki görüntüyle nesil kaydırma çakışmasın
+        if not len(self.chain):
+            return False
+        if len(self.chain) == self._snapshot_blocks and self.header_index_file.exists():
+            return True  # son görüntüden beri block eklenmedi
+        return self._store_snapshot(*self._capture_snapshot())
+    
+    def _start_snapshot(self):
+        """Periyodik anlık görüntüyü arka planda yaz (yazma kilidi alınmış olmalı)"""
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return  # önceki görüntü sürüyor; sonraki eklemede tekrar denenir
+        self._snapshot_thread = Thread(target=self._store_snapshot, args=self._capture_snapshot(),
+                                       name='ledger-snapshot', daemon=True)
+        self._snapshot_thread.start()
+    
+    def wait_for_snapshot(self, timeout: float = None):
+        """Arka planda yazılan anlık görüntü varsa bitmesini bekle"""
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _capture_snapshot(self) -> Tuple[Dict, Dict, Dict]:
+        """
+        Anlık görüntünün durumunu yakala (yazma kilidi alınmış olmalı)
+        
+        Sadece sözlükler kopyalanır; sona eklenen diziler referansla alınır
+        ve `_store_snapshot` onları meta'daki block sayısına kırpar. Böylece
+        kilit altındaki iş anahtar sayısıyla sınırlı kalır.
+        
+        Returns:
+            (meta, sütunlar, durum)
+        """
+        last = len(self.chain) - 1
+        meta = {
+            'format': HEADER_INDEX_FORMAT,
+            'blocks': len(self.chain),
+            'last_location': list(self.chain.location(last)),
+            'last_hash': self.chain[last].hash,
+            'byteorder': sys.byteorder,
+            'fields': list(INDEXED_FIELDS),
+            'created_at': datetime.now().isoformat()
+        }
+        state = {
+            'chain': self.chain.state(),
+            'types': dict(self._type_positions),
+            'fields': {field_name: dict(keys) for field_name, keys in self._field_positions.items()},
+            'payouts': self.payouts.state(),
+            'query': self.query_index.state(),
+            'totals': self.totals.state(),
+            'time': self.time_index.state(),
+        }
+        return meta, self.chain.columns(), state
+    
+    def _store_snapshot(self, meta: Dict, columns: Dict, state: Dict) -> bool:
+        """Yakalanan durumu kırpıp yaz, önceki nesilleri kaydır (kilit gerekmez)"""
+        count = meta['blocks']
+        # Sadece düz veri: dosyadan nesne kurulmaz, indeksler restore() ile
+        state = dict(state,
+                     types=positions_before(state['types'], count),
+                     fields={field_name: positions_before(keys, count)
+                             for field_name, keys in state['fields'].items()},
+                     query=ChainQueryIndex.trim_state(state['query'], count),
+                     time=TimeIndex.trim_state(state['time'], count))
+        try:
+            self.log.sync()  # görüntü diske inmemiş block'u göstermesin
+            files = self.snapshot_files()
+            for older, newer in zip(reversed(files), reversed(files[:-1])):
+                if newer.exists():
+                    os.replace(newer, older)
+            write_header_index(self.header_index_file, meta, ChainStore.column_prefixes(columns, count),
+                               state, self._key)
+            self._snapshot_blocks = count
+            return True
+        except OSError as e:
+            print(f"⚠️ Yan dosya kaydetme hatası: {e}")
+            return False
+    
+    def _load_header_index(self) -> int:
+        """
+        Başlıkları ve türetilmiş durumu en yeni kullanılabilir anlık
+        görüntüden kur, günlüğün kuyruğunu oynat
+        
+        Bozuk ya da günlükle eşleşmeyen görüntü atlanıp bir önceki nesil
+        denenir.
+        
+        Returns:
+            Görüntüden alınan block sayısı (0 ise görüntü kullanılmadı, zincir boştur)
+        """
+        for generation, path in enumerate(self.snapshot_files()):
+            try:
+                count = self._load_snapshot(path)
+            except FileNotFoundError:
+                continue
+            except Exception as e:  # görüntü sadece hızlandırır; her hatada bir önceki nesil
+                print(f"⚠️ Yan dosya kullanılamadı ({path.name}): {e}")
+                self.chain.clear()
+                self._clear_indexes()
+                continue
+            if generation == 0:
+                self._snapshot_blocks = count
+            return count
+        return 0
+    
+    def _load_snapshot(self, path: Path) -> int:
+        """
+        Tek anlık görüntüyü yükle ve kuyruğu oynat
+        
+        Görüntünün son block'u günlükten okunup hash'i karşılaştırılır;
+        günlük sıfırlanmış ya da kısalmışsa görüntü kullanılmaz.
+        
+        Returns:
+            Görüntüdeki block sayısı
+        """
+        with open_header_index(path, self._key) as index:
+            meta = index.meta
+            if (meta.get('format') != HEADER_INDEX_FORMAT or meta.get('byteorder') != sys.byteorder or
+                    meta.get('fields') != list(INDEXED_FIELDS)):
+                raise HeaderIndexError("Yan dosya bu sürümle uyumsuz")
+            count = meta['blocks']
+            if not 0 < count <= len(self.log):
+                raise HeaderIndexError(f"Yan dosya {count} block, günlük {len(self.log)} block")
+            state = index.state
+            self.chain.restore({name: index.column(name) for name in ChainStore.COLUMNS}, state['chain'])
+        self._clear_indexes()
+        self._type_positions = state['types']
+        self._field_positions = state['fields']
+        self.payouts.restore(state['payouts'])
+        self.query_index.restore(state['query'])
+        self.totals.restore(state['totals'])
+        self.time_index.restore(state['time'])
+        if len(self.chain) != count:
+            raise HeaderIndexError("Yan dosya sütunları meta ile uyuşmuyor")
+        
+        # Kuyruk: görüntünün son block'undan itibaren (ilk kayıt eşleşme kontrolü)
+        records = self.log.scan(count - 1, tuple(meta['last_location']))
+        _, _, payload = next(records, (None, None, None))
+        last_hash = meta['last_hash']
+        if payload is None or Block.decode(payload).hash != last_hash or self.chain[count - 1].hash != last_hash:
+            raise HeaderIndexError("Yan dosya blok günlüğüyle eşleşmiyor")
+        for segment_first, offset, payload in records:
+            block = Block.decode(payload)
+            position = len(self.chain)
+            self.chain.append(block, (segment_first, offset), cache=False)
+            self._index_block(position, block)
+        return count
+    
+    def _discard_header_index(self):
+        """Tüm anlık görüntü nesillerini sil (zincir baştan yazılacak)"""
+        self.wait_for_snapshot()  # eski zincirin görüntüsü silindikten sonra yazılmasın
+        for path in self.snapshot_files():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._snapshot_blocks = 0
+    
+    def close(self):
+        """
+        Temiz kapanış: kuyruğu doğrulayıp checkpoint'i ilerlet, yan dosyayı
+        yaz ve günlüğü kapat
+        """
+        with self._writer_lock:
+            if self.writer is None:
+                self.writer = BlockWriter(self)  # kapalı: sonraki add_block doğrudan yazar
+            self.writer.close()  # kuyruktaki block'lar yazılır
+        if self.verify() is None and self._verified[0] > self._checkpoint_index:
+            self._write_checkpoint(*self._verified)
+        self.save_header_index()
+        self.log.close()
+    
+    # -------------------------------------------------------------------------
+    # MERKLE CHECKPOINT'LERİ VE DAHİL OLMA KANITLARI
+    # -------------------------------------------------------------------------
+    
+    def _merkle_window_start(self) -> int:
+        """Henüz kökü yazılmamış pencerenin ilk block pozisyonu"""
+        checkpoints = self.positions_by_type(MERKLE_CHECKPOINT_TYPE)
+        return self.chain[checkpoints[-1]].data['end'] if checkpoints else 0
+    
+    def _merkle_window(self, position: int) -> Tuple[int, int, Optional[Block]]:
+        """Pozisyonu içeren pencere: (başlangıç, bitiş, checkpoint block'u ya da None)"""
+        checkpoints = self.positions_by_type(MERKLE_CHECKPOINT_TYPE)
+        
+        # Pencereler ardışıktır: 'end' değeri pozisyondan büyük ilk checkpoint (ikili arama)
+        lo, hi = 0, len(checkpoints)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.chain[checkpoints[mid]].data['end'] <= position:
+                lo = mid + 1
+            else:
+                hi = mid
+        
+        if lo < len(checkpoints):
+            checkpoint = self.chain[checkpoints[lo]]
+            return checkpoint.data['start'], checkpoint.data['end'], checkpoint
+        return self._merkle_window_start(), len(self.chain), None
+    
+    def inclusion_proof(self, position: int) -> Optional[Dict]:
+        """
+        Tek block için Merkle dahil olma kanıtı
+        
+        Doğrulayan taraf block'un hash'ini kendi verisinden hesaplar
+        (Block.calculate_hash), kanıt yolu ile kökü bulur ve kökü zincirdeki
+        checkpoint block'unun köküyle karşılaştırır. Pencerenin kökü henüz
+        yazılmadıysa `checkpoint` None'dır ve kök o anki bloklardan hesaplanır.
+        
+        Returns:
+            Kanıt sözlüğü; pozisyon zincir dışındaysa None
+        """
+        if not 0 <= position < len(self.chain):
+            return None
+        
+        start, end, checkpoint = self._merkle_window(position)
+        block_hashes = [block.hash for block in self.chain[start:end]]
+        root = merkle_root(block_hashes)
+        proof = merkle_proof(block_hashes, position - start)
+        block = self.chain[position]
+        
+        return {
+            'block': block.to_dict(),
+            'window': {'start': start, 'end': end},
+            'leaf_index': position - start,
+            'proof': proof,
+            'root': root,
+            'checkpoint': {
+                'index': checkpoint.index,
+                'hash': checkpoint.hash,
+                'root': checkpoint.data['root']
+            } if checkpoint else None,
+            'valid': (block.hash == block.calculate_hash() and
+                      verify_proof(block.hash, proof, checkpoint.data['root'] if checkpoint else root))
+        }
+    
+    def _first_invalid_merkle_root(self) -> Optional[Tuple[int, str]]:
+        """Kökü pencere bloklarıyla tutmayan ilk checkpoint block'u"""
+        for position in self.positions_by_type(MERKLE_CHECKPOINT_TYPE):
+            data = self.chain[position].data
+            block_hashes = [block.hash for block in self.chain[data['start']:data['end']]]
+            if merkle_root(block_hashes) != data['root']:
+                return position, 'Merkle root mismatch'
+        return None
+    
+    # -------------------------------------------------------------------------
+    # DOĞRULAMA (artımlı, checkpoint'li)
+    # -------------------------------------------------------------------------
+    
+    def _checkpoint_signature(self, index: int, block_hash: str) -> str:
+        message = f'{index}:{block_hash}'.encode()
+        return hmac.new(self._key, message, hashlib.sha256).hexdigest()
+    
+    def _resume_from_checkpoint(self):
+        """İmzası ve hash'i tutan son checkpoint'i doğrulanmış önek olarak al"""
+        self._verified = (0, self.chain[0].hash)
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            index, block_hash = int(checkpoint['index']), checkpoint['hash']
+        except FileNotFoundError:
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Checkpoint okunamadı: {e}, doğrulama genesis'ten başlayacak")
+            return
+        
+        signature = self._checkpoint_signature(index, block_hash)
+        if not hmac.compare_digest(signature, str(checkpoint.get('signature', ''))):
+            print("⚠️ Checkpoint imzası geçersiz, doğrulama genesis'ten başlayacak")
+        elif index >= len(self.chain) or self.chain[index].hash != block_hash:
+            print(f"⚠️ Checkpoint (block {index}) zincirle eşleşmiyor, doğrulama genesis'ten başlayacak")
+        else:
+            self._verified = (index, block_hash)
+            self._checkpoint_index = index
+    
+    def _write_checkpoint(self, index: int, block_hash: str):
+        """Doğrulanmış öneki imzalı checkpoint olarak kaydet (atomik)"""
+        self.log.sync()  # checkpoint diske inmemiş bloğu göstermesin
+        checkpoint = {
+            'index': index,
+            'hash': block_hash,
+            'signature': self._checkpoint_signature(index, block_hash),
+            'created_at': datetime.now().isoformat()
+        }
+        try:
+            tmp_path = self.checkpoint_file.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.checkpoint_file)
+            self._checkpoint_index = index
+        except OSError as e:
+            print(f"⚠️ Checkpoint kaydetme hatası: {e}")
+    
+    def verify(self, full_audit: bool = False) -> Optional[Tuple[int, str]]:
+        """
+        Zinciri doğrula, ilk bozuk block'u döndür
+        
+        Sadece doğrulanmış önekten (watermark) sonra eklenen block'lar
+        kontrol edilir (uzun aralıklar paralel, bkz. chain_verifier.py).
+        Önekin son block'u zincirde yoksa ya da hash'i değiştiyse
+        (ör. reset_to_genesis) doğrulama baştan yapılır.
+        
+        Args:
+            full_audit: True ise tüm zincir genesis'ten yeniden doğrulanır,
+                kanonik yükler data'dan yeniden üretilir ve Merkle checkpoint
+                kökleri yeniden hesaplanır
+        
+        Returns:
+            (pozisyon, neden) ya da zincir geçerliyse None
+        """
+        with self._verify_lock:
+            chain = self.chain
+            index, block_hash = self._verified
+            if full_audit or index >= len(chain) or chain[index].hash != block_hash:
+                index = 0
+                self._checkpoint_index = 0
             
-            # Hash kontrolü
-            if current_block.hash != current_block.calculate_hash():
-                return False
+            # Uzun aralıklar segmentlere bölünüp worker havuzunda doğrulanır
+            failure, self.last_audit = verify_chain(chain, index + 1, deep=full_audit)
+            if failure is None and full_audit:
+                failure = self._first_invalid_merkle_root()
+            last = failure[0] - 1 if failure else len(chain) - 1
+            self._verified = (last, chain[last].hash)
             
-            # Zincir kontrolü
-            if current_block.previous_hash != previous_block.hash:
-                return False
-        
-        return True
+            if failure is None and (full_audit or last - self._checkpoint_index >= CHECKPOINT_EVERY):
+                self._write_checkpoint(last, chain[last].hash)
+            return failure
+    
+    def is_valid(self, full_audit: bool = False) -> bool:
+        """Blockchain'in geçerliliğini kontrol et (bkz. verify)"""
+        return self.verify(full_audit) is None
+    
+    @property
+    def verified_height(self) -> int:
+        """Doğrulanmış önekin son block pozisyonu"""
+        return self._verified[0]
     
     def get_blocks_by_type(self, block_type: str) -> List[Block]:
         """Belirli tip block'ları getir"""
-        return [block for block in self.chain if block.data.get('type') == block_type]
+        return [self.chain[position] for position in self.positions_by_type(block_type)]
+    
+    def positions_by_type(self, block_type: str) -> Sequence[int]:
+        """
+        Belirli tip block'ların zincir pozisyonları (artan sıralı)
+        
+        Dönen liste indeksin kendisidir, DEĞİŞTİRİLMEMELİDİR; keyset
+        sayfalama bu liste üzerinde ikili arama yapar.
+        """
+        return self._type_positions.get(block_type, array('q'))
+    
+    def positions_by(self, field_name: str, key) -> List[int]:
+        """
+        İkincil indeksten block pozisyonları (artan sıralı)
+        
+        Args:
+            field_name: INDEXED_FIELDS anahtarı (customer_id, policy, request_id, approver)
+            key: Aranan değer (str'ye çevrilerek karşılaştırılır)
+        
+        Dönen liste indeksin kendisidir, DEĞİŞTİRİLMEMELİDİR.
+        """
+        return self._field_positions[field_name].get(str(key), [])
+    
+    def blocks_by(self, field_name: str, key, block_type: str = None) -> List[Block]:
+        """İkincil indeksten block'lar, isteğe bağlı tip filtresiyle (O(sonuç))"""
+        positions = self.positions_by(field_name, key)
+        if block_type is not None:
+            # Tip başlıkta: data okunmadan süzülür
+            positions = [position for position in positions if self.chain.block_type(position) == block_type]
+        return [self.chain[position] for position in positions]
+    
+    def positions_between(self, start: float = None, end: float = None) -> range:
+        """
+        Defter zamanı [start, end] (epoch, dahil) aralığındaki block pozisyonları
+        
+        Zaman indeksinde iki ikili arama; None sınır açıktır (bkz. time_index.py).
+        """
+        return self.time_index.between(start, end)
+    
+    def activity(self, start: float, end: float, bucket: str = 'hour', block_type: str = None) -> List[Dict]:
+        """Saatlik/günlük block sayıları (saatlik sayaçlardan, zincir taranmaz)"""
+        return self.time_index.histogram(start, end, bucket, block_type)
+    
+    def query(self, predicates: Dict, limit: int = 50, cursor: int = None) -> Dict:
+        """Yapılandırılmış sorgu: sayfa pozisyonları, sonraki imleç ve plan (bkz. chain_query.py)"""
+        return run_query(self, predicates, limit=limit, cursor=cursor)
+    
+    def index_keys(self, field_name: str) -> Iterable[str]:
+        """İkincil indeksteki anahtarlar (ör. zincirdeki tüm poliçe kimlikleri)"""
+        return self._field_positions[field_name].keys()
+    
+    def payout_request(self, request_id: str) -> Optional[Block]:
+        """request_id ile ödeme emri block'u"""
+        requests = self.blocks_by('request_id', request_id, 'payout_request')
+        return requests[0] if requests else None
+    
+    def payout_approvals(self, request_id: str) -> List[Block]:
+        """Ödeme emrine verilmiş admin onayları (zincir sırasıyla)"""
+        return self.blocks_by('request_id', request_id, 'payout_approval')
     
     def get_block_by_id(self, block_id: int) -> Optional[Block]:
         """ID ile block getir"""
@@ -202,15 +1314,16 @@ class Blockchain:
     
     def get_stats(self) -> Dict:
         """Blockchain istatistikleri"""
-        policy_blocks = len(self.get_blocks_by_type('policy'))
-        earthquake_blocks = len(self.get_blocks_by_type('earthquake'))
-        payout_blocks = len(self.get_blocks_by_type('payout'))
+        policy_blocks = len(self.positions_by_type('policy'))
+        earthquake_blocks = len(self.positions_by_type('earthquake'))
+        payout_blocks = len(self.positions_by_type('payout'))
         
         return {
             'total_blocks': len(self.chain),
             'policy_blocks': policy_blocks,
             'earthquake_blocks': earthquake_blocks,
             'payout_blocks': payout_blocks,
+            'merkle_checkpoints': len(self.positions_by_type(MERKLE_CHECKPOINT_TYPE)),
             'is_valid': self.is_valid(),
             'genesis_time': datetime.fromtimestamp(self.chain[0].timestamp).isoformat() if self.chain else None,
             'last_block_time': datetime.fromtimestamp(self.chain[-1].timestamp).isoformat() if self.chain else None
@@ -244,6 +1357,8 @@ class BlockchainService:
         
         # 🔗 BLOCKCHAIN (Hash'li, Zincirli, Immutable)
         self.blockchain = Blockchain()
+        # Contract bellekte boş başlar: poliçe kimlikleri zincirdekilerden devam eder
+        self.contract.policy_counter = max(self.contract.policy_counter, self.blockchain.totals.next_policy_id)
         
         # 👥 MULTI-ADMIN SYSTEM (2-of-3 onay gerekli)
         self.admins = {
@@ -297,55 +1412,95 @@ class BlockchainService:
         Returns:
             policy_id: Blockchain'deki poliçe ID'si
         """
-        # Koordinatları blockchain formatına çevir (1e8 precision)
-        lat_blockchain = int(latitude * 1e8)
-        lon_blockchain = int(longitude * 1e8)
-        
-        # Coverage ve premium'u wei'ye çevir (1 TL = 1e18 wei)
-        coverage_wei = int(coverage_amount * 1e18)
-        premium_wei = int(premium * 1e18)
-        
-        # Müşteri adresi oluştur
-        customer_address = self._generate_address(customer_id)
-        
         try:
-            # Contract'da poliçe oluştur
-            policy_id = self.contract.create_policy(
-                coverage_amount=coverage_wei,
-                latitude=lat_blockchain,
-                longitude=lon_blockchain,
-                caller=customer_address,
-                payment=premium_wei
-            )
-            
-            # 🔗 BLOCKCHAIN'E KAYDET (Immutable, diske yazmadan)
-            block_data = {
-                'type': 'policy',
-                'policy_id': policy_id,
-                'customer_id': customer_id,
-                'customer_address': customer_address,
-                'coverage_tl': coverage_amount,
-                'premium_tl': premium,
-                'latitude': latitude,
-                'longitude': longitude,
-                'package_type': package_type,
-                'created_at': datetime.now().isoformat()
-            }
+            block_data = self._policy_block_data(customer_id, coverage_amount, latitude, longitude,
+                                                 premium, package_type)
             
             # save_to_disk=False ile sadece memory'de tut (performans optimizasyonu)
             block = self.blockchain.add_block(block_data, save_to_disk=False)
             
             if verbose:
-                print(f"✅ Poliçe #{policy_id} oluşturuldu")
+                print(f"✅ Poliçe #{block_data['policy_id']} oluşturuldu")
                 print(f"   🔗 Block #{block.index}, Hash: {block.hash[:16]}...")
             
-            return policy_id
+            return block_data['policy_id']
             
         except Exception as e:
             if verbose:
                 print(f"❌ Blockchain poliçe hatası: {e}")
             raise
     
+    def create_policies_on_chain(self, policies: Iterable[Dict]) -> List[Optional[int]]:
+        """
+        Poliçeleri toplu oluştur (senkronizasyon / toplu yükleme)
+        
+        Contract kayıtları tek tek, block'lar tek `add_blocks` çağrısıyla eklenir.
+        
+        Args:
+            policies: create_policy_on_chain argümanları (verbose hariç) dict'leri
+        
+        Returns:
+            Poliçe sırasıyla blockchain poliçe ID'leri (hatalı poliçe için None)
+        """
+        policy_ids: List[Optional[int]] = []
+        block_data_list = []
+        for policy in policies:
+            try:
+                block_data = self._policy_block_data(**policy)
+            except Exception as e:
+                print(f"❌ Blockchain poliçe hatası ({policy.get('customer_id')}): {e}")
+                policy_ids.append(None)
+                continue
+            block_data_list.append(block_data)
+            policy_ids.append(block_data['policy_id'])
+        
+        self.blockchain.add_blocks(block_data_list, save_to_disk=False)
+        return policy_ids
+    
+    def _policy_block_data(
+        self,
+        customer_id: str,
+        coverage_amount: int,
+        latitude: float,
+        longitude: float,
+        premium: int,
+        package_type: str = "Standart"
+    ) -> Dict:
+        """Contract'da poliçeyi oluştur, zincire yazılacak block verisini döndür"""
+        # Koordinatları blockchain formatına çevir (1e8 precision)
+        lat_blockchain = int(latitude * 1e8)
+        lon_blockchain = int(longitude * 1e8)
+        
+        # Coverage ve premium'u wei'ye çevir (1 TL = 1e18 wei)
+        coverage_wei = int(coverage_amount * 1e18)
+        premium_wei = int(premium * 1e18)
+        
+        # Müşteri adresi oluştur
+        customer_address = self._generate_address(customer_id)
+        
+        # Contract'da poliçe oluştur
+        policy_id = self.contract.create_policy(
+            coverage_amount=coverage_wei,
+            latitude=lat_blockchain,
+            longitude=lon_blockchain,
+            caller=customer_address,
+            payment=premium_wei
+        )
+        
+        # 🔗 Zincire yazılacak block verisi (Immutable)
+        return {
+            'type': 'policy',
+            'policy_id': policy_id,
+            'customer_id': customer_id,
+            'customer_address': customer_address,
+            'coverage_tl': coverage_amount,
+            'premium_tl': premium,
+            'latitude': latitude,
+            'longitude': longitude,
+            'package_type': package_type,
+            'created_at': datetime.now().isoformat()
+        }
+    
     def report_earthquake(
         self,
         magnitude: int,
@@ -438,7 +1593,8 @@ class BlockchainService:
     def execute_payout(
         self,
         payout_id: int,
-        admin_approvals: List[str] = None
+        admin_approvals: List[str] = None,
+        request_id: str = None
     ) -> bool:
         """
         Ödeme gerçekleştir (MULTI-ADMIN ONAY SİSTEMİ)
@@ -450,6 +1606,7 @@ class BlockchainService:
         Args:
             payout_id: Ödeme talep ID'si
             admin_approvals: Onaylayan admin isimleri (örn: ['admin1', 'admin2'])
+            request_id: Zincirdeki ödeme emri (verilirse emir 'executed' olur)
         
         Returns:
             success: Ödeme başarılı mı
@@ -501,6 +1658,8 @@ class BlockchainService:
                                 'approval_count': len(approved_admins),
                                 'executed_at': datetime.now().isoformat()
                             }
+                            if request_id is not None:
+                                block_data['request_id'] = request_id
                             
                             # save_to_disk=True çünkü ödemeler kritik ve hemen kaydedilmeli
                             block = self.blockchain.add_block(block_data, save_to_disk=True)
@@ -555,6 +1714,7 @@ class BlockchainService:
             return {
                 'contract': contract_stats,
                 'blockchain': blockchain_stats,
+                'ledger': self.blockchain.totals.to_dict(),
                 'admins': {
                     'count': len(self.admins),
                     'multi_sig': '2-of-3',
@@ -575,46 +1735,41 @@ class BlockchainService:
         Returns:
             blocks: Block listesi
         """
+        chain = self.blockchain.chain
         if block_type:
-            blocks = self.blockchain.get_blocks_by_type(block_type)
+            positions = self.blockchain.positions_by_type(block_type)
         else:
-            blocks = self.blockchain.chain[1:]  # Genesis hariç
+            positions = range(1, len(chain))  # Genesis hariç
         
-        # Son N block
-        recent_blocks = blocks[-limit:] if len(blocks) > limit else blocks
+        # Son N block (sadece bunlar günlükten okunur)
+        recent_positions = positions[-limit:] if len(positions) > limit else positions
         
-        return [block.to_dict() for block in reversed(recent_blocks)]
+        return [chain[position].to_dict() for position in reversed(recent_positions)]
     
-    def verify_blockchain_integrity(self) -> Dict:
+    def verify_blockchain_integrity(self, full_audit: bool = False) -> Dict:
         """
         Blockchain bütünlüğünü doğrula
         
+        Args:
+            full_audit: True ise checkpoint'e güvenmeden tüm zincir doğrulanır
+        
         Returns:
             result: Doğrulama sonucu
         """
-        is_valid = self.blockchain.is_valid()
+        failure = self.blockchain.verify(full_audit)
+        is_valid = failure is None
         
         result = {
             'valid': is_valid,
             'total_blocks': len(self.blockchain.chain),
+            'verified_blocks': self.blockchain.verified_height + 1,
+            'full_audit': full_audit,
+            'audit': self.blockchain.last_audit,
             'message': '✅ Blockchain bütünlüğü sağlam' if is_valid else '❌ Blockchain bozulmuş!'
         }
         
         if not is_valid:
-            # Hangi block bozuk?
-            for i in range(1, len(self.blockchain.chain)):
-                current = self.blockchain.chain[i]
-                previous = self.blockchain.chain[i - 1]
-                
-                if current.hash != current.calculate_hash():
-                    result['corrupted_block'] = i
-                    result['reason'] = 'Hash mismatch'
-                    break
-                
-                if current.previous_hash != previous.hash:
-                    result['corrupted_block'] = i
-                    result['reason'] = 'Chain broken'
-                    break
+            result['corrupted_block'], result['reason'] = failure
         
         return result
     
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Akışlı Defter Dışa Aktarma (CSV / NDJSON)
+===============================================
+
+Eski dışa aktarma bütün poliçe block'larından bir DataFrame kurup geçici
+bir CSV'ye yazıyor, dosya bitince gönderiyordu; bellek zincirle büyüyor,
+istemci yazımın bitmesini bekliyordu. Bu modül satırları block deposundan
+tek tek üreten generator'lar sağlar; Flask yanıtı bunları parça parça
+gönderir, ilk bayt hemen çıkar ve bellek kullanımı sabittir:
+
+    pozisyonlar (index aralığı ∩ zaman indeksi aralığı, tip indeksi)
+        → günlük kaydı (pread; LRU önbelleğe girmez)
+        → CSV satırı ya da NDJSON satırı
+        → ~64 KB'lık parçalar
+
+NDJSON satırı block'un günlük kaydının kendisidir (tek satırlık JSON);
+çözülmeden aynen gönderilir. CSV satırları kayıttan çözülen data'dan
+EXPORT_COLUMNS sütunlarıyla kurulur; tam data `data` sütununda JSON'dur.
+
+Akış kilit tutmaz. Başladığı andaki zincir uzunluğu ve defter nesli
+(`Blockchain.generation`) sabitlenir; her kayıt okunduktan sonra nesil
+kontrol edilir. Akış sürerken reset_to_genesis (/api/blockchain/sync)
+defteri sıfırlarsa sonraki parçada ExportAborted yükselir; yeni defterin
+kayıtları eski pozisyonlarla karışmaz.
+
+KULLANIM:
+    from chain_export import export_positions, export_chunks
+
+    generation = blockchain.generation
+    positions = export_positions(blockchain, start=0, stop=None, block_type='policy')
+    return Response(export_chunks(blockchain, positions, 'csv', generation), mimetype='text/csv')
+"""
+
+import csv
+import io
+import json
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXPORT_COLUMNS = ('block_index', 'timestamp', 'type', 'customer_id', 'policy_number',
+                  'coverage_amount', 'premium', 'amount_tl', 'latitude', 'longitude',
+                  'hash', 'previous_hash', 'data')
+
+# Parça boyutu (bayt): küçük parçalar ağ/WSGI çağrısı sayısını artırır
+CHUNK_BYTES = 64 * 1024
+
+
+class ExportAborted(RuntimeError):
+    """Dışa aktarma sürerken defter sıfırlandı (reset_to_genesis)"""
+
+
+def export_positions(blockchain, start: int = 0, stop: int = None, block_type: str = None,
+                     time_from: float = None, time_to: float = None) -> Iterator[int]:
+    """
+    Dışa aktarılacak block pozisyonları (artan)
+
+    Aralık çağrı anındaki zincir uzunluğuyla sınırlanır; aktarım sırasında
+    eklenen block'lar dahil edilmez.
+
+    Args:
+        start: İlk block pozisyonu (dahil)
+        stop: Son block pozisyonu (hariç; None = zincir sonu)
+        block_type: Sadece bu tip (tip indeksi; None = hepsi)
+        time_from, time_to: Defter zamanı aralığı (epoch, dahil; zaman indeksinden)
+    """
+    stop = len(blockchain.chain) if stop is None else min(stop, len(blockchain.chain))
+    start = max(start, 0)
+    if time_from is not None or time_to is not None:
+        span = blockchain.positions_between(time_from, time_to)
+        start, stop = max(start, span.start), min(stop, span.stop)
+    if block_type is not None:
+        positions = blockchain.positions_by_type(block_type)
+        return (positions[i] for i in range(bisect_left(positions, start), bisect_left(positions, stop)))
+    return iter(range(start, stop))
+
+
+def _csv_row(position: int, record: bytes) -> Dict:
+    block = json.loads(record)
+    data = block.get('data') or {}
+    return {
+        'block_index': block.get('index', position),
+        'timestamp': datetime.fromtimestamp(block['timestamp']).isoformat(),
+        'type': data.get('type'),
+        'customer_id': data.get('customer_id', ''),
+        'policy_number': data.get('policy_number', data.get('policy_id', '')),
+        'coverage_amount': data.get('coverage_amount', data.get('coverage_tl', '')),
+        'premium': data.get('premium', data.get('premium_tl', '')),
+        'amount_tl': data.get('amount_tl', ''),
+        'latitude': data.get('latitude', ''),
+        'longitude': data.get('longitude', ''),
+        'hash': block.get('hash'),
+        'previous_hash': block.get('previous_hash'),
+        'data': json.dumps(data, ensure_ascii=False, separators=(',', ':')),
+    }
+
+
+def export_chunks(blockchain, positions: Iterable[int], export_format: str = 'csv',
+                  generation: int = None) -> Iterator[bytes]:
+    """
+    Satırları ~CHUNK_BYTES'lık UTF-8 parçalar halinde üret
+
+    İlk parça (CSV başlığı) hemen üretilir; kayıtlar günlükten okunur ve
+    LRU önbelleğe alınmaz. Zincir uzunluğu çağrı anında sabitlenir.
+
+    Args:
+        generation: Pozisyonların hesaplandığı defter nesli (None = şimdiki)
+
+    Raises:
+        ValueError: Bilinmeyen format
+        ExportAborted: (akış sırasında) defter sıfırlandı
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Bilinmeyen format: {export_format} ({', '.join(EXPORT_FORMATS)})")
+    if generation is None:
+        generation = blockchain.generation
+    records = _pinned_records(blockchain, positions, generation, len(blockchain.chain))
+    return _ndjson_chunks(records) if export_format == 'ndjson' else _csv_chunks(records)
+
+
+def _pinned_records(blockchain, positions: Iterable[int], generation: int,
+                    length: int) -> Iterator[Tuple[int, bytes]]:
+    """(pozisyon, günlük kaydı); sabitlenen uzunlukta durur, nesil değişirse ExportAborted"""
+    chain = blockchain.chain
+    for position in positions:
+        if position >= length:
+            break
+        try:
+            record = chain.record(position)
+        except (IndexError, OSError, ValueError):
+            # Sıfırlama okuma sırasında günlüğü silmiş olabilir
+            if blockchain.generation == generation:
+                raise
+            record = None
+        # Nesil okumadan SONRA kontrol edilir: okuma sıfırlamayla çakıştıysa
+        # kayıt yeni defterden gelmiş olabilir
+        if blockchain.generation != generation:
+            raise ExportAborted(f"Dışa aktarma block {position}'da durduruldu: defter sıfırlandı")
+        yield position, record
+
+
+def _csv_chunks(records: Iterable[Tuple[int, bytes]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator='\n')
+    writer.writeheader()
+    yield buffer.getvalue().encode('utf-8')  # ilk bayt: başlık
+    buffer.seek(0)
+    buffer.truncate()
+
+    for position, record in records:
+        writer.writerow(_csv_row(position, record))
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(records: Iterable[Tuple[int, bytes]]) -> Iterator[bytes]:
+    chunk = bytearray()
+    for _, record in records:
+        chunk += record
+        chunk += b'\n'
+        if len(chunk) >= CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
+
+
+def parse_export_args(args: Dict) -> Dict:
+    """
+    Sorgu parametrelerini export_positions argümanlarına çevir
+
+    Parametreler: format (csv|ndjson), type (varsayılan 'policy'; 'all' = hepsi),
+    start_index / end_index (dahil), from / to (ISO tarih ya da epoch)
+
+    Raises:
+        ValueError: Geçersiz parametre
+    """
+    from chain_query import parse_timestamp
+
+    export_format = (args.get('format') or 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Bilinmeyen format: {export_format} ({', '.join(EXPORT_FORMATS)})")
+    block_type: Optional[str] = args.get('type') or 'policy'
+    end_index = args.get('end_index')
+
+    return {
+        'format': export_format,
+        'block_type': None if block_type == 'all' else block_type,
+        'start': int(args.get('start_index') or 0),
+        'stop': int(end_index) + 1 if end_index not in (None, '') else None,
+        'time_from': parse_timestamp(args.get('from')),
+        'time_to': parse_timestamp(args.get('to')),
+    }
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Blockchain Sorgu Motoru (Yapılandırılmış Arama)
+=====================================================
+
+Eski arama her block'un yükünü çözüp alt dize araması yapıyordu; her sorgu
+bütün defteri okuyordu. Sorgu motoru alan koşullarını, block eklenirken
+güncellenen indeksler üzerinde çalıştırır:
+
+    koşul                  kaynak                              maliyet
+    ---------------------  ----------------------------------  ---------------
+    type                   tip indeksi / başlık tip sütunu     O(1) kontrol
+    customer_id, policy_*  ikincil alan indeksleri             sıralı pozisyon
+    request_id, approver
+    text                   token indeksi (TEXT_FIELDS)         sıralı pozisyon
+    amount_min/max         tutar kovaları + tutar sütunu       kova birleşimi
+    from/to (zaman)        zaman indeksi (ikili arama)         pozisyon aralığı
+    query (eski arama)     kimlik / token anahtarları          anahtar taraması
+
+Plan: sıralı pozisyon veren kaynaklardan en küçüğü sürücü (driver) olur;
+sürücü en yeniden eskiye gezilir, diğer kaynaklara ikili arama ile üyelik
+sorulur, tip/tutar bellekteki sütunlardan kontrol edilir. Zaman koşulu
+defter zamanı üzerindedir (bkz. time_index.py) ve bir pozisyon aralığına
+dönüşür; aralık hem sürücü adayıdır hem de taramanın sınırıdır. Filtreleme
+sırasında block verisi okunmaz; sadece dönen sayfanın block'ları yüklenir.
+Sonuçlar `cursor` (bir önceki sayfanın son pozisyonu) ile sayfalanır ve
+kullanılan plan sonuçla birlikte döner.
+
+Eski tek kutulu arama (`query`) alt dize eşleşmesidir (büyük/küçük harf ve
+aksan duyarsız): sorgu customer_id / poliçe / request_id kimliklerinden
+birinin içinde geçiyorsa ya da sorgunun her kelimesi TEXT_FIELDS
+kelimelerinden birinin içinde geçiyorsa block eşleşir. Block verisi
+okunmaz; indeks anahtarları taranır. Eski tam JSON taramasından farkı:
+diğer alanlar (hash, tarih, ...) aranmaz.
+
+KULLANIM:
+    from chain_query import run_query
+
+    page = run_query(blockchain, {'type': 'policy', 'text': 'kadıköy',
+                                  'amount_min': 500000}, limit=50)
+    page['positions'], page['next_cursor'], page['plan']
+"""
+
+import heapq
+import math
+import re
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Serbest metin aramasına açık alanlar (token indeksi)
+TEXT_FIELDS = ('owner_name', 'city', 'district', 'package_type', 'reason', 'message')
+
+# Tutar alanları (ilk bulunan; TL)
+AMOUNT_FIELDS = ('amount_tl', 'coverage_tl', 'coverage_amount')
+
+# Sorgu koşulu → INDEXED_FIELDS alanı
+FIELD_PREDICATES = {
+    'customer_id': 'customer_id',
+    'policy_number': 'policy',
+    'policy_id': 'policy',
+    'request_id': 'request_id',
+    'approver': 'approver',
+}
+
+# Eski tek kutulu aramanın baktığı kimlik indeksleri
+_QUERY_FIELDS = ('customer_id', 'policy', 'request_id')
+
+MAX_LIMIT = 500
+_TOKEN = re.compile(r'\w+')
+_NO_AMOUNT = math.nan
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Normalize edilmiş kelimeler, sırasıyla ve tekrarsız
+    
+    Büyük/küçük harf ve aksan duyarsız: 'KADIKÖY', 'Kadıköy' ve 'kadikoy'
+    aynı token'dır (ı/İ → i, ö → o, ş → s, ...).
+    """
+    text = unicodedata.normalize('NFKD', str(text).casefold().replace('ı', 'i'))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return list(dict.fromkeys(_TOKEN.findall(text)))
+
+
+def _amount_bucket(amount: float) -> int:
+    """Logaritmik tutar kovası (2'nin kuvvetleri; sıfır ve negatifler tek kovada)"""
+    return math.frexp(amount)[1] if amount > 0 else -1075
+
+
+def positions_before(mapping: Dict, count: int) -> Dict:
+    """Anahtar → artan pozisyon dizisi eşlemesinin `count`tan küçük pozisyonları (kopya)"""
+    return {key: positions[:bisect_left(positions, count)] for key, positions in mapping.items()}
+
+
+def _block_amount(data: Dict) -> float:
+    for field_name in AMOUNT_FIELDS:
+        value = data.get(field_name)
+        if value is not None:
+            try:
+                amount = float(value)
+            except (TypeError, ValueError):
+                return _NO_AMOUNT
+            return amount if math.isfinite(amount) else _NO_AMOUNT
+    return _NO_AMOUNT
+
+
+class ChainQueryIndex:
+    """
+    Sorgu indeksleri (block eklenirken güncellenir)
+
+    - token → block pozisyonları (array('q'), artan)
+    - tutar sütunu: pozisyon başına 8 bayt (tutarsız block'larda NaN)
+    - tutar kovası → block pozisyonları (array('q'), artan)
+    """
+
+    def __init__(self):
+        self._tokens: Dict[str, array] = {}
+        self._amounts = array('d')
+        self._amount_buckets: Dict[int, array] = {}
+
+    def add(self, position: int, data: Dict):
+        """Block'u indeksle (pozisyonlar sırayla eklenmelidir)"""
+        if position != len(self._amounts):
+            raise ValueError(f"Sorgu indeksi pozisyonu {len(self._amounts)} bekliyordu, {position} geldi")
+        text = ' '.join(str(data[field_name]) for field_name in TEXT_FIELDS
+                        if data.get(field_name) not in (None, '', 'N/A'))
+        for token in tokenize(text):
+            positions = self._tokens.get(token)
+            if positions is None:
+                positions = self._tokens[token] = array('q')
+            positions.append(position)
+
+        amount = _block_amount(data)
+        self._amounts.append(amount)
+        if amount == amount:  # NaN değil
+            bucket = _amount_bucket(amount)
+            positions = self._amount_buckets.get(bucket)
+            if positions is None:
+                positions = self._amount_buckets[bucket] = array('q')
+            positions.append(position)
+
+    def token_positions(self, token: str) -> Sequence[int]:
+        return self._tokens.get(token, array('q'))
+
+    def substring_positions(self, word: str) -> List[Sequence[int]]:
+        """İçinde `word` (normalize) geçen token'ların pozisyon dizileri (anahtar taraması)"""
+        return [positions for token, positions in self._tokens.items() if word in token]
+
+    def amount(self, position: int) -> float:
+        return self._amounts[position]
+
+    def amount_sources(self, low: float = None, high: float = None) -> List[Sequence[int]]:
+        """[low, high] aralığıyla kesişen kovaların pozisyon dizileri"""
+        first = _amount_bucket(low) if low is not None else None
+        last = _amount_bucket(high) if high is not None else None
+        return [positions for bucket, positions in self._amount_buckets.items()
+                if (first is None or bucket >= first) and (last is None or bucket <= last)]
+
+    def state(self):
+        """
+        Anlık görüntü için düz veri (bkz. header_index.py)
+        
+        Sözlükler kopyalanır, diziler referansla döner: yazar eklemeye devam
+        ederken `trim_state` ile yakalandığı andaki uzunluğa kırpılır.
+        """
+        return dict(self._tokens), self._amounts, dict(self._amount_buckets)
+    
+    @staticmethod
+    def trim_state(state, count: int):
+        """`state()` çıktısını ilk `count` block'a kırp (kopya)"""
+        tokens, amounts, amount_buckets = state
+        return positions_before(tokens, count), amounts[:count], positions_before(amount_buckets, count)
+
+    def restore(self, state):
+        self._tokens, self._amounts, self._amount_buckets = state
+
+
+# =============================================================================
+# PLAN VE YÜRÜTME
+# =============================================================================
+
+class _Source:
+    """Sıralı pozisyon kaynağı (tek dizi ya da dizilerin birleşimi)"""
+
+    def __init__(self, label: str, sequences: List[Sequence[int]]):
+        self.label = label
+        self.sequences = [sequence for sequence in sequences if len(sequence)]
+        self.size = sum(len(sequence) for sequence in self.sequences)
+
+    def __contains__(self, position: int) -> bool:
+        for sequence in self.sequences:
+            i = bisect_left(sequence, position)
+            if i < len(sequence) and sequence[i] == position:
+                return True
+        return False
+
+    def descending(self, before: int) -> Iterator[int]:
+        """`before`'dan küçük pozisyonlar, büyükten küçüğe (tekrarsız)"""
+        iterators = [_descending(sequence, before) for sequence in self.sequences]
+        if len(iterators) == 1:
+            yield from iterators[0]
+            return
+        last = None
+        for position in heapq.merge(*iterators, reverse=True):
+            if position != last:
+                last = position
+                yield position
+
+
+def _intersect(sources: List[_Source]) -> Iterator[int]:
+    """Tüm kaynaklarda olan pozisyonlar (artan); en küçük kaynak gezilir"""
+    sources = sorted(sources, key=lambda source: source.size)
+    for position in reversed(list(sources[0].descending(math.inf))):
+        if all(position in source for source in sources[1:]):
+            yield position
+
+
+def _descending(sequence: Sequence[int], before: int) -> Iterator[int]:
+    for i in range(bisect_left(sequence, before) - 1, -1, -1):
+        yield sequence[i]
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Epoch saniye (sayı ya da sayı metni) veya ISO tarih → epoch saniye"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value)).timestamp()
+
+
+def key_substring_positions(blockchain, field_names: Iterable[str], needle: str) -> List[Sequence[int]]:
+    """
+    Kimliğinde `needle` geçen (büyük/küçük harf duyarsız) block'ların pozisyon dizileri
+
+    Block verisi okunmaz: ikincil indeksin anahtarları taranır (maliyet
+    farklı kimlik sayısıyla orantılı) ve eşleşen anahtarların sıralı
+    pozisyon dizileri döner.
+    """
+    needle = str(needle).casefold()
+    return [blockchain.positions_by(field_name, key)
+            for field_name in field_names
+            for key in blockchain.index_keys(field_name) if needle in key.casefold()]
+
+
+def merge_positions(sequences: List[Sequence[int]]) -> List[int]:
+    """Sıralı pozisyon dizilerinin tekrarsız, artan birleşimi"""
+    if len(sequences) == 1:
+        return list(sequences[0])
+    return list(dict.fromkeys(heapq.merge(*sequences)))
+
+
+def _number(value) -> Optional[float]:
+    return None if value is None or value == '' else float(value)
+
+
+def run_query(blockchain, predicates: Dict, limit: int = 50, cursor: int = None) -> Dict:
+    """
+    Yapılandırılmış sorguyu çalıştır
+
+    Args:
+        blockchain: Blockchain (indeksler ve ChainStore)
+        predicates: type, customer_id, policy_number / policy_id, request_id,
+            approver, text, amount_min, amount_max, from, to, query
+        limit: Sayfa boyutu (en fazla MAX_LIMIT)
+        cursor: Önceki sayfanın `next_cursor`'ı (bu pozisyondan eskiler döner)
+
+    Returns:
+        {'positions': [...] (yeniden eskiye), 'next_cursor': int ya da None, 'plan': {...}}
+
+    Raises:
+        ValueError: Geçersiz koşul değeri (tarih, tutar, bilinmeyen alan)
+    """
+    started = time.perf_counter()
+    chain = blockchain.chain
+    index = blockchain.query_index
+    limit = max(1, min(int(limit or 50), MAX_LIMIT))
+    before = len(chain) if cursor is None else max(0, min(int(cursor), len(chain)))
+
+    unknown = set(predicates) - set(FIELD_PREDICATES) - {
+        'type', 'text', 'query', 'amount_min', 'amount_max', 'from', 'to'}
+    if unknown:
+        raise ValueError(f"Bilinmeyen sorgu alanı: {', '.join(sorted(unknown))}")
+
+    # Sıralı pozisyon kaynakları
+    sources: List[_Source] = []
+    for name, field_name in FIELD_PREDICATES.items():
+        if predicates.get(name) not in (None, ''):
+            key = predicates[name]
+            sources.append(_Source(f'{name}={key}', [blockchain.positions_by(field_name, key)]))
+    text = predicates.get('text')
+    if text:
+        for token in tokenize(text):
+            sources.append(_Source(f'token={token}', [index.token_positions(token)]))
+    query = predicates.get('query')
+    if query:
+        # Eski arama (alt dize): kimlikler ya da her kelimesi bir metin kelimesinde
+        words = tokenize(query)
+        sequences = key_substring_positions(blockchain, _QUERY_FIELDS, str(query).strip())
+        if len(words) == 1:
+            sequences += index.substring_positions(words[0])
+        elif words:
+            # Her kelime bir metin kelimesinin içinde geçmeli (kesişim)
+            sequences.append(list(_intersect([_Source(word, index.substring_positions(word))
+                                              for word in words])))
+        sources.append(_Source(f'query={query}', sequences))
+
+    block_type = predicates.get('type') or None
+    amount_min, amount_max = _number(predicates.get('amount_min')), _number(predicates.get('amount_max'))
+    time_from, time_to = parse_timestamp(predicates.get('from')), parse_timestamp(predicates.get('to'))
+    has_amount = amount_min is not None or amount_max is not None
+    if has_amount:
+        sources.append(_Source(f'amount∈[{amount_min}, {amount_max}]',
+                               index.amount_sources(amount_min, amount_max)))
+    has_time = time_from is not None or time_to is not None
+    if has_time:
+        sources.append(_Source(f'time∈[{time_from}, {time_to}]', [blockchain.positions_between(time_from, time_to)]))
+    if block_type and not sources:
+        sources.append(_Source(f'type={block_type}', [blockchain.positions_by_type(block_type)]))
+
+    # Sürücü: en küçük kaynak; yoksa zincirin tamamı (en yeniden eskiye)
+    sources.sort(key=lambda source: source.size)
+    driver = sources[0] if sources else None
+    probes = sources[1:]
+    plan = {
+        'driver': {'source': driver.label, 'size': driver.size} if driver else
+                  {'source': 'scan', 'size': before},
+        'probes': [{'source': source.label, 'size': source.size, 'method': 'bisect'} for source in probes],
+        'filters': [],
+    }
+    if block_type and (driver is None or not driver.label.startswith('type=')):
+        plan['filters'].append({'predicate': f'type={block_type}', 'method': 'header'})
+    if has_amount:
+        plan['filters'].append({'predicate': 'amount', 'method': 'amount column'})
+
+    candidates: Iterable[int] = driver.descending(before) if driver else range(before - 1, -1, -1)
+    positions: List[int] = []
+    examined = 0
+    next_cursor = None
+    for position in candidates:
+        examined += 1
+        if block_type and chain.block_type(position) != block_type:
+            continue
+        if has_amount:
+            amount = index.amount(position)
+            if amount != amount or (amount_min is not None and amount < amount_min) or \
+                    (amount_max is not None and amount > amount_max):
+                continue
+        if any(position not in source for source in probes):
+            continue
+        if len(positions) == limit:
+            # Sayfa dolu ve bir eşleşme daha var: sonraki sayfa boş değil
+            next_cursor = positions[-1]
+            break
+        positions.append(position)
+
+    plan['examined'] = examined
+    plan['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return {'positions': positions, 'next_cursor': next_cursor, 'plan': plan}
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Paralel Zincir Doğrulama (Segment Bazlı)
+==============================================
+
+Tam denetim (full audit) her block'un hash'ini yeniden hesaplar; tek bir
+Python döngüsünde bu, milyonlarca block'luk bir defterde dakikalar sürer.
+Bu modül zinciri ardışık segmentlere böler ve her segmenti bir worker
+sürecinde doğrular:
+
+    [1 ............ 50k)[50k ........ 100k)[100k ....... 150k) ...
+     worker 1            worker 2            worker 3
+     - hash yeniden hesaplanır
+     - segment içi previous_hash bağları
+
+    Son geçiş (ana süreç): segment sınırlarındaki bağlar
+        chain[50k].previous_hash == chain[50k - 1].hash, ...
+
+Sonuç, seri doğrulama ile birebir aynıdır: zincir sırasıyla ilk bozuk block
+ve nedeni ('Hash mismatch' / 'Chain broken'). Sonuçlar segment sırasıyla
+toplanır; bozuk bir segment bulununca geri kalan işler iptal edilir.
+
+Worker'lar `fork` ile başlatılır (Linux/macOS); zincir (ChainStore
+başlıkları ve blok günlüğü dosya tanıtıcıları) kopyalanmadan üst süreçten
+devralınır. `fork` olmayan platformlarda (Windows) ve küçük zincirlerde
+(süreç başlatma maliyeti kazançtan büyük) seri doğrulama kullanılır.
+
+Ayarlar:
+    DASK_VERIFY_WORKERS   worker sayısı (varsayılan: CPU sayısı, 1 = seri)
+    DASK_VERIFY_SEGMENT   segment başına block (varsayılan: 50000)
+
+KULLANIM:
+    from chain_verifier import verify_chain
+
+    failure, stats = verify_chain(blockchain.chain, start=1)
+    # failure: (pozisyon, neden) ya da None
+    # stats: {'blocks': ..., 'seconds': ..., 'blocks_per_second': ..., 'workers': ..., 'segments': ...}
+"""
+
+import os
+import time
+import logging
+import multiprocessing
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VERIFY_WORKERS = int(os.environ.get('DASK_VERIFY_WORKERS', 0)) or os.cpu_count() or 1
+VERIFY_SEGMENT = int(os.environ.get('DASK_VERIFY_SEGMENT', 50000))
+
+# Worker sürecinde doğrulanan zincir ve derinlik (pool initializer ile atanır)
+_chain = None
+_deep = False
+
+
+def first_invalid(chain: List, start: int, stop: int = None, deep: bool = False) -> Optional[Tuple[int, str]]:
+    """
+    [start, stop) aralığındaki ilk bozuk block (seri)
+
+    `start` block'unun önceki block'a bağı da kontrol edilir. Hash'ler
+    block'ta saklanan kanonik yük üzerinden hesaplanır; `deep` ise yük
+    data'dan yeniden üretilir (bkz. Block.hash_matches).
+
+    Returns:
+        (pozisyon, neden) ya da None
+    """
+    stop = len(chain) if stop is None else stop
+    for i in range(max(start, 1), stop):
+        current_block = chain[i]
+
+        # Hash kontrolü
+        if not current_block.hash_matches(deep):
+            return i, 'Hash mismatch'
+
+        # Zincir kontrolü
+        if current_block.previous_hash != chain[i - 1].hash:
+            return i, 'Chain broken'
+
+    return None
+
+
+def _init_worker(chain: List, deep: bool):
+    global _chain, _deep
+    _chain, _deep = chain, deep
+    # Üst süreçte başka thread'in tuttuğu kilitler alt süreçte hiç açılmaz
+    after_fork = getattr(chain, 'after_fork', None)
+    if after_fork is not None:
+        after_fork()
+
+
+def _verify_segment(bounds: Tuple[int, int]) -> Optional[Tuple[int, str]]:
+    """
+    Worker: segmentin hash'leri ve segment içi bağları
+
+    Segmentin ilk block'unun önceki segmente bağı sınır geçişinde kontrol edilir.
+    """
+    start, stop = bounds
+    chain, deep = _chain, _deep
+    for i in range(start, stop):
+        current_block = chain[i]
+        if not current_block.hash_matches(deep):
+            return i, 'Hash mismatch'
+        if i > start and current_block.previous_hash != chain[i - 1].hash:
+            return i, 'Chain broken'
+    return None
+
+
+def _can_fork() -> bool:
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _verify_parallel(chain: List, start: int, stop: int, workers: int, segment_size: int,
+                     deep: bool) -> Tuple[Optional[Tuple[int, str]], int]:
+    """Segmentleri worker havuzunda doğrula, sınır bağlarını ana süreçte kontrol et"""
+    bounds = [(first, min(first + segment_size, stop)) for first in range(start, stop, segment_size)]
+
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes=workers, initializer=_init_worker, initargs=(chain, deep)) as pool:
+        # Sonuçlar segment sırasıyla gelir; ilk bozuk segmentte durulur
+        for first, failure in zip((first for first, _ in bounds),
+                                  pool.imap(_verify_segment, bounds)):
+            # Sınır bağı: aynı block'ta hash hatası öncelikli
+            if chain[first].previous_hash != chain[first - 1].hash and \
+                    (failure is None or failure[0] != first):
+                return (first, 'Chain broken'), len(bounds)
+            if failure is not None:
+                return failure, len(bounds)
+    return None, len(bounds)
+
+
+def verify_chain(chain: List, start: int = 1, workers: int = None, segment_size: int = None,
+                 deep: bool = False) -> Tuple[Optional[Tuple[int, str]], Dict]:
+    """
+    Zincirin [start, len) aralığını doğrula
+
+    Args:
+        chain: Block listesi (genesis dahil)
+        start: İlk doğrulanacak pozisyon (önceki block'a bağı dahil)
+        workers: Worker sayısı (varsayılan: DASK_VERIFY_WORKERS)
+        segment_size: Segment başına block (varsayılan: DASK_VERIFY_SEGMENT)
+        deep: Saklanan yükler yerine data'dan yeniden üretilen yüklerle doğrula
+
+    Returns:
+        (ilk bozuk block (pozisyon, neden) ya da None, istatistik)
+    """
+    workers = workers or VERIFY_WORKERS
+    segment_size = segment_size or VERIFY_SEGMENT
+    start = max(start, 1)
+    stop = len(chain)  # doğrulama sırasında eklenen block'lar sonraki tura kalır
+    total = max(stop - start, 0)
+
+    begin = time.perf_counter()
+    segments = 1
+    if workers > 1 and total >= 2 * segment_size and _can_fork():
+        workers = min(workers, -(-total // segment_size))
+        try:
+            failure, segments = _verify_parallel(chain, start, stop, workers, segment_size, deep)
+        except OSError as e:
+            logger.warning(f"⚠️ Paralel doğrulama başlatılamadı ({e}), seri doğrulamaya geçiliyor")
+            workers = 1
+            failure = first_invalid(chain, start, stop, deep)
+    else:
+        workers = 1
+        failure = first_invalid(chain, start, stop, deep)
+    elapsed = time.perf_counter() - begin
+
+    checked = (failure[0] - start + 1) if failure else total
+    stats = {
+        'blocks': checked,
+        'seconds': round(elapsed, 4),
+        'blocks_per_second': int(checked / elapsed) if elapsed > 0 else checked,
+        'workers': workers,
+        'segments': segments,
+    }
+    return failure, stats
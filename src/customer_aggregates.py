@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Müşteri Özet Görünümü (Materialized Aggregate)
+====================================================
+
+/api/customers listesinin ihtiyaç duyduğu müşteri başına özet:
+
+    building_count        → müşterinin bina/poliçe sayısı
+    active_policy_count   → policy_status == 'Aktif' sayısı
+    total_premium         → annual_premium_tl toplamı
+    building_id, owner_*, district, neighborhood, created_at, risk_score
+                          → müşterinin ilk binasının iletişim alanları
+
+Snapshot yüklenirken tek bir vektörel groupby ile kurulur (iterrows yok).
+Soğuk kurulum PortfolioStore'un yeniden yükleme kilidi altında yapılır:
+aynı anda gelen istekler arasında yalnızca bir thread hesaplar, diğerleri
+hazır snapshot'ı bekler (single-flight).
+Poliçe silme / ekleme / prim güncellemesinde sadece etkilenen müşterilerin
+satırları, o müşterilerin binalarından (hash indeks, O(k)) yeniden hesaplanır.
+Nesne değişmezdir: güncellemeler yeni bir CustomerAggregates döndürür,
+eski snapshot'ı okuyan thread'ler etkilenmez.
+
+Sıra, müşterinin bina tablosunda ilk göründüğü sıradır. Artımlı
+güncellemede müşteri listedeki yerini korur; yeni müşteriler sona eklenir.
+"""
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# İlk binadan alınan iletişim alanları
+CONTACT_COLUMNS = [
+    'building_id', 'owner_name', 'owner_email', 'owner_phone',
+    'district', 'neighborhood', 'created_at', 'risk_score',
+]
+
+# Özeti etkileyen bina kolonları (bunlar değişmediyse özet yeniden hesaplanmaz)
+SOURCE_COLUMNS = set(CONTACT_COLUMNS) | {'customer_id', 'policy_status', 'annual_premium_tl'}
+
+
+def _summarize(buildings: pd.DataFrame) -> pd.DataFrame:
+    """Bina satırlarından müşteri özetleri (index: customer_id, ilk görünme sırası)"""
+    contact = [col for col in CONTACT_COLUMNS if col in buildings.columns]
+    customer_ids = buildings['customer_id']
+
+    summary = buildings.drop_duplicates('customer_id')[['customer_id', *contact]].set_index('customer_id')
+    summary['building_count'] = customer_ids.value_counts(sort=False)
+
+    if 'policy_status' in buildings.columns:
+        active = (buildings['policy_status'] == 'Aktif').groupby(customer_ids, sort=False).sum()
+    else:
+        active = 0
+    summary['active_policy_count'] = active
+
+    if 'annual_premium_tl' in buildings.columns:
+        premium = pd.to_numeric(buildings['annual_premium_tl'], errors='coerce')
+        summary['total_premium'] = premium.groupby(customer_ids, sort=False).sum()
+    else:
+        summary['total_premium'] = 0.0
+
+    return summary
+
+
+def _category_mismatch(current: pd.Series, values: pd.Series) -> bool:
+    """Kategorik kolona kategorileri farklı değerler atanacak mı?"""
+    if not isinstance(current.dtype, pd.CategoricalDtype):
+        return False
+    return not values.dropna().isin(current.cat.categories).all()
+
+
+class CustomerAggregates:
+    """Müşteri başına özet tablosu (değişmez)"""
+
+    __slots__ = ('frame',)
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    @classmethod
+    def build(cls, buildings: Optional[pd.DataFrame]) -> 'CustomerAggregates':
+        if buildings is None or 'customer_id' not in buildings.columns:
+            return cls(pd.DataFrame(columns=['building_count', 'active_policy_count', 'total_premium'],
+                                    index=pd.Index([], name='customer_id')))
+        return cls(_summarize(buildings))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    # -------------------------------------------------------------------------
+    # SORGULAR
+    # -------------------------------------------------------------------------
+
+    def positions(self, customer_ids: Iterable) -> np.ndarray:
+        """Müşteri ID'lerinin tablo pozisyonları (bilinmeyenler atlanır, sıra korunur)"""
+        positions = self.frame.index.get_indexer(list(customer_ids))
+        return positions[positions >= 0]
+
+    def records(self, positions) -> List[dict]:
+        """Verilen pozisyonlardaki özetler (Python tipli sözlükler, JSON'a hazır)"""
+        return self.frame.iloc[positions].reset_index().to_dict('records')
+
+    def get(self, customer_id) -> Optional[dict]:
+        positions = self.positions([customer_id])
+        return self.records(positions)[0] if len(positions) else None
+
+    # -------------------------------------------------------------------------
+    # ARTIMLI GÜNCELLEME
+    # -------------------------------------------------------------------------
+
+    def with_customers(self, buildings: pd.DataFrame, index, customer_ids: Iterable) -> 'CustomerAggregates':
+        """
+        Verilen müşterilerin özetlerini güncel bina tablosundan yeniden hesapla
+
+        Args:
+            buildings: Güncel bina tablosu
+            index: `buildings` için kurulmuş PortfolioIndex
+            customer_ids: Binası eklenen / silinen / değişen müşteriler
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        rows = [index.building_rows_for_customer(customer_id) for customer_id in customer_ids]
+        rows = np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.intp)
+
+        updated = _summarize(buildings.iloc[rows]) if len(rows) else self.frame.iloc[:0]
+        removed = [cid for cid in customer_ids if cid not in updated.index]
+
+        frame = self.frame.drop(index=[cid for cid in removed if cid in self.frame.index])
+        existing = updated.index.intersection(frame.index)
+        if len(existing):
+            frame = frame.copy()
+            for col in updated.columns:
+                if col not in frame.columns:
+                    frame[col] = np.nan
+                elif _category_mismatch(frame[col], updated[col]):
+                    frame[col] = frame[col].astype(object)
+                frame.loc[existing, col] = updated.loc[existing, col]
+
+        added = updated.index.difference(frame.index, sort=False)
+        if len(added):
+            frame = pd.concat([frame, updated.loc[added]])
+
+        # Atama / concat kategorik kolonu object'e düşürdüyse geri çevir
+        retype = {col: 'category' for col in updated.columns
+                  if isinstance(updated[col].dtype, pd.CategoricalDtype)
+                  and not isinstance(frame[col].dtype, pd.CategoricalDtype)}
+        if retype:
+            frame = frame.astype(retype)
+
+        return CustomerAggregates(frame)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Başlık ve İndeks Yan Dosyası (Header Index Sidecar)
+=========================================================
+
+Açılışta blok günlüğünün her kaydını çözüp başlıkları ve ikincil indeksleri
+yeniden kurmak zincir uzunluğuyla büyür. Temiz kapanışta (ve toplu
+yüklemelerden sonra) bellekteki başlık sütunları ve indeksler tek bir yan
+dosyaya yazılır; sonraki açılış bu dosyayı bellek eşlemeli (mmap) okuyup
+sütunları toplu kopyalar ve günlükte sadece dosyadan sonra eklenen kuyruğu
+tarar:
+
+    data/blockchain_segments/
+        00000000000000000000.seg
+        headers.idx             # N block'un başlıkları + indeksler
+
+    dosya = [sihirli: 8 bayt][meta uzunluğu: 4 bayt][meta (JSON)]
+            [sütun 1][sütun 2]...[durum dizileri][durum (JSON)][HMAC-SHA256: 32 bayt]
+
+Meta; block sayısını, son block'un günlükteki konumunu ve hash'ini, sütun
+boyutlarını taşır. Durum (indeksler) sadece düz veridir: None, bool, int,
+float, str, liste, sözlük ve `array`. JSON'da sözlükler {"k": [anahtarlar],
+"v": [değerler]} (str dışı anahtarlar korunur), diziler {"a": tip kodu,
+"o": ofset, "n": uzunluk} olarak yazılır; dizi baytları tip kodu başına tek
+bir ikili bölümdedir. Dosyadan nesne/sınıf kurulmaz, çözüm kod
+çalıştıramaz; nesneler çağıran tarafta bu veriden kurulur
+(`restore()`). İmza dosyanın tamamını kapsar; imzası tutmayan dosya
+açılmaz. Dosyanın
+günlükle eşleşip eşleşmediği (sıfırlama, kesilmiş kuyruk) çağıran tarafta
+son block'un kaydı okunarak kontrol edilir (bkz. Blockchain._load_header_index).
+
+KULLANIM:
+    from header_index import write_header_index, open_header_index
+
+    write_header_index(path, meta, {'hashes': hashes, ...}, state, key)
+
+    with open_header_index(path, key) as index:
+        hashes = bytearray(index.column('hashes'))
+        state = index.state
+"""
+
+import gc
+import hashlib
+import hmac
+import json
+import mmap
+import os
+import struct
+from array import array
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MAGIC = b'DASKHIX\x02'  # 02: durum JSON + ikili diziler (01: pickle, okunmaz)
+_META_LENGTH = struct.Struct('>I')
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+# Durumda izin verilen dizi tip kodları
+STATE_TYPECODES = ('q', 'd', 'H', 'B', 'Q')
+
+
+class HeaderIndexError(Exception):
+    """Yan dosya bozuk, imzası tutmuyor ya da bu sürümle okunamıyor"""
+
+
+_PLAIN_TYPES = frozenset((type(None), bool, int, float, str))
+_SEQUENCE_TYPES = frozenset((list, tuple))
+
+
+def _is_plain(values) -> bool:
+    """Düz değerler ya da düz değer listeleri (kontroller C döngülerinde)"""
+    kinds = set(map(type, values))
+    if kinds <= _PLAIN_TYPES:
+        return True
+    return kinds <= _SEQUENCE_TYPES and set(map(type, chain.from_iterable(values))) <= _PLAIN_TYPES
+
+
+def _encode_state(value, arrays: Dict[str, List[array]], sizes: Dict[str, int]):
+    """Düz veriyi JSON'a uygun yapıya çevir; diziler `arrays`a ayrılır"""
+    kind = type(value)
+    if kind in _PLAIN_TYPES:
+        return value
+    if kind is list or kind is tuple:
+        if _is_plain(value):
+            return value  # ör. pozisyon listeleri olduğu gibi
+        return [_encode_state(item, arrays, sizes) for item in value]
+    if kind is dict:
+        return {'k': _encode_state(list(value), arrays, sizes),
+                'v': _encode_state(list(value.values()), arrays, sizes)}
+    if kind is array and value.typecode in STATE_TYPECODES:
+        offset = sizes.get(value.typecode, 0)
+        arrays.setdefault(value.typecode, []).append(value)
+        sizes[value.typecode] = offset + len(value)
+        return {'a': value.typecode, 'o': offset, 'n': len(value)}
+    raise TypeError(f"Yan dosya durumunda desteklenmeyen tip: {kind.__name__}")
+
+
+def _decode_state(state_bytes, blobs: Dict[str, memoryview]):
+    """JSON durumu çöz: listeler C çözücüde kalır, sadece {"k","v"} ve {"a"} nesneleri kurulur"""
+    def build(obj: Dict):
+        if 'k' in obj:
+            keys = obj['k']
+            if list in set(map(type, keys)):
+                keys = [tuple(key) if type(key) is list else key for key in keys]
+            values = obj['v']
+            if len(keys) != len(values):
+                raise HeaderIndexError("Yan dosya sözlüğünde anahtar/değer sayısı farklı")
+            return dict(zip(keys, values))
+        typecode, offset, count = obj['a'], obj['o'], obj['n']
+        if typecode not in blobs:
+            raise HeaderIndexError(f"Yan dosyada '{typecode}' dizi bölümü yok")
+        result = array(typecode)
+        size = result.itemsize
+        if offset < 0 or count < 0 or (offset + count) * size > len(blobs[typecode]):
+            raise HeaderIndexError("Yan dosya dizisi bölüm dışında")
+        result.frombytes(blobs[typecode][offset * size:(offset + count) * size])
+        return result
+
+    return json.loads(bytes(state_bytes).decode('utf-8'), object_hook=build)
+
+
+def write_header_index(path, meta: Dict, columns: Dict[str, object], state: object, key: bytes):
+    """
+    Yan dosyayı atomik yaz (geçici dosya + fsync + yeniden adlandırma)
+
+    Args:
+        path: Dosya yolu
+        meta: JSON'a çevrilebilir meta veri
+        columns: Sütun adı → bayt dizisi (bytes, bytearray, array)
+        state: Diğer durum (indeksler vb.; sadece düz veri ve array, bkz. modül açıklaması)
+        key: İmza anahtarı
+
+    Raises:
+        TypeError: Durumda düz veri dışı nesne
+    """
+    path = Path(path)
+    arrays: Dict[str, List[array]] = {}
+    encoded = _encode_state(state, arrays, {})
+    state_bytes = json.dumps(encoded, separators=(',', ':')).encode('utf-8')
+    views = {name: memoryview(column).cast('B') for name, column in columns.items()}
+    state_views = [(typecode, [memoryview(item).cast('B') for item in items]) for typecode, items in arrays.items()]
+    meta = dict(meta, columns=[[name, view.nbytes] for name, view in views.items()],
+                state_arrays=[[typecode, sum(view.nbytes for view in parts)] for typecode, parts in state_views],
+                state_length=len(state_bytes))
+    meta_bytes = json.dumps(meta).encode('utf-8')
+
+    signature = hmac.new(key, digestmod=hashlib.sha256)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        for part in (MAGIC, _META_LENGTH.pack(len(meta_bytes)), meta_bytes, *views.values(),
+                     *(view for _, parts in state_views for view in parts), state_bytes):
+            f.write(part)
+            signature.update(part)
+        f.write(signature.digest())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class HeaderIndexFile:
+    """Bellek eşlemeli, imzası doğrulanmış yan dosya (bkz. open_header_index)"""
+
+    def __init__(self, path, key: bytes):
+        try:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            raise
+        except (OSError, ValueError) as e:  # boş dosya mmap'lenemez
+            raise HeaderIndexError(f"{Path(path).name} açılamadı: {e}")
+        self._view = memoryview(self._mmap)
+        self._views = [self._view]   # kapanışta bırakılacak tüm görünümler
+        self._columns: Dict[str, memoryview] = {}
+        self._state_blobs: Dict[str, memoryview] = {}
+        self._state: Optional[object] = None
+        try:
+            self._parse(key)
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self, key: bytes):
+        view = self._view
+        header_size = len(MAGIC) + _META_LENGTH.size
+        if len(view) < header_size + _SIGNATURE_SIZE or view[:len(MAGIC)] != MAGIC:
+            raise HeaderIndexError("Tanınmayan yan dosya")
+
+        body = view[:-_SIGNATURE_SIZE]
+        self._views.append(body)
+        expected = hmac.new(key, body, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, bytes(view[-_SIGNATURE_SIZE:])):
+            raise HeaderIndexError("Yan dosya imzası geçersiz")
+
+        meta_length, = _META_LENGTH.unpack_from(view, len(MAGIC))
+        offset = header_size + meta_length
+        self.meta = json.loads(bytes(view[header_size:offset]).decode('utf-8'))
+        for name, length in self.meta['columns']:
+            self._columns[name] = body[offset:offset + length]
+            self._views.append(self._columns[name])
+            offset += length
+        for typecode, length in self.meta.get('state_arrays', []):
+            if typecode not in STATE_TYPECODES:
+                raise HeaderIndexError(f"Yan dosyada bilinmeyen dizi tipi: {typecode}")
+            self._state_blobs[typecode] = body[offset:offset + length]
+            self._views.append(self._state_blobs[typecode])
+            offset += length
+        self._state_view = body[offset:offset + self.meta['state_length']]
+        self._views.append(self._state_view)
+        if offset + self.meta['state_length'] != len(body):
+            raise HeaderIndexError("Yan dosya boyutu meta ile uyuşmuyor")
+
+    def column(self, name: str) -> memoryview:
+        """Sütunun baytları (kopyalanmadan; dosya açıkken geçerli)"""
+        return self._columns[name]
+
+    @property
+    def state(self) -> object:
+        if self._state is None:
+            # Milyonlarca küçük liste: çözüm sırasında döngüsel GC turları atlanır
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                self._state = _decode_state(self._state_view, self._state_blobs)
+            except (ValueError, KeyError, TypeError) as e:
+                raise HeaderIndexError(f"Yan dosya durumu çözülemedi: {e}")
+            finally:
+                if gc_enabled:
+                    gc.enable()
+        return self._state
+
+    def close(self):
+        # mmap, üzerindeki tüm görünümler bırakılmadan kapatılamaz
+        self._columns.clear()
+        self._state_blobs.clear()
+        while self._views:
+            self._views.pop().release()
+        self._mmap.close()
+
+    def __enter__(self) -> 'HeaderIndexFile':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_header_index(path, key: bytes) -> HeaderIndexFile:
+    """
+    Yan dosyayı aç ve imzasını doğrula
+
+    Raises:
+        FileNotFoundError: Dosya yok
+        HeaderIndexError: Dosya bozuk ya da imzası tutmuyor
+    """
+    return HeaderIndexFile(path, key)
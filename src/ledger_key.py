@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Defter İmza Anahtarı (Kuruluma Özel)
+==========================================
+
+Doğrulama checkpoint'i (checkpoint.json) ve durum anlık görüntüleri
+(headers.idx) HMAC-SHA256 ile imzalanır; imza, dosyaların bu kurulum
+tarafından yazıldığını kanıtlar. Anahtar kaynak kodda durmaz:
+
+    1. DASK_CHECKPOINT_KEY ortam değişkeni (birden çok sunucu aynı defteri
+       paylaşıyorsa hepsinde aynı değer)
+    2. Yoksa zincir dosyasının yanındaki anahtar dosyası (data/blockchain.key):
+       ilk açılışta 32 rastgele bayttan oluşturulur, izinleri 0600
+
+Anahtar dosyası başka bir kullanıcıya aitse ya da grup/diğerleri
+okuyabiliyor/yazabiliyorsa açılış hata verir (fail closed): data/
+dizinine yazabilen biri dosyayı kendi anahtarıyla değiştirip imzalı
+checkpoint ya da görüntü üretemesin.
+
+KULLANIM:
+    from ledger_key import load_ledger_key
+
+    key = load_ledger_key(Path('data/blockchain.key'))
+    hmac.new(key, message, hashlib.sha256)
+"""
+
+import os
+import secrets
+from pathlib import Path
+from typing import Optional
+
+KEY_BYTES = 32
+
+
+class LedgerKeyError(PermissionError):
+    """Anahtar dosyası güvenli değil ya da okunamıyor"""
+
+
+def load_ledger_key(path: Path, secret: Optional[str] = None) -> bytes:
+    """
+    İmza anahtarını döndür (yoksa oluştur)
+
+    Args:
+        path: Anahtar dosyası yolu
+        secret: Açık anahtar (DASK_CHECKPOINT_KEY); verilirse dosyaya bakılmaz
+
+    Raises:
+        LedgerKeyError: Dosya başka kullanıcıya ait, izinleri açık ya da bozuk
+    """
+    if secret:
+        return secret.encode('utf-8')
+
+    path = Path(path)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return _read_key(path)
+    try:
+        os.write(fd, secrets.token_hex(KEY_BYTES).encode('ascii'))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    print(f"🔑 Defter imza anahtarı oluşturuldu: {path}")
+    return _read_key(path)
+
+
+def _read_key(path: Path) -> bytes:
+    if os.name != 'nt':
+        stat = os.stat(path)
+        if stat.st_uid != os.getuid():
+            raise LedgerKeyError(f"{path} başka bir kullanıcıya ait, imza anahtarı kullanılmıyor")
+        if stat.st_mode & 0o077:
+            raise LedgerKeyError(f"{path} izinleri çok açık ({oct(stat.st_mode & 0o777)}), 0600 olmalı")
+    key = path.read_text(encoding='ascii').strip()
+    if len(key) < KEY_BYTES:
+        raise LedgerKeyError(f"{path} geçersiz (boş ya da kısa anahtar)")
+    return key.encode('ascii')
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Defter Toplamları Projeksiyonu
+====================================
+
+BlockchainService'in zincirden türeyen özet durumu: zincirdeki poliçelerin
+teminat/prim toplamları, gerçekleşen ödemelerin tutarı, bir sonraki
+poliçe kimliği. Her block eklendiğinde (ve açılışta kuyruk yeniden
+oynatılırken) `apply()` ile güncellenir; durum anlık görüntüsüyle
+(bkz. Blockchain.save_header_index) birlikte saklanır, açılışta zincir
+taranmaz.
+
+Contract simülatörü bellekte başlar; açılışta poliçe sayacı buradan
+ilerletilir, böylece yeniden başlatma sonrası yeni poliçeler zincirdeki
+kimlikleri tekrar kullanmaz.
+
+KULLANIM:
+    from ledger_totals import LedgerTotals
+
+    totals = LedgerTotals()
+    totals.apply(position, block.data)         # her yeni block için
+
+    totals.next_policy_id, totals.to_dict()
+"""
+
+from typing import Dict
+
+POLICY_TYPE = 'policy'
+PAYOUT_TYPE = 'payout'
+
+
+def _amount(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class LedgerTotals:
+    """Zincir sırasıyla `apply` edilen block'lardan toplamlar"""
+
+    def __init__(self):
+        self.blocks = 0
+        self.policy_count = 0
+        self.coverage_tl = 0.0
+        self.premium_tl = 0.0
+        self.payout_count = 0
+        self.payout_tl = 0.0
+        # Servis poliçelerinin (sayısal policy_id) en büyüğü + 1
+        self.next_policy_id = 0
+
+    def apply(self, position: int, data: Dict):
+        """Block'u toplamlara işle"""
+        self.blocks = position + 1
+        block_type = data.get('type')
+        if block_type == POLICY_TYPE:
+            self.policy_count += 1
+            self.coverage_tl += _amount(data.get('coverage_tl', data.get('coverage_amount')))
+            self.premium_tl += _amount(data.get('premium_tl', data.get('premium')))
+            policy_id = data.get('policy_id')
+            if isinstance(policy_id, int) and not isinstance(policy_id, bool) and policy_id >= self.next_policy_id:
+                self.next_policy_id = policy_id + 1
+        elif block_type == PAYOUT_TYPE:
+            self.payout_count += 1
+            self.payout_tl += _amount(data.get('amount_tl'))
+
+    def to_dict(self) -> Dict:
+        return {
+            'blocks': self.blocks,
+            'policy_count': self.policy_count,
+            'total_coverage_tl': round(self.coverage_tl, 2),
+            'total_premium_tl': round(self.premium_tl, 2),
+            'payout_count': self.payout_count,
+            'total_payout_tl': round(self.payout_tl, 2),
+            'next_policy_id': self.next_policy_id,
+        }
+
+    def state(self):
+        """Anlık görüntü için düz veri (bkz. header_index.py)"""
+        return (self.blocks, self.policy_count, self.coverage_tl, self.premium_tl,
+                self.payout_count, self.payout_tl, self.next_policy_id)
+
+    def restore(self, state):
+        (self.blocks, self.policy_count, self.coverage_tl, self.premium_tl,
+         self.payout_count, self.payout_tl, self.next_policy_id) = state
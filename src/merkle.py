@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Merkle Ağacı ve Dahil Olma Kanıtları (Inclusion Proof)
+============================================================
+
+Zincir sabit boyutlu pencerelere bölünür; her pencerenin block hash'leri
+üzerine bir Merkle ağacı kurulur ve kökü zincire `merkle_checkpoint`
+block'u olarak yazılır. Tek bir kaydın (poliçe, ödeme, deprem) o pencereye
+dahil olduğu, bütün defteri yeniden hash'lemeden O(log n) hash ile
+doğrulanabilir:
+
+    kök
+    ├── düğüm(0-1)
+    │   ├── yaprak(block 0)
+    │   └── yaprak(block 1)   ← kanıt: [kardeş yaprak 0, kardeş düğüm(2-3)]
+    └── düğüm(2-3)
+
+- Yaprak  = SHA-256(0x00 || block_hash)
+- Düğüm   = SHA-256(0x01 || sol || sağ)
+  (Önekler yaprak ile iç düğümün karıştırılmasını önler.)
+- Tek kalan düğüm bir üst seviyeye kopyalanmadan taşınır; aynı pencereye
+  sahte bir son yaprak eklenerek aynı kök elde edilemez.
+
+KULLANIM:
+    from merkle import merkle_root, merkle_proof, verify_proof
+
+    root = merkle_root(block_hashes)
+    proof = merkle_proof(block_hashes, 5)
+    assert verify_proof(block_hashes[5], proof, root)
+"""
+
+import hashlib
+from typing import Dict, List
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def _leaf(block_hash: str) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + bytes.fromhex(block_hash)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+def _next_level(level: List[bytes]) -> List[bytes]:
+    parents = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])  # tek düğüm taşınır
+    return parents
+
+
+def merkle_root(block_hashes: List[str]) -> str:
+    """Block hash'leri (hex) üzerine Merkle kökü (hex)"""
+    if not block_hashes:
+        raise ValueError("Boş pencere için Merkle kökü yok")
+    level = [_leaf(block_hash) for block_hash in block_hashes]
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+
+def merkle_proof(block_hashes: List[str], position: int) -> List[Dict[str, str]]:
+    """
+    `position`daki yaprağın köke giden yolu
+
+    Returns:
+        [{'side': 'left' | 'right', 'hash': kardeş düğüm (hex)}, ...]
+        yapraktan köke doğru sıralı
+    """
+    if not 0 <= position < len(block_hashes):
+        raise IndexError(f"Pencere dışında yaprak: {position}")
+
+    proof = []
+    level = [_leaf(block_hash) for block_hash in block_hashes]
+    while len(level) > 1:
+        sibling = position ^ 1
+        if sibling < len(level):
+            proof.append({'side': 'left' if sibling < position else 'right',
+                          'hash': level[sibling].hex()})
+        level = _next_level(level)
+        position //= 2
+    return proof
+
+
+def verify_proof(block_hash: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """Block hash'inin kanıt yolu ile verilen köke ulaştığını doğrula (O(log n))"""
+    try:
+        current = _leaf(block_hash)
+        for step in proof:
+            sibling = bytes.fromhex(step['hash'])
+            current = _node(sibling, current) if step['side'] == 'left' else _node(current, sibling)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return current.hex() == root
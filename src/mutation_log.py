@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Mutasyon Günlüğü (Append-Only Delta Dosyası)
+==================================================
+
+Satır bazında yazım desteği olmayan backend'lerde (CSV / Parquet) tek bir
+poliçe değişikliği tüm dosyanın yeniden yazılması demektir. Bunun yerine
+değişiklikler anahtar kolonuna (policy_number) göre JSON satırları olarak
+`data/<veri_seti>.mutations.jsonl` dosyasına eklenir:
+
+    {"base": [[mtime_ns, size], ...]}                   # başlık: taban imzası
+    {"op": "delete", "key": "DP-2025-00000001"}
+    {"op": "update", "key": "DP-2025-00000002", "values": {"annual_premium_tl": 1250.0}}
+    {"op": "upsert", "key": "DP-2025-00000099", "values": {...tüm satır...}}
+
+- Tek değişiklik = tek satır ekleme + fsync (O(1) I/O)
+- Okuyucular taban veri setini okur ve günlüğü üzerine uygular
+- Sıkıştırma (compaction) birleşik veriyi atomik olarak tabana yazar ve
+  günlüğü siler
+- Başlıktaki taban imzası tabanla eşleşmezse günlük yok sayılır: taban
+  dışarıdan değiştirildiyse (generator.py) ya da sıkıştırma tabanı yazıp
+  günlüğü silemeden çöktüyse eski değişiklikler iki kez uygulanmaz
+- Yarım yazılmış son satır (çökme) okunurken atlanır
+
+KULLANIM:
+    from mutation_log import MutationLog
+
+    log = MutationLog('data/buildings.mutations.jsonl')
+    log.append([{'op': 'delete', 'key': 'DP-2025-00000001'}], base_signature)
+
+    entries = log.read(base_signature)          # imza eşleşmezse []
+    df = MutationLog.apply(base_df, entries, 'policy_number')
+    log.clear()                                 # sıkıştırma sonrası
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+OP_DELETE = 'delete'
+OP_UPDATE = 'update'
+OP_UPSERT = 'upsert'
+
+
+def json_value(value):
+    """numpy/pandas skalerini JSON'a yazılabilir Python tipine çevir (NaN → null)"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def row_values(frame: pd.DataFrame, columns: List[str]) -> List[Dict[str, object]]:
+    """DataFrame satırlarını JSON'a yazılabilir {kolon: değer} sözlüklerine çevir"""
+    return [
+        {col: json_value(value) for col, value in zip(columns, row)}
+        for row in frame[columns].itertuples(index=False, name=None)
+    ]
+
+
+def _align_dtype(current: pd.Series, new_values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Bellek içi tipli kolonu (category / datetime64) yeni değerleri alacak hale getir
+
+    Kategorik kolona olmayan bir kategori atanamaz; eksik kategoriler eklenir.
+    Tarih kolonuna günlükteki metin değerleri parse edilerek yazılır;
+    tanınmayan bir değer varsa kolon object'e döner.
+    """
+    if isinstance(current.dtype, pd.CategoricalDtype):
+        missing = pd.Index(new_values.dropna().unique()).difference(current.cat.categories)
+        if len(missing):
+            current = current.cat.add_categories(missing)
+    elif pd.api.types.is_datetime64_any_dtype(current):
+        parsed = pd.to_datetime(new_values, format='ISO8601', errors='coerce')
+        if (parsed.isna() & new_values.notna()).any():
+            current = current.astype(object)
+        else:
+            new_values = parsed
+    return current, new_values
+
+
+class MutationLog:
+    """Tek bir veri setinin append-only mutasyon günlüğü"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = Lock()
+
+    # -------------------------------------------------------------------------
+    # YAZMA
+    # -------------------------------------------------------------------------
+
+    def append(self, entries: List[dict], base_signature):
+        """
+        Mutasyonları günlüğün sonuna ekle ve diske zorla (fsync)
+
+        Args:
+            entries: {'op', 'key', 'values'} sözlükleri
+            base_signature: Günlük boşsa başlığa yazılacak taban imzası
+        """
+        if not entries:
+            return
+
+        lines = [json.dumps(entry, ensure_ascii=False) for entry in entries]
+        with self._lock:
+            with open(self.path, 'a+b') as f:
+                if f.tell() == 0:
+                    lines.insert(0, json.dumps({'base': base_signature}))
+                else:
+                    # Önceki yazım yarım kaldıysa yeni satır ondan ayrılsın
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        f.write(b'\n')
+                f.write(('\n'.join(lines) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """Günlüğü sil (sıkıştırma ya da taban yeniden içe aktarıldıktan sonra)"""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    # -------------------------------------------------------------------------
+    # OKUMA
+    # -------------------------------------------------------------------------
+
+    def read(self, base_signature) -> List[dict]:
+        """Tabana ait mutasyonları sırayla döndür (başlık eşleşmezse boş)"""
+        try:
+            with open(self.path, 'rb') as f:
+                raw_lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        if not raw_lines:
+            return []
+
+        records = []
+        for number, raw in enumerate(raw_lines):
+            try:
+                records.append(json.loads(raw))
+            except ValueError:
+                if number == len(raw_lines) - 1:
+                    break  # yarım yazılmış son satır
+                logger.warning(f"⚠️ {self.path.name}: bozuk satır {number + 1} atlandı")
+
+        if not records or records[0].get('base') != json.loads(json.dumps(base_signature)):
+            logger.warning(f"⚠️ {self.path.name} farklı bir tabana ait, yok sayılıyor")
+            return []
+        return records[1:]
+
+    def count(self) -> int:
+        """Bekleyen mutasyon sayısı (başlık hariç; imza kontrolü yapılmaz)"""
+        try:
+            with open(self.path, 'rb') as f:
+                return max(f.read().count(b'\n') - 1, 0)
+        except FileNotFoundError:
+            return 0
+
+    # -------------------------------------------------------------------------
+    # BİRLEŞTİRME
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def apply(frame: Optional[pd.DataFrame], entries: List[dict], key_column: str,
+              columns: List[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Mutasyonları taban DataFrame'e uygula (yeni frame döner)
+
+        Önce her anahtarın son durumu çıkarılır, sonra kolon başına tek bir
+        vektörel atama yapılır. Var olan anahtara upsert satırı yerinde
+        günceller; olmayan anahtar sona eklenir. Silinmiş anahtara gelen
+        update yok sayılır.
+
+        Args:
+            frame: Taban veri (None ise sadece upsert satırlarından oluşur)
+            entries: read() çıktısı
+            key_column: Anahtar kolonu (policy_number)
+            columns: Kolon projeksiyonu (None: tüm kolonlar)
+        """
+        if not entries:
+            return frame
+
+        deleted = set()
+        updates: Dict[object, dict] = {}
+        inserts: Dict[object, dict] = {}
+
+        for entry in entries:
+            key, op = entry['key'], entry['op']
+            values = entry.get('values') or {}
+            if op == OP_DELETE:
+                deleted.add(key)
+                updates.pop(key, None)
+                inserts.pop(key, None)
+            elif op == OP_UPSERT:
+                deleted.discard(key)
+                updates.pop(key, None)
+                inserts[key] = dict(values)
+            elif op == OP_UPDATE and key not in deleted:
+                target = inserts[key] if key in inserts else updates.setdefault(key, {})
+                target.update(values)
+
+        if frame is None:
+            frame = pd.DataFrame(columns=[key_column])
+        keys = frame[key_column]
+
+        # Var olan anahtarlara gelen upsert'ler yerinde güncellemedir
+        existing = keys.isin(list(inserts))
+        for key in keys[existing].unique():
+            updates[key] = inserts.pop(key)
+
+        # Kolonlar bütün olarak değiştirilir: taban frame'e dokunulmaz
+        if deleted:
+            frame = frame.take(np.flatnonzero(~keys.isin(list(deleted)).to_numpy()))
+            keys = frame[key_column]
+        else:
+            frame = frame.copy(deep=False)
+
+        # Kolon başına {anahtar: değer} eşlemesi
+        by_column: Dict[str, dict] = {}
+        for key, values in updates.items():
+            for col, value in values.items():
+                by_column.setdefault(col, {})[key] = value
+
+        for col, mapping in by_column.items():
+            if columns is not None and col not in columns:
+                continue
+            mask = keys.isin(list(mapping))
+            if not mask.any():
+                continue
+            new_values = keys[mask].map(mapping)
+            if col in frame.columns:
+                current, new_values = _align_dtype(frame[col], new_values)
+                frame[col] = current.where(~mask, new_values)
+            else:
+                frame[col] = new_values
+
+        if inserts:
+            appended = pd.DataFrame(list(inserts.values()))
+            if columns is not None:
+                appended = appended[[col for col in appended.columns if col in columns]]
+            frame = pd.concat([frame, appended], ignore_index=True)
+
+        return frame.reset_index(drop=True)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Keyset (Cursor) Sayfalama
+===============================
+
+`page`/`offset` ile sayfalama her istekte tüm listeyi süzüp sonra dilimler;
+derin sayfalar ve uzun zincirlerde maliyet sayfa numarasıyla büyür ve
+araya eklenen/silinen kayıtlar sayfaları kaydırır.
+
+Keyset sayfalamada istemci son gördüğü sıralama anahtarını opak bir
+cursor olarak geri gönderir. Sunucu sıralı indekste bu anahtarın yerini
+ikili arama ile bulur ve sadece bir sayfalık kaydı üretir:
+
+    GET /api/policies?cursor=&per_page=20          → ilk sayfa + next_cursor
+    GET /api/policies?cursor=<next_cursor>          → sonraki sayfa
+
+Cursor, anahtarın base64url kodlanmış JSON'udur; istemci içeriğine
+bakmamalıdır. Alaka skoruna göre sıralı arama sonuçlarında anahtar
+(skor, policy_number) çiftidir: sıra skor azalan, eşitlikte anahtar artan.
+
+KULLANIM:
+    from pagination import (decode_cursor, encode_cursor, keyset_window,
+                            ranked_order, ranked_window)
+
+    after = decode_cursor(request.args.get('cursor'))   # None: ilk sayfa
+    start, stop = keyset_window(sorted_keys, after, limit)
+    page = sorted_keys[start:stop]
+    next_cursor = encode_cursor(page[-1]) if stop < len(sorted_keys) else None
+
+    # Alaka sıralı arama sonucu: cursor [skor, anahtar]
+    order = ranked_order(scores, keys)
+    start, stop = ranked_window(scores[order], keys[order], after, limit)
+"""
+
+import base64
+import bisect
+import json
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class InvalidCursor(ValueError):
+    """Çözülemeyen ya da bu uç noktaya ait olmayan cursor"""
+
+
+def encode_cursor(key) -> str:
+    """Sıralama anahtarını opak cursor'a çevir"""
+    if isinstance(key, np.generic):
+        key = key.item()
+    raw = json.dumps(key, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: Optional[str]):
+    """
+    Cursor'ı sıralama anahtarına çevir
+
+    Returns:
+        Anahtar; token boşsa None (ilk sayfa)
+
+    Raises:
+        InvalidCursor: Token çözülemezse
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        return json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f'Geçersiz cursor: {token}') from e
+
+
+def _search(keys: Sequence, key, side: str) -> int:
+    if isinstance(keys, np.ndarray):
+        return int(np.searchsorted(keys, key, side=side))
+    if side == 'right':
+        return bisect.bisect_right(keys, key)
+    return bisect.bisect_left(keys, key)
+
+
+def keyset_window(sorted_keys: Sequence, after, limit: int,
+                  descending: bool = False) -> Tuple[int, int]:
+    """
+    Artan sıralı anahtar dizisinde cursor'dan sonraki sayfanın sınırları
+
+    Args:
+        sorted_keys: Artan sıralı anahtarlar (numpy dizisi ya da liste)
+        after: Önceki sayfanın son anahtarı (None: ilk sayfa)
+        limit: Sayfa boyutu
+        descending: True ise sayfa azalan sırada ilerler (en yeni önce);
+            dönen aralık yine artan indekslerdir, çağıran ters çevirir
+
+    Returns:
+        (start, stop): sorted_keys[start:stop] sayfanın kayıtlarıdır
+    """
+    n = len(sorted_keys)
+    if descending:
+        stop = n if after is None else _search(sorted_keys, after, 'left')
+        return max(stop - limit, 0), stop
+
+    start = 0 if after is None else _search(sorted_keys, after, 'right')
+    return start, min(start + limit, n)
+
+
+def ranked_order(scores: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """(skor azalan, anahtar artan) sıralama permütasyonu"""
+    return np.lexsort((keys, -scores))
+
+
+def ranked_window(scores: np.ndarray, keys: np.ndarray, after, limit: int) -> Tuple[int, int]:
+    """
+    ranked_order ile sıralı sonuçta (skor, anahtar) cursor'ından sonraki sayfa
+
+    Args:
+        scores, keys: ranked_order sırasındaki skorlar ve anahtarlar (str)
+        after: Önceki sayfanın son [skor, anahtar] çifti (None: ilk sayfa)
+        limit: Sayfa boyutu
+
+    Raises:
+        InvalidCursor: after bir [skor, anahtar] çifti değilse
+    """
+    n = len(keys)
+    if after is None:
+        return 0, min(limit, n)
+    if not (isinstance(after, list) and len(after) == 2 and isinstance(after[1], str) and
+            isinstance(after[0], (int, float)) and not isinstance(after[0], bool)):
+        raise InvalidCursor(f'Geçersiz cursor: {after!r}')
+    score, key = after
+    # Sıra (−skor, anahtar): cursor'a kadar (dahil) olanlar sayılır
+    start = int(np.count_nonzero((scores > score) | ((scores == score) & (keys <= key))))
+    return start, min(start + limit, n)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Ödeme Emri Durum Projeksiyonu (Event-Sourced)
+===================================================
+
+Ödeme akışı zincirde üç tür block olarak ilerler:
+
+    payout_request   (request_id)           → emir açıldı, onay bekliyor
+    payout_approval  (request_id, admin)    → bir admin onayı
+    payout           (request_id, ...)      → ödeme gerçekleşti
+
+Durum (onaylayanlar, onay sayısı, gerçekleşti mi) her seferinde zincir
+taranarak hesaplanmaz; her block eklendiğinde (ve açılışta zincir
+yüklenirken) `apply()` ile bu projeksiyona işlenir. Tek emrin durumu O(1),
+gerçekleşmemiş emirlerin listesi O(bekleyen) ile okunur.
+
+Projeksiyon zincirin türevidir: kaybolursa zincirden aynen yeniden kurulur
+(bkz. Blockchain._rebuild_indexes). Aynı request_id ile açılmış ikinci emir
+ve aynı admin'in ikinci onayı yok sayılır (ilk kayıt geçerlidir). Onay
+block'u yazılmadan önce `approval_rejection()` ile kontrol edilir; kontrol
+ve ekleme zincirin yazma kilidi altında yapılır (bkz.
+Blockchain.add_payout_approval), eşzamanlı onaylardan sadece biri yazılır.
+
+KULLANIM:
+    from payout_projection import PayoutProjection
+
+    payouts = PayoutProjection()
+    payouts.apply(position, block.data)        # her yeni block için
+
+    state = payouts.get('PAY-20250101120000-DP-1')
+    state.approval_count, state.has_approved('admin1'), state.executed
+    for state in payouts.pending():            # gerçekleşmemiş emirler
+        ...
+    payouts.approval_rejection(request_id, 'admin1')  # None ya da REJECT_* nedeni
+"""
+
+from typing import Dict, Iterator, Optional
+
+REQUEST_TYPE = 'payout_request'
+APPROVAL_TYPE = 'payout_approval'
+EXECUTION_TYPE = 'payout'
+
+# Ödemenin gerçekleşebilmesi için gereken admin onayı (2-of-3 multi-sig)
+REQUIRED_APPROVALS = 2
+
+# Onayın reddedilme nedenleri
+REJECT_NOT_FOUND = 'not_found'
+REJECT_EXECUTED = 'executed'
+REJECT_ALREADY_APPROVED = 'already_approved'
+
+
+class PayoutApprovalRejected(ValueError):
+    """Onay block'u yazılmadı: emir yok, gerçekleşmiş ya da admin zaten onaylamış"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class PayoutState:
+    """Tek ödeme emrinin durumu"""
+
+    __slots__ = ('request_id', 'position', 'approvers', 'executed_position')
+
+    def __init__(self, request_id: str, position: int):
+        self.request_id = request_id
+        self.position = position                 # payout_request block'u
+        self.approvers: Dict[str, int] = {}      # admin → onay block'u (onay sırasıyla)
+        self.executed_position: Optional[int] = None
+
+    @property
+    def approval_count(self) -> int:
+        return len(self.approvers)
+
+    @property
+    def executed(self) -> bool:
+        return self.executed_position is not None
+
+    def has_approved(self, admin: str) -> bool:
+        return admin in self.approvers
+
+    @property
+    def status(self) -> str:
+        """'executed', 'approved' (onaylar tamam, ödeme bekliyor) ya da 'pending'"""
+        if self.executed:
+            return 'executed'
+        return 'approved' if self.approval_count >= REQUIRED_APPROVALS else 'pending'
+
+    def to_dict(self) -> Dict:
+        return {
+            'request_id': self.request_id,
+            'block_index': self.position,
+            'approval_count': self.approval_count,
+            'required_approvals': REQUIRED_APPROVALS,
+            'approved_by': list(self.approvers),
+            'status': self.status,
+            'executed_block_index': self.executed_position,
+        }
+
+
+class PayoutProjection:
+    """request_id → PayoutState; zincir sırasıyla `apply` edilen block'lardan"""
+
+    def __init__(self):
+        self._requests: Dict[str, PayoutState] = {}
+        # Gerçekleşmemiş emirler (açılış sırasıyla)
+        self._pending: Dict[str, PayoutState] = {}
+
+    def apply(self, position: int, data: Dict):
+        """Block'u projeksiyona işle (ödeme akışı dışındaki tipler yok sayılır)"""
+        block_type = data.get('type')
+        if block_type not in (REQUEST_TYPE, APPROVAL_TYPE, EXECUTION_TYPE):
+            return
+        request_id = data.get('request_id')
+        if request_id is None:
+            return  # eski (request_id'siz) ödeme block'ları emirle eşleşmez
+        request_id = str(request_id)
+
+        if block_type == REQUEST_TYPE:
+            if request_id not in self._requests:
+                state = PayoutState(request_id, position)
+                self._requests[request_id] = state
+                self._pending[request_id] = state
+            return
+
+        state = self._requests.get(request_id)
+        if state is None or state.executed:
+            return
+        if block_type == APPROVAL_TYPE:
+            admin = data.get('admin')
+            if admin is not None and admin not in state.approvers:
+                state.approvers[admin] = position
+        else:
+            state.executed_position = position
+            del self._pending[request_id]
+
+    def get(self, request_id: str) -> Optional[PayoutState]:
+        """Emrin durumu (O(1)); emir yoksa None"""
+        return self._requests.get(str(request_id))
+
+    def approval_rejection(self, request_id: str, admin: str) -> Optional[str]:
+        """Admin'in onayı şu an reddedilir mi (REJECT_* nedeni; kabul edilirse None)"""
+        state = self.get(request_id)
+        if state is None:
+            return REJECT_NOT_FOUND
+        if state.executed:
+            return REJECT_EXECUTED
+        if state.has_approved(admin):
+            return REJECT_ALREADY_APPROVED
+        return None
+
+    def pending(self) -> Iterator[PayoutState]:
+        """Gerçekleşmemiş emirler, açılış sırasıyla (O(bekleyen))"""
+        return iter(list(self._pending.values()))
+
+    def counts(self) -> Dict[str, int]:
+        """Durum bazında emir sayıları (O(bekleyen))"""
+        pending = list(self._pending.values())  # yazar thread'i eşzamanlı ekleyebilir
+        awaiting = sum(1 for state in pending if state.approval_count < REQUIRED_APPROVALS)
+        total = len(self._requests)
+        return {
+            'total': total,
+            'pending': awaiting,
+            'approved': len(pending) - awaiting,
+            'executed': total - len(pending),
+        }
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def state(self):
+        """Anlık görüntü için düz veri (bkz. header_index.py)"""
+        requests = [(state.request_id, state.position, dict(state.approvers), state.executed_position)
+                    for state in self._requests.values()]
+        return requests, list(self._pending)
+
+    def restore(self, state):
+        requests, pending = state
+        self._requests = {}
+        for request_id, position, approvers, executed_position in requests:
+            request = self._requests[request_id] = PayoutState(request_id, position)
+            request.approvers = approvers
+            request.executed_position = executed_position
+        self._pending = {request_id: self._requests[request_id] for request_id in pending}
+
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Portföy Hash İndeksleri
+=============================
+
+Snapshot yüklendiğinde bir kez kurulan anahtar → satır pozisyonu haritaları.
+Route'lar boolean maske ile tüm DataFrame'i taramak yerine bu haritalardan
+O(1) sürede satır pozisyonu alır ve `iloc` ile doğrudan satıra gider.
+
+    policy_number  → tek satır pozisyonu   (buildings)
+    building_id    → tek satır pozisyonu   (buildings)
+    customer_id    → satır pozisyonu dizisi (buildings, bire-çok; CSR düzeni)
+    customer_id    → tek satır pozisyonu   (customers)
+    email (lower)  → tek satır pozisyonu   (customers)
+
+Aynı anahtar birden fazla satırda varsa ilk satır kazanır (eski
+`df[mask].iloc[0]` davranışı ile aynı).
+
+Poliçe silme indeksi yeniden kurmaz (`without_policy`): haritalar kurulduğu
+taban tablonun pozisyonlarını tutar, silinen satırın taban pozisyonu sıralı
+mezar taşı (tombstone) dizisine eklenir. Sorgular taban pozisyonunu ikili
+aramayla güncel pozisyona çevirir (önündeki mezar taşı sayısı kadar kaydırır,
+silinmişse None). Mezar taşları büyüdüğünde `needs_rebuild` True olur.
+
+Keyset sayfalama için policy_number'a göre sıralı satır dizisi de tutulur.
+1M satırda sıralama saniyeler sürdüğü için ilk istekte (tembel) kurulur ve
+poliçe silmede yeni indekse O(n) numpy işlemiyle taşınır.
+"""
+
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_EMPTY_ROWS = np.empty(0, dtype=np.intp)
+
+
+def _unique_map(values: pd.Series) -> Dict[Hashable, int]:
+    """Anahtar → ilk satır pozisyonu (C seviyesinde dict kurulumu)"""
+    keys = values.tolist()
+    n = len(keys)
+    # Ters sırada kur: sonraki yazım öncekini ezer, böylece ilk satır kazanır
+    return dict(zip(reversed(keys), range(n - 1, -1, -1)))
+
+
+class _GroupMap:
+    """
+    Bire-çok anahtar → satır pozisyonları (CSR düzeni)
+
+    Anahtar başına ayrı numpy dizisi yerine tek bir sıralı pozisyon dizisi
+    ve ofset tablosu tutulur; 1M satırda groupby().indices'e göre ~2 kat
+    hızlı kurulur ve çok daha az nesne üretir.
+    """
+
+    __slots__ = ('codes', 'order', 'offsets')
+
+    def __init__(self, codes: Dict[Hashable, int], order: np.ndarray, offsets: np.ndarray):
+        self.codes = codes
+        self.order = order
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, values: pd.Series) -> '_GroupMap':
+        codes, uniques = pd.factorize(values)
+        # factorize NaN'ı -1 yapar: sayım/sıralama dışında bırak
+        valid = codes >= 0
+        positions = np.flatnonzero(valid)
+        codes = codes[valid]
+
+        order = positions[np.argsort(codes, kind='stable')]
+        offsets = np.zeros(len(uniques) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(codes, minlength=len(uniques)), out=offsets[1:])
+
+        keys = uniques.tolist()
+        return cls(dict(zip(keys, range(len(keys)))), order, offsets)
+
+    def get(self, key) -> np.ndarray:
+        code = self.codes.get(key)
+        if code is None:
+            return _EMPTY_ROWS
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+_EMPTY_GROUPS = _GroupMap({}, _EMPTY_ROWS, np.zeros(1, dtype=np.intp))
+
+
+class PortfolioIndex:
+    """
+    Portföy snapshot'ı için değişmez hash indeks seti
+
+    Bina haritaları (policy_rows, building_rows, customer_building_rows)
+    taban pozisyonlarını tutar; güncel pozisyon için sorgu metodları
+    kullanılmalıdır.
+    """
+
+    # Mezar taşları bu sayıyı (veya taban satırların %10'unu) aşınca yeniden kurulum önerilir
+    TOMBSTONE_REBUILD_MIN = 1000
+
+    __slots__ = ('policy_rows', 'building_rows', 'customer_building_rows',
+                 'customer_rows', 'email_rows', 'removed', 'base_count', '_policy_order')
+
+    def __init__(self,
+                 policy_rows: Dict[Hashable, int],
+                 building_rows: Dict[Hashable, int],
+                 customer_building_rows: _GroupMap,
+                 customer_rows: Dict[Hashable, int],
+                 email_rows: Dict[Hashable, int],
+                 removed: np.ndarray = _EMPTY_ROWS,
+                 base_count: int = 0):
+        self.policy_rows = policy_rows
+        self.building_rows = building_rows
+        self.customer_building_rows = customer_building_rows
+        self.customer_rows = customer_rows
+        self.email_rows = email_rows
+        # Silinen bina satırlarının taban pozisyonları (artan sıralı)
+        self.removed = removed
+        self.base_count = base_count
+        # Tembel kurulan sıralı görünüm: (sıralı anahtarlar, satır pozisyonları)
+        self._policy_order: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def build(cls,
+              buildings: Optional[pd.DataFrame],
+              customers: Optional[pd.DataFrame]) -> 'PortfolioIndex':
+        """DataFrame'lerden indeksleri kur (vektörel, tek geçiş)"""
+        policy_rows, building_rows, customer_building_rows = {}, {}, _EMPTY_GROUPS
+        customer_rows, email_rows = {}, {}
+
+        if buildings is not None:
+            if 'policy_number' in buildings.columns:
+                policy_rows = _unique_map(buildings['policy_number'])
+            if 'building_id' in buildings.columns:
+                building_rows = _unique_map(buildings['building_id'])
+            if 'customer_id' in buildings.columns:
+                customer_building_rows = _GroupMap.build(buildings['customer_id'])
+
+        if customers is not None:
+            if 'customer_id' in customers.columns:
+                customer_rows = _unique_map(customers['customer_id'])
+            if 'email' in customers.columns:
+                email_rows = _unique_map(customers['email'].astype(str).str.lower())
+
+        return cls(policy_rows, building_rows, customer_building_rows,
+                   customer_rows, email_rows,
+                   base_count=0 if buildings is None else len(buildings))
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return len(self.removed) > max(self.TOMBSTONE_REBUILD_MIN, self.base_count // 10)
+
+    # -------------------------------------------------------------------------
+    # ARTIMLI GÜNCELLEME
+    # -------------------------------------------------------------------------
+
+    def without_policy(self, policy_number) -> 'PortfolioIndex':
+        """
+        Poliçenin satırı silinmiş tablo için indeks (haritalar paylaşılır)
+
+        Maliyet mezar taşı sayısıyla orantılıdır, portföy boyutuyla değil.
+        Poliçe numarası tek satırda olmalıdır (delete_policy aynı numaralı
+        tüm satırları siler; birden fazlaysa indeks baştan kurulur).
+        building_id tekil varsayılır (generator.py'de PRIMARY KEY).
+        """
+        base = self.policy_rows.get(policy_number)
+        row = self._live_row(base)
+        if row is None:
+            return self
+
+        removed = np.insert(self.removed, np.searchsorted(self.removed, base), base)
+        index = PortfolioIndex(self.policy_rows, self.building_rows,
+                               self.customer_building_rows, self.customer_rows,
+                               self.email_rows, removed, self.base_count)
+        index.inherit_policy_order(self, row)
+        return index
+
+    def _live_row(self, base: Optional[int]) -> Optional[int]:
+        """Taban pozisyonu → güncel pozisyon (silinmişse None)"""
+        removed = self.removed
+        if base is None or not len(removed):
+            return base
+        shift = int(np.searchsorted(removed, base))
+        if shift < len(removed) and removed[shift] == base:
+            return None
+        return base - shift
+
+    def _live_rows(self, bases: np.ndarray) -> np.ndarray:
+        """Taban pozisyonları → güncel pozisyonlar (silinen ve -1 girdiler -1)"""
+        removed = self.removed
+        if not len(removed):
+            return bases
+        shift = np.searchsorted(removed, bases)
+        rows = bases - shift
+        rows[removed[np.minimum(shift, len(removed) - 1)] == bases] = -1
+        return rows
+
+    # -------------------------------------------------------------------------
+    # SORGULAR - O(1)
+    # -------------------------------------------------------------------------
+
+    def policy_row(self, policy_number) -> Optional[int]:
+        return self._live_row(self.policy_rows.get(policy_number))
+
+    def policy_positions(self, policy_numbers) -> np.ndarray:
+        """Poliçe numaraları → satır pozisyonları (bulunamayanlar -1)"""
+        get = self.policy_rows.get
+        bases = np.fromiter((get(p, -1) for p in policy_numbers),
+                            dtype=np.intp, count=len(policy_numbers))
+        return self._live_rows(bases)
+
+    def building_row(self, building_id) -> Optional[int]:
+        return self._live_row(self.building_rows.get(building_id))
+
+    def building_rows_for_customer(self, customer_id) -> np.ndarray:
+        rows = self.customer_building_rows.get(customer_id)
+        if not len(self.removed) or not len(rows):
+            return rows
+        rows = self._live_rows(rows)
+        return rows[rows >= 0]
+
+    def customer_row(self, customer_id) -> Optional[int]:
+        return self.customer_rows.get(customer_id)
+
+    def email_row(self, email: str) -> Optional[int]:
+        if not email:
+            return None
+        return self.email_rows.get(email.lower())
+
+    # -------------------------------------------------------------------------
+    # SIRALI GÖRÜNÜM (KEYSET SAYFALAMA)
+    # -------------------------------------------------------------------------
+
+    def sorted_policy_rows(self, buildings: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        policy_number'a göre artan sıralı (anahtarlar, satır pozisyonları)
+
+        İlk çağrıda kurulur ve indeks nesnesinde saklanır (indeks değişmez
+        olduğu için eşzamanlı iki kurulum aynı sonucu üretir, kilit gerekmez).
+
+        Args:
+            buildings: Bu indeksin kurulduğu bina tablosu
+        """
+        order = self._policy_order
+        if order is None:
+            order = self._policy_order = self._build_policy_order(buildings)
+        return order
+
+    def inherit_policy_order(self, previous: 'PortfolioIndex', removed_row: int):
+        """Önceki indeksin sıralı görünümünü tek satır silinmiş tabloya taşı"""
+        order = previous._policy_order
+        if order is None:
+            return
+        keys, rows = order
+        keep = rows != removed_row
+        rows = rows[keep]
+        self._policy_order = (keys[keep], rows - (rows > removed_row))
+
+    @staticmethod
+    def _build_policy_order(buildings: Optional[pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray]:
+        if buildings is None or 'policy_number' not in buildings.columns:
+            return np.empty(0, dtype=object), _EMPTY_ROWS
+
+        values = buildings['policy_number']
+        rows = np.flatnonzero(values.notna().to_numpy())
+        keys = values.to_numpy()[rows]
+        # generator.py poliçe numaralarını sıralı üretir: çoğu zaman sıralama gerekmez
+        if not pd.Index(keys).is_monotonic_increasing:
+            order = np.argsort(keys.astype(str), kind='stable')
+            rows, keys = rows[order], keys[order]
+        return keys, rows
@@ -0,0 +1,1086 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Portföy Depolama Backend'i (SQLite / CSV / Parquet)
+=========================================================
+
+buildings, customers ve earthquakes veri setleri için takılabilir depolama
+katmanı. Varsayılan backend SQLite'tır (generator.py'nin data/dask_plus.db
+veritabanı):
+
+- Thread başına bağlantı, WAL modu (okuyucular yazarı beklemez)
+- Hazır (prepared) ifadeler: sabit SQL + `?` parametreleri, bağlantı başına
+  derlenip önbellekte tutulur
+- generator.py'nin indeksleri (idx_building_policy, idx_building_customer, ...)
+  her senkronizasyonda garanti edilir
+- Satır bazında yazım: poliçe silme tek bir indeksli DELETE, prim
+  güncellemesi sadece değişen kolonlara UPDATE
+
+Parquet backend'i (pyarrow kuruluysa):
+
+- Açık şema: her veri setinin kolon tipleri aşağıda tanımlıdır
+- Kolon projeksiyonu: `read(name, columns=[...])` sadece istenen kolonları okur
+- Memory-mapped okuma: Parquet dosyası mmap ile açılır
+- CSV, Parquet dosyasından daha yeniyse (ör. generator.py yeniden
+  çalıştırıldığında) otomatik içe aktarılır
+
+Her iki backend'de de CSV içe/dışa aktarma formatı olarak kalır. SQLite'ta
+CSV, tablo hiç yoksa ya da veritabanındaki son yazımdan sonra yeniden
+yazıldıysa içe aktarılır; sonrasında dışa aktarma hedefidir.
+
+CSV ve Parquet backend'leri get_storage() tarafından LoggedStorage ile
+sarılır: satır değişiklikleri append-only mutasyon günlüğüne yazılır
+(bkz. mutation_log.py), okuyucular günlüğü birleşik görür ve `compact()`
+günlüğü tabana işler.
+
+Tüm backend'ler okunan frame'e veri setinin bellek içi şemasını uygular
+(`typed_frame`): az değerli metin kolonları category, küçük tamsayılar
+int32, tarih kolonları datetime64 olur. Dosyaya/tabloya yazarken tarihler
+eski metin biçimine döner; disk formatı değişmez.
+
+Backend seçimi `DASK_STORAGE_BACKEND` ortam değişkeni ile yapılır
+('sqlite', 'parquet' veya 'csv'). pyarrow yoksa Parquet yerine CSV
+backend'e düşülür.
+
+KULLANIM:
+    from portfolio_storage import get_storage
+
+    storage = get_storage()                       # data/ dizini
+    df = storage.read('buildings')                # tüm kolonlar
+    df = storage.read('buildings', columns=['policy_number', 'annual_premium_tl'])
+    n = storage.row_count('earthquakes')          # Parquet: sadece metadata
+
+    storage.write('buildings', df)                # atomik yazım
+    storage.export_csv('buildings')               # data/buildings.csv
+
+    # Satır bazında yazım (SQLite: indeksli SQL, CSV/Parquet: mutasyon günlüğü)
+    storage.delete_rows('buildings', 'policy_number', ['DP-2025-00000001'])
+    storage.update_rows('buildings', 'policy_number', df, ['annual_premium_tl'])
+    storage.compact('buildings')                  # CSV/Parquet: günlüğü tabana işle
+
+    # Komut satırı (DASK_STORAGE_BACKEND'e göre)
+    python src/portfolio_storage.py import        # CSV → SQLite / Parquet
+    python src/portfolio_storage.py export        # SQLite / Parquet → CSV
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock, local
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mutation_log import OP_DELETE, OP_UPDATE, OP_UPSERT, MutationLog, json_value, row_values
+
+# Parquet desteği (opsiyonel)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Dosya imzası: (mtime_ns, size) - dosya yoksa None
+FileSignature = Optional[Tuple[int, int]]
+
+
+# =============================================================================
+# VERİ SETİ ŞEMALARI
+# =============================================================================
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """Veri seti tanımı: dosya adı, kolon tipleri ve CSV okuma seçenekleri"""
+    name: str
+    columns: Dict[str, str]
+    # Bellek içi (DataFrame) tipleri - bkz. typed_frame
+    frame_types: Dict[str, str] = field(default_factory=dict)
+    csv_encodings: Tuple[str, ...] = ('utf-8-sig',)
+    csv_options: Dict[str, object] = field(default_factory=dict)
+    strip_column_names: bool = False
+    # SQLite indeksleri: (indeks adı, kolonlar) - adlar generator.py ile aynı
+    sql_indexes: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+
+    @property
+    def csv_name(self) -> str:
+        return f'{self.name}.csv'
+
+    @property
+    def parquet_name(self) -> str:
+        return f'{self.name}.parquet'
+
+
+_BUILDING_COLUMNS = {
+    'building_id': 'string', 'customer_id': 'string',
+    'owner_name': 'string', 'owner_email': 'string', 'owner_phone': 'string',
+    'policy_number': 'string',
+    'city': 'string', 'district': 'string', 'neighborhood': 'string',
+    'complete_address': 'string',
+    'latitude': 'float64', 'longitude': 'float64',
+    'structure_type': 'string', 'construction_year': 'int64',
+    'building_age': 'int64', 'floors': 'int64', 'apartment_count': 'int64',
+    'building_area_m2': 'float64', 'residents': 'int64', 'commercial_units': 'int64',
+    'soil_type': 'string', 'soil_amplification': 'float64',
+    'liquefaction_risk': 'float64', 'distance_to_fault_km': 'float64',
+    'nearest_fault': 'string', 'quality_score': 'float64', 'risk_score': 'float64',
+    'package_type': 'string', 'max_coverage': 'int64', 'insurance_value_tl': 'int64',
+    'annual_premium_tl': 'float64', 'monthly_premium_tl': 'float64',
+    'ai_risk_score': 'float64',
+    'policy_status': 'string', 'policy_start_date': 'string',
+    'policy_end_date': 'string', 'created_at': 'string',
+}
+
+_CUSTOMER_COLUMNS = {
+    'customer_id': 'string', 'first_name': 'string', 'last_name': 'string',
+    'full_name': 'string', 'email': 'string', 'phone': 'string',
+    'tc_number': 'int64', 'password': 'string', 'password_hash': 'string',
+    'password_salt': 'string', 'password_aes_encrypted': 'string',
+    'avatar_url': 'string', 'status': 'string', 'registration_date': 'string',
+    'last_login': 'string', 'customer_score': 'int64',
+}
+
+# Bellek içi tipler (okuma sonrası, disk formatından bağımsız):
+#   category → az sayıda farklı değer alan metin kolonları
+#   int32    → küçük tamsayılar (yıl, kat, sayaç); para ve kimlik int64 kalır
+#   date     → 'YYYY-MM-DD' metni, bir kez parse edilir (datetime64)
+#   datetime → 'YYYY-MM-DD HH:MM:SS' metni (datetime64)
+# Ondalık kolonlar float64 kalır: prim ve koordinatlar hassasiyet ister,
+# route'lar bu değerleri yuvarlamadan JSON'a yazar
+_BUILDING_FRAME_TYPES = {
+    'owner_name': 'category', 'city': 'category', 'district': 'category',
+    'neighborhood': 'category', 'structure_type': 'category', 'soil_type': 'category',
+    'nearest_fault': 'category', 'package_type': 'category', 'policy_status': 'category',
+    'construction_year': 'int32', 'building_age': 'int32', 'floors': 'int32',
+    'apartment_count': 'int32', 'residents': 'int32', 'commercial_units': 'int32',
+    'policy_start_date': 'date', 'policy_end_date': 'date', 'created_at': 'datetime',
+}
+
+_CUSTOMER_FRAME_TYPES = {
+    'first_name': 'category', 'last_name': 'category', 'full_name': 'category',
+    'password': 'category', 'password_hash': 'category', 'password_salt': 'category',
+    'password_aes_encrypted': 'category', 'avatar_url': 'category', 'status': 'category',
+    'customer_score': 'int32',
+    'registration_date': 'date', 'last_login': 'datetime',
+}
+
+# Kandilli katalog formatı (pricing.py / trigger.py ile aynı kolon adları)
+_EARTHQUAKE_COLUMNS = {
+    'Olus tarihi': 'string', 'Olus zamani': 'string',
+    'Enlem': 'float64', 'Boylam': 'float64', 'Der(km)': 'float64',
+    'xM': 'float64', 'MD': 'float64', 'ML': 'float64',
+    'Mw': 'float64', 'Ms': 'float64', 'Mb': 'float64',
+    'Tip': 'string', 'Yer': 'string',
+}
+
+DATASETS: Dict[str, DatasetSpec] = {
+    'buildings': DatasetSpec(
+        'buildings', _BUILDING_COLUMNS, _BUILDING_FRAME_TYPES,
+        sql_indexes=(
+            # generator.py'de building_id PRIMARY KEY; to_sql(replace) bunu düşürür
+            ('idx_building_id', ('building_id',)),
+            ('idx_building_customer', ('customer_id',)),
+            ('idx_building_location', ('latitude', 'longitude')),
+            ('idx_building_policy', ('policy_number',)),
+            ('idx_building_status', ('policy_status',)),
+        )
+    ),
+    'customers': DatasetSpec(
+        'customers', _CUSTOMER_COLUMNS, _CUSTOMER_FRAME_TYPES,
+        sql_indexes=(
+            ('idx_customer_id', ('customer_id',)),
+            ('idx_customer_email', ('email',)),
+            ('idx_customer_status', ('status',)),
+        )
+    ),
+    'earthquakes': DatasetSpec(
+        'earthquakes', _EARTHQUAKE_COLUMNS,
+        # RealEarthquakeDataAnalyzer ile aynı sıra
+        csv_encodings=('latin-1', 'windows-1254', 'utf-8', 'iso-8859-9'),
+        csv_options={'on_bad_lines': 'skip'},
+        strip_column_names=True
+    ),
+}
+
+
+def dataset_spec(name: str) -> DatasetSpec:
+    if name not in DATASETS:
+        raise KeyError(f"Bilinmeyen veri seti: {name}")
+    return DATASETS[name]
+
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _typed_column(series: pd.Series, frame_type: str) -> pd.Series:
+    """Tek kolonu bellek içi tipine çevir; kayıpsız değilse olduğu gibi bırak"""
+    if frame_type == 'category':
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        if series.nunique() > len(series) // 2:
+            return series  # çoğu tekil (ör. gerçek parola hash'leri): kategori kazanç sağlamaz
+        return series.astype('category')
+
+    if frame_type == 'int32':
+        if series.dtype == np.int32 or not pd.api.types.is_integer_dtype(series):
+            return series  # boş değerli tamsayı kolonu float64 olarak kalır
+        if len(series) and (series.min() < _INT32.min or series.max() > _INT32.max):
+            return series
+        return series.astype(np.int32)
+
+    if frame_type in ('date', 'datetime'):
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        parsed = pd.to_datetime(series, format='ISO8601', errors='coerce')
+        if (parsed.isna() & series.notna()).any():
+            return series  # tanınmayan tarih metni: veri kaybetmemek için dokunma
+        return parsed
+
+    raise ValueError(f"Bilinmeyen bellek tipi: {frame_type}")
+
+
+def typed_frame(df: Optional[pd.DataFrame], name: str) -> Optional[pd.DataFrame]:
+    """
+    Okunan frame'e veri setinin bellek içi şemasını uygula
+
+    Zaten doğru tipte olan kolonlara dokunulmaz (tekrar çağırmak ucuzdur).
+    Şemada olmayan veri setleri ve kolonlar olduğu gibi döner.
+    """
+    spec = DATASETS.get(name)
+    if df is None or spec is None or not spec.frame_types:
+        return df
+
+    converted = {}
+    for col, frame_type in spec.frame_types.items():
+        if col in df.columns:
+            series = _typed_column(df[col], frame_type)
+            if series is not df[col]:
+                converted[col] = series
+    if not converted:
+        return df
+
+    df = df.copy(deep=False)
+    for col, series in converted.items():
+        df[col] = series
+    return df
+
+
+def plain_frame(df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Kategorik kolonları object'e çevir (kopya döner)
+
+    Serbest metin atayan dönüşümler (fillna('Unknown'), LabelEncoder, ...)
+    kategorik kolonda yeni kategori hatası verir; özellik mühendisliği gibi
+    kısa ömürlü kopyalarda kullanılır.
+    """
+    if df is None:
+        return None
+    categorical = {col: object for col in df.columns
+                   if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    return df.astype(categorical) if categorical else df.copy()
+
+
+def _text_column(series: pd.Series) -> pd.Series:
+    """Metin olarak saklanan kolonu yazıma hazırla (tarih → metin, boş → None)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Seri bütün olarak biçimlenir: saat kısmı hep 00:00 ise sadece tarih
+        return series.astype(str).where(series.notna(), None)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    return series.where(series.isna(), series.astype(str))
+
+
+def _signature(path: Path) -> FileSignature:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# =============================================================================
+# CSV BACKEND
+# =============================================================================
+
+def _logical_type(series: pd.Series, spec: DatasetSpec, column) -> str:
+    """Kolonun şemadaki tipi; şemada yoksa dtype'tan çıkarılır"""
+    logical = spec.columns.get(column)
+    if logical is not None:
+        return logical
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int64'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'float64'
+    return 'string'
+
+
+class CsvStorage:
+    """Metin CSV backend'i (geriye dönük uyumlu varsayılan düzen)"""
+
+    format_name = 'csv'
+    supports_row_writes = False
+
+    def __init__(self, data_dir: str = None):
+        self.data_dir = Path(data_dir or Path(__file__).parent.parent / 'data')
+
+    def path(self, name: str) -> Path:
+        return self.data_dir / dataset_spec(name).csv_name
+
+    def exists(self, name: str) -> bool:
+        return self.path(name).exists()
+
+    def signature(self, name: str) -> Tuple[FileSignature, ...]:
+        return (_signature(self.path(name)),)
+
+    def read(self, name: str, columns: List[str] = None) -> Optional[pd.DataFrame]:
+        """CSV'yi oku (dosya yoksa None)"""
+        path = self.path(name)
+        if not path.exists():
+            return None
+        return typed_frame(self.read_file(path, dataset_spec(name), columns), name)
+
+    @classmethod
+    def read_file(cls, path: Path, spec: DatasetSpec, columns: List[str] = None) -> pd.DataFrame:
+        """Herhangi bir CSV yolunu veri setinin okuma seçenekleriyle oku"""
+        usecols = None
+        if columns is not None:
+            wanted = set(columns)
+            usecols = lambda col: col.strip() in wanted  # noqa: E731
+
+        df = cls._read_csv(path, spec, usecols)
+        if spec.strip_column_names:
+            df.columns = df.columns.str.strip()
+        return df
+
+    @staticmethod
+    def _read_csv(path: Path, spec: DatasetSpec, usecols) -> pd.DataFrame:
+        """Veri setinin encoding listesini sırayla dene"""
+        last_error = None
+        for encoding in spec.csv_encodings:
+            try:
+                return pd.read_csv(path, encoding=encoding, usecols=usecols, **spec.csv_options)
+            except (UnicodeDecodeError, pd.errors.ParserError) as e:
+                last_error = e
+        raise last_error
+
+    def write(self, name: str, df: pd.DataFrame):
+        """CSV'yi atomik olarak yaz (geçici dosya + os.replace)"""
+        path = self.path(name)
+        tmp_path = path.with_name(path.name + '.tmp')
+        df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+        os.replace(tmp_path, path)
+
+    def sync(self, name: str):
+        """CSV tek kaynak: senkronize edilecek bir şey yok"""
+
+    def row_count(self, name: str) -> int:
+        path = self.path(name)
+        if not path.exists():
+            return 0
+        return len(self._read_csv(path, dataset_spec(name), usecols=[0]))
+
+
+# =============================================================================
+# PARQUET BACKEND
+# =============================================================================
+
+def _arrow_type(logical: str):
+    return {
+        'string': pa.string(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'bool': pa.bool_(),
+    }[logical]
+
+
+def _to_arrow_table(df: pd.DataFrame, spec: DatasetSpec) -> 'pa.Table':
+    """
+    DataFrame'i veri setinin açık şemasına göre Arrow tablosuna çevir
+
+    Şemada olmayan ek kolonlar tip çıkarımı ile korunur (sayısal → kendi
+    tipi, diğerleri → string). Boş değer içeren tamsayı kolonlar Arrow'da
+    null olarak saklanır; okunurken pandas'ta float64 olur (CSV ile aynı).
+    """
+    arrays, fields = [], []
+
+    for col in df.columns:
+        series = df[col]
+        logical = _logical_type(series, spec, col)
+
+        if logical in ('int64', 'float64'):
+            series = pd.to_numeric(series, errors='coerce')
+            if logical == 'int64' and series.dtype.kind == 'f':
+                finite = series.dropna()
+                if not (finite == finite.round()).all():
+                    logical = 'float64'
+        elif logical == 'string':
+            series = _text_column(series)
+
+        arrow_type = _arrow_type(logical)
+        arrays.append(pa.array(series, type=arrow_type, from_pandas=True))
+        fields.append(pa.field(str(col), arrow_type))
+
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+class ParquetStorage:
+    """
+    Kolon tabanlı Parquet backend'i
+
+    CSV dosyaları içe/dışa aktarma formatı olarak kullanılır: CSV, Parquet
+    dosyasından daha yeniyse okuma öncesi otomatik içe aktarılır.
+    """
+
+    format_name = 'parquet'
+    supports_row_writes = False
+
+    def __init__(self, data_dir: str = None):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet backend için pyarrow gerekli: pip install pyarrow")
+        self.csv = CsvStorage(data_dir)
+        self.data_dir = self.csv.data_dir
+        self._import_lock = Lock()
+
+    def path(self, name: str) -> Path:
+        return self.data_dir / dataset_spec(name).parquet_name
+
+    def exists(self, name: str) -> bool:
+        return self.path(name).exists() or self.csv.exists(name)
+
+    def signature(self, name: str) -> Tuple[FileSignature, ...]:
+        # CSV imzası da dahil: dışarıdan yeniden yazılan CSV snapshot'ı bayatlatır
+        return (_signature(self.path(name)), _signature(self.csv.path(name)))
+
+    def read(self, name: str, columns: List[str] = None) -> Optional[pd.DataFrame]:
+        """Parquet'i memory-map ile oku (gerekirse önce CSV'den içe aktar)"""
+        self.sync(name)
+
+        path = self.path(name)
+        if not path.exists():
+            return None
+
+        if columns is not None:
+            available = set(pq.read_schema(path).names)
+            columns = [col for col in columns if col in available]
+
+        table = pq.read_table(path, columns=columns, memory_map=True)
+        return typed_frame(table.to_pandas(), name)
+
+    def write(self, name: str, df: pd.DataFrame):
+        """Parquet'i atomik olarak yaz (geçici dosya + os.replace)"""
+        path = self.path(name)
+        tmp_path = path.with_name(path.name + '.tmp')
+        table = _to_arrow_table(df, dataset_spec(name))
+        pq.write_table(table, tmp_path, compression='snappy')
+        os.replace(tmp_path, path)
+
+    def row_count(self, name: str) -> int:
+        self.sync(name)
+        path = self.path(name)
+        if not path.exists():
+            return 0
+        return pq.read_metadata(path).num_rows
+
+    # -------------------------------------------------------------------------
+    # İÇE / DIŞA AKTARMA
+    # -------------------------------------------------------------------------
+
+    def import_csv(self, name: str) -> int:
+        """CSV → Parquet (satır sayısını döndürür)"""
+        df = self.csv.read(name)
+        if df is None:
+            return 0
+        self.write(name, df)
+        logger.info(f"🔄 {self.csv.path(name).name} → {self.path(name).name} ({len(df):,} satır)")
+        return len(df)
+
+    def export_csv(self, name: str) -> int:
+        """Parquet → CSV (satır sayısını döndürür)"""
+        df = self.read(name)
+        if df is None:
+            return 0
+        self.csv.write(name, df)
+        # CSV'yi Parquet ile aynı zamana çek: yeniden içe aktarma tetiklenmesin
+        parquet_mtime = os.stat(self.path(name)).st_mtime_ns
+        os.utime(self.csv.path(name), ns=(parquet_mtime, parquet_mtime))
+        logger.info(f"📤 {self.path(name).name} → {self.csv.path(name).name} ({len(df):,} satır)")
+        return len(df)
+
+    def sync(self, name: str):
+        """CSV, Parquet'ten daha yeniyse içe aktar (imza alınmadan önce çağrılır)"""
+        if not self._csv_is_newer(name):
+            return
+        with self._import_lock:
+            if self._csv_is_newer(name):
+                self.import_csv(name)
+
+    def _csv_is_newer(self, name: str) -> bool:
+        csv_signature = _signature(self.csv.path(name))
+        if csv_signature is None:
+            return False
+        parquet_signature = _signature(self.path(name))
+        return parquet_signature is None or csv_signature[0] > parquet_signature[0]
+
+
+# =============================================================================
+# SQLITE BACKEND
+# =============================================================================
+
+_SQL_TYPES = {'string': 'TEXT', 'int64': 'INTEGER', 'float64': 'REAL', 'bool': 'INTEGER'}
+
+
+def _quote(identifier) -> str:
+    """SQL tanımlayıcısını çift tırnakla (kolon adları dışarıdan gelir)"""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _sql_value(value):
+    """numpy/pandas skalerini sqlite3'ün bağlayabileceği Python tipine çevir"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (str, int, float, bytes)):
+        return value
+    return str(value)
+
+
+def _sql_rows(df: pd.DataFrame) -> Iterable[tuple]:
+    """
+    DataFrame satırlarını parametre demetleri olarak üret (NaN → NULL)
+
+    astype(object) sayısal numpy değerlerini Python int/float'a çevirir;
+    tarih kolonları sqlite3 bağlayamadığı için CSV ile aynı metne çevrilir.
+    """
+    frame = df.copy(deep=False)
+    for col in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[col]):
+            frame[col] = _text_column(frame[col])
+    frame = frame.astype(object)
+    frame = frame.where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+class SqliteStorage:
+    """
+    SQLite backend'i (data/dask_plus.db)
+
+    buildings ve customers tabloları generator.py'nin `save_to_database`
+    ile doldurduğu tablolardır. earthquakes Kandilli kataloğu olarak CSV'de
+    kalır (generator'ın earthquakes tablosu farklı kolon adları kullanır).
+    """
+
+    format_name = 'sqlite'
+    supports_row_writes = True
+
+    DB_NAME = 'dask_plus.db'
+    TABLES = ('buildings', 'customers')
+
+    def __init__(self, data_dir: str = None):
+        self.csv = CsvStorage(data_dir)
+        self.data_dir = self.csv.data_dir
+        self.db_path = self.data_dir / self.DB_NAME
+        self._local = local()
+        self._import_lock = Lock()
+        # Tabloyla aynı içerikteki CSV imzaları (içe/dışa aktarma sonrası)
+        self._synced_csv: Dict[str, FileSignature] = {}
+
+    # -------------------------------------------------------------------------
+    # BAĞLANTI
+    # -------------------------------------------------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        """Thread başına tek bağlantı (sqlite3 bağlantıları thread'ler arası paylaşılmaz)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            # isolation_level=None: işlemler _transaction() ile açıkça yönetilir
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0,
+                                   isolation_level=None, cached_statements=256)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Yazma işlemi: BEGIN IMMEDIATE ... COMMIT (hata olursa ROLLBACK)"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _table_columns(self, name: str) -> Optional[List[str]]:
+        """Tablonun kolonları (tablo yoksa None)"""
+        if not self.db_path.exists():
+            return None
+        rows = self._connection().execute(f'PRAGMA table_info({_quote(name)})').fetchall()
+        return [row[1] for row in rows] or None
+
+    def _ensure_indexes(self, conn: sqlite3.Connection, name: str, columns: Iterable[str]):
+        """generator.py indekslerini oluştur (tabloda olmayan kolonlar atlanır)"""
+        available = set(columns)
+        for index_name, index_columns in dataset_spec(name).sql_indexes:
+            if set(index_columns) <= available:
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {_quote(index_name)} ON {_quote(name)} '
+                    f'({", ".join(_quote(col) for col in index_columns)})'
+                )
+
+    # -------------------------------------------------------------------------
+    # OKUMA
+    # -------------------------------------------------------------------------
+
+    def path(self, name: str) -> Path:
+        return self.db_path if name in self.TABLES else self.csv.path(name)
+
+    def exists(self, name: str) -> bool:
+        if name not in self.TABLES:
+            return self.csv.exists(name)
+        return self._table_columns(name) is not None or self.csv.exists(name)
+
+    def signature(self, name: str) -> Tuple[FileSignature, ...]:
+        if name not in self.TABLES:
+            return self.csv.signature(name)
+        # CSV imzası da dahil: dışarıdan yeniden yazılan CSV snapshot'ı bayatlatır (bkz. sync)
+        return self._db_signature() + (_signature(self.csv.path(name)),)
+
+    def _db_signature(self) -> Tuple[FileSignature, ...]:
+        # WAL modunda commit'ler önce -wal dosyasına yazılır
+        wal_path = self.db_path.with_name(self.db_path.name + '-wal')
+        return (_signature(self.db_path), _signature(wal_path))
+
+    def read(self, name: str, columns: List[str] = None) -> Optional[pd.DataFrame]:
+        """Tabloyu ekleme sırasıyla oku (gerekirse önce CSV'den içe aktar)"""
+        if name not in self.TABLES:
+            return self.csv.read(name, columns)
+
+        self.sync(name)
+        available = self._table_columns(name)
+        if available is None:
+            return None
+
+        if columns is not None:
+            present = set(available)
+            available = [col for col in columns if col in present]
+            if not available:
+                return pd.DataFrame()
+
+        select = ', '.join(_quote(col) for col in available)
+        df = pd.read_sql_query(f'SELECT {select} FROM {_quote(name)} ORDER BY rowid',
+                               self._connection())
+        return typed_frame(df, name)
+
+    def row_count(self, name: str) -> int:
+        if name not in self.TABLES:
+            return self.csv.row_count(name)
+        self.sync(name)
+        if self._table_columns(name) is None:
+            return 0
+        return self._connection().execute(f'SELECT COUNT(*) FROM {_quote(name)}').fetchone()[0]
+
+    # -------------------------------------------------------------------------
+    # YAZMA
+    # -------------------------------------------------------------------------
+
+    def write(self, name: str, df: pd.DataFrame):
+        """Tabloyu tek işlemde yeniden oluştur (DROP + CREATE + INSERT + indeksler)"""
+        if name not in self.TABLES:
+            return self.csv.write(name, df)
+
+        spec = dataset_spec(name)
+        table = _quote(name)
+        definitions = ', '.join(
+            f'{_quote(col)} {_SQL_TYPES[_logical_type(df[col], spec, col)]}' for col in df.columns
+        )
+        placeholders = ', '.join('?' for _ in df.columns)
+
+        with self._transaction() as conn:
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+            conn.execute(f'CREATE TABLE {table} ({definitions})')
+            conn.executemany(f'INSERT INTO {table} VALUES ({placeholders})', _sql_rows(df))
+            self._ensure_indexes(conn, name, df.columns)
+
+    def delete_rows(self, name: str, key_column: str, keys: Iterable) -> int:
+        """Anahtar kolonu eşleşen satırları sil (silinen satır sayısı)"""
+        sql = f'DELETE FROM {_quote(name)} WHERE {_quote(key_column)} = ?'
+        with self._transaction() as conn:
+            cursor = conn.executemany(sql, [(_sql_value(key),) for key in keys])
+            return cursor.rowcount
+
+    def update_rows(self, name: str, key_column: str, df: pd.DataFrame,
+                    columns: List[str]) -> int:
+        """
+        Verilen kolonları anahtar kolonuna göre güncelle (güncellenen satır sayısı)
+
+        Tabloda olmayan kolonlar (ör. ai_risk_score) önce ALTER TABLE ile eklenir.
+        """
+        if not columns:
+            return 0
+
+        spec = dataset_spec(name)
+        table = _quote(name)
+        existing = set(self._table_columns(name) or ())
+        assignments = ', '.join(f'{_quote(col)} = ?' for col in columns)
+        sql = f'UPDATE {table} SET {assignments} WHERE {_quote(key_column)} = ?'
+
+        with self._transaction() as conn:
+            for col in columns:
+                if col not in existing:
+                    sql_type = _SQL_TYPES[_logical_type(df[col], spec, col)]
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {_quote(col)} {sql_type}')
+            cursor = conn.executemany(sql, _sql_rows(df[list(columns) + [key_column]]))
+            return cursor.rowcount
+
+    # -------------------------------------------------------------------------
+    # İÇE / DIŞA AKTARMA
+    # -------------------------------------------------------------------------
+
+    def import_csv(self, name: str) -> int:
+        """CSV → SQLite tablosu (satır sayısını döndürür)"""
+        if name not in self.TABLES:
+            return 0
+        csv_signature = _signature(self.csv.path(name))
+        df = self.csv.read(name)
+        if df is None:
+            return 0
+        self.write(name, df)
+        self._synced_csv[name] = csv_signature
+        logger.info(f"🔄 {self.csv.path(name).name} → {self.db_path.name}:{name} ({len(df):,} satır)")
+        return len(df)
+
+    def export_csv(self, name: str) -> int:
+        """SQLite tablosu → CSV (satır sayısını döndürür)"""
+        if name not in self.TABLES:
+            return 0
+        df = self.read(name)
+        if df is None:
+            return 0
+        self.csv.write(name, df)
+        self._synced_csv[name] = _signature(self.csv.path(name))
+        logger.info(f"📤 {self.db_path.name}:{name} → {self.csv.path(name).name} ({len(df):,} satır)")
+        return len(df)
+
+    def sync(self, name: str):
+        """
+        Tablo yoksa ya da CSV veritabanından yeniyse CSV'den içe aktar,
+        indeksleri garanti et
+
+        CSV veritabanındaki son yazımdan (satır silme / prim güncellemesi
+        dahil) sonra yeniden yazıldıysa (ör. sadece CSV üreten bir araç) CSV
+        kazanır; aksi halde tablodaki satır bazlı değişiklikler korunur.
+        generator.py `to_sql(if_exists='replace')` ile tabloyu yeniden
+        oluşturduğunda indeksler düşer; burada yeniden kurulur.
+        """
+        if name not in self.TABLES:
+            return
+        with self._import_lock:
+            columns = self._table_columns(name)
+            if columns is None or self._csv_is_newer(name):
+                self.import_csv(name)
+                return
+            # Tüm indeksler varsa hiçbir şey yazılmaz (imza değişmez)
+            self._ensure_indexes(self._connection(), name, columns)
+
+    def _csv_is_newer(self, name: str) -> bool:
+        csv_signature = _signature(self.csv.path(name))
+        if csv_signature is None or csv_signature == self._synced_csv.get(name):
+            return False
+        # WAL modunda son yazım -wal dosyasındadır
+        db_mtimes = [sig[0] for sig in self._db_signature() if sig is not None]
+        return not db_mtimes or csv_signature[0] > max(db_mtimes)
+
+
+# =============================================================================
+# MUTASYON GÜNLÜKLÜ BACKEND (CSV / PARQUET)
+# =============================================================================
+
+# Mutasyon günlüğü tutulan veri setleri ve anahtar kolonları
+LOGGED_DATASETS = {'buildings': 'policy_number'}
+
+
+class LoggedStorage:
+    """
+    CSV / Parquet backend'ine satır bazında yazım ekleyen sarmalayıcı
+
+    - delete_rows / update_rows / upsert_rows: günlüğe ekleme (O(1) I/O)
+    - read: taban + günlük birleşimi (kolon projeksiyonu korunur)
+    - signature: taban imzası + günlük dosyası imzası
+    - compact: birleşik veriyi tabana atomik yazar, günlüğü siler
+    - Günlük `max_pending` mutasyonu aşacaksa toplu yazım doğrudan tabana
+      işlenir (ör. tüm primlerin yeniden hesaplanması)
+    """
+
+    supports_row_writes = True
+
+    def __init__(self, base, max_pending: int = None):
+        """
+        Args:
+            base: CsvStorage ya da ParquetStorage
+            max_pending: Günlükte tutulacak en fazla mutasyon
+                (varsayılan: DASK_MUTATION_LOG_MAX, 10000)
+        """
+        self.base = base
+        self.data_dir = base.data_dir
+        self.format_name = f'{base.format_name}+log'
+        self.max_pending = max_pending or int(os.environ.get('DASK_MUTATION_LOG_MAX', 10_000))
+        self._logs = {
+            name: MutationLog(self.data_dir / f'{name}.mutations.jsonl')
+            for name in LOGGED_DATASETS
+        }
+        self._write_lock = Lock()
+
+    def _log_for(self, name: str, key_column: str) -> MutationLog:
+        if LOGGED_DATASETS.get(name) != key_column:
+            raise KeyError(f"Satır bazında yazım desteklenmiyor: {name}.{key_column}")
+        return self._logs[name]
+
+    def _entries(self, name: str) -> List[dict]:
+        log = self._logs.get(name)
+        if log is None:
+            return []
+        return log.read(self.base.signature(name))
+
+    # -------------------------------------------------------------------------
+    # OKUMA
+    # -------------------------------------------------------------------------
+
+    def path(self, name: str) -> Path:
+        return self.base.path(name)
+
+    def exists(self, name: str) -> bool:
+        return self.base.exists(name)
+
+    def sync(self, name: str):
+        self.base.sync(name)
+
+    def signature(self, name: str) -> Tuple[FileSignature, ...]:
+        log = self._logs.get(name)
+        if log is None:
+            return self.base.signature(name)
+        return self.base.signature(name) + (_signature(log.path),)
+
+    def read(self, name: str, columns: List[str] = None) -> Optional[pd.DataFrame]:
+        """Tabanı oku ve bekleyen mutasyonları uygula"""
+        self.base.sync(name)
+        entries = self._entries(name)
+        if not entries:
+            return self.base.read(name, columns)
+
+        key_column = LOGGED_DATASETS[name]
+        base_columns = None if columns is None else list(dict.fromkeys([*columns, key_column]))
+        df = MutationLog.apply(self.base.read(name, base_columns), entries, key_column, columns)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return typed_frame(df, name)  # eklenen satırlar tipsiz gelir
+
+    def row_count(self, name: str) -> int:
+        if not self._entries(name):
+            return self.base.row_count(name)
+        return len(self.read(name, columns=[LOGGED_DATASETS[name]]))
+
+    def pending_mutations(self, name: str) -> int:
+        """Günlükte bekleyen mutasyon sayısı"""
+        log = self._logs.get(name)
+        return 0 if log is None else log.count()
+
+    # -------------------------------------------------------------------------
+    # YAZMA
+    # -------------------------------------------------------------------------
+
+    def write(self, name: str, df: pd.DataFrame):
+        """Tüm veri setini yaz (günlük geçersiz kalır ve silinir)"""
+        with self._write_lock:
+            self.base.write(name, df)
+            log = self._logs.get(name)
+            if log is not None:
+                log.clear()
+
+    def delete_rows(self, name: str, key_column: str, keys: Iterable) -> int:
+        """Silme mutasyonlarını günlüğe ekle (eklenen mutasyon sayısı)"""
+        entries = [{'op': OP_DELETE, 'key': json_value(key)} for key in keys]
+        return self._append(name, key_column, entries)
+
+    def update_rows(self, name: str, key_column: str, df: pd.DataFrame,
+                    columns: List[str]) -> int:
+        """Verilen kolonların güncellemelerini günlüğe ekle (eklenen mutasyon sayısı)"""
+        if not columns:
+            return 0
+        return self._append(name, key_column, self._row_entries(OP_UPDATE, df, key_column, columns))
+
+    def upsert_rows(self, name: str, key_column: str, df: pd.DataFrame) -> int:
+        """Satırları ekle ya da (anahtar varsa) tamamen değiştir"""
+        return self._append(name, key_column,
+                            self._row_entries(OP_UPSERT, df, key_column, list(df.columns)))
+
+    @staticmethod
+    def _row_entries(op: str, df: pd.DataFrame, key_column: str, columns: List[str]) -> List[dict]:
+        keys = [json_value(key) for key in df[key_column]]
+        return [{'op': op, 'key': key, 'values': values}
+                for key, values in zip(keys, row_values(df, list(columns)))]
+
+    def _append(self, name: str, key_column: str, entries: List[dict]) -> int:
+        log = self._log_for(name, key_column)
+        if not entries:
+            return 0
+
+        with self._write_lock:
+            if log.count() + len(entries) <= self.max_pending:
+                log.append(entries, self.base.signature(name))
+                return len(entries)
+
+            # Günlük taşacak: birleşik veriyi doğrudan tabana yaz
+            merged = MutationLog.apply(self.read(name), entries, key_column)
+            self.base.write(name, merged)
+            log.clear()
+            logger.info(f"🗜️ {name}: {len(entries):,} mutasyon doğrudan tabana yazıldı")
+            return len(entries)
+
+    def compact(self, name: str, merged: pd.DataFrame = None) -> int:
+        """
+        Günlüğü tabana işle (işlenen mutasyon sayısı)
+
+        Args:
+            merged: Taban + günlük birleşimi zaten bellekteyse (PortfolioStore
+                snapshot'ı) yeniden okumamak için verilir
+        """
+        log = self._logs.get(name)
+        if log is None:
+            return 0
+
+        with self._write_lock:
+            pending = log.count()
+            if pending == 0:
+                return 0
+            if merged is None:
+                merged = self.read(name)
+            # Taban atomik yazılır; günlük silinmeden çökülürse başlıktaki
+            # eski taban imzası eşleşmez ve günlük yok sayılır
+            self.base.write(name, merged)
+            log.clear()
+
+        logger.info(f"🗜️ {name}: {pending:,} mutasyon tabana işlendi")
+        return pending
+
+    # -------------------------------------------------------------------------
+    # İÇE / DIŞA AKTARMA
+    # -------------------------------------------------------------------------
+
+    def import_csv(self, name: str) -> int:
+        """CSV'yi taban olarak al (bekleyen mutasyonlar atılır)"""
+        with self._write_lock:
+            if isinstance(self.base, ParquetStorage):
+                count = self.base.import_csv(name)
+            else:
+                count = self.base.row_count(name)
+            log = self._logs.get(name)
+            if log is not None:
+                log.clear()
+        return count
+
+    def export_csv(self, name: str) -> int:
+        """Günlüğü tabana işle ve CSV'ye aktar"""
+        self.compact(name)
+        if isinstance(self.base, ParquetStorage):
+            return self.base.export_csv(name)
+        return self.base.row_count(name)
+
+
+# =============================================================================
+# FABRİKA
+# =============================================================================
+
+_BACKENDS = {'sqlite': SqliteStorage, 'parquet': ParquetStorage, 'csv': CsvStorage}
+
+_storages: Dict[Tuple[str, str], object] = {}
+_storages_lock = Lock()
+
+
+def get_storage(data_dir: str = None, backend: str = None):
+    """
+    Yapılandırılmış depolama backend'ini döndür (dizin başına tek örnek)
+
+    Args:
+        data_dir: Veri dizini (varsayılan: proje/data)
+        backend: 'sqlite', 'parquet' veya 'csv' (varsayılan: DASK_STORAGE_BACKEND)
+    """
+    backend = (backend or os.environ.get('DASK_STORAGE_BACKEND', 'sqlite')).lower()
+    if backend == 'parquet' and not PARQUET_AVAILABLE:
+        logger.warning("⚠️ pyarrow bulunamadı, CSV depolama kullanılıyor")
+        backend = 'csv'
+    if backend not in _BACKENDS:
+        logger.warning(f"⚠️ Bilinmeyen depolama backend'i '{backend}', CSV kullanılıyor")
+        backend = 'csv'
+
+    resolved_dir = str(Path(data_dir or Path(__file__).parent.parent / 'data').resolve())
+    key = (backend, resolved_dir)
+
+    with _storages_lock:
+        storage = _storages.get(key)
+        if storage is None:
+            storage = _BACKENDS[backend](resolved_dir)
+            if not storage.supports_row_writes:
+                storage = LoggedStorage(storage)
+            _storages[key] = storage
+    return storage
+
+
+def read_dataset_file(filepath, columns: List[str] = None,
+                      dataset: str = None) -> Optional[pd.DataFrame]:
+    """
+    CSV yolu verilen veri setini yapılandırılmış backend üzerinden oku
+
+    Dosya adı bilinen bir veri setine (buildings.csv, earthquakes.csv, ...)
+    karşılık geliyorsa backend kullanılır. Aksi halde dosya doğrudan CSV
+    olarak okunur; `dataset` verilmişse o veri setinin encoding/okuma
+    seçenekleri uygulanır.
+    """
+    path = Path(filepath)
+    for spec in DATASETS.values():
+        if path.name == spec.csv_name:
+            return get_storage(str(path.parent)).read(spec.name, columns=columns)
+
+    if not path.exists():
+        return None
+    if dataset is not None:
+        return CsvStorage.read_file(path, dataset_spec(dataset), columns)
+    return pd.read_csv(path, encoding='utf-8-sig', usecols=columns)
+
+
+# =============================================================================
+# KOMUT SATIRI
+# =============================================================================
+
+def main():
+    """python src/portfolio_storage.py [import|export] [veri_seti ...]"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('import', 'export'):
+        print(main.__doc__)
+        sys.exit(1)
+
+    storage = get_storage()
+    names = sys.argv[2:] or list(DATASETS)
+    for name in names:
+        if sys.argv[1] == 'import':
+            storage.import_csv(name)
+        else:
+            storage.export_csv(name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,697 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Portföy Deposu (Process-Wide In-Memory Store)
+===================================================
+
+buildings ve customers veri setleri her istekte yeniden parse edilmek yerine
+süreç başına bir kez yüklenir. Tüm route'lar aynı salt-okunur snapshot'ı
+paylaşır; dosyanın mtime/size imzası ya da dahili veri versiyonu
+değiştiğinde snapshot atomik olarak yenisiyle değiştirilir.
+
+Versiyonlar (copy-on-write):
+- Her snapshot değişmezdir ve tekil bir versiyon numarası taşır
+- Yazıcılar yeni versiyonu kopya üzerinde hazırlar ve referansı tek
+  atamayla değiştirir; okuyucular hiçbir kilidi beklemez
+- Okuma kapsamında (HTTP isteği) ilk snapshot() çağrısı versiyonu sabitler
+  (pin); kapsam boyunca aynı versiyon döner, yarım yazılmış veri görülmez
+- Sabitlenen versiyonlar sayılır; son pin bırakılınca eski versiyonu tutan
+  referans kalmaz ve bellek hemen geri verilir (CPython referans sayımı)
+
+Veri portfolio_storage backend'i üzerinden okunur/yazılır (varsayılan
+SQLite; CSV içe/dışa aktarma formatı olarak kalır). Poliçe silme ve prim
+güncellemesi tüm tabloyu yeniden yazmaz: SQLite'ta indeksli DELETE/UPDATE,
+CSV/Parquet'te mutasyon günlüğüne ekleme yapılır; arka plan sıkıştırıcısı
+günlüğü periyodik olarak tabana işler.
+
+KULLANIM:
+    from portfolio_store import get_portfolio_store
+
+    store = get_portfolio_store()
+    snapshot = store.snapshot()
+
+    if snapshot.buildings is None:
+        ...  # bina verisi yok
+
+    # O(1) anahtar sorguları (hash indeks)
+    policy = snapshot.policy('DP-2025-00000001')         # pd.Series | None
+    buildings = snapshot.customer_buildings('CUS-000001') # pd.DataFrame
+
+    # Trigram arama (Türkçe katlamalı, sıralı)
+    result = snapshot.policy_search.search('yilmaz')     # result.keys: poliçe no'ları
+    result = snapshot.customer_search.search('ayse')     # result.keys: customer_id'ler
+
+    # Müşteri özetleri (bina sayısı, aktif poliçe, toplam prim, iletişim)
+    page = snapshot.customer_aggregates.records(slice(0, 20))
+
+    # Keyset sayfalama: policy_number'a göre sıralı anahtarlar ve satırlar
+    keys, rows = snapshot.sorted_policies(status='Aktif')
+
+    # Bu süreç içinden yazma: snapshot ve indeks yeniden parse edilmeden yayınlanır
+    store.delete_policy('DP-2025-00000001')
+    store.replace_buildings(updated_df, keys_changed=False)
+
+    # Oku-değiştir-yaz: dönüşüm en güncel versiyon üzerinde, yazma kilidi altında
+    store.update_buildings(lambda snapshot: new_df_for(snapshot), keys_changed=False)
+
+    # İstek boyunca tek versiyon (Flask before/teardown_request kancaları)
+    with store.pinned():
+        a = store.snapshot()
+        b = store.snapshot()                 # a is b, arada yazım olsa bile
+        store.pinned_version()               # yanıt başlığı: X-Portfolio-Version
+
+    # Dışarıdan yazıldığında (CSV başka bir araçla değiştirildiğinde)
+    store.invalidate()
+
+    # CSV/Parquet mutasyon günlüğünü arka planda tabana işle
+    store.start_compactor()                  # DASK_COMPACT_INTERVAL (saniye)
+"""
+
+import os
+import time
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from contextlib import contextmanager
+from threading import Event, Lock, Thread, local
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from customer_aggregates import SOURCE_COLUMNS, CustomerAggregates
+from portfolio_index import PortfolioIndex
+from portfolio_storage import FileSignature, LoggedStorage, get_storage
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Backend imzası: veri setine ait dosyaların (mtime_ns, size) demeti
+StorageSignature = Tuple[FileSignature, ...]
+
+# Arama alanları ve sıralama ağırlıkları
+# PortfolioIndex haritalarının kurulduğu bina kolonları
+INDEX_KEY_COLUMNS = ('policy_number', 'building_id', 'customer_id')
+
+POLICY_SEARCH_FIELDS = {'policy_number': 3.0, 'owner_name': 2.0, 'complete_address': 1.0}
+CUSTOMER_SEARCH_FIELDS = {'owner_name': 3.0, 'owner_email': 2.0, 'district': 1.0, 'neighborhood': 1.0}
+
+
+def _customer_documents(buildings: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Müşteri arama dokümanları: müşterinin ilk bina satırı (/api/customers ile aynı)"""
+    if buildings is None or 'customer_id' not in buildings.columns:
+        return None
+    return buildings.drop_duplicates('customer_id')
+
+
+def _row_changes(before: Optional[pd.DataFrame],
+                 after: pd.DataFrame) -> Optional[Tuple[List[str], np.ndarray]]:
+    """
+    Satır sırası aynı iki bina tablosu arasında değişen kolonlar ve satırlar
+
+    Kolon silinmişse None döner (satır bazında güncelleme yapılamaz).
+
+    Returns:
+        (değişen kolonlar, değişen satırların bool maskesi)
+    """
+    if before is None or not set(before.columns) <= set(after.columns):
+        return None
+
+    columns = [col for col in after.columns
+               if col not in before.columns or not before[col].equals(after[col])]
+    if any(col not in before.columns for col in columns):
+        return columns, np.ones(len(after), dtype=bool)
+
+    rows = np.zeros(len(after), dtype=bool)
+    for col in columns:
+        old, new = before[col], after[col]
+        if isinstance(old.dtype, pd.CategoricalDtype) or isinstance(new.dtype, pd.CategoricalDtype):
+            # Farklı kategori kümeleri doğrudan karşılaştırılamaz
+            old, new = old.astype(object), new.astype(object)
+        rows |= ~((old == new) | (old.isna() & new.isna())).to_numpy()
+    return columns, rows
+
+
+def _same_keys(before: Optional[pd.DataFrame], after: pd.DataFrame) -> bool:
+    """İki bina tablosunda satır sırası, anahtar ve arama kolonları aynı mı"""
+    if before is None or len(before) != len(after):
+        return False
+    columns = set(INDEX_KEY_COLUMNS) | set(POLICY_SEARCH_FIELDS) | set(CUSTOMER_SEARCH_FIELDS)
+    for col in columns:
+        if (col in before.columns) != (col in after.columns):
+            return False
+        if col in before.columns and not before[col].astype(object).equals(after[col].astype(object)):
+            return False
+    return True
+
+
+def build_search_indexes(buildings: Optional[pd.DataFrame]) -> Tuple[SearchIndex, SearchIndex]:
+    """Poliçe ve müşteri arama indekslerini kur"""
+    return (
+        SearchIndex.build(buildings, 'policy_number', POLICY_SEARCH_FIELDS),
+        SearchIndex.build(_customer_documents(buildings), 'customer_id', CUSTOMER_SEARCH_FIELDS),
+    )
+
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """
+    Portföy verisinin değişmez (immutable) görüntüsü
+
+    DataFrame'ler tüm thread'ler arasında paylaşılır; route'lar bunları
+    yerinde DEĞİŞTİRMEMELİDİR (filtreleme yeni frame döndürür, sorun yok).
+    """
+    buildings: Optional[pd.DataFrame]
+    customers: Optional[pd.DataFrame]
+    version: int
+    loaded_at: float
+    buildings_signature: StorageSignature
+    customers_signature: StorageSignature
+    index: PortfolioIndex
+    policy_search: SearchIndex
+    customer_search: SearchIndex
+    customer_aggregates: CustomerAggregates
+    # Durum filtreli sıralı görünümler (tembel; durum kolonu snapshot'a özgü)
+    _status_orders: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(
+        default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def building_count(self) -> int:
+        return 0 if self.buildings is None else len(self.buildings)
+
+    @property
+    def customer_count(self) -> int:
+        return 0 if self.customers is None else len(self.customers)
+
+    # -------------------------------------------------------------------------
+    # İNDEKSLİ SORGULAR
+    # -------------------------------------------------------------------------
+
+    def policy(self, policy_number) -> Optional[pd.Series]:
+        """Poliçe numarasına göre bina satırı"""
+        pos = self.index.policy_row(policy_number)
+        return None if pos is None else self.buildings.iloc[pos]
+
+    def building(self, building_id) -> Optional[pd.Series]:
+        """Bina ID'sine göre bina satırı"""
+        pos = self.index.building_row(building_id)
+        return None if pos is None else self.buildings.iloc[pos]
+
+    def customer_buildings(self, customer_id) -> pd.DataFrame:
+        """Müşteriye ait tüm bina satırları (boş olabilir)"""
+        if self.buildings is None:
+            return pd.DataFrame()
+        return self.buildings.iloc[self.index.building_rows_for_customer(customer_id)]
+
+    def customer(self, customer_id) -> Optional[pd.Series]:
+        """Müşteri ID'sine göre customers.csv satırı"""
+        pos = self.index.customer_row(customer_id)
+        return None if pos is None else self.customers.iloc[pos]
+
+    def customer_by_email(self, email: str) -> Optional[pd.Series]:
+        """E-postaya göre (büyük/küçük harf duyarsız) customers.csv satırı"""
+        pos = self.index.email_row(email)
+        return None if pos is None else self.customers.iloc[pos]
+
+    def sorted_policies(self, status: str = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        policy_number'a göre sıralı (anahtarlar, satır pozisyonları) - keyset sayfalama
+
+        Args:
+            status: Verilirse sadece policy_status == status olan poliçeler
+        """
+        keys, rows = self.index.sorted_policy_rows(self.buildings)
+        if status is None:
+            return keys, rows
+
+        filtered = self._status_orders.get(status)
+        if filtered is None:
+            mask = self.buildings['policy_status'].to_numpy()[rows] == status
+            filtered = self._status_orders[status] = (keys[mask], rows[mask])
+        return filtered
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class PortfolioStore:
+    """
+    Süreç genelinde tek portföy deposu
+
+    - Okuyucular kilitsiz: snapshot referansı atomik olarak okunur
+    - Yeniden yükleme tek bir thread tarafından yapılır (double-checked lock)
+    - Dosya imzası en fazla `check_interval` saniyede bir kontrol edilir
+    - Okuma kapsamı içinde (pinned) thread aynı versiyonu görür; yazıcılar
+      her zaman en güncel versiyon üzerinde çalışır
+    """
+
+    def __init__(self, data_dir: str = None, check_interval: float = 1.0, storage=None):
+        """
+        Args:
+            data_dir: Veri dizini (buildings, customers)
+            check_interval: Dosya imzası kontrol aralığı (saniye)
+            storage: Depolama backend'i (varsayılan: get_storage(data_dir));
+                satır bazında yazım desteklemiyorsa LoggedStorage ile sarılır
+        """
+        self.data_dir = Path(data_dir or Path(__file__).parent.parent / 'data')
+        storage = storage or get_storage(str(self.data_dir))
+        if not storage.supports_row_writes:
+            storage = LoggedStorage(storage)
+        self.storage = storage
+        self.check_interval = check_interval
+
+        self._snapshot: Optional[PortfolioSnapshot] = None
+        self._data_version = 0
+        self._last_check = 0.0
+        self._reload_lock = Lock()
+        self._write_lock = Lock()
+        self._compactor: Optional[Thread] = None
+        self._compactor_stop = Event()
+
+        # Thread başına okuma kapsamı ve versiyon → pin sayısı
+        self._scope = local()
+        self._pins: Dict[int, int] = {}
+        self._pins_lock = Lock()
+
+    # -------------------------------------------------------------------------
+    # OKUMA
+    # -------------------------------------------------------------------------
+
+    def snapshot(self) -> PortfolioSnapshot:
+        """
+        Güncel snapshot'ı döndür (gerekirse yeniden yükle)
+
+        Okuma kapsamı içindeyse kapsamın sabitlediği versiyon döner.
+        """
+        scope = self._scope
+        if getattr(scope, 'depth', 0):
+            snapshot = scope.snapshot
+            if snapshot is None:
+                snapshot = self._latest()
+                self._pin(snapshot)
+            return snapshot
+        return self._latest()
+
+    def _latest(self) -> PortfolioSnapshot:
+        """En güncel snapshot (kapsam sabitlemesini yok sayar; yazıcılar kullanır)"""
+        snapshot = self._snapshot
+
+        if snapshot is not None and not self._should_check():
+            return snapshot
+
+        if snapshot is None or self._is_stale(snapshot):
+            with self._reload_lock:
+                snapshot = self._snapshot
+                if snapshot is None or self._is_stale(snapshot):
+                    snapshot = self._load()
+                    self._snapshot = snapshot
+
+        return snapshot
+
+    def invalidate(self):
+        """
+        Dahili veri versiyonunu artır
+
+        Bu süreç içinden CSV yeniden yazıldığında çağrılır; bir sonraki
+        snapshot() çağrısı imza kontrolünü beklemeden yeniden yükler.
+        """
+        with self._reload_lock:
+            self._data_version += 1
+            self._last_check = 0.0
+
+    @property
+    def data_version(self) -> int:
+        return self._data_version
+
+    # -------------------------------------------------------------------------
+    # VERSİYON SABİTLEME (OKUMA KAPSAMI)
+    # -------------------------------------------------------------------------
+
+    def begin_read(self):
+        """Bu thread için okuma kapsamı aç (iç içe çağrılar sayılır)"""
+        scope = self._scope
+        depth = getattr(scope, 'depth', 0)
+        if depth == 0:
+            scope.snapshot = None
+        scope.depth = depth + 1
+
+    def end_read(self):
+        """Okuma kapsamını kapat; en dıştaki kapanışta pin bırakılır"""
+        scope = self._scope
+        depth = getattr(scope, 'depth', 0)
+        if depth == 0:
+            return
+        scope.depth = depth - 1
+        if depth == 1:
+            self._unpin()
+
+    @contextmanager
+    def pinned(self):
+        """Blok içindeki snapshot() çağrıları aynı versiyonu görür"""
+        self.begin_read()
+        try:
+            yield
+        finally:
+            self.end_read()
+
+    def pinned_version(self) -> Optional[int]:
+        """Bu thread'in kapsamında sabitlenmiş versiyon (yoksa None)"""
+        snapshot = getattr(self._scope, 'snapshot', None)
+        return None if snapshot is None else snapshot.version
+
+    def version_info(self) -> Dict[str, object]:
+        """Güncel versiyon ve okuyucuların sabitlediği versiyonlar (pin sayıları)"""
+        snapshot = self._snapshot
+        with self._pins_lock:
+            pins = dict(self._pins)
+        return {
+            'current': None if snapshot is None else snapshot.version,
+            'pinned': pins
+        }
+
+    def _pin(self, snapshot: PortfolioSnapshot):
+        self._scope.snapshot = snapshot
+        with self._pins_lock:
+            self._pins[snapshot.version] = self._pins.get(snapshot.version, 0) + 1
+
+    def _unpin(self):
+        snapshot = getattr(self._scope, 'snapshot', None)
+        if snapshot is None:
+            return
+        self._scope.snapshot = None
+        with self._pins_lock:
+            count = self._pins.get(snapshot.version, 0) - 1
+            if count > 0:
+                self._pins[snapshot.version] = count
+            else:
+                self._pins.pop(snapshot.version, None)
+
+    # -------------------------------------------------------------------------
+    # YAZMA
+    # -------------------------------------------------------------------------
+
+    def delete_policy(self, policy_number) -> bool:
+        """
+        Poliçeyi sil, bina veri setini yaz ve yeni snapshot'ı yayınla
+
+        Returns:
+            True: silindi, False: poliçe bulunamadı
+        """
+        with self._write_lock:
+            snapshot = self._latest()
+            pos = snapshot.index.policy_row(policy_number)
+            if pos is None:
+                return False
+
+            buildings = snapshot.buildings
+            keep = buildings['policy_number'] != policy_number
+            buildings = buildings[keep].reset_index(drop=True)
+            # Tek satır silindiyse indeks mezar taşıyla güncellenir (yeniden kurulmaz)
+            single = len(buildings) == snapshot.building_count - 1
+            index = snapshot.index.without_policy(policy_number) if single else None
+            if index is None or index.needs_rebuild:
+                index = PortfolioIndex.build(buildings, snapshot.customers)
+                if single:
+                    index.inherit_policy_order(snapshot.index, pos)
+
+            # Arama indekslerini artımlı güncelle: poliçeyi çıkar, müşterinin
+            # arama dokümanını kalan ilk binasından yenile (yoksa çıkar)
+            customer_id = snapshot.buildings.iloc[pos]['customer_id']
+            policy_search = snapshot.policy_search.remove([policy_number])
+            remaining = index.building_rows_for_customer(customer_id)
+            if len(remaining):
+                customer_search = snapshot.customer_search.upsert(buildings.iloc[remaining[:1]])
+            else:
+                customer_search = snapshot.customer_search.remove([customer_id])
+
+            if policy_search.needs_rebuild or customer_search.needs_rebuild:
+                policy_search, customer_search = build_search_indexes(buildings)
+
+            aggregates = snapshot.customer_aggregates.with_customers(buildings, index, [customer_id])
+
+            self.storage.delete_rows('buildings', 'policy_number', [policy_number])
+
+            self._publish_buildings(snapshot, buildings, index, policy_search,
+                                    customer_search, aggregates)
+            return True
+
+    def replace_buildings(self, buildings: pd.DataFrame, keys_changed: bool = True):
+        """
+        Tüm bina tablosunu değiştir (ör. toplu prim yeniden hesaplama)
+
+        Args:
+            buildings: Yeni bina DataFrame'i
+            keys_changed: False ise satır sırası, anahtar kolonları
+                (policy_number, building_id, customer_id) ve arama kolonları
+                aynıdır; mevcut hash/arama indeksleri yeniden kurulmadan yeni
+                snapshot'a taşınır
+        """
+        with self._write_lock:
+            self._replace_buildings(self._latest(), buildings, keys_changed)
+
+    def update_buildings(self, update: Callable[[PortfolioSnapshot], pd.DataFrame],
+                         keys_changed: bool = True) -> PortfolioSnapshot:
+        """
+        Oku-değiştir-yaz: bina tablosunu en güncel versiyondan türet
+
+        `update` yazma kilidi altında en güncel snapshot ile çağrılır ve yeni
+        bina DataFrame'ini döndürür (snapshot'ın frame'ini değiştirmeden,
+        kopya üzerinde). Uzun hesaplamalar önceden yapılmalı; `update` sadece
+        sonuçları güncel versiyona uygular, böylece arada yayınlanan bir
+        yazım (ör. poliçe silme) kaybolmaz.
+
+        Returns:
+            Yayınlanan yeni snapshot
+        """
+        with self._write_lock:
+            snapshot = self._latest()
+            self._replace_buildings(snapshot, update(snapshot), keys_changed)
+            return self._snapshot
+
+    def _replace_buildings(self, snapshot: PortfolioSnapshot, buildings: pd.DataFrame,
+                           keys_changed: bool):
+        """replace_buildings gövdesi (yazma kilidi alınmış olmalı)"""
+        buildings = buildings.reset_index(drop=True)
+        if not keys_changed and snapshot.building_count != len(buildings):
+            keys_changed = True
+        elif keys_changed and _same_keys(snapshot.buildings, buildings):
+            # Anahtar ve arama kolonları aynı: indeksler taşınır
+            keys_changed = False
+
+        if keys_changed:
+            index = PortfolioIndex.build(buildings, snapshot.customers)
+            policy_search, customer_search = build_search_indexes(buildings)
+        else:
+            index = snapshot.index
+            policy_search, customer_search = snapshot.policy_search, snapshot.customer_search
+
+        changes = None if keys_changed else _row_changes(snapshot.buildings, buildings)
+        aggregates = self._updated_aggregates(snapshot, buildings, index, changes)
+
+        # Anahtarlar aynı ve tekilse sadece değişen satır/kolonlar yazılır
+        if changes is not None and buildings['policy_number'].is_unique:
+            columns, rows = changes
+            self.storage.update_rows('buildings', 'policy_number', buildings[rows], columns)
+        else:
+            self.storage.write('buildings', buildings)
+
+        self._publish_buildings(snapshot, buildings, index, policy_search,
+                                customer_search, aggregates)
+
+    # -------------------------------------------------------------------------
+    # SIKIŞTIRMA (CSV / PARQUET MUTASYON GÜNLÜĞÜ)
+    # -------------------------------------------------------------------------
+
+    def compact(self) -> int:
+        """
+        Bekleyen bina mutasyonlarını depolama tabanına işle
+
+        Snapshot verisi ve indeksler değişmez; sadece imza yenilenir, yani
+        sıkıştırma yeniden yüklemeye yol açmaz.
+
+        Returns:
+            İşlenen mutasyon sayısı (backend günlük tutmuyorsa 0)
+        """
+        if not hasattr(self.storage, 'compact'):
+            return 0
+
+        with self._write_lock:
+            snapshot = self._latest()
+            # Snapshot güncelse birleşik veri zaten bellekte: yeniden okunmaz
+            merged = None
+            if snapshot.buildings_signature == self.storage.signature('buildings'):
+                merged = snapshot.buildings
+
+            count = self.storage.compact('buildings', merged=merged)
+            if count:
+                self._publish_buildings(snapshot, snapshot.buildings, snapshot.index,
+                                        snapshot.policy_search, snapshot.customer_search,
+                                        snapshot.customer_aggregates)
+            return count
+
+    def start_compactor(self, interval: float = None):
+        """
+        Mutasyon günlüğünü arka planda periyodik olarak tabana işle
+
+        Args:
+            interval: Kontrol aralığı, saniye (varsayılan: DASK_COMPACT_INTERVAL, 60)
+        """
+        if not hasattr(self.storage, 'compact') or self._compactor is not None:
+            return
+
+        interval = interval or float(os.environ.get('DASK_COMPACT_INTERVAL', 60))
+        self._compactor_stop.clear()
+        self._compactor = Thread(target=self._compact_loop, args=(interval,),
+                                 name='portfolio-compactor', daemon=True)
+        self._compactor.start()
+        logger.info(f"🗜️ Mutasyon günlüğü sıkıştırıcısı başlatıldı ({interval:.0f} sn)")
+
+    def stop_compactor(self):
+        """Arka plan sıkıştırıcısını durdur"""
+        if self._compactor is None:
+            return
+        self._compactor_stop.set()
+        self._compactor.join()
+        self._compactor = None
+
+    def _compact_loop(self, interval: float):
+        while not self._compactor_stop.wait(interval):
+            try:
+                if self.storage.pending_mutations('buildings'):
+                    self.compact()
+            except Exception as e:
+                logger.error(f"❌ Mutasyon günlüğü sıkıştırma hatası: {e}")
+
+    # -------------------------------------------------------------------------
+    # İÇ YARDIMCILAR
+    # -------------------------------------------------------------------------
+
+    def _should_check(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            return True
+        return False
+
+    def _is_stale(self, snapshot: PortfolioSnapshot) -> bool:
+        return (
+            snapshot.version != self._data_version or
+            snapshot.buildings_signature != self.storage.signature('buildings') or
+            snapshot.customers_signature != self.storage.signature('customers')
+        )
+
+    @staticmethod
+    def _updated_aggregates(previous: PortfolioSnapshot, buildings: pd.DataFrame,
+                            index: PortfolioIndex, changes) -> CustomerAggregates:
+        """
+        Müşteri özetlerini bina değişikliğine göre güncelle
+
+        Özet kolonları değişmediyse mevcut nesne korunur; değişen müşteri
+        sayısı azsa sadece onlar yeniden hesaplanır, aksi halde groupby ile
+        baştan kurulur.
+        """
+        if changes is None:
+            return CustomerAggregates.build(buildings)
+
+        columns, rows = changes
+        if not SOURCE_COLUMNS.intersection(columns):
+            return previous.customer_aggregates
+
+        customer_ids = buildings['customer_id'].to_numpy()[rows]
+        customer_ids = pd.unique(np.concatenate([
+            customer_ids, previous.buildings['customer_id'].to_numpy()[rows]
+        ]))
+        if len(customer_ids) > max(100, len(previous.customer_aggregates) // 10):
+            return CustomerAggregates.build(buildings)
+        return previous.customer_aggregates.with_customers(buildings, index, customer_ids)
+
+    def _publish_buildings(self, previous: PortfolioSnapshot, buildings: pd.DataFrame,
+                           index: PortfolioIndex, policy_search: SearchIndex,
+                           customer_search: SearchIndex, customer_aggregates: CustomerAggregates):
+        """Yazılmış bina verisiyle snapshot'ı dosya yeniden okunmadan değiştir"""
+        with self._reload_lock:
+            self._data_version += 1
+            self._snapshot = PortfolioSnapshot(
+                buildings=buildings,
+                customers=previous.customers,
+                version=self._data_version,
+                loaded_at=time.time(),
+                buildings_signature=self.storage.signature('buildings'),
+                # SQLite'ta iki tablo aynı dosyada: müşteri verisi değişmedi,
+                # ama imzası değişti - güncel imza alınır
+                customers_signature=self.storage.signature('customers'),
+                index=index,
+                policy_search=policy_search,
+                customer_search=customer_search,
+                customer_aggregates=customer_aggregates
+            )
+
+        # Yazan thread okuma kapsamındaysa kendi yazısını görsün
+        if getattr(self._scope, 'depth', 0):
+            self._unpin()
+            self._pin(self._snapshot)
+
+    def _load(self) -> PortfolioSnapshot:
+        """Dosyaları oku ve yeni snapshot oluştur"""
+        start_time = time.perf_counter()
+
+        # Her yükleme yeni bir versiyondur (dış değişiklikle yeniden yüklemede
+        # de iki farklı snapshot aynı numarayı taşımaz); _reload_lock altında
+        self._data_version += 1
+        version = self._data_version
+
+        # İmzayı okumadan ÖNCE al: okuma sırasında dosya değişirse
+        # bir sonraki kontrolde snapshot yine bayat sayılır
+        self.storage.sync('buildings')
+        self.storage.sync('customers')
+        buildings_signature = self.storage.signature('buildings')
+        customers_signature = self.storage.signature('customers')
+
+        buildings = self.storage.read('buildings')
+        customers = self.storage.read('customers')
+
+        policy_search, customer_search = build_search_indexes(buildings)
+
+        snapshot = PortfolioSnapshot(
+            buildings=buildings,
+            customers=customers,
+            version=version,
+            loaded_at=time.time(),
+            buildings_signature=buildings_signature,
+            customers_signature=customers_signature,
+            index=PortfolioIndex.build(buildings, customers),
+            policy_search=policy_search,
+            customer_search=customer_search,
+            customer_aggregates=CustomerAggregates.build(buildings)
+        )
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(
+            f"📦 Portföy yüklendi: {snapshot.building_count:,} bina, "
+            f"{snapshot.customer_count:,} müşteri (v{version}, "
+            f"{self.storage.format_name}, {duration_ms:.0f} ms)"
+        )
+        return snapshot
+
+
+# =============================================================================
+# SÜREÇ GENELİ TEKİL NESNE
+# =============================================================================
+
+_store: Optional[PortfolioStore] = None
+_store_lock = Lock()
+
+
+def get_portfolio_store(data_dir: str = None) -> PortfolioStore:
+    """Süreç genelindeki PortfolioStore örneğini döndür"""
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PortfolioStore(data_dir=data_dir)
+    return _store
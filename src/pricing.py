@@ -19,6 +19,8 @@ from multiprocessing import Pool, cpu_count
 from functools import partial
 from pathlib import Path
 
+from portfolio_storage import plain_frame, read_dataset_file
+
 # Makine Öğrenmesi Kütüphaneleri
 from sklearn.model_selection import train_test_split, cross_val_score, KFold
 from sklearn.preprocessing import StandardScaler, LabelEncoder
@@ -294,24 +296,11 @@ class RealEarthquakeDataAnalyzer:
         print("\n🌍 Gerçek deprem verisi yükleniyor...")
         
         try:
-            # Farklı encoding'leri dene
-            encodings = ['latin-1', 'windows-1254', 'utf-8', 'iso-8859-9']
-            df = None
-            
-            for enc in encodings:
-                try:
-                    df = pd.read_csv(
-                        self.earthquake_file,
-                        encoding=enc,
-                        on_bad_lines='skip'
-                    )
-                    print(f"✅ Dosya '{enc}' encoding ile yüklendi")
-                    break
-                except Exception as e:
-                    continue
+            # Depolama backend'i üzerinden oku (CSV ise encoding'ler sırayla denenir)
+            df = read_dataset_file(self.earthquake_file, dataset='earthquakes')
             
             if df is None:
-                print("❌ Dosya hiçbir encoding ile yüklenemedi!")
+                print(f"❌ Deprem verisi bulunamadı: {self.earthquake_file}")
                 return None
             
             # Sütun isimlerini temizle
@@ -518,7 +507,7 @@ class RealEarthquakeDataAnalyzer:
 # =============================================================================
 
 class BuildingDataLoader:
-    """CSV dosyasından bina verisi yükleyici"""
+    """Bina verisi yükleyici (portfolio_storage backend'i üzerinden)"""
     
     def __init__(self, data_dir=None):
         if data_dir is None:
@@ -528,20 +517,27 @@ class BuildingDataLoader:
         if not os.path.exists(self.data_dir):
             raise FileNotFoundError(f"❌ Veri dizini bulunamadı: {self.data_dir}")
     
-    def load_building_data(self, filepath=None):
-        """CSV dosyasından bina verilerini yükle"""
+    def load_building_data(self, filepath=None, columns=None):
+        """
+        Bina verilerini yükle
+        
+        Args:
+            filepath: buildings.csv yolu (Parquet kopyası varsa o okunur)
+            columns: Sadece bu kolonları oku (None=hepsi)
+        """
         if filepath is None:
             filepath = str(Path(__file__).parent.parent / 'data' / 'buildings.csv')
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"❌ Bina verisi bulunamadı: {filepath}\n"
-                                  f"Lütfen önce data_generator.py çalıştırarak veri oluşturun.")
         
         print(f"\n📂 Bina verisi yükleniyor: {filepath}")
         
+        # Depolama backend'i (Parquet: memory-mapped, kolon projeksiyonlu)
+        df = read_dataset_file(filepath, columns=columns, dataset='buildings')
+        if df is None:
+            raise FileNotFoundError(f"❌ Bina verisi bulunamadı: {filepath}\n"
+                                  f"Lütfen önce data_generator.py çalıştırarak veri oluşturun.")
+        df = plain_frame(df)  # fillna / paket ataması serbest metin yazar
+        
         try:
-            # CSV'yi yükle
-            df = pd.read_csv(filepath, encoding='utf-8-sig')
-            
             print(f"✅ {len(df):,} bina kaydı yüklendi")
             
             # Temel sütun kontrolü
@@ -705,7 +701,7 @@ class AIRiskPricingModel:
         - Müşteri faktörü: customer_score (fraud/güvenilirlik)
         """
         
-        features = buildings_df.copy()
+        features = plain_frame(buildings_df)
         
         # =========================================================================
         # BÖLÜM 1: TEMEL VE MEVCUT FEATURES
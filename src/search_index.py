@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Trigram Arama İndeksi
+===========================
+
+Poliçe ve müşteri araması için ters (inverted) n-gram indeksi. Her istekte
+tüm DataFrame üzerinde `str.contains` taraması yapmak yerine, sorgunun
+trigramlarının posting listeleri kesiştirilir; maliyet portföy boyutuna
+değil eşleşen kayıt sayısına bağlıdır.
+
+Türkçe harf katlama (case folding):
+    İ/I/ı → i, Ş/ş → s, Ğ/ğ → g, Ç/ç → c, Ö/ö → o, Ü/ü → u
+    ("yil" sorgusu "Yılmaz"ı, "IZMIR" sorgusu "İzmir"i bulur)
+
+Sorgu kelimelere bölünür ve tüm kelimeler eşleşmelidir (AND):
+    1-2 harfli kelime → kelime başı eşleşmesi ("ay" → "Aydın", "Ayşe")
+    3+ harfli kelime  → alt dizi eşleşmesi    ("maz" → "Yılmaz")
+
+Sonuçlar sıralıdır: alan ağırlığı × eşleşme türü (tam > alan başı >
+kelime başı > alt dizi); eşit skorda orijinal satır sırası korunur.
+
+Yazma işlemlerinde indeks artımlı güncellenir: silinen/değişen kayıtlar
+ana segmentte mezar taşı (tombstone) ile işaretlenir, yeni hali küçük bir
+delta segmentine eklenir. Delta büyüdüğünde `needs_rebuild` True olur.
+
+KULLANIM:
+    from search_index import SearchIndex
+
+    index = SearchIndex.build(df, key_column='policy_number',
+                              fields={'policy_number': 3.0, 'owner_name': 2.0})
+    result = index.search('yilmaz')
+    result.keys       # sıralı anahtar listesi
+    result.total      # toplam eşleşme
+
+    index = index.remove(['DP-2025-00000001'])
+    index = index.upsert(updated_rows_df)
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# TÜRKÇE KATLAMA
+# =============================================================================
+
+_TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o',
+    'Ü': 'u', 'ü': 'u',
+    'Â': 'a', 'â': 'a', 'Î': 'i', 'î': 'i', 'Û': 'u', 'û': 'u',
+})
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+# Kelime başı işaretçisi: 1-2 harfli sorgular için '\x01\x01a' / '\x01ay' gramları
+_WORD_START = '\x01'
+_SPACE = ord(' ')
+
+# Bu sayıdan fazla aday varsa doğrulama/sıralama atlanır (gecikme sabit kalır)
+RANK_LIMIT = 20000
+
+_EMPTY_DOCS = np.empty(0, dtype=np.int64)
+
+
+def fold_text(text) -> str:
+    """Türkçe duyarlı katlama + ayırıcıları tek boşluğa indirme"""
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return ''
+    folded = str(text).translate(_TURKISH_FOLD).lower()
+    return _SEPARATORS.sub(' ', folded).strip()
+
+
+def _fold_series(values: pd.Series) -> np.ndarray:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Kategorik kolon: her farklı değer bir kez katlanır, kodlarla yayılır
+        categories = np.append(_fold_series(pd.Series(values.cat.categories)), '')
+        return categories[values.cat.codes.to_numpy()]
+
+    folded = (values.fillna('').astype(str)
+              .str.translate(_TURKISH_FOLD).str.lower()
+              .str.replace(_SEPARATORS, ' ', regex=True).str.strip())
+    return folded.to_numpy(dtype=object)
+
+
+def _query_grams(token: str) -> List[str]:
+    if len(token) == 1:
+        return [_WORD_START * 2 + token]
+    if len(token) == 2:
+        return [_WORD_START + token]
+    return [token[i:i + 3] for i in range(len(token) - 2)]
+
+
+def _gram_code(gram: str) -> int:
+    a, b, c = (ord(ch) for ch in gram)
+    return (a << 42) | (b << 21) | c
+
+
+# =============================================================================
+# SEGMENT (değişmez CSR posting yapısı)
+# =============================================================================
+
+class _Segment:
+    """Değişmez trigram segmenti: gram kodu → doküman listesi (CSR)"""
+
+    __slots__ = ('keys', 'texts', 'weights', 'codes', 'offsets', 'postings', '_doc_of_key')
+
+    _CHUNK = 50000
+
+    def __init__(self, keys: np.ndarray, texts: Dict[str, np.ndarray], weights: Dict[str, float],
+                 codes: np.ndarray, offsets: np.ndarray, postings: np.ndarray):
+        self.keys = keys
+        self.texts = texts
+        self.weights = weights
+        self.codes = codes
+        self.offsets = offsets
+        self.postings = postings
+        self._doc_of_key = None
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, key_column: str, fields: Dict[str, float]) -> '_Segment':
+        keys = frame[key_column].to_numpy(dtype=object)
+        texts = {
+            field: (_fold_series(frame[field]) if field in frame.columns
+                    else np.full(len(frame), '', dtype=object))
+            for field in fields
+        }
+
+        pair_codes, pair_docs = [], []
+        for start in range(0, len(frame), cls._CHUNK):
+            codes, docs = cls._chunk_grams(texts, start, min(start + cls._CHUNK, len(frame)))
+            pair_codes.append(codes)
+            pair_docs.append(docs)
+
+        codes = np.concatenate(pair_codes) if pair_codes else _EMPTY_DOCS
+        docs = np.concatenate(pair_docs) if pair_docs else _EMPTY_DOCS
+
+        # (kod, doküman) çiftlerini sırala ve tekilleştir → CSR
+        order = np.lexsort((docs, codes))
+        codes, docs = codes[order], docs[order]
+        if len(codes):
+            keep = np.ones(len(codes), dtype=bool)
+            keep[1:] = (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])
+            codes, docs = codes[keep], docs[keep]
+
+        unique_codes, starts = np.unique(codes, return_index=True)
+        offsets = np.append(starts, len(codes)).astype(np.int64)
+        return cls(keys, texts, dict(fields), unique_codes, offsets, docs.astype(np.int64))
+
+    @staticmethod
+    def _chunk_grams(texts: Dict[str, np.ndarray], start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Bir doküman bloğunun tüm (gram kodu, doküman) çiftleri - vektörel"""
+        combined = None
+        for values in texts.values():
+            part = pd.Series(values[start:end])
+            combined = part if combined is None else combined + ' ' + part
+        # Her kelimenin başına işaretçi: "ali yilmaz" → "\x01\x01ali \x01\x01yilmaz"
+        padded = combined.str.replace(r'(?:^|(?<= ))(?=\S)', _WORD_START * 2, regex=True)
+
+        lengths = padded.str.len().to_numpy() + 1
+        doc_of_char = np.repeat(np.arange(start, end, dtype=np.int64), lengths)
+        blob = ' '.join(padded.tolist()) + ' '
+        chars = np.frombuffer(blob.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+        # Boşluk içeren gramlar kelime/doküman sınırını aşar → at
+        valid = (chars[:-2] != _SPACE) & (chars[1:-1] != _SPACE) & (chars[2:] != _SPACE)
+        codes = (chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:]
+        return codes[valid], doc_of_char[:-2][valid]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def postings_for(self, gram: str) -> np.ndarray:
+        code = _gram_code(gram)
+        pos = np.searchsorted(self.codes, code)
+        if pos >= len(self.codes) or self.codes[pos] != code:
+            return _EMPTY_DOCS
+        return self.postings[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def candidates(self, tokens: List[str]) -> np.ndarray:
+        """Tüm kelimelerin tüm gramlarını içeren dokümanlar (sıralı)"""
+        lists = [self.postings_for(gram) for token in tokens for gram in _query_grams(token)]
+        if not lists:
+            return _EMPTY_DOCS
+        lists.sort(key=len)
+        result = lists[0]
+        for docs in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, docs, assume_unique=True)
+        return result
+
+    def doc_of_key(self, key) -> Optional[int]:
+        if self._doc_of_key is None:
+            keys = self.keys.tolist()
+            self._doc_of_key = dict(zip(reversed(keys), range(len(keys) - 1, -1, -1)))
+        return self._doc_of_key.get(key)
+
+    def score(self, docs: np.ndarray, tokens: List[str], phrase: str) -> np.ndarray:
+        """
+        Aday dokümanları doğrula ve skorla (0 = eşleşme yok)
+
+        Kelime başına en iyi alan skoru toplanır:
+            4 tam alan eşleşmesi, 3 alan başı, 2 kelime başı, 1 alt dizi
+        """
+        scores = np.zeros(len(docs), dtype=np.float64)
+        alive = np.ones(len(docs), dtype=bool)
+        field_texts = [(self.texts[f][docs], w) for f, w in self.weights.items()]
+
+        for i in range(len(docs)):
+            total = 0.0
+            for token in tokens:
+                best = 0.0
+                for texts, weight in field_texts:
+                    text = texts[i]
+                    pos = text.find(token)
+                    if pos < 0:
+                        continue
+                    if text == phrase:
+                        level = 4
+                    elif pos == 0:
+                        level = 3
+                    elif text[pos - 1] == ' ' or (' ' + token) in text:
+                        level = 2
+                    else:
+                        level = 1
+                    best = max(best, weight * level)
+                if best == 0.0:
+                    alive[i] = False
+                    break
+                total += best
+            scores[i] = total
+        scores[~alive] = 0.0
+        return scores
+
+
+# =============================================================================
+# ARAMA SONUCU
+# =============================================================================
+
+@dataclass(frozen=True)
+class SearchResult:
+    """Sıralı arama sonucu (scores: keys ile hizalı alaka skorları, sırasızsa 0)"""
+    keys: List
+    total: int
+    ranked: bool
+    scores: List[float] = ()
+
+
+# =============================================================================
+# İNDEKS
+# =============================================================================
+
+class SearchIndex:
+    """
+    Ana segment + mezar taşları + delta segmentinden oluşan değişmez indeks
+
+    Tüm yazma metodları yeni bir SearchIndex döndürür; eski snapshot'ları
+    okuyan istekler etkilenmez.
+    """
+
+    # Delta bu boyutu (veya ana segmentin %10'unu) aşınca yeniden kurulum önerilir
+    DELTA_REBUILD_MIN = 1000
+
+    def __init__(self, key_column: str, fields: Dict[str, float], base: _Segment,
+                 deleted: FrozenSet[int] = frozenset(),
+                 delta_frame: Optional[pd.DataFrame] = None,
+                 delta: Optional[_Segment] = None):
+        self.key_column = key_column
+        self.fields = dict(fields)
+        self.base = base
+        self.deleted = deleted
+        self.delta_frame = delta_frame
+        self.delta = delta
+
+    @classmethod
+    def build(cls, frame: Optional[pd.DataFrame], key_column: str,
+              fields: Dict[str, float]) -> 'SearchIndex':
+        """
+        Args:
+            frame: Dokümanlar (her satır bir doküman)
+            key_column: Sonuçta döndürülecek anahtar kolonu
+            fields: Aranacak kolonlar ve sıralama ağırlıkları
+        """
+        if frame is None:
+            frame = pd.DataFrame(columns=[key_column, *fields])
+        columns = [key_column] + [f for f in fields if f in frame.columns and f != key_column]
+        return cls(key_column, fields, _Segment.build(frame[columns], key_column, fields))
+
+    @property
+    def doc_count(self) -> int:
+        delta_count = 0 if self.delta is None else len(self.delta)
+        return len(self.base) - len(self.deleted) + delta_count
+
+    @property
+    def needs_rebuild(self) -> bool:
+        if self.delta is None:
+            return False
+        return len(self.delta) > max(self.DELTA_REBUILD_MIN, len(self.base) // 10)
+
+    # -------------------------------------------------------------------------
+    # ARAMA
+    # -------------------------------------------------------------------------
+
+    def search(self, query: str) -> SearchResult:
+        """Sorguyu çalıştır ve sıralı anahtarları döndür"""
+        phrase = fold_text(query)
+        tokens = phrase.split()
+        if not tokens:
+            return SearchResult(keys=[], total=0, ranked=False)
+
+        segments = [(self.base, self.base.candidates(tokens))]
+        if self.deleted and len(segments[0][1]):
+            docs = segments[0][1]
+            segments[0] = (self.base, docs[~np.isin(docs, np.fromiter(self.deleted, np.int64))])
+        if self.delta is not None:
+            segments.append((self.delta, self.delta.candidates(tokens)))
+
+        candidate_count = sum(len(docs) for _, docs in segments)
+        if candidate_count > RANK_LIMIT:
+            # Çok geniş sorgu: trigram eşleşmesi kesin kabul edilir, sıra korunur
+            keys = [key for segment, docs in segments for key in segment.keys[docs].tolist()]
+            return SearchResult(keys=keys, total=len(keys), ranked=False, scores=[0.0] * len(keys))
+
+        keys, scores, order = [], [], []
+        for rank, (segment, docs) in enumerate(segments):
+            if not len(docs):
+                continue
+            doc_scores = segment.score(docs, tokens, phrase)
+            matched = doc_scores > 0
+            keys.extend(segment.keys[docs[matched]].tolist())
+            scores.append(doc_scores[matched])
+            order.append(docs[matched] + rank * (len(self.base) + 1))
+
+        if not keys:
+            return SearchResult(keys=[], total=0, ranked=True)
+
+        scores = np.concatenate(scores)
+        order = np.concatenate(order)
+        ranking = np.lexsort((order, -scores))
+        return SearchResult(keys=[keys[i] for i in ranking], total=len(keys), ranked=True,
+                            scores=scores[ranking].tolist())
+
+    # -------------------------------------------------------------------------
+    # ARTIMLI GÜNCELLEME
+    # -------------------------------------------------------------------------
+
+    def remove(self, keys: Iterable) -> 'SearchIndex':
+        """Anahtarları indeksten çıkar (yeni indeks döndürür)"""
+        keys = set(keys)
+        deleted = set(self.deleted)
+        for key in keys:
+            doc = self.base.doc_of_key(key)
+            if doc is not None:
+                deleted.add(doc)
+
+        delta_frame = self.delta_frame
+        if delta_frame is not None:
+            delta_frame = delta_frame[~delta_frame[self.key_column].isin(keys)]
+        return self._with(frozenset(deleted), delta_frame)
+
+    def upsert(self, frame: pd.DataFrame) -> 'SearchIndex':
+        """Satırları ekle veya güncelle (aynı anahtarın eski hali silinir)"""
+        columns = [self.key_column] + [f for f in self.fields
+                                       if f in frame.columns and f != self.key_column]
+        removed = self.remove(frame[self.key_column].tolist())
+        delta_frame = frame[columns] if removed.delta_frame is None else \
+            pd.concat([removed.delta_frame, frame[columns]], ignore_index=True)
+        return removed._with(removed.deleted, delta_frame)
+
+    def _with(self, deleted: FrozenSet[int], delta_frame: Optional[pd.DataFrame]) -> 'SearchIndex':
+        delta = None
+        if delta_frame is not None and len(delta_frame):
+            delta = _Segment.build(delta_frame.reset_index(drop=True), self.key_column, self.fields)
+        else:
+            delta_frame = None
+        return SearchIndex(self.key_column, self.fields, self.base, deleted, delta_frame, delta)
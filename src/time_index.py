@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+DASK+ Zaman Aralığı İndeksi (Defter Zaman Çizelgesi)
+====================================================
+
+İşlem/log zaman çizelgeleri ve zaman koşullu sorgular "son 24 saat" ya da
+"X ile Y arası" block'larını bulmak için zinciri geriye doğru yürüyor,
+aktivite grafikleri her block'un zamanına bakıyordu. Zaman indeksi block
+pozisyonlarıyla hizalı, monoton artan bir epoch dizisidir:
+
+    pozisyon      0      1      2      3      4      5
+    zaman       100.0  100.0  160.2  160.2  158.9  201.5   (block başlığı)
+    defter      100.0  100.0  160.2  160.2  160.2  201.5   (monoton; indeks)
+
+Defter zamanı, block'un kendi zamanı ile zincirde o ana kadar görülen en
+büyük zamanın büyüğüdür: saat geri giderse (NTP düzeltmesi, içe aktarılan
+eski kayıtlar) block bir önceki block'un zamanına sayılır ve dizi sıralı
+kalır. Zaman penceresi iki ikili arama ile bir pozisyon aralığına
+(`range`) dönüşür; sayfalama ve tip/alan indeksleriyle kesişim doğrudan
+bu aralık üzerinde yapılır.
+
+Saatlik sayaçlar (toplam ve block tipi bazında) block eklenirken
+güncellenir; saatlik/günlük aktivite histogramı pencere içindeki saat
+sayısıyla orantılıdır, block sayısından bağımsızdır.
+
+KULLANIM:
+    from time_index import TimeIndex
+
+    times = TimeIndex()
+    times.add(position, block.timestamp, block_type)   # her yeni block için
+
+    span = times.between(now - 86400, now)      # son 24 saatin pozisyonları (range)
+    times.histogram(now - 7 * 86400, now, 'day', block_type='policy')
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional
+
+HOUR = 3600
+BUCKETS = ('hour', 'day')
+
+# Histogram en fazla kaç saatlik pencereyi tarar (~5 yıl)
+MAX_HISTOGRAM_HOURS = 5 * 366 * 24
+
+
+class TimeIndex:
+    """Pozisyon → defter zamanı (monoton) ve saatlik block sayaçları"""
+
+    def __init__(self):
+        self._times = array('d')
+        # Saat (epoch // 3600) → block sayısı; tip bazında ayrıca
+        self._hours: Dict[int, int] = {}
+        self._type_hours: Dict[Optional[str], Dict[int, int]] = {}
+
+    def add(self, position: int, timestamp: float, block_type: str = None):
+        """Block'u indeksle (pozisyonlar sırayla eklenmelidir)"""
+        if position != len(self._times):
+            raise ValueError(f"Zaman indeksi pozisyonu {len(self._times)} bekliyordu, {position} geldi")
+        if self._times and timestamp < self._times[-1]:
+            timestamp = self._times[-1]  # saat geri gitti: defter zamanı geri gitmez
+        self._times.append(timestamp)
+        hour = int(timestamp // HOUR)
+        self._hours[hour] = self._hours.get(hour, 0) + 1
+        type_hours = self._type_hours.get(block_type)
+        if type_hours is None:
+            type_hours = self._type_hours[block_type] = {}
+        type_hours[hour] = type_hours.get(hour, 0) + 1
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def time(self, position: int) -> float:
+        """Block'un defter zamanı"""
+        return self._times[position]
+
+    def between(self, start: float = None, end: float = None) -> range:
+        """
+        Defter zamanı [start, end] aralığındaki pozisyonlar (iki ikili arama)
+
+        None sınır açıktır; dönen aralık artan sıralıdır.
+        """
+        times = self._times
+        low = 0 if start is None else bisect_left(times, start)
+        high = len(times) if end is None else bisect_right(times, end)
+        return range(low, max(low, high))
+
+    def histogram(self, start: float, end: float, bucket: str = 'hour',
+                  block_type: str = None) -> List[Dict]:
+        """
+        [start, end] penceresinde saatlik ya da günlük (yerel saat) block sayıları
+
+        Pencerenin tüm kovaları boş olsalar da döner (grafik ekseni için).
+
+        Args:
+            start, end: Epoch saniye
+            bucket: 'hour' ya da 'day'
+            block_type: Sadece bu tipin block'ları (None = hepsi)
+
+        Returns:
+            [{'bucket': ISO başlangıç, 'count': n}, ...] (eskiden yeniye)
+
+        Raises:
+            ValueError: Bilinmeyen kova ya da çok uzun pencere
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Bilinmeyen kova: {bucket} ({', '.join(BUCKETS)})")
+        first, last = int(start // HOUR), int(end // HOUR)
+        if last - first > MAX_HISTOGRAM_HOURS:
+            raise ValueError(f"Histogram penceresi çok uzun (en fazla {MAX_HISTOGRAM_HOURS // 24} gün)")
+        hours = self._hours if block_type is None else self._type_hours.get(block_type, {})
+
+        counts: Dict[str, int] = {}
+        for hour in range(first, last + 1):
+            moment = datetime.fromtimestamp(hour * HOUR)
+            if bucket == 'day':
+                moment = moment.replace(hour=0, minute=0, second=0)
+            label = moment.isoformat()
+            counts[label] = counts.get(label, 0) + hours.get(hour, 0)
+        return [{'bucket': label, 'count': count} for label, count in counts.items()]
+
+    def bounds(self) -> Optional[tuple]:
+        """(ilk, son) defter zamanı; indeks boşsa None"""
+        return (self._times[0], self._times[-1]) if self._times else None
+
+    def state(self):
+        """Anlık görüntü için düz veri (bkz. header_index.py; sayaçlar kopya, zaman dizisi referans)"""
+        return (self._times, dict(self._hours),
+                {block_type: dict(hours) for block_type, hours in self._type_hours.items()})
+    
+    @staticmethod
+    def trim_state(state, count: int):
+        """`state()` çıktısını ilk `count` block'a kırp (kopya)"""
+        times, hours, type_hours = state
+        return times[:count], hours, type_hours
+
+    def restore(self, state):
+        self._times, self._hours, self._type_hours = state
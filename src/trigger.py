@@ -39,6 +39,8 @@ from folium import plugins
 from geopy.distance import geodesic, great_circle
 from pathlib import Path
 
+from portfolio_storage import get_storage, plain_frame
+
 # Ek modüller (improvements içinden taşındı)
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
@@ -1049,22 +1051,20 @@ def main():
     try:
         # Data path'ını doğru ayarla (src/ içinden çalıştırıldığında parent/data/'ye gider)
         data_dir = Path(__file__).parent.parent / 'data'
-        buildings_file = data_dir / 'buildings.csv'
-        earthquakes_file = data_dir / 'earthquakes.csv'
+        # Yapılandırılmış backend (varsayılan SQLite): silme / prim güncellemeleri
+        # yalnızca orada tutulur, CSV'yi doğrudan okumak eski veriyi verir
+        storage = get_storage(str(data_dir))
         
-        buildings_df = pd.read_csv(str(buildings_file), encoding='utf-8-sig')
-        print(f"✅ {len(buildings_df):,} bina yüklendi")
+        buildings_df = plain_frame(storage.read('buildings'))
+        if buildings_df is None:
+            print("❌ Bina verisi bulunamadı! Önce generator.py çalıştırın.")
+            return
+        print(f"✅ {len(buildings_df):,} bina yüklendi ({storage.format_name})")
         
-        # Deprem verisi
-        eq_encodings = ['latin-1', 'windows-1254', 'utf-8']
-        earthquakes_df = None
-        for enc in eq_encodings:
-            try:
-                earthquakes_df = pd.read_csv(str(earthquakes_file), encoding=enc, on_bad_lines='skip')
-                print(f"✅ {len(earthquakes_df):,} deprem verisi yüklendi ({enc})")
-                break
-            except:
-                continue
+        # Deprem verisi (Kandilli kataloğu; encoding denemeleri backend'de)
+        earthquakes_df = plain_frame(storage.read('earthquakes'))
+        if earthquakes_df is not None:
+            print(f"✅ {len(earthquakes_df):,} deprem verisi yüklendi")
         
         if earthquakes_df is None:
             print("❌ Deprem verisi yüklenemedi!")
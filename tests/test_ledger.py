@@ -0,0 +1,1009 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Blockchain Defteri Testleri
+===========================
+Blok günlüğü (segmentler, group commit, çökme kurtarma) ve Blockchain
+kalıcılığı (sunucu gerektirmez)
+"""
+import csv
+import hashlib
+import hmac
+import io
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import blockchain_service  # noqa: E402
+from block_log import BlockLog, BlockLogError  # noqa: E402
+from block_writer import BlockWriter, BlockWriterClosed  # noqa: E402
+from blockchain_service import Block, Blockchain  # noqa: E402
+from chain_export import ExportAborted, export_chunks, export_positions, parse_export_args  # noqa: E402
+from chain_query import key_substring_positions, merge_positions  # noqa: E402
+from chain_verifier import first_invalid, verify_chain  # noqa: E402
+from ledger_key import LedgerKeyError  # noqa: E402
+from payout_projection import REJECT_ALREADY_APPROVED, REJECT_EXECUTED, PayoutApprovalRejected  # noqa: E402
+from merkle import verify_proof  # noqa: E402
+
+
+def test_block_log_rotates_segments_and_truncates_torn_tail(tmp_path):
+    """Kayıtlar segmentlere bölünür; yarım son kayıt açılışta kesilir"""
+    log = BlockLog(tmp_path / 'segments', segment_bytes=64, fsync_every=1000, fsync_interval=60)
+    payloads = [f'block-{i:02d}-'.encode() * 2 for i in range(10)]
+    for payload in payloads[:9]:
+        log.append([payload])
+    log.append(payloads[9:], sync=True)
+    log.close()
+
+    segments = log.segments()
+    assert len(segments) > 1
+    assert segments[0][0] == 0
+    assert log.read_all() == payloads
+
+    last = segments[-1][1]
+    size = last.stat().st_size
+    with open(last, 'ab') as f:
+        f.write(b'\x00\x00\x01\x00\xde\xad')  # yarım başlık + yük
+
+    reopened = BlockLog(tmp_path / 'segments', segment_bytes=64)
+    assert len(reopened) == 10
+    assert last.stat().st_size == size
+    reopened.append([b'after-crash'], sync=True)
+    assert reopened.read_all() == payloads + [b'after-crash']
+
+
+def test_block_log_refuses_to_truncate_after_corrupt_length(tmp_path):
+    """Segment ortasındaki kaydın uzunluk alanı bozulursa ardındaki kayıtlar kesilmez"""
+    log = BlockLog(tmp_path / 'segments', segment_bytes=4096, fsync_every=1000, fsync_interval=60)
+    locations = log.append([f'block-{i:02d}'.encode() * 4 for i in range(6)], sync=True)
+    log.close()
+
+    path = log.segments()[-1][1]
+    data = bytearray(path.read_bytes())
+    _, offset = locations[2]
+    for length in (0xFFFFFF00, len(data)):  # segmente sığmayan / dosya sonuna uzanan
+        data[offset:offset + 4] = length.to_bytes(4, 'big')
+        path.write_bytes(bytes(data))
+        with pytest.raises(BlockLogError):
+            BlockLog(tmp_path / 'segments', segment_bytes=4096)
+        assert path.read_bytes() == bytes(data)
+
+
+class _LegacyBlock:
+    """Eski (v0) Block: __slots__ yok, `version` yok, f-string hash"""
+
+    # Eski pickle'lar sınıfı bu adla kaydeder
+    __module__ = 'blockchain_service'
+    __qualname__ = 'Block'
+
+    def __init__(self, index, timestamp, data, previous_hash):
+        self.index = index
+        self.timestamp = timestamp
+        self.data = data
+        self.previous_hash = previous_hash
+        self.nonce = 0
+        self.hash = hashlib.sha256(
+            f"{index}{timestamp}{json.dumps(data, sort_keys=True)}{previous_hash}{self.nonce}".encode()).hexdigest()
+
+
+def _legacy_pickle(blocks, monkeypatch) -> bytes:
+    """Eski kodun yazdığı gibi: örnekler `blockchain_service.Block` adıyla, __dict__ durumuyla"""
+    with monkeypatch.context() as patched:
+        patched.setattr(blockchain_service, 'Block', _LegacyBlock)
+        return pickle.dumps(blocks)
+
+
+def test_blockchain_appends_to_log_and_imports_pickle(tmp_path, monkeypatch):
+    """Eski pickle bir kez içe aktarılır; sonraki bloklar günlüğe eklenir"""
+    chain_file = tmp_path / 'blockchain.dat'
+    legacy = [_LegacyBlock(0, 1700000000.123456, {'type': 'genesis', 'message': 'DASK+ Blockchain Genesis Block'}, '0')]
+    legacy.append(_LegacyBlock(1, 1700000001.5, {'type': 'policy', 'policy_id': 1, 'tutar': 'ü'}, legacy[0].hash))
+    legacy.append(_LegacyBlock(2, 1700000002.0, {'type': 'payout', 'amount': 1000.5}, legacy[1].hash))
+    raw = _legacy_pickle(legacy, monkeypatch)
+    assert b'version' not in raw and b'_data' not in raw
+    chain_file.write_bytes(raw)
+
+    chain = Blockchain(chain_file=str(chain_file))
+    assert [block.hash for block in chain.chain] == [block.hash for block in legacy]
+    assert [block.version for block in chain.chain] == [0, 0, 0]
+    assert chain.chain[1].data == legacy[1].data
+    assert chain.is_valid() and chain.is_valid(full_audit=True)
+    assert not chain_file.exists()
+    assert (tmp_path / 'blockchain.dat.imported').exists()
+
+    chain.add_block({'type': 'policy', 'policy_id': 2})
+    chain.add_block({'type': 'payout', 'amount': 1000}, save_to_disk=True)
+
+    reloaded = Blockchain(chain_file=str(chain_file))
+    assert len(reloaded.chain) == 5
+    assert reloaded.is_valid(full_audit=True)
+    assert [block.hash for block in reloaded.chain] == [block.hash for block in chain.chain]
+    assert [block.hash for block in reloaded.chain[:3]] == [block.hash for block in legacy]
+    assert list(reloaded.positions_by_type('policy')) == [1, 3]
+
+    reloaded.reset_to_genesis()
+    assert len(Blockchain(chain_file=str(chain_file)).chain) == 1
+
+
+def test_unreadable_ledger_fails_startup_and_only_the_tail_is_repaired(tmp_path, monkeypatch):
+    """Sadece yarım/çözülemeyen son kayıt kesilir; diğer hatalarda açılış durur, yeni chain kurulmaz"""
+    from block_log import LedgerStateError
+
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_blocks({'type': 'policy', 'policy_id': i} for i in range(5))
+    hashes = [block.hash for block in chain.chain]
+    chain.log.append([b'{"index": 6'], sync=True)  # CRC'si tutan ama çözülemeyen son kayıt
+    chain.log.close()
+    segment = chain.log.segments()[-1][1]
+
+    repaired = Blockchain(chain_file=chain_file)
+    assert [block.hash for block in repaired.chain] == hashes and len(repaired.log) == 6
+    repaired.add_block({'type': 'policy', 'policy_id': 5})
+    repaired.log.close()
+    with open(segment, 'ab') as f:
+        f.write(bytes(4096))  # sıfır dolgulu kuyruk (yarım yazım)
+    assert len(Blockchain(chain_file=chain_file).chain) == 7
+    intact = segment.read_bytes()
+
+    # Ortadaki bozuk kayıt yarım yazım değildir: günlük kesilmez, açılış durur
+    corrupt = bytearray(intact)
+    corrupt[40] ^= 0xFF
+    segment.write_bytes(bytes(corrupt))
+    with pytest.raises(LedgerStateError):
+        Blockchain(chain_file=chain_file)
+    assert segment.read_bytes() == bytes(corrupt)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['blockchain.key', 'blockchain_segments']
+
+    # İndeksleme hatası da günlüğü boş chain ile değiştirmez
+    segment.write_bytes(intact)
+    Blockchain(chain_file=chain_file)._discard_header_index()
+    monkeypatch.setattr(Blockchain, '_index_block', lambda self, position, block: 1 / 0)
+    with pytest.raises(LedgerStateError):
+        Blockchain(chain_file=chain_file)
+    monkeypatch.undo()
+    assert segment.read_bytes() == intact
+    assert [block.hash for block in Blockchain(chain_file=chain_file).chain][:6] == hashes
+
+
+def test_incremental_validation_resumes_from_signed_checkpoint(tmp_path, monkeypatch):
+    """Sadece yeni bloklar doğrulanır; yeniden açılış imzalı checkpoint'ten devam eder"""
+    monkeypatch.setattr(blockchain_service, 'CHECKPOINT_EVERY', 3)
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    for i in range(4):
+        chain.add_block({'type': 'policy', 'policy_id': i})
+    assert chain.is_valid()
+    assert chain.verified_height == 4
+
+    # Doğrulanmış önekteki değişiklik artımlı kontrolde görünmez, derin denetimde görünür
+    chain.chain[2].data['policy_id'] = 99
+    chain.add_block({'type': 'policy', 'policy_id': 4})
+    assert chain.is_valid()
+    assert chain.verify(full_audit=True) == (2, 'Hash mismatch')
+    assert chain.verified_height == 1
+    chain.chain[2].data['policy_id'] = 1
+    assert chain.is_valid(full_audit=True)
+
+    resumed = Blockchain(chain_file=chain_file)
+    assert resumed.verified_height == 5
+    checkpoint = json.loads(resumed.checkpoint_file.read_text(encoding='utf-8'))
+    assert checkpoint['hash'] == chain.chain[5].hash
+
+    checkpoint['index'] = 4
+    resumed.checkpoint_file.write_text(json.dumps(checkpoint), encoding='utf-8')
+    assert Blockchain(chain_file=chain_file).verified_height == 0
+
+    # Anahtar kuruluma özel (0600); eski sabit anahtarla imzalanmış checkpoint geçersiz
+    key_file = tmp_path / 'blockchain.key'
+    assert key_file.stat().st_mode & 0o777 == 0o600
+    message = f'5:{chain.chain[5].hash}'.encode()
+    checkpoint = {'index': 5, 'hash': chain.chain[5].hash,
+                  'signature': hmac.new(b'DASK-PARAMETRIK-CHECKPOINT-2025!', message, hashlib.sha256).hexdigest()}
+    resumed.checkpoint_file.write_text(json.dumps(checkpoint), encoding='utf-8')
+    assert Blockchain(chain_file=chain_file).verified_height == 0
+
+    # Başkalarının okuyabildiği ya da bozuk anahtar dosyasıyla açılış reddedilir
+    key_file.chmod(0o644)
+    with pytest.raises(LedgerKeyError):
+        Blockchain(chain_file=chain_file)
+    key_file.chmod(0o600)
+    key_file.write_text('')
+    with pytest.raises(LedgerKeyError):
+        Blockchain(chain_file=chain_file)
+
+
+def test_secondary_indexes_follow_appends_and_reload(tmp_path):
+    """Müşteri, poliçe, ödeme emri ve onaylayan indeksleri ekleme ve yeniden yüklemede tutarlı"""
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_block({'type': 'policy', 'customer_id': 'CUST000001', 'policy_number': 'DP-2025-00000001'})
+    chain.add_block({'type': 'policy', 'customer_id': 'CUST000002', 'policy_id': 7})
+    chain.add_block({'type': 'payout_request', 'request_id': 'PAY-1', 'policy_id': 'DP-2025-00000001',
+                     'customer_id': 'CUST000001'})
+    chain.add_block({'type': 'payout_approval', 'request_id': 'PAY-1', 'admin': 'admin1'})
+    chain.add_block({'type': 'payout_approval', 'request_id': 'PAY-1', 'admin': 'admin2'})
+
+    for ledger in (chain, Blockchain(chain_file=chain_file)):
+        assert ledger.positions_by('customer_id', 'CUST000001') == [1, 3]
+        assert ledger.positions_by('policy', 'DP-2025-00000001') == [1, 3]
+        assert ledger.positions_by('policy', 7) == [2]
+        assert ledger.payout_request('PAY-1').index == 3
+        assert ledger.payout_request('PAY-2') is None
+        assert [block.data['admin'] for block in ledger.payout_approvals('PAY-1')] == ['admin1', 'admin2']
+        assert ledger.positions_by('approver', 'admin2') == [5]
+        assert [block.index for block in ledger.blocks_by('customer_id', 'CUST000001', 'policy')] == [1]
+
+    chain.reset_to_genesis()
+    assert chain.positions_by('customer_id', 'CUST000001') == []
+
+
+def test_merkle_checkpoints_and_inclusion_proofs(tmp_path, monkeypatch):
+    """Pencere kökleri zincire yazılır; tek block kanıtı checkpoint köküne ulaşır"""
+    monkeypatch.setattr(blockchain_service, 'MERKLE_WINDOW', 4)
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    for i in range(8):
+        chain.add_block({'type': 'policy', 'policy_id': i})
+
+    checkpoints = chain.get_blocks_by_type('merkle_checkpoint')
+    assert [(block.index, block.data['start'], block.data['end']) for block in checkpoints] == [(4, 0, 4), (8, 4, 8)]
+
+    for position in range(len(chain.chain)):
+        proof = chain.inclusion_proof(position)
+        assert proof['valid']
+        assert verify_proof(chain.chain[position].hash, proof['proof'], proof['root'])
+        assert len(proof['proof']) <= 2
+
+    proof = chain.inclusion_proof(6)
+    assert proof['checkpoint']['index'] == 8
+    assert proof['checkpoint']['root'] == proof['root']
+    assert not verify_proof(chain.chain[5].hash, proof['proof'], proof['root'])
+    assert chain.inclusion_proof(10)['checkpoint'] is None
+    assert chain.inclusion_proof(99) is None
+
+    chain.chain[6].hash = chain.chain[5].hash  # kök checkpoint'le tutmaz
+    assert not chain.inclusion_proof(6)['valid']
+    assert chain.verify(full_audit=True)[0] == 6
+
+
+def test_parallel_verification_matches_serial(tmp_path):
+    """Segmentler worker havuzunda doğrulanır; ilk bozuk block seri doğrulamayla aynı"""
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    for i in range(40):
+        chain.add_block({'type': 'policy', 'policy_id': i})
+    blocks = chain.chain
+
+    failure, stats = verify_chain(blocks, workers=2, segment_size=8)
+    assert failure is None
+    assert (stats['blocks'], stats['workers'], stats['segments']) == (40, 2, 5)
+    assert stats['blocks_per_second'] > 0
+
+    blocks[20].data = {'type': 'policy', 'policy_id': -1}  # segment içi (yük derin denetimde yeniden üretilir)
+    assert verify_chain(blocks, workers=2, segment_size=8, deep=True)[0] == (20, 'Hash mismatch')
+    assert first_invalid(blocks, 1, deep=True) == (20, 'Hash mismatch')
+
+    blocks[17].previous_hash = '0' * 64  # segment sınırı (17 = 1 + 2 * 8)
+    blocks[17].hash = blocks[17].calculate_hash()
+    assert verify_chain(blocks, workers=2, segment_size=8)[0] == (17, 'Chain broken')
+    assert verify_chain(blocks, workers=1)[0] == (17, 'Chain broken')
+    assert chain.verify(full_audit=True) == (17, 'Chain broken')
+    assert chain.last_audit['blocks'] == 17
+
+
+def test_add_blocks_matches_single_appends(tmp_path, monkeypatch):
+    """Toplu ekleme: tek günlük yazımı, araya Merkle checkpoint'i, indeksler ve yeniden yükleme"""
+    monkeypatch.setattr(blockchain_service, 'MERKLE_WINDOW', 4)
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    chain.add_block({'type': 'policy', 'policy_id': 0, 'customer_id': 'CUST000000'})
+
+    added = chain.add_blocks({'type': 'policy', 'policy_id': i, 'customer_id': f'CUST{i % 2:06d}'}
+                             for i in range(1, 8))
+    assert [block.data['policy_id'] for block in added] == list(range(1, 8))
+    assert chain.add_blocks([]) == []
+
+    # Pencereler tek tek eklemeyle aynı yerlerde kapanır
+    checkpoints = chain.get_blocks_by_type('merkle_checkpoint')
+    assert [(block.index, block.data['start'], block.data['end']) for block in checkpoints] == [(4, 0, 4), (8, 4, 8)]
+    assert all(chain.inclusion_proof(position)['valid'] for position in range(len(chain.chain)))
+    assert chain.is_valid(full_audit=True)
+    assert len(chain.log) == len(chain.chain) == 11
+    assert [block.index for block in chain.blocks_by('customer_id', 'CUST000001')] == [2, 5, 7, 10]
+
+    reloaded = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    assert [block.hash for block in reloaded.chain] == [block.hash for block in chain.chain]
+
+
+def test_canonical_encoding_caches_payload_and_keeps_legacy_blocks(tmp_path):
+    """v1 hash'i saklanan kanonik yükten; v0 block'lar eski formatla doğrulanır"""
+    legacy = Block(1, 1700000000.5, {'type': 'policy', 'şehir': 'İzmir', 'b': 1, 'a': 2}, 'f' * 64,
+                   version=blockchain_service.LEGACY_BLOCK_VERSION)
+    legacy_string = f"1{1700000000.5}{json.dumps(legacy.data, sort_keys=True)}{'f' * 64}0"
+    assert legacy.hash == blockchain_service.hashlib.sha256(legacy_string.encode()).hexdigest()
+
+    block = Block(2, 1700000001.25, {'type': 'policy', 'şehir': 'İzmir', 'b': 1, 'a': 2}, legacy.hash)
+    assert block.version == blockchain_service.BLOCK_VERSION
+    assert block.payload == '{"a":2,"b":1,"type":"policy","şehir":"İzmir"}'.encode('utf-8')
+    assert block.hash == Block(2, 1700000001.25, {'şehir': 'İzmir', 'a': 2, 'type': 'policy', 'b': 1},
+                               legacy.hash).hash
+
+    # Günlük kaydından okunan v1 block yükü yeniden serileştirmeden kayıttan alır
+    decoded = Block.decode(block.encode())
+    assert decoded._payload == block.payload
+    assert decoded.data == block.data and decoded.hash_matches()
+    assert Block.decode(legacy.encode()).version == blockchain_service.LEGACY_BLOCK_VERSION
+    assert Block.decode(legacy.encode()).hash_matches(deep=True)
+
+    # Bellekte değiştirilen data sadece derin denetimde görünür
+    decoded.data['b'] = 99
+    assert decoded.hash_matches()
+    assert not decoded.hash_matches(deep=True)
+
+    # Eski ve yeni formatlı block'lar aynı zincirde, yeniden yüklemede geçerli
+    chain_file = str(tmp_path / 'blockchain.dat')
+    genesis = Block(0, 1700000000.0, {'type': 'genesis'}, '0', version=blockchain_service.LEGACY_BLOCK_VERSION)
+    legacy_block = Block(1, 1700000000.5, {'type': 'policy', 'policy_id': 1}, genesis.hash,
+                         version=blockchain_service.LEGACY_BLOCK_VERSION)
+    with open(chain_file, 'wb') as f:
+        pickle.dump([genesis, legacy_block], f)
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_block({'type': 'policy', 'policy_id': 2})
+    assert [block.version for block in chain.chain] == [0, 0, 1]
+    assert Blockchain(chain_file=chain_file).is_valid(full_audit=True)
+
+
+def test_chain_store_keeps_headers_and_loads_payloads_lazily(tmp_path, monkeypatch):
+    """Bellekte sadece başlıklar; data günlükten istendiğinde okunur, LRU sınırlı"""
+    monkeypatch.setattr(blockchain_service, 'BLOCK_CACHE_SIZE', 3)
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_blocks({'type': 'policy', 'policy_id': i, 'customer_id': f'CUST{i:06d}'} for i in range(10))
+    assert len(chain.chain._cache) == 3
+
+    reloaded = Blockchain(chain_file=chain_file)
+    store = reloaded.chain
+    assert len(store) == 11 and len(store._cache) <= 1  # yükleme sadece başlıkları tutar
+    assert store.block_type(0) == 'genesis' and store.block_type(5) == 'policy'
+
+    block = store[5]
+    assert block._data is None and block._payload is None
+    assert block.previous_hash == store[4].hash and store[0].previous_hash == '0'
+    assert block.data == {'type': 'policy', 'policy_id': 4, 'customer_id': 'CUST000004'}
+    assert block.hash == chain.chain[5].hash and block.hash_matches(deep=True)
+    assert [b.hash for b in store] == [b.hash for b in chain.chain]
+    assert len(store._cache) == 3
+
+    # Tip süzgeci başlıktan; seçilen block'ların data'sı günlükten
+    assert [b.data['policy_id'] for b in reloaded.blocks_by('customer_id', 'CUST000007', 'policy')] == [7]
+    assert reloaded.blocks_by('customer_id', 'CUST000007', 'payout') == []
+    assert reloaded.is_valid(full_audit=True)
+
+    # Sıfırlama: genesis günlükten okunup yeniden yazılır
+    genesis_hash = store[0].hash
+    reloaded.reset_to_genesis()
+    assert len(store) == 1 and store[0].hash == genesis_hash
+    assert store[0].data['type'] == 'genesis'
+    assert Blockchain(chain_file=chain_file).is_valid(full_audit=True)
+
+
+def test_header_index_sidecar_loads_prefix_and_scans_only_the_tail(tmp_path, monkeypatch):
+    """Temiz kapanışta yan dosya yazılır; açılışta sadece kuyruk taranır"""
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_blocks({'type': 'policy', 'policy_id': i, 'customer_id': f'CUST{i % 3:06d}'} for i in range(8))
+    chain.close()
+    assert chain.header_index_file.exists()
+    assert json.loads(chain.checkpoint_file.read_text())['index'] == 8
+
+    # Sadece kuyruk çözülür: yan dosyadaki 9 block için decode çağrılmaz (eşleşme kontrolü hariç)
+    decoded = []
+    original_decode = Block.decode.__func__
+    monkeypatch.setattr(Block, 'decode', classmethod(lambda cls, p: decoded.append(p) or original_decode(cls, p)))
+    reopened = Blockchain(chain_file=chain_file)
+    assert len(decoded) == 1 and reopened.verified_height == 8
+    reopened.add_blocks([{'type': 'payout_request', 'request_id': 'REQ-1', 'policy_id': 2,
+                          'customer_id': 'CUST000002'}])
+    reopened.log.close()  # yan dosya yazılmadan (çökme)
+
+    decoded.clear()
+    tail = Blockchain(chain_file=chain_file)
+    assert len(decoded) == 2  # eşleşme kontrolü + yeni block
+    monkeypatch.undo()
+    full = Blockchain(chain_file=chain_file)
+    full._discard_header_index()
+    full = Blockchain(chain_file=chain_file)
+    assert [b.hash for b in tail.chain] == [b.hash for b in full.chain]
+    assert tail.positions_by('customer_id', 'CUST000002') == full.positions_by('customer_id', 'CUST000002') == [3, 6, 9]
+    assert list(tail.positions_by_type('policy')) == list(range(1, 9))
+    assert tail.payout_request('REQ-1').index == 9 and tail.is_valid(full_audit=True)
+
+    # İmzası tutmayan yan dosya kullanılmaz, günlük baştan taranır
+    tail.close()
+    raw = bytearray(tail.header_index_file.read_bytes())
+    raw[-40] ^= 0xFF
+    tail.header_index_file.write_bytes(bytes(raw))
+    assert [b.hash for b in Blockchain(chain_file=chain_file).chain] == [b.hash for b in full.chain]
+
+    # Sıfırlanmış zincir eski yan dosyayı kullanmaz
+    tail = Blockchain(chain_file=chain_file)
+    tail.close()
+    reset = Blockchain(chain_file=chain_file)
+    stale = reset.header_index_file.read_bytes()
+    reset.reset_to_genesis()
+    reset.add_blocks([{'type': 'policy', 'policy_id': 99}] * 12)
+    reset.header_index_file.write_bytes(stale)
+    reset.log.close()
+    reloaded = Blockchain(chain_file=chain_file)
+    assert len(reloaded.chain) == 13 and reloaded.is_valid(full_audit=True)
+
+
+def test_snapshot_state_is_plain_data_and_pickles_are_never_loaded(tmp_path):
+    """Durum JSON + ikili diziler olarak yazılır; imzası geçerli eski (pickle) dosya bile çözülmez"""
+    import pickle
+    from array import array
+
+    from header_index import HeaderIndexError, _decode_state, open_header_index, write_header_index
+
+    state = {'types': {None: array('q', [0]), 'policy': array('q', [1, 2])}, 'hours': {493: 2},
+             'fields': {'customer_id': {'CUST000001': [1, 2]}}, 'amounts': array('d', [float('nan'), 1.5]),
+             'requests': [('REQ-1', 3, {'admin1': 4}, None)]}
+    path = tmp_path / 'headers.idx'
+    write_header_index(path, {'blocks': 3}, {'hashes': bytes(96)}, state, b'k' * 32)
+    assert b'\x80\x05' not in path.read_bytes()  # pickle protokol başlığı yok
+    with open_header_index(path, b'k' * 32) as index:
+        loaded = index.state
+        assert bytes(index.column('hashes')) == bytes(96)
+    assert loaded['types'] == {None: array('q', [0]), 'policy': array('q', [1, 2])}
+    assert loaded['hours'] == {493: 2} and loaded['fields'] == state['fields']
+    assert loaded['amounts'][1] == 1.5 and loaded['amounts'][0] != loaded['amounts'][0]
+    assert loaded['requests'] == [['REQ-1', 3, {'admin1': 4}, None]]
+    with pytest.raises(TypeError):
+        write_header_index(path, {}, {}, {'chain': object()}, b'k' * 32)
+    with pytest.raises(HeaderIndexError):
+        _decode_state(b'{"k": [1, 2], "v": [3]}', {})
+
+    # Anahtarı bilen biri bile eski biçimde (pickle) kod çalıştıran dosya üretemez
+    class Exploit:
+        def __reduce__(self):
+            return (Path(tmp_path / 'pwned').touch, ())
+
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.close()
+    body = b'DASKHIX\x01'
+    payload = pickle.dumps(Exploit())
+    meta = json.dumps({'columns': [], 'state_length': len(payload)}).encode()
+    body += len(meta).to_bytes(4, 'big') + meta + payload
+    chain.header_index_file.write_bytes(body + hmac.new(chain._key, body, hashlib.sha256).digest())
+    with pytest.raises(HeaderIndexError):
+        open_header_index(chain.header_index_file, chain._key)
+    assert len(Blockchain(chain_file=chain_file).chain) == 1
+    assert not (tmp_path / 'pwned').exists()
+
+
+def test_block_log_scan_resumes_from_location_across_segments(tmp_path):
+    """scan(position, location) önceki segmentleri okumadan devam eder"""
+    log = BlockLog(tmp_path / 'segments', segment_bytes=64, fsync_every=1000, fsync_interval=60)
+    payloads = [f'block-{i:02d}-'.encode() * 2 for i in range(10)]
+    locations = log.append(payloads, sync=True)
+    assert len(log.segments()) > 1
+    for position in (0, 3, 9):
+        resumed = list(log.scan(position, locations[position]))
+        assert [payload for _, _, payload in resumed] == payloads[position:]
+        assert [(first, offset) for first, offset, _ in resumed] == locations[position:]
+
+
+def test_payout_projection_tracks_approvals_and_execution(tmp_path):
+    """Ödeme emri durumları block'lar eklendikçe güncellenir, açılışta aynı kurulur"""
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_blocks([
+        {'type': 'payout_request', 'request_id': 'PAY-1', 'policy_id': 'P1', 'amount_tl': 100},
+        {'type': 'payout_request', 'request_id': 'PAY-2', 'policy_id': 'P2', 'amount_tl': 200},
+        {'type': 'payout_approval', 'request_id': 'PAY-1', 'admin': 'admin1'},
+        {'type': 'payout_approval', 'request_id': 'PAY-1', 'admin': 'admin1'},  # tekrar: yok sayılır
+        {'type': 'payout_approval', 'request_id': 'PAY-2', 'admin': 'admin3'},
+        {'type': 'payout_approval', 'request_id': 'PAY-1', 'admin': 'admin2'},
+        {'type': 'payout_approval', 'request_id': 'PAY-9', 'admin': 'admin1'},  # emri yok
+    ])
+    payouts = chain.payouts
+    assert list(payouts.get('PAY-1').approvers) == ['admin1', 'admin2']
+    assert payouts.get('PAY-1').status == 'approved' and payouts.get('PAY-2').status == 'pending'
+    assert payouts.get('PAY-9') is None
+    assert payouts.counts() == {'total': 2, 'pending': 1, 'approved': 1, 'executed': 0}
+
+    chain.add_block({'type': 'payout', 'payout_id': 0, 'request_id': 'PAY-1', 'amount_tl': 100})
+    chain.add_block({'type': 'payout_approval', 'request_id': 'PAY-1', 'admin': 'admin3'})  # gerçekleşmiş emir
+    assert payouts.get('PAY-1').executed and payouts.get('PAY-1').executed_position == 8
+    assert payouts.get('PAY-1').approval_count == 2
+    assert [state.request_id for state in payouts.pending()] == ['PAY-2']
+    assert payouts.counts() == {'total': 2, 'pending': 1, 'approved': 0, 'executed': 1}
+
+    # Yan dosyadan ve tam taramadan aynı projeksiyon
+    chain.close()
+    for reloaded in (Blockchain(chain_file=chain_file), None):
+        if reloaded is None:
+            Blockchain(chain_file=chain_file)._discard_header_index()
+            reloaded = Blockchain(chain_file=chain_file)
+        assert [state.to_dict() for state in reloaded.payouts.pending()] == \
+            [state.to_dict() for state in payouts.pending()]
+        assert reloaded.payouts.get('PAY-1').to_dict() == payouts.get('PAY-1').to_dict()
+
+    chain = Blockchain(chain_file=chain_file)
+    chain.reset_to_genesis()
+    assert len(chain.payouts) == 0
+
+
+def test_concurrent_payout_approvals_are_checked_under_the_write_lock(tmp_path):
+    """Eşzamanlı tekrar onaylardan ve ödemeyle yarışan onaylardan sadece geçerli olanlar yazılır"""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    chain.add_blocks([{'type': 'payout_request', 'request_id': f'PAY-{i}', 'amount_tl': 100} for i in (1, 2)])
+    original_rejection = chain.payouts.approval_rejection
+
+    def slow_rejection(request_id, admin):
+        reason = original_rejection(request_id, admin)
+        time.sleep(0.005)  # kontrol ile ekleme arası: kilitsiz olsaydı herkes geçerdi
+        return reason
+
+    chain.payouts.approval_rejection = slow_rejection
+    barrier = threading.Barrier(12)
+
+    def approve(request_id, admin):
+        barrier.wait()
+        try:
+            chain.add_payout_approval({'type': 'payout_approval', 'request_id': request_id, 'admin': admin})
+            return 'ok'
+        except PayoutApprovalRejected as e:
+            return e.reason
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        results = list(pool.map(approve, ['PAY-1'] * 12, ['admin1'] * 6 + ['admin2'] * 6))
+    assert results.count('ok') == 2 and results.count(REJECT_ALREADY_APPROVED) == 10
+    assert list(chain.payouts.get('PAY-1').approvers) in (['admin1', 'admin2'], ['admin2', 'admin1'])
+    assert len(chain.positions_by_type('payout_approval')) == 2
+
+    # Ödemeyle yarışan onaylar: ödemeden sonra onay block'u yazılmaz
+    def execute():
+        barrier.wait()
+        chain.add_block({'type': 'payout', 'request_id': 'PAY-2', 'amount_tl': 100}, save_to_disk=True)
+        return 'executed'
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        futures = [pool.submit(approve, 'PAY-2', f'admin{i % 3 + 1}') for i in range(11)]
+        futures.append(pool.submit(execute))
+        results = [future.result() for future in futures]
+    executed_at = chain.payouts.get('PAY-2').executed_position
+    approvals = [position for position in chain.positions_by('request_id', 'PAY-2')
+                 if chain.chain[position].data['type'] == 'payout_approval']
+    assert all(position < executed_at for position in approvals)
+    assert len(approvals) == results.count('ok') <= 3
+    assert set(results[:-1]) <= {'ok', REJECT_ALREADY_APPROVED, REJECT_EXECUTED}
+
+
+def test_structured_query_uses_indexes_and_pages_with_cursor(tmp_path):
+    """Alan/token/tutar/zaman koşulları indekslerden; sayfalama imleçle, plan sonuçla döner"""
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    cities = ['İstanbul', 'İzmir', 'Ankara']
+    chain.add_blocks({'type': 'policy', 'customer_id': f'CUST{i % 4:06d}', 'policy_number': f'DP-{i:04d}',
+                      'coverage_tl': 100_000 * (i + 1), 'city': cities[i % 3], 'district': 'Kadıköy' if i % 5 == 0 else 'Merkez'}
+                     for i in range(20))
+    chain.add_block({'type': 'payout_request', 'request_id': 'PAY-1', 'customer_id': 'CUST000001',
+                     'amount_tl': 250_000, 'reason': 'Parametrik tetikleme'})
+
+    def found(predicates, **kwargs):
+        return chain.query(predicates, **kwargs)['positions']
+
+    assert found({'customer_id': 'CUST000001'}) == [21, 18, 14, 10, 6, 2]
+    assert found({'customer_id': 'CUST000001', 'type': 'policy'}) == [18, 14, 10, 6, 2]
+    assert found({'policy_number': 'DP-0007'}) == [8]
+    assert found({'text': 'KADIKÖY'}) == [16, 11, 6, 1]
+    assert found({'text': 'izmir kadıköy'}) == [11]
+    assert found({'text': 'tetikleme'}) == [21]
+    assert found({'amount_min': 1_500_000, 'amount_max': 1_700_000}) == [17, 16, 15]
+    assert found({'amount_min': 250_000, 'amount_max': 250_000}) == [21]
+    assert found({'type': 'policy', 'amount_max': 300_000}) == [3, 2, 1]
+    assert found({'query': 'CUST000003'}) == [20, 16, 12, 8, 4]
+    assert found({'query': 'ankara', 'type': 'policy'}) == [18, 15, 12, 9, 6, 3]
+    # Eski arama alt dize eşleşmesidir: kimliklerde ve metin kelimelerinde
+    assert found({'query': 'ust000003'}) == [20, 16, 12, 8, 4]
+    assert found({'query': 'dp-000'}) == list(range(10, 0, -1))
+    assert found({'query': 'pay-'}) == [21]
+    assert found({'query': 'kadik'}) == [16, 11, 6, 1]
+    assert found({'query': 'izm KADIK'}) == [11]
+    assert found({'query': 'tetik'}) == [21]
+    assert found({'query': 'nowhere'}) == []
+
+    # /api/blockchain/policies araması: kimlik indeksi anahtarlarında alt dize
+    assert merge_positions(key_substring_positions(chain, ('customer_id', 'policy'), 'dp-001')) == \
+        list(range(11, 21))
+    assert merge_positions(key_substring_positions(chain, ('customer_id', 'policy'), '000001')) == \
+        [2, 6, 10, 14, 18, 21]
+    genesis_time = chain.chain[0].timestamp
+    assert found({'to': genesis_time}) == [0]
+    assert found({'type': 'genesis', 'from': genesis_time - 1}) == [0]
+
+    # İmleçli sayfalama tüm sonuçları bir kez verir; boş son sayfa istenmez
+    pages, cursor, requests = [], None, 0
+    while True:
+        page = chain.query({'type': 'policy'}, limit=5, cursor=cursor)
+        requests += 1
+        pages.extend(page['positions'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert pages == list(range(20, 0, -1))
+    assert requests == 4
+    # Sayfa tam dolduğunda imleç ancak bir eşleşme daha varsa döner
+    assert chain.query({'type': 'policy'}, limit=20)['next_cursor'] is None
+    assert chain.query({'type': 'policy'}, limit=19)['next_cursor'] == 2
+
+    # Plan: en küçük kaynak sürücü, diğerleri ikili arama, filtreler başlıktan
+    plan = chain.query({'customer_id': 'CUST000001', 'text': 'ankara', 'type': 'policy'})['plan']
+    assert plan['driver'] == {'source': 'customer_id=CUST000001', 'size': 6}
+    assert plan['probes'] == [{'source': 'token=ankara', 'size': 6, 'method': 'bisect'}]
+    assert plan['filters'] == [{'predicate': 'type=policy', 'method': 'header'}]
+    assert plan['examined'] == 6
+
+    with pytest.raises(ValueError):
+        chain.query({'colour': 'red'})
+
+
+def test_export_streams_filtered_rows_in_chunks(tmp_path, monkeypatch):
+    """Dışa aktarma index/tip/zaman filtreleriyle satırları parça parça üretir"""
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    chain.add_blocks({'type': 'policy' if i % 2 else 'payout', 'customer_id': f'CUST{i:06d}',
+                      'coverage_tl': 1000 * i, 'note': 'satır\nsonu, "tırnak"'} for i in range(1, 41))
+
+    assert list(export_positions(chain, block_type='policy', start=5, stop=12)) == [5, 7, 9, 11]
+    assert list(export_positions(chain, start=38)) == [38, 39, 40]
+    genesis_time = chain.chain[0].timestamp
+    assert list(export_positions(chain, time_to=genesis_time)) == [0]
+
+    # NDJSON: günlük kaydı aynen; CSV: başlık ilk parça, veri satırları ayrıştırılabilir
+    lines = b''.join(export_chunks(chain, export_positions(chain, block_type='payout'), 'ndjson')).splitlines()
+    assert [json.loads(line)['index'] for line in lines] == list(range(2, 41, 2))
+    assert json.loads(lines[0])['data'] == chain.chain[2].data
+
+    chunks = export_chunks(chain, export_positions(chain, block_type='policy'), 'csv')
+    header = next(chunks)
+    assert header.startswith(b'block_index,timestamp,type')
+    rows = list(csv.DictReader(io.StringIO((header + b''.join(chunks)).decode('utf-8'), newline='')))
+    assert [int(row['block_index']) for row in rows] == list(range(1, 41, 2))
+    assert rows[0]['coverage_amount'] == '1000' and json.loads(rows[0]['data'])['note'] == 'satır\nsonu, "tırnak"'
+
+    # Büyük çıktı sınırlı parçalara bölünür
+    monkeypatch.setattr('chain_export.CHUNK_BYTES', 512)
+    chunks = list(export_chunks(chain, export_positions(chain), 'ndjson'))
+    assert len(chunks) > 1 and all(len(chunk) < 512 + 1024 for chunk in chunks)
+
+    # Başladıktan sonra eklenen block'lar akışa girmez (uzunluk sabitlenir)
+    chunks = export_chunks(chain, iter(range(39, 100)), 'ndjson')
+    chain.add_block({'type': 'policy', 'customer_id': 'CUST000041'})
+    assert [json.loads(line)['index'] for line in b''.join(chunks).splitlines()] == [39, 40]
+
+    # Akış sürerken defter sıfırlanırsa (sync) akış hata ile durur
+    for export_format in ('ndjson', 'csv'):
+        generation = chain.generation
+        chunks = export_chunks(chain, export_positions(chain), export_format, generation)
+        next(chunks)
+        chain.reset_to_genesis()
+        assert chain.generation == generation + 1
+        with pytest.raises(ExportAborted):
+            list(chunks)
+        chain.add_blocks({'type': 'policy', 'customer_id': f'CUST{i:06d}'} for i in range(1, 41))
+
+    # Okuma sıfırlamayla çakışırsa kayıt kullanılmaz
+    generation = chain.generation
+    original_record = chain.chain.record
+
+    def record_during_reset(position):
+        chain.reset_to_genesis()
+        return original_record(position)
+
+    monkeypatch.setattr(chain.chain, 'record', record_during_reset)
+    with pytest.raises(ExportAborted):
+        list(export_chunks(chain, iter([0, 1, 2]), 'ndjson', generation))
+    monkeypatch.undo()
+
+    options = parse_export_args({'format': 'NDJSON', 'type': 'all', 'start_index': '3', 'end_index': '5',
+                                 'from': str(genesis_time)})
+    assert options == {'format': 'ndjson', 'block_type': None, 'start': 3, 'stop': 6,
+                       'time_from': genesis_time, 'time_to': None}
+    for bad in ({'format': 'xml'}, {'from': 'dün'}, {'start_index': 'x'}):
+        with pytest.raises(ValueError):
+            parse_export_args(bad)
+
+
+def test_periodic_snapshots_keep_generations_and_replay_only_the_tail(tmp_path, monkeypatch):
+    """Her N block'ta anlık görüntü yazılır; açılış en yeni geçerli nesilden kuyruğu oynatır"""
+    monkeypatch.setattr(blockchain_service, 'SNAPSHOT_EVERY', 10)
+    monkeypatch.setattr(blockchain_service, 'SNAPSHOT_KEEP', 2)
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    latest, previous = chain.snapshot_files()
+    chain.add_blocks({'type': 'policy', 'policy_id': i, 'coverage_tl': 1000, 'premium_tl': 10} for i in range(8))
+    assert not latest.exists()
+    chain.add_blocks([{'type': 'policy', 'policy_id': 8, 'coverage_tl': 1000, 'premium_tl': 10}])
+    chain.wait_for_snapshot()
+    assert latest.exists() and not previous.exists()
+    chain.add_blocks({'type': 'policy', 'policy_id': 9 + i, 'coverage_tl': 1000, 'premium_tl': 10} for i in range(10))
+    chain.wait_for_snapshot()
+    assert previous.exists()
+    chain.add_blocks([{'type': 'payout', 'policy_id': 3, 'amount_tl': 500.5}] * 3)
+    chain.log.close()  # kapanışta görüntü yazılmadan (çökme)
+
+    # Sadece son görüntüden sonraki 3 block (ve eşleşme kontrolü) çözülür
+    decoded = []
+    original_decode = Block.decode.__func__
+    monkeypatch.setattr(Block, 'decode', classmethod(lambda cls, p: decoded.append(p) or original_decode(cls, p)))
+    reopened = Blockchain(chain_file=chain_file)
+    assert len(decoded) == 4
+    monkeypatch.undo()
+    assert reopened.totals.to_dict() == {'blocks': 23, 'policy_count': 19, 'total_coverage_tl': 19000.0,
+                                         'total_premium_tl': 190.0, 'payout_count': 3,
+                                         'total_payout_tl': 1501.5, 'next_policy_id': 19}
+
+    # Bozuk en yeni nesil atlanır, bir önceki nesilden aynı durum kurulur
+    raw = bytearray(latest.read_bytes())
+    raw[-40] ^= 0xFF
+    latest.write_bytes(bytes(raw))
+    recovered = Blockchain(chain_file=chain_file)
+    assert [b.hash for b in recovered.chain] == [b.hash for b in reopened.chain]
+    assert recovered.totals.to_dict() == reopened.totals.to_dict()
+    assert list(recovered.positions_by_type('payout')) == [20, 21, 22] and recovered.is_valid(full_audit=True)
+
+    # Servis poliçe kimliklerine zincirden devam eder
+    monkeypatch.setattr(blockchain_service, 'Blockchain', lambda: Blockchain(chain_file=chain_file))
+    service = blockchain_service.BlockchainService()
+    assert service.contract.policy_counter == 19
+    assert service.get_contract_stats()['ledger']['policy_count'] == 19
+
+
+def test_periodic_snapshot_is_written_off_the_append_path(tmp_path, monkeypatch):
+    """Görüntü sınırını geçen ekleme yazımı beklemez; görüntü yakalandığı andaki durumu taşır"""
+    import threading
+    import time
+    from header_index import open_header_index
+
+    monkeypatch.setattr(blockchain_service, 'SNAPSHOT_EVERY', 10)
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    chain.add_blocks({'type': 'policy', 'policy_id': i, 'customer_id': f'C{i % 3}'} for i in range(8))
+
+    release = threading.Event()
+    original_write = blockchain_service.write_header_index
+
+    def slow_write(*args):
+        assert release.wait(10)
+        original_write(*args)
+
+    monkeypatch.setattr(blockchain_service, 'write_header_index', slow_write)
+    start = time.perf_counter()
+    chain.add_blocks([{'type': 'policy', 'policy_id': 8, 'customer_id': 'C2'}])  # 10. block: sınır
+    boundary = time.perf_counter() - start
+    for i in range(9, 15):  # görüntü yazılırken eklemeler ve yeni anahtarlar
+        chain.add_blocks([{'type': 'payout', 'policy_id': i, 'customer_id': f'C{i}', 'amount_tl': 1.0}])
+    assert boundary < 1 and not chain.header_index_file.exists()
+    release.set()
+    chain.wait_for_snapshot()
+    assert chain._snapshot_blocks == 10
+
+    # Görüntü 10 block'luk durumu taşır; kuyruk açılışta oynatılır
+    chain.log.close()
+    with open_header_index(chain.header_index_file, chain._key) as index:
+        assert index.meta['blocks'] == 10
+    reopened = Blockchain(chain_file=chain_file)
+    assert len(reopened.chain) == 16
+    assert list(reopened.positions_by_type('payout')) == list(range(10, 16))
+    assert list(reopened.positions_by('customer_id', 'C2')) == [3, 6, 9]
+    assert reopened.totals.to_dict() == chain.totals.to_dict()
+
+
+def test_block_writer_batches_concurrent_appends(tmp_path):
+    """Eşzamanlı add_block'lar tek yazarda partilenir; hatalı block sadece kendi Future'ını bozar"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+
+    def append(i):
+        return chain.add_block({'type': 'customer_login', 'customer_id': f'CUST{i % 5:06d}', 'n': i},
+                               save_to_disk=i % 10 == 0)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        blocks = list(pool.map(append, range(400)))
+
+    assert sorted(block.index for block in blocks) == list(range(1, 401))
+    assert [block.data['n'] for block in blocks] == list(range(400))
+    assert chain.is_valid(full_audit=True)
+    assert len(chain.positions_by('customer_id', 'CUST000003')) == 80
+
+    # Kuyrukta birikenler partilere bölünür; kritik kayıt partinin tek fsync'ini paylaşır
+    writer = BlockWriter(chain, batch_size=64)
+    futures = [writer.submit({'type': 'note', 'n': i}, durable=i == 70) for i in range(200)]
+    writer.start()
+    assert [future.result().index for future in futures] == list(range(401, 601))
+    assert writer.stats == {'batches': 4, 'blocks': 200, 'durable_batches': 1}
+    writer.close()
+
+    # Serileştirilemeyen block partiyi bozmaz
+    good = chain.submit_block({'type': 'note', 'n': 1})
+    bad = chain.submit_block({'type': 'note', 'n': object()})
+    with pytest.raises(TypeError):
+        bad.result()
+    assert good.result().data == {'type': 'note', 'n': 1}
+
+    # Kapanış kuyruğu boşaltır; sonrası doğrudan yazılır
+    pending = [chain.submit_block({'type': 'note', 'n': i}) for i in range(50)]
+    chain.close()
+    assert all(future.done() for future in pending)
+    reopened = Blockchain(chain_file=chain_file)
+    assert len(reopened.chain) == 652 and reopened.is_valid(full_audit=True)
+
+
+def test_block_writer_survives_unexpected_commit_errors(tmp_path, monkeypatch):
+    """add_blocks dışındaki hata partinin Future'larını bozar; yazar çalışmaya devam eder"""
+    chain = Blockchain(chain_file=str(tmp_path / 'blockchain.dat'))
+    writer = BlockWriter(chain)
+    original_add_blocks = chain.add_blocks
+    calls = []
+
+    def add_blocks(items, save_to_disk=False):
+        blocks = original_add_blocks(items, save_to_disk)
+        calls.append(len(blocks))
+        return None if len(calls) == 1 else blocks  # ilk partide sonuç eşlenemez
+
+    monkeypatch.setattr(chain, 'add_blocks', add_blocks)
+    futures = [writer.submit({'type': 'note', 'n': i}) for i in range(3)]
+    writer.start()
+    for future in futures:
+        with pytest.raises(TypeError):
+            future.result(timeout=5)
+
+    assert writer.submit({'type': 'note', 'n': 3}).result(timeout=5).index == 4
+    assert writer._thread.is_alive()
+    writer.close()
+    with pytest.raises(BlockWriterClosed):
+        writer.submit({'type': 'note', 'n': 4})
+
+
+def test_index_readers_never_see_unpublished_blocks_and_failed_indexing_rebuilds(tmp_path, monkeypatch):
+    """Kilitsiz okuyucular indeksten sadece zincirdeki pozisyonları alır; yarım kalan indeksleme günlükten kurulur"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from block_log import LedgerStateError
+    from chain_query import ChainQueryIndex
+
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            try:
+                for position in chain.positions_by_type('policy')[-20:]:
+                    assert chain.chain[position].data['type'] == 'policy'
+                for block in chain.blocks_by('customer_id', 'CUST000001')[-5:]:
+                    assert block.data['customer_id'] == 'CUST000001'
+                span = chain.positions_between(None, None)
+                for position in range(max(span.start, span.stop - 20), span.stop):
+                    chain.chain[position].hash
+                b''.join(export_chunks(chain, export_positions(chain, block_type='policy',
+                                                               start=max(0, len(chain.chain) - 30)), 'ndjson'))
+            except Exception as e:  # noqa: BLE001 - okuyucu hatası testte raporlanır
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(chain.submit_block, {'type': 'policy', 'customer_id': f'CUST{i % 3:06d}', 'n': i})
+                   for i in range(3000)]
+        blocks = [future.result().result() for future in futures]
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert len(blocks) == 3000 and len(chain.positions_by_type('policy')) == 3000
+
+    # Günlüğe yazılmış partinin indekslemesi yarıda kesilirse bellek günlükten yeniden kurulur
+    calls = []
+    original_add = chain.query_index.add
+
+    def flaky_add(position, data):
+        calls.append(position)
+        if len(calls) == 2:
+            raise MemoryError('indeks büyütülemedi')
+        original_add(position, data)
+
+    monkeypatch.setattr(chain.query_index, 'add', flaky_add)
+    before = len(chain.chain)
+    added = chain.add_blocks([{'type': 'payout', 'policy_id': i, 'amount_tl': 5} for i in range(3)])
+    assert [block.index for block in added] == [before, before + 1, before + 2]
+    assert len(chain.chain) == len(chain.log) == before + 3
+    assert list(chain.positions_by_type('payout')) == [before, before + 1, before + 2]
+    assert chain.totals.payout_count == 3 and chain.is_valid(full_audit=True)
+
+    # Günlükten de kurulamıyorsa hata yükselir ve yazar partiyi ikinci kez eklemez
+    original_class_add = ChainQueryIndex.add
+    monkeypatch.setattr(ChainQueryIndex, 'add', lambda self, position, data: (
+        (_ for _ in ()).throw(ValueError('bozuk')) if data.get('poison') else original_class_add(self, position, data)))
+    poisoned = [chain.submit_block({'type': 'note', 'poison': True, 'n': i}) for i in range(3)]
+    for future in poisoned:
+        with pytest.raises(LedgerStateError):
+            future.result()
+    assert len(chain.log) == before + 6
+    monkeypatch.undo()
+    chain.log.close()
+    assert len(Blockchain(chain_file=chain_file).chain) == before + 6
+
+
+def test_time_index_windows_and_histograms(tmp_path, monkeypatch):
+    """Zaman pencereleri ikili aramayla, aktivite saatlik sayaçlardan; defter zamanı geri gitmez"""
+    from datetime import datetime
+
+    base = datetime(2026, 1, 5, 10, 0).timestamp()
+    clock = [base - 100]
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock[0], tz)
+
+    monkeypatch.setattr(blockchain_service, 'datetime', Clock)
+    chain_file = str(tmp_path / 'blockchain.dat')
+    chain = Blockchain(chain_file=chain_file)
+    clock[0] = base
+    chain.add_blocks({'type': 'policy', 'policy_id': i} for i in range(3))
+    clock[0] = base + 3600
+    chain.add_blocks([{'type': 'payout', 'policy_id': 1, 'amount_tl': 10}] * 2)
+    clock[0] = base + 1800  # saat geri gitti: block bir önceki defter zamanına sayılır
+    chain.add_block({'type': 'policy', 'policy_id': 3})
+    clock[0] = base + 86400
+    chain.add_block({'type': 'policy', 'policy_id': 4})
+
+    assert chain.positions_between(base, base + 3600) == range(1, 7)
+    assert chain.positions_between(base + 1, base + 3600) == range(4, 7)
+    assert chain.positions_between(None, base - 1) == range(0, 1)
+    assert chain.positions_between(base + 90000) == range(8, 8)
+    assert chain.query({'from': base + 1})['plan']['driver'] == {'source': f'time∈[{base + 1}, None]', 'size': 4}
+    assert chain.query({'from': str(base + 1), 'type': 'policy'})['positions'] == [7, 6]
+
+    hour = datetime.fromtimestamp(base).isoformat()
+    next_hour = datetime.fromtimestamp(base + 3600).isoformat()
+    expected = {
+        'hour': [{'bucket': hour, 'count': 3}, {'bucket': next_hour, 'count': 3}],
+        'payout': [{'bucket': hour, 'count': 0}, {'bucket': next_hour, 'count': 2}],
+        'day': [{'bucket': '2026-01-05T00:00:00', 'count': 6}, {'bucket': '2026-01-06T00:00:00', 'count': 1}],
+    }
+
+    def histograms(blockchain):
+        return {
+            'hour': blockchain.activity(base, base + 7199),
+            'payout': blockchain.activity(base, base + 7199, block_type='payout'),
+            'day': blockchain.activity(base, base + 86400, 'day'),
+        }
+
+    assert histograms(chain) == expected
+    with pytest.raises(ValueError):
+        chain.activity(base, base + 3600, 'week')
+
+    # Temiz kapanış (anlık görüntü) ve çökme sonrası kuyruk oynatma aynı indeksi kurar
+    chain.close()
+    reopened = Blockchain(chain_file=chain_file)
+    assert histograms(reopened) == expected and reopened.positions_between(base + 1, base + 3600) == range(4, 7)
+    reopened.log.close()
+    reopened._discard_header_index()
+    rescanned = Blockchain(chain_file=chain_file)
+    assert histograms(rescanned) == expected and rescanned.positions_between(base + 1, base + 3600) == range(4, 7)
@@ -0,0 +1,583 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Portföy Deposu Testleri
+=======================
+PortfolioStore snapshot'ı, hash indeksleri, arama indeksi ve depolama
+backend'i (sunucu gerektirmez)
+"""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from customer_aggregates import CustomerAggregates  # noqa: E402
+from mutation_log import MutationLog  # noqa: E402
+from portfolio_index import PortfolioIndex  # noqa: E402
+from pagination import (InvalidCursor, decode_cursor, encode_cursor, keyset_window,  # noqa: E402
+                        ranked_order, ranked_window)
+from portfolio_storage import (LoggedStorage, ParquetStorage, SqliteStorage,  # noqa: E402
+                               get_storage, typed_frame)
+from portfolio_store import PortfolioStore  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+
+def _write_portfolio(data_dir: Path):
+    pd.DataFrame({
+        'building_id': ['BLD_000000', 'BLD_000001', 'BLD_000002', 'BLD_000003'],
+        'customer_id': ['CUST000001', 'CUST000002', 'CUST000001', 'CUST000003'],
+        'policy_number': ['DP-2025-00000000', 'DP-2025-00000001',
+                          'DP-2025-00000002', 'DP-2025-00000003'],
+        'owner_name': ['Ali Yılmaz', 'Ayşe Kaya', 'Ali Yılmaz', 'Mehmet Demir'],
+        'complete_address': ['Moda Cad. No: 1 Kadıköy', 'Atatürk Sok. No: 2 Çankaya',
+                             'Bağdat Cad. No: 3 Kadıköy', 'İnönü Bulvarı No: 4 Karşıyaka'],
+        'monthly_premium_tl': [100.0, 200.0, 300.0, 400.0],
+    }).to_csv(data_dir / 'buildings.csv', index=False, encoding='utf-8-sig')
+    pd.DataFrame({
+        'customer_id': ['CUST000001', 'CUST000002', 'CUST000003'],
+        'email': ['ali.yilmaz0@email.com', 'Ayse.Kaya1@email.com', 'mehmet.demir2@email.com'],
+    }).to_csv(data_dir / 'customers.csv', index=False, encoding='utf-8-sig')
+
+
+def test_indexed_lookups(tmp_path):
+    """Poliçe, bina, müşteri ve e-posta sorguları indeksten döner"""
+    _write_portfolio(tmp_path)
+    snapshot = PortfolioStore(str(tmp_path)).snapshot()
+
+    assert snapshot.policy('DP-2025-00000001')['building_id'] == 'BLD_000001'
+    assert snapshot.building('BLD_000003')['customer_id'] == 'CUST000003'
+    assert snapshot.policy('DP-2025-99999999') is None
+
+    buildings = snapshot.customer_buildings('CUST000001')
+    assert list(buildings['building_id']) == ['BLD_000000', 'BLD_000002']
+    assert snapshot.customer_buildings('CUST999999').empty
+
+    assert snapshot.customer('CUST000002')['email'] == 'Ayse.Kaya1@email.com'
+    assert snapshot.customer_by_email('AYSE.KAYA1@email.com')['customer_id'] == 'CUST000002'
+
+
+def test_delete_policy_updates_index(tmp_path):
+    """Silme depoya yazılır ve yeni snapshot'ın indeksi kaydırılmış satırları gösterir"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+
+    assert store.delete_policy('DP-2025-00000000') is True
+    assert store.delete_policy('DP-2025-00000000') is False
+
+    snapshot = store.snapshot()
+    assert snapshot.policy('DP-2025-00000000') is None
+    assert snapshot.policy('DP-2025-00000002')['building_id'] == 'BLD_000002'
+    assert list(snapshot.customer_buildings('CUST000001')['building_id']) == ['BLD_000002']
+    assert len(store.storage.read('buildings')) == 3
+
+
+def test_delete_policy_index_is_incremental(tmp_path, monkeypatch):
+    """Silme indeksi yeniden kurmaz: mezar taşlı indeks baştan kurulanla aynı sonucu verir"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+    store.snapshot().sorted_policies()
+
+    builds = []
+    original_build = PortfolioIndex.build.__func__
+    monkeypatch.setattr(PortfolioIndex, 'build',
+                        classmethod(lambda cls, *args: builds.append(1) or original_build(cls, *args)))
+
+    assert store.delete_policy('DP-2025-00000001') is True
+    assert store.delete_policy('DP-2025-00000000') is True
+    assert builds == []
+
+    snapshot = store.snapshot()
+    fresh = original_build(PortfolioIndex, snapshot.buildings, snapshot.customers)
+    index = snapshot.index
+    assert list(index.removed) == [0, 1]
+    for policy in ['DP-2025-00000000', 'DP-2025-00000001', 'DP-2025-00000002', 'DP-2025-00000003']:
+        assert index.policy_row(policy) == fresh.policy_row(policy)
+    for building in ['BLD_000000', 'BLD_000002', 'BLD_000003']:
+        assert index.building_row(building) == fresh.building_row(building)
+    for customer in ['CUST000001', 'CUST000002', 'CUST000003']:
+        assert list(index.building_rows_for_customer(customer)) == \
+            list(fresh.building_rows_for_customer(customer))
+    assert list(index.policy_positions(['DP-2025-00000003', 'DP-2025-00000001', 'X'])) == [1, -1, -1]
+    assert list(snapshot.sorted_policies()[1]) == [0, 1]
+
+    # Mezar taşı sınırı aşılınca baştan kurulur
+    monkeypatch.setattr(PortfolioIndex, 'TOMBSTONE_REBUILD_MIN', 0)
+    assert store.delete_policy('DP-2025-00000002') is True
+    assert builds == [1]
+    assert len(store.snapshot().index.removed) == 0
+    assert store.snapshot().policy('DP-2025-00000003')['building_id'] == 'BLD_000003'
+
+    # keys_changed=True ama anahtarlar aynı: indeks taşınır
+    before = store.snapshot()
+    updated = before.buildings.copy()
+    updated['monthly_premium_tl'] = 1.0
+    store.replace_buildings(updated)
+    assert store.snapshot().index is before.index
+    assert builds == [1]
+
+
+def test_replace_buildings_keeps_index(tmp_path):
+    """Anahtarlar değişmediğinde indeks yeniden kurulmaz"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+    before = store.snapshot()
+
+    updated = before.buildings.copy()
+    updated['monthly_premium_tl'] = updated['monthly_premium_tl'] * 2
+    store.replace_buildings(updated, keys_changed=False)
+
+    after = store.snapshot()
+    assert after.index is before.index
+    assert after.version > before.version
+    assert after.policy('DP-2025-00000003')['monthly_premium_tl'] == 800.0
+
+
+def test_keyset_pages_survive_delete_and_status_change(tmp_path):
+    """Cursor sayfaları policy_number sırasında ilerler; silme ve durum değişikliği sonrası tutarlıdır"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+
+    keys, rows = store.snapshot().sorted_policies()
+    start, stop = keyset_window(keys, decode_cursor(''), 2)
+    assert list(keys[start:stop]) == ['DP-2025-00000000', 'DP-2025-00000001']
+    cursor = encode_cursor(keys[stop - 1])
+
+    # Sayfalar arasında önceki sayfadan bir poliçe silinir: sonraki sayfa kaymaz
+    store.delete_policy('DP-2025-00000000')
+    snapshot = store.snapshot()
+    keys, rows = snapshot.sorted_policies()
+    start, stop = keyset_window(keys, decode_cursor(cursor), 2)
+    assert list(keys[start:stop]) == ['DP-2025-00000002', 'DP-2025-00000003']
+    assert list(snapshot.buildings['policy_number'].iloc[rows[start:stop]]) == list(keys[start:stop])
+
+    # En yeni önce (azalan) sayfa
+    start, stop = keyset_window(keys, None, 2, descending=True)
+    assert list(keys[start:stop][::-1]) == ['DP-2025-00000003', 'DP-2025-00000002']
+
+    # Durum filtreli görünüm yeni snapshot'ta yeniden kurulur
+    updated = snapshot.buildings.assign(policy_status=['Aktif', 'Pasif', 'Aktif'])
+    store.replace_buildings(updated, keys_changed=False)
+    assert list(store.snapshot().sorted_policies('Aktif')[0]) == ['DP-2025-00000001', 'DP-2025-00000003']
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor('%%%')
+
+
+def test_ranked_search_pages_use_score_and_policy_keyset(tmp_path):
+    """Arama cursor'ı (skor, policy_number) taşır: önceki sayfadan silme sonraki sayfayı kaydırmaz"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+
+    def search_page(after, limit):
+        snapshot = store.snapshot()
+        result = snapshot.policy_search.search('ali')
+        scores = np.asarray(result.scores, dtype=float)
+        keys = np.asarray(result.keys).astype(str)
+        order = ranked_order(scores, keys)
+        scores, keys = scores[order], keys[order]
+        start, stop = ranked_window(scores, keys, after, limit)
+        cursor = [float(scores[stop - 1]), str(keys[stop - 1])] if stop < len(keys) else None
+        return list(keys[start:stop]), cursor
+
+    page, cursor = search_page(None, 1)
+    assert page == ['DP-2025-00000000']
+    cursor = decode_cursor(encode_cursor(cursor))
+
+    store.delete_policy('DP-2025-00000000')
+    page, next_cursor = search_page(cursor, 1)
+    assert page == ['DP-2025-00000002'] and next_cursor is None
+
+    with pytest.raises(InvalidCursor):
+        ranked_window(np.zeros(1), np.array(['DP']), {'o': 1}, 1)
+
+
+def _rewrite_buildings_csv(data_dir: Path, rows: int):
+    """buildings.csv'yi dışarıdan yeniden yaz (ilk `rows` satır); mtime dizindeki her dosyadan yeni"""
+    csv_path = data_dir / 'buildings.csv'
+    pd.read_csv(csv_path, encoding='utf-8-sig').head(rows).to_csv(csv_path, index=False, encoding='utf-8-sig')
+    newest = max(path.stat().st_mtime_ns for path in data_dir.iterdir())
+    os.utime(csv_path, ns=(newest + 10**9, newest + 10**9))
+
+
+def test_snapshot_reloads_on_file_signature_and_data_version(tmp_path):
+    """Dosya imzası (mtime/size) ya da veri versiyonu değişince snapshot yenisiyle değişir"""
+    for backend in ('csv', 'sqlite'):
+        data_dir = tmp_path / backend
+        data_dir.mkdir()
+        _write_portfolio(data_dir)
+        store = PortfolioStore(str(data_dir), check_interval=0, storage=get_storage(str(data_dir), backend))
+        first = store.snapshot()
+        assert store.snapshot() is first  # değişiklik yok: yeniden yükleme yok
+
+        _rewrite_buildings_csv(data_dir, 2)
+        reloaded = store.snapshot()
+        assert reloaded is not first and reloaded.version > first.version
+        assert reloaded.building_count == 2 and reloaded.policy('DP-2025-00000003') is None
+        assert first.building_count == 4  # eski snapshot değişmez
+        assert store.snapshot() is reloaded
+
+        store.invalidate()
+        bumped = store.snapshot()
+        assert bumped is not reloaded and bumped.version > reloaded.version
+        assert bumped.building_count == 2
+
+    # İmza en fazla check_interval'da bir kontrol edilir; invalidate() beklemez
+    store = PortfolioStore(str(tmp_path / 'csv'), check_interval=60, storage=get_storage(str(tmp_path / 'csv'), 'csv'))
+    cached = store.snapshot()
+    store.snapshot()
+    _rewrite_buildings_csv(tmp_path / 'csv', 1)
+    assert store.snapshot() is cached
+    store.invalidate()
+    assert store.snapshot().building_count == 1
+
+
+def test_readers_keep_their_snapshot_while_reload_runs(tmp_path):
+    """Yeniden yükleme sürerken okuyucular eski snapshot'la beklemeden devam eder"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path), check_interval=60)
+    old = store.snapshot()
+    assert store.snapshot() is old
+
+    loading, release = threading.Event(), threading.Event()
+    original_load = store._load
+
+    def slow_load():
+        loading.set()
+        assert release.wait(10)
+        return original_load()
+
+    store._load = slow_load
+    reloaded, others = [], []
+    with store.pinned():
+        assert store.snapshot() is old
+        _rewrite_buildings_csv(tmp_path, 2)
+        store.invalidate()
+        reloader = threading.Thread(target=lambda: reloaded.append(store.snapshot()))
+        reloader.start()
+        assert loading.wait(5)
+
+        # Yükleme yarıda: sabitlenmiş okuyucu ve diğer istekler eski versiyonu görür
+        assert store.snapshot() is old and store.snapshot().policy('DP-2025-00000003') is not None
+        reader = threading.Thread(target=lambda: others.append(store.snapshot()))
+        reader.start()
+        reader.join(5)
+        assert others == [old] and not reloaded
+
+        release.set()
+        reloader.join(5)
+        new, = reloaded
+        assert new.building_count == 2 and new.version > old.version
+        assert store.snapshot() is old  # kapsam sonuna kadar sabit
+        assert store.version_info() == {'current': new.version, 'pinned': {old.version: 1}}
+
+    assert store.snapshot() is new
+    assert store.version_info()['pinned'] == {}
+
+
+def test_pinned_version_is_stable_and_released(tmp_path):
+    """Okuma kapsamı sabitlenen versiyonu görür; yazıcı en güncel versiyona yazar"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+
+    with store.pinned():
+        pinned = store.snapshot()
+        assert store.pinned_version() == pinned.version
+
+        # Başka bir thread (istek) yazar: bu kapsam eski versiyonu görmeye devam eder
+        writer = threading.Thread(target=store.delete_policy, args=('DP-2025-00000001',))
+        writer.start()
+        writer.join()
+        assert store.snapshot() is pinned
+        assert store.snapshot().policy('DP-2025-00000001') is not None
+        assert store.version_info() == {'current': pinned.version + 1, 'pinned': {pinned.version: 1}}
+
+        # Kendi yazısını görür (read-your-writes) ve pin yeni versiyona taşınır
+        published = store.update_buildings(
+            lambda snapshot: snapshot.buildings.assign(monthly_premium_tl=1.0), keys_changed=False)
+        assert store.snapshot() is published
+        assert published.building_count == 3
+        assert store.version_info()['pinned'] == {published.version: 1}
+
+    assert store.pinned_version() is None
+    assert store.version_info()['pinned'] == {}
+    assert store.snapshot().policy('DP-2025-00000001') is None
+
+
+def test_search_index_turkish_folding_and_ranking():
+    """Türkçe karakterler katlanır, kelimeler AND'lenir, tam eşleşme öne çıkar"""
+    frame = pd.DataFrame({
+        'policy_number': ['DP-1', 'DP-2', 'DP-3', 'DP-4'],
+        'owner_name': ['Ali Yılmaz', 'AYŞE KAYA', 'Kaya Ayşegül', 'İsmail Çelik'],
+    })
+    index = SearchIndex.build(frame, 'policy_number', {'policy_number': 2.0, 'owner_name': 1.0})
+
+    assert index.search('yil').keys == ['DP-1']
+    assert index.search('ISMAIL celik').keys == ['DP-4']
+    assert index.search('ayse').keys == ['DP-2', 'DP-3']
+    assert index.search('kaya ayşe').keys == ['DP-2', 'DP-3']
+    assert index.search('a').total == 3
+    assert index.search('xyz').total == 0
+
+    updated = index.remove(['DP-2']).upsert(pd.DataFrame({
+        'policy_number': ['DP-5'], 'owner_name': ['Ayşe Yıldız']}))
+    assert updated.search('ayse').keys == ['DP-5', 'DP-3']
+    assert 'DP-2' not in updated.search('kaya').keys
+    assert index.search('ayse').keys == ['DP-2', 'DP-3']  # eski snapshot değişmez
+
+
+def test_delete_policy_updates_search(tmp_path):
+    """Silinen poliçe ve son binası silinen müşteri aramadan düşer"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+    snapshot = store.snapshot()
+    assert snapshot.policy_search.search('kadikoy').keys == ['DP-2025-00000000', 'DP-2025-00000002']
+    assert snapshot.customer_search.search('mehmet').keys == ['CUST000003']
+
+    store.delete_policy('DP-2025-00000000')
+    store.delete_policy('DP-2025-00000003')
+    snapshot = store.snapshot()
+    assert snapshot.policy_search.search('kadıköy').keys == ['DP-2025-00000002']
+    assert snapshot.customer_search.search('yilmaz').keys == ['CUST000001']
+    assert snapshot.customer_search.search('mehmet').total == 0
+
+
+def test_parquet_storage_import_projection_export(tmp_path):
+    """CSV otomatik içe aktarılır, projeksiyon çalışır, dışa aktarma CSV üretir"""
+    pytest.importorskip('pyarrow')
+    _write_portfolio(tmp_path)
+    storage = ParquetStorage(str(tmp_path))
+
+    df = storage.read('buildings', columns=['policy_number', 'monthly_premium_tl'])
+    assert list(df.columns) == ['policy_number', 'monthly_premium_tl']
+    assert storage.path('buildings').exists()
+    assert storage.row_count('buildings') == 4
+
+    # CSV dışarıdan yeniden yazılırsa bir sonraki okumada içe aktarılır
+    time.sleep(0.01)
+    full = storage.read('buildings')
+    full.head(2).to_csv(tmp_path / 'buildings.csv', index=False, encoding='utf-8-sig')
+    assert len(storage.read('buildings')) == 2
+
+    storage.write('buildings', full)
+    assert storage.export_csv('buildings') == 4
+    assert len(pd.read_csv(tmp_path / 'buildings.csv')) == 4
+    assert len(storage.read('buildings')) == 4
+
+
+def test_sqlite_storage_indexed_row_writes(tmp_path):
+    """CSV tablo yokken içe aktarılır, silme/güncelleme indeksli satır yazımıdır"""
+    _write_portfolio(tmp_path)
+    storage = SqliteStorage(str(tmp_path))
+    store = PortfolioStore(str(tmp_path), storage=storage)
+    assert store.snapshot().building_count == 4
+
+    conn = sqlite3.connect(storage.db_path)
+    plan = conn.execute('EXPLAIN QUERY PLAN DELETE FROM buildings WHERE policy_number = ?',
+                        ('DP-2025-00000001',)).fetchall()
+    assert 'idx_building_policy' in str(plan)
+
+    assert store.delete_policy('DP-2025-00000001') is True
+    updated = store.snapshot().buildings.copy()
+    updated['ai_risk_score'] = [0.1, 0.2, 0.3]
+    store.replace_buildings(updated, keys_changed=False)
+
+    rows = conn.execute('SELECT policy_number, ai_risk_score FROM buildings ORDER BY rowid').fetchall()
+    assert rows == [('DP-2025-00000000', 0.1), ('DP-2025-00000002', 0.2), ('DP-2025-00000003', 0.3)]
+    conn.close()
+
+    # CSV dışa aktarma hedefi: ancak export ile güncellenir
+    assert len(pd.read_csv(tmp_path / 'buildings.csv')) == 4
+    assert storage.export_csv('buildings') == 3
+    assert list(pd.read_csv(tmp_path / 'buildings.csv')['ai_risk_score']) == [0.1, 0.2, 0.3]
+
+
+def test_sqlite_storage_reimports_rewritten_csv(tmp_path):
+    """Son yazımdan sonra yeniden yazılan CSV içe aktarılır, eski CSV satır değişikliklerini ezmez"""
+    _write_portfolio(tmp_path)
+    storage = SqliteStorage(str(tmp_path))
+    store = PortfolioStore(str(tmp_path), storage=storage)
+    assert store.delete_policy('DP-2025-00000001') is True
+
+    # CSV veritabanından eski: silinen poliçe geri gelmez
+    assert storage.row_count('buildings') == 3
+    assert 'DP-2025-00000001' not in set(storage.read('buildings')['policy_number'])
+
+    # CSV sonradan yeniden yazıldı (ör. veri üretici): CSV kazanır
+    csv_path = tmp_path / 'buildings.csv'
+    regenerated = pd.read_csv(csv_path, encoding='utf-8-sig').head(2)
+    regenerated.to_csv(csv_path, index=False, encoding='utf-8-sig')
+    newest = max(sig[0] for sig in storage.signature('buildings') if sig is not None)
+    os.utime(csv_path, ns=(newest + 10**9, newest + 10**9))
+    assert list(storage.read('buildings')['policy_number']) == ['DP-2025-00000000', 'DP-2025-00000001']
+    assert store.snapshot().building_count == 2
+
+    # Dışa aktarılan CSV tabloyla aynı içerik: tekrar içe aktarılmaz
+    assert storage.export_csv('buildings') == 2
+    assert storage._csv_is_newer('buildings') is False
+
+
+def test_mutation_log_row_writes_and_compaction(tmp_path):
+    """CSV backend: yazımlar günlüğe eklenir, okuyucular birleşik görür, sıkıştırıcı tabana işler"""
+    _write_portfolio(tmp_path)
+    storage = get_storage(str(tmp_path), backend='csv')
+    assert isinstance(storage, LoggedStorage)
+    store = PortfolioStore(str(tmp_path), storage=storage)
+
+    store.delete_policy('DP-2025-00000001')
+    updated = store.snapshot().buildings.copy()
+    updated.loc[2, 'monthly_premium_tl'] = 999.0
+    store.replace_buildings(updated, keys_changed=False)
+
+    # Taban CSV'ye dokunulmadı; günlükte 1 silme + sadece değişen 1 satır var
+    assert len(pd.read_csv(tmp_path / 'buildings.csv')) == 4
+    assert storage.pending_mutations('buildings') == 2
+    assert storage.row_count('buildings') == 3
+    fresh = PortfolioStore(str(tmp_path), storage=storage).snapshot()
+    assert fresh.policy('DP-2025-00000001') is None
+    assert fresh.policy('DP-2025-00000003')['monthly_premium_tl'] == 999.0
+    projected = storage.read('buildings', columns=['monthly_premium_tl'])
+    assert list(projected.columns) == ['monthly_premium_tl']
+    assert list(projected['monthly_premium_tl']) == [100.0, 300.0, 999.0]
+
+    before = store.snapshot()
+    store.start_compactor(interval=0.01)
+    deadline = time.time() + 5
+    while storage.pending_mutations('buildings') and time.time() < deadline:
+        time.sleep(0.01)
+    store.stop_compactor()
+
+    assert storage.pending_mutations('buildings') == 0
+    assert list(pd.read_csv(tmp_path / 'buildings.csv')['monthly_premium_tl']) == [100.0, 300.0, 999.0]
+    assert store.snapshot().index is before.index
+
+
+def test_mutation_log_upsert_torn_tail_and_stale_base(tmp_path):
+    """Upsert yerinde günceller/sona ekler; yarım satır ve farklı taban yok sayılır"""
+    log = MutationLog(tmp_path / 'buildings.mutations.jsonl')
+    base = pd.DataFrame({'policy_number': ['A', 'B'], 'premium': [1.0, 2.0]})
+    log.append([
+        {'op': 'upsert', 'key': 'C', 'values': {'policy_number': 'C', 'premium': 3.0}},
+        {'op': 'upsert', 'key': 'A', 'values': {'policy_number': 'A', 'premium': 10.0}},
+        {'op': 'update', 'key': 'B', 'values': {'premium': 20.0}},
+        {'op': 'delete', 'key': 'B'},
+        {'op': 'update', 'key': 'B', 'values': {'premium': 30.0}},
+    ], [[1, 2]])
+    with open(log.path, 'ab') as f:
+        f.write(b'{"op": "delete", "ke')
+
+    merged = MutationLog.apply(base, log.read([[1, 2]]), 'policy_number')
+    assert merged.to_dict('list') == {'policy_number': ['A', 'C'], 'premium': [10.0, 3.0]}
+    assert list(base['premium']) == [1.0, 2.0]
+
+    log.append([{'op': 'delete', 'key': 'A'}], [[1, 2]])
+    assert len(log.read([[1, 2]])) == 6
+    assert log.read([[9, 9]]) == []
+
+
+def test_typed_schema_round_trip(tmp_path):
+    """Okunan frame tiplidir; günlük ve sıkıştırma diske aynı metni yazar"""
+    _write_portfolio(tmp_path)
+    buildings = pd.read_csv(tmp_path / 'buildings.csv', encoding='utf-8-sig')
+    buildings['city'] = ['İstanbul', 'Ankara', 'İstanbul', 'Ankara']
+    buildings['floors'] = [3, 5, 8, 2]
+    buildings['policy_start_date'] = ['2025-01-01', '2025-02-01', '', '2025-04-01']
+    buildings['created_at'] = ['2025-01-01 10:00:00'] * 4
+    buildings.to_csv(tmp_path / 'buildings.csv', index=False, encoding='utf-8-sig')
+    storage = get_storage(str(tmp_path), backend='csv')
+    store = PortfolioStore(str(tmp_path), storage=storage)
+
+    snapshot = store.snapshot()
+    assert isinstance(snapshot.buildings['city'].dtype, pd.CategoricalDtype)
+    assert snapshot.buildings['floors'].dtype == 'int32'
+    assert snapshot.buildings['policy_start_date'].dtype == 'datetime64[ns]'
+    assert pd.isna(snapshot.buildings['policy_start_date'][2])
+    assert typed_frame(snapshot.buildings, 'buildings') is snapshot.buildings
+
+    # Yeni kategori ve tarih değeri günlükten tipli frame'e uygulanır
+    def relocate(current):
+        updated = current.buildings.copy()
+        updated['city'] = updated['city'].cat.add_categories(['Bursa'])
+        updated.loc[1, 'city'] = 'Bursa'
+        updated.loc[1, 'policy_start_date'] = pd.Timestamp('2025-03-15')
+        return updated
+
+    store.update_buildings(relocate, keys_changed=False)
+    assert storage.pending_mutations('buildings') == 1
+    fresh = PortfolioStore(str(tmp_path), storage=storage).snapshot()
+    assert fresh.policy('DP-2025-00000001')['city'] == 'Bursa'
+    assert isinstance(fresh.buildings['city'].dtype, pd.CategoricalDtype)
+    assert fresh.buildings['policy_start_date'][1] == pd.Timestamp('2025-03-15')
+
+    store.compact()
+    raw = pd.read_csv(tmp_path / 'buildings.csv', encoding='utf-8-sig', dtype=str, keep_default_na=False)
+    assert list(raw['policy_start_date']) == ['2025-01-01', '2025-03-15', '', '2025-04-01']
+    assert list(raw['created_at']) == ['2025-01-01 10:00:00'] * 4
+    assert list(raw['floors']) == ['3', '5', '8', '2']
+
+
+def test_customer_aggregates_incremental_matches_rebuild(tmp_path):
+    """Silme ve prim güncellemesi sonrası artımlı özet, baştan kurulumla aynıdır"""
+    _write_portfolio(tmp_path)
+    buildings = pd.read_csv(tmp_path / 'buildings.csv', encoding='utf-8-sig')
+    buildings['annual_premium_tl'] = [200.0, 200.0, 300.0, 400.0]
+    buildings['policy_status'] = ['Aktif', 'Aktif', 'Pasif', 'Aktif']
+    buildings.to_csv(tmp_path / 'buildings.csv', index=False, encoding='utf-8-sig')
+    store = PortfolioStore(str(tmp_path))
+    summary = store.snapshot().customer_aggregates.get('CUST000001')
+    assert summary['building_count'] == 2
+    assert summary['total_premium'] == 500.0
+    assert summary['active_policy_count'] == 1
+    assert summary['owner_name'] == 'Ali Yılmaz'
+
+    store.delete_policy('DP-2025-00000000')
+    store.delete_policy('DP-2025-00000003')
+    updated = store.snapshot().buildings.copy()
+    updated.loc[0, 'annual_premium_tl'] = 1234.5
+    store.replace_buildings(updated, keys_changed=False)
+
+    snapshot = store.snapshot()
+    rebuilt = CustomerAggregates.build(snapshot.buildings)
+    # Artımlı güncellemede müşteri listedeki yerini korur; içerik aynı olmalı
+    pd.testing.assert_frame_equal(snapshot.customer_aggregates.frame.sort_index(),
+                                  rebuilt.frame.sort_index(), check_dtype=False)
+    assert snapshot.customer_aggregates.get('CUST000001')['building_id'] == 'BLD_000002'
+    assert snapshot.customer_aggregates.get('CUST000003') is None
+    assert snapshot.customer_aggregates.get('CUST000002')['total_premium'] == 1234.5
+
+
+def test_cold_snapshot_load_is_single_flight(tmp_path):
+    """Aynı anda gelen istekler arasında snapshot (ve özetler) bir kez kurulur"""
+    _write_portfolio(tmp_path)
+    store = PortfolioStore(str(tmp_path))
+    loads = []
+    original_load = store._load
+
+    def counting_load():
+        loads.append(1)
+        time.sleep(0.05)
+        return original_load()
+
+    store._load = counting_load
+    barrier = threading.Barrier(8)
+    snapshots = []
+
+    def reader():
+        barrier.wait()
+        snapshots.append(store.snapshot())
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)